@@ -0,0 +1,67 @@
+"""
+Per-step LLM overhead: building ChatOpenAI + trustcall extractor on every node
+call (old behaviour) vs. reusing them from AgentRuntime.
+
+    python -m benchmarks.bench_agent_runtime --steps 50
+"""
+import argparse
+import logging
+import statistics
+import time
+
+from langchain_openai import ChatOpenAI
+from trustcall import create_extractor
+
+from benchmarks.stub_openai import StubOpenAIServer
+from src.agent.navigator import Decision, FileRelevance
+from src.agent.runtime import AgentRuntime
+
+PROMPT = "Pick the next item for query 'quarterly report' from: Work/, Personal/, report.pdf"
+
+
+def per_call(base_url: str, tool):
+    llm = ChatOpenAI(model="stub", openai_api_key="stub", openai_api_base=base_url, temperature=0)
+    extractor = create_extractor(llm, tools=[tool], tool_choice=tool.__name__)
+    return extractor.invoke(input=PROMPT)
+
+
+def pooled(runtime: AgentRuntime, tool):
+    return runtime.extractor(tool).invoke(input=PROMPT)
+
+
+def measure(fn, steps: int):
+    timings = []
+    for i in range(steps):
+        tool = Decision if i % 2 == 0 else FileRelevance
+        start = time.perf_counter()
+        fn(tool)
+        timings.append((time.perf_counter() - start) * 1000)
+    return timings
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--steps", type=int, default=50)
+    args = parser.parse_args()
+    for name in ("httpx", "httpx2"):
+        logging.getLogger(name).setLevel(logging.WARNING)
+
+    with StubOpenAIServer() as stub:
+        runtime = AgentRuntime(model="stub", api_key="stub", base_url=stub.base_url)
+        # Warm imports / first connection for both variants.
+        per_call(stub.base_url, Decision)
+        pooled(runtime, Decision)
+
+        rows = [
+            ("per-call client+extractor", measure(lambda t: per_call(stub.base_url, t), args.steps)),
+            ("AgentRuntime (pooled)", measure(lambda t: pooled(runtime, t), args.steps)),
+        ]
+
+    print(f"{'variant':<28}{'mean ms':>10}{'p50 ms':>10}{'p95 ms':>10}")
+    for name, t in rows:
+        p95 = sorted(t)[int(len(t) * 0.95) - 1]
+        print(f"{name:<28}{statistics.mean(t):>10.2f}{statistics.median(t):>10.2f}{p95:>10.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,75 @@
+"""
+Single-path vs. beam navigation over a synthetic drive with a scripted,
+occasionally wrong LLM and simulated Graph / LLM latencies.
+
+    python -m benchmarks.bench_beam_navigation --queries 20 --error-rate 0.3
+"""
+import argparse
+import logging
+import random
+import statistics
+import time
+
+from benchmarks.synthetic import FakeDrive, ScriptedRuntime, deepest_files, make_tree, noisy_oracle
+from src.agent.beam import BeamState, build_beam_graph
+from src.agent.navigator import AgentState, build_agent_graph
+
+
+def query_for(item) -> str:
+    stem = item["name"].rsplit(".", 1)[0]
+    return f"find the {stem.replace('_', ' ')} document"
+
+
+def run(graph, state, drive, runtime):
+    start = time.perf_counter()
+    final = graph.invoke(
+        state,
+        config={"configurable": {"graph_client": drive, "runtime": runtime}, "recursion_limit": 100},
+    )
+    return final, time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--queries", type=int, default=20)
+    parser.add_argument("--depth", type=int, default=3)
+    parser.add_argument("--branching", type=int, default=6)
+    parser.add_argument("--beam-width", type=int, default=3)
+    parser.add_argument("--error-rate", type=float, default=0.3)
+    parser.add_argument("--graph-latency", type=float, default=0.05)
+    parser.add_argument("--llm-latency", type=float, default=0.2)
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args()
+    logging.disable(logging.INFO)
+
+    tree = make_tree(depth=args.depth, branching=args.branching, seed=args.seed)
+    targets = random.Random(args.seed).sample(deepest_files(tree), args.queries)
+    modes = {
+        "single-path": (build_agent_graph(), lambda q: AgentState(user_query=q, max_attempts=args.depth + 3)),
+        f"beam (k={args.beam_width})": (
+            build_beam_graph(),
+            lambda q: BeamState(user_query=q, beam_width=args.beam_width, max_depth=args.depth + 1),
+        ),
+    }
+
+    print(f"tree depth={args.depth} branching={args.branching}; LLM error rate {args.error_rate}; "
+          f"latency graph={args.graph_latency}s llm={args.llm_latency}s")
+    print(f"{'mode':<14}{'success':>9}{'mean s':>9}{'p50 s':>8}{'LLM calls':>11}{'listings':>10}")
+    for mode, (graph, make_state) in modes.items():
+        wins, times, llm_calls, listings = 0, [], 0, 0
+        for target in targets:
+            drive = FakeDrive(tree, latency=args.graph_latency)
+            runtime = ScriptedRuntime(noisy_oracle(tree, target, args.error_rate, args.seed), args.llm_latency)
+            final, elapsed = run(graph, make_state(query_for(target)), drive, runtime)
+            found = final.get("current_file")
+            wins += bool(final.get("verified") and found and found.id == target["id"])
+            times.append(elapsed)
+            llm_calls += runtime.calls
+            listings += drive.calls
+        n = len(targets)
+        print(f"{mode:<14}{wins / n:>8.0%}{statistics.mean(times):>9.2f}{statistics.median(times):>8.2f}"
+              f"{llm_calls / n:>11.1f}{listings / n:>10.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,82 @@
+"""
+Checkpoint cost per step of the navigation graph on the SQLite saver: write
+latency and bytes stored (per-channel deltas) vs. a full state snapshot.
+
+    python -m benchmarks.bench_checkpoint --queries 10
+"""
+import argparse
+import logging
+import os
+import random
+import statistics
+import tempfile
+import time
+
+from benchmarks.synthetic import FakeDrive, ScriptedRuntime, deepest_files, make_tree, noisy_oracle
+from src.agent.checkpoint import SqliteCheckpointSaver
+from src.agent.navigator import AgentState, build_agent_graph
+
+
+class TimedSaver(SqliteCheckpointSaver):
+    """Records put/put_writes latency and delta vs. snapshot sizes."""
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.put_ms, self.writes_ms, self.delta_bytes, self.snapshot_bytes = [], [], [], []
+
+    def put(self, config, checkpoint, metadata, new_versions):
+        values = checkpoint["channel_values"]
+        self.delta_bytes.append(sum(len(self.serde.dumps_typed(values[k])[1]) for k in new_versions if k in values))
+        self.snapshot_bytes.append(len(self.serde.dumps_typed(values)[1]))
+        start = time.perf_counter()
+        result = super().put(config, checkpoint, metadata, new_versions)
+        self.put_ms.append((time.perf_counter() - start) * 1000)
+        return result
+
+    def put_writes(self, config, writes, task_id, task_path=""):
+        start = time.perf_counter()
+        super().put_writes(config, writes, task_id, task_path)
+        self.writes_ms.append((time.perf_counter() - start) * 1000)
+
+
+def p95(values):
+    return sorted(values)[int(len(values) * 0.95)]
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--queries", type=int, default=10)
+    parser.add_argument("--depth", type=int, default=4)
+    parser.add_argument("--branching", type=int, default=6)
+    parser.add_argument("--files-per-folder", type=int, default=40)
+    parser.add_argument("--seed", type=int, default=11)
+    args = parser.parse_args()
+    logging.disable(logging.WARNING)
+
+    tree = make_tree(depth=args.depth, branching=args.branching, files_per_folder=args.files_per_folder, seed=args.seed)
+    targets = random.Random(args.seed).sample(deepest_files(tree), args.queries)
+    with tempfile.TemporaryDirectory() as tmp:
+        saver = TimedSaver(os.path.join(tmp, "checkpoints.db"))
+        graph = build_agent_graph(checkpointer=saver)
+        for n, target in enumerate(targets):
+            query = "find the " + target["name"].rsplit(".", 1)[0].replace("_", " ")
+            graph.invoke(
+                AgentState(user_query=query, max_attempts=args.depth + 3),
+                config={"configurable": {
+                    "thread_id": f"q{n}",
+                    "graph_client": FakeDrive(tree),
+                    "runtime": ScriptedRuntime(noisy_oracle(tree, target, error_rate=0.0)),
+                }},
+            )
+        saver.close()
+        db_bytes = sum(os.path.getsize(os.path.join(tmp, f)) for f in os.listdir(tmp))
+
+    steps = len(saver.put_ms)
+    print(f"{args.queries} runs, {steps} checkpoints, {args.files_per_folder} files + {args.branching} folders per listing")
+    print(f"put        mean {statistics.mean(saver.put_ms):.2f} ms  p95 {p95(saver.put_ms):.2f} ms")
+    print(f"put_writes mean {statistics.mean(saver.writes_ms):.2f} ms  p95 {p95(saver.writes_ms):.2f} ms")
+    print(f"bytes/step delta {statistics.mean(saver.delta_bytes):,.0f}  full snapshot {statistics.mean(saver.snapshot_bytes):,.0f}")
+    print(f"database on disk {db_bytes / 1024:,.0f} KiB")
+
+
+if __name__ == "__main__":
+    main()
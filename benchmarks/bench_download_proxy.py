@@ -0,0 +1,94 @@
+"""
+Proxying a large file through GET /drive/items/{id}/content: peak Python
+memory and time to first chunk of the streaming proxy vs. buffering the file
+the way GraphClient.download_file does.
+
+    python -m benchmarks.bench_download_proxy --mib 256
+"""
+import argparse
+import asyncio
+import time
+import tracemalloc
+
+import src.main as main
+from src.utils.search_cache import SearchCache
+
+
+class FakeUpstream:
+    """Download URL response producing `size` bytes in network-sized reads."""
+    status_code = 200
+
+    def __init__(self, size: int):
+        self.size = size
+        self.headers = {"Content-Length": str(size), "Content-Type": "application/octet-stream"}
+
+    def iter_content(self, chunk_size):
+        block = b"x" * chunk_size
+        sent = 0
+        while sent < self.size:
+            n = min(chunk_size, self.size - sent)
+            sent += n
+            yield block[:n] if n < chunk_size else block
+
+    @property
+    def content(self):
+        return b"".join(self.iter_content(65536))
+
+    def close(self):
+        pass
+
+
+class FakeClient:
+    def __init__(self, size: int):
+        self.size = size
+
+    def get_download_info(self, item_id):
+        return {"id": item_id, "name": "big.bin", "@microsoft.graph.downloadUrl": "https://dl/big"}
+
+    def open_download(self, url, headers=None):
+        return FakeUpstream(self.size)
+
+
+class _Request:
+    headers = {}
+
+
+async def measure(chunks):
+    tracemalloc.start()
+    start = time.perf_counter()
+    first = None
+    total = 0
+    async for chunk in chunks:
+        if first is None:
+            first = time.perf_counter() - start
+        total += len(chunk)
+    elapsed = time.perf_counter() - start
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return first, elapsed, peak, total
+
+
+def main_():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--mib", type=int, default=256)
+    args = parser.parse_args()
+    size = args.mib * 2**20
+    main.graph = lambda: FakeClient(size)
+    main.download_cache = SearchCache(ttl=300, negative_ttl=0)
+
+    async def buffered():
+        yield FakeUpstream(size).content
+
+    def streamed():
+        return main.item_content("BIG", _Request(), redirect=False).body_iterator
+
+    print(f"{args.mib} MiB file")
+    print(f"{'mode':>10}{'first chunk ms':>16}{'total s':>9}{'peak MiB':>10}")
+    for label, chunks in (("buffered", buffered), ("streamed", streamed)):
+        first, elapsed, peak, total = asyncio.run(measure(chunks()))
+        assert total == size
+        print(f"{label:>10}{first * 1000:>16.1f}{elapsed:>9.2f}{peak / 2**20:>10.1f}")
+
+
+if __name__ == "__main__":
+    main_()
@@ -0,0 +1,75 @@
+"""
+Burst of agent jobs against the bounded job queue with a fake agent run:
+peak concurrent runs (what the LLM and Graph backends see), admissions vs.
+429 rejections, and queue wait times.
+
+    python -m benchmarks.bench_jobs --jobs 300 --users 12
+"""
+import argparse
+import random
+import threading
+import time
+
+from src.agent.jobs import JobQueue, QueueFull
+
+
+class FakeAgentRun:
+    """Sleeps like an agent run and tracks peak concurrency overall and per user."""
+    def __init__(self, seconds: float):
+        self.seconds = seconds
+        self.active = 0
+        self.peak = 0
+        self.per_user = {}
+        self.peak_per_user = 0
+        self._lock = threading.Lock()
+
+    def __call__(self, job):
+        with self._lock:
+            self.active += 1
+            self.per_user[job.user] = self.per_user.get(job.user, 0) + 1
+            self.peak = max(self.peak, self.active)
+            self.peak_per_user = max(self.peak_per_user, self.per_user[job.user])
+        time.sleep(self.seconds * random.uniform(0.5, 1.5))
+        with self._lock:
+            self.active -= 1
+            self.per_user[job.user] -= 1
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--jobs", type=int, default=300)
+    parser.add_argument("--users", type=int, default=12)
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--max-queued", type=int, default=50)
+    parser.add_argument("--per-user", type=int, default=2)
+    parser.add_argument("--run-seconds", type=float, default=0.05)
+    parser.add_argument("--interval", type=float, default=0.002, help="seconds between submissions")
+    args = parser.parse_args()
+    random.seed(0)
+
+    run = FakeAgentRun(args.run_seconds)
+    queue = JobQueue(run, workers=args.workers, max_queued=args.max_queued, per_user=args.per_user)
+    accepted, retry_after = 0, []
+    start = time.perf_counter()
+    for n in range(args.jobs):
+        try:
+            queue.submit(f"user{n % args.users}", n, priority=random.choice((0, 0, 0, 5)))
+            accepted += 1
+        except QueueFull as e:
+            retry_after.append(e.retry_after)
+        time.sleep(args.interval)
+    while queue.metrics()["completed"] < accepted:
+        time.sleep(0.01)
+    elapsed = time.perf_counter() - start
+    queue.shutdown()
+
+    m = queue.metrics()
+    print(f"{args.jobs} jobs from {args.users} users, {args.workers} workers, queue bound {args.max_queued}")
+    print(f"accepted {accepted}  rejected {m['rejected']}  retry-after {min(retry_after, default=0)}-{max(retry_after, default=0)} s")
+    print(f"peak concurrent runs {run.peak} (bound {args.workers}), peak per user {run.peak_per_user} (cap {args.per_user})")
+    print(f"wait p50 {m['wait_p50_s'] * 1000:.0f} ms  p95 {m['wait_p95_s'] * 1000:.0f} ms  "
+          f"run mean {m['run_mean_s'] * 1000:.0f} ms  wall {elapsed:.2f} s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,105 @@
+"""
+Listing a 50k-item folder: buffered JSON (list_folder + one response body)
+vs. the NDJSON stream written page by page. Reports time to first byte,
+total time and peak Python memory while producing the body.
+
+    python -m benchmarks.bench_listing_stream --items 50000
+"""
+import argparse
+import json
+import time
+import tracemalloc
+from pathlib import Path
+
+from src.clients.oneDriveHelper import GraphClient
+
+FIXTURE = Path(__file__).resolve().parent.parent / "testgraph.json"
+
+
+class _Response:
+    status_code = 200
+
+    def __init__(self, payload):
+        self._payload = payload
+
+    def raise_for_status(self):
+        pass
+
+    def json(self):
+        return self._payload
+
+
+class PagedDrive:
+    """requests.Session stand-in serving a big folder in pages, with per-page latency."""
+    def __init__(self, total: int, page_size: int, latency: float):
+        self.template = json.loads(FIXTURE.read_text())["value"][0]
+        self.total = total
+        self.page_size = page_size
+        self.latency = latency
+
+    def get(self, url, params=None, timeout=None):
+        time.sleep(self.latency)
+        # Like Graph, the nextLink carries the query options of the first request.
+        query = dict(p.split("=", 1) for p in url.split("?", 1)[1].split("&")) if "?" in url else {}
+        query.update(params or {})
+        page = int(query.get("page", 0))
+        start = page * self.page_size
+        fields = query["$select"].split(",") if "$select" in query else None
+        value = []
+        for i in range(start, min(start + self.page_size, self.total)):
+            item = dict(self.template, id=f"ITEM!{i}", name=f"file_{i}.pdf")
+            value.append({k: item[k] for k in fields if k in item} if fields else item)
+        payload = {"value": value}
+        if start + self.page_size < self.total:
+            select = f"$select={query['$select']}&" if "$select" in query else ""
+            payload["@odata.nextLink"] = f"https://graph/next?{select}page={page + 1}"
+        return _Response(payload)
+
+
+def measure(produce):
+    tracemalloc.start()
+    start = time.perf_counter()
+    first = None
+    size = 0
+    for chunk in produce():
+        if first is None:
+            first = time.perf_counter() - start
+        size += len(chunk)
+    total = time.perf_counter() - start
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return first, total, peak, size
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--items", type=int, default=50_000)
+    parser.add_argument("--page-size", type=int, default=200)
+    parser.add_argument("--latency", type=float, default=0.002, help="seconds per Graph page")
+    args = parser.parse_args()
+
+    client = GraphClient("token")
+    client.session = PagedDrive(args.items, args.page_size, args.latency)
+
+    def buffered():
+        yield json.dumps(client.list_folder("BIG"))
+
+    def streamed(select=None):
+        def produce():
+            for page in client.iter_children("BIG", select=select, page_size=args.page_size):
+                yield "".join(json.dumps(item) + "\n" for item in page)
+        return produce
+
+    print(f"{args.items} items, {args.page_size}/page, {args.latency * 1000:.0f} ms/page")
+    print(f"{'mode':>18}{'first byte ms':>15}{'total s':>9}{'peak MiB':>10}{'body MiB':>10}")
+    for label, produce in (
+        ("buffered json", buffered),
+        ("ndjson stream", streamed()),
+        ("ndjson $select", streamed(["id", "name", "size"])),
+    ):
+        first, total, peak, size = measure(produce)
+        print(f"{label:>18}{first * 1000:>15.1f}{total:>9.2f}{peak / 2**20:>10.1f}{size / 2**20:>10.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,57 @@
+"""
+Structured LLM calls through AgentRuntime against a stub server with simulated
+model latency: first run (cache cold) vs. repeated run (cache warm), with the
+cache reopened from disk in between.
+
+    python -m benchmarks.bench_llm_cache --prompts 40 --latency 0.3
+"""
+import argparse
+import logging
+import os
+import statistics
+import tempfile
+import time
+
+from benchmarks.stub_openai import StubOpenAIServer
+from src.agent.llm_cache import LLMCache
+from src.agent.navigator import Decision, FileRelevance
+from src.agent.runtime import AgentRuntime
+
+
+def run(base_url: str, cache: LLMCache, prompts):
+    runtime = AgentRuntime(model="stub", api_key="stub", base_url=base_url, cache=cache)
+    timings = []
+    for i, prompt in enumerate(prompts):
+        tool = Decision if i % 2 == 0 else FileRelevance
+        start = time.perf_counter()
+        runtime.extractor(tool).invoke(input=prompt)
+        timings.append((time.perf_counter() - start) * 1000)
+    runtime.close()
+    return timings
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--prompts", type=int, default=40)
+    parser.add_argument("--latency", type=float, default=0.3)
+    args = parser.parse_args()
+    for name in ("httpx", "httpx2"):
+        logging.getLogger(name).setLevel(logging.WARNING)
+
+    prompts = [f"User query: report {i}\nContents:\nc1\tF\treport_{i}.pdf\t12 KB\t2025-06-01" for i in range(args.prompts)]
+    with tempfile.TemporaryDirectory() as tmp, StubOpenAIServer(latency=args.latency) as stub:
+        db_path = os.path.join(tmp, "llm_cache.db")
+        cold = run(stub.base_url, LLMCache(db_path), prompts)
+        cold_requests = stub.requests
+        warm = run(stub.base_url, LLMCache(db_path), prompts)
+        warm_requests = stub.requests - cold_requests
+
+    print(f"{args.prompts} prompts, model latency {args.latency * 1000:.0f} ms")
+    print(f"{'run':<6}{'mean ms':>9}{'p50 ms':>9}{'max ms':>9}{'LLM requests':>14}")
+    for name, timings, requests in (("cold", cold, cold_requests), ("warm", warm, warm_requests)):
+        print(f"{name:<6}{statistics.mean(timings):>9.2f}{statistics.median(timings):>9.2f}"
+              f"{max(timings):>9.2f}{requests:>14}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,57 @@
+"""
+First vs. repeated queries with cross-run navigation memory (SQLite store).
+
+    python -m benchmarks.bench_memory --queries 10
+"""
+import argparse
+import logging
+import random
+import statistics
+import time
+
+from benchmarks.synthetic import FakeDrive, ScriptedRuntime, deepest_files, make_tree, noisy_oracle
+from src.agent.navigator import AgentState, build_agent_graph
+from src.agent.store import SqliteStore
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--queries", type=int, default=10)
+    parser.add_argument("--depth", type=int, default=3)
+    parser.add_argument("--branching", type=int, default=5)
+    parser.add_argument("--graph-latency", type=float, default=0.1)
+    parser.add_argument("--llm-latency", type=float, default=0.3)
+    parser.add_argument("--seed", type=int, default=9)
+    args = parser.parse_args()
+    logging.disable(logging.INFO)
+
+    tree = make_tree(depth=args.depth, branching=args.branching, seed=args.seed)
+    targets = random.Random(args.seed).sample(deepest_files(tree), args.queries)
+    graph = build_agent_graph(store=SqliteStore())
+
+    print(f"depth={args.depth} branching={args.branching}; graph={args.graph_latency}s llm={args.llm_latency}s")
+    print(f"{'pass':<8}{'success':>9}{'mean s':>9}{'nav steps':>11}{'LLM calls':>11}{'Graph calls':>13}")
+    for label in ("first", "repeat"):
+        wins, times, steps, llm_calls, graph_calls = 0, [], 0, 0, 0
+        for target in targets:
+            drive = FakeDrive(tree, latency=args.graph_latency)
+            runtime = ScriptedRuntime(noisy_oracle(tree, target, error_rate=0.0), args.llm_latency)
+            query = "find the " + target["name"].rsplit(".", 1)[0].replace("_", " ")
+            start = time.perf_counter()
+            final = graph.invoke(
+                AgentState(user_query=query, max_attempts=args.depth + 3),
+                config={"configurable": {"graph_client": drive, "runtime": runtime}},
+            )
+            times.append(time.perf_counter() - start)
+            found = final.get("current_file")
+            wins += bool(final.get("verified") and found and found.id == target["id"])
+            steps += len(final["decision_trace"])
+            llm_calls += runtime.calls
+            graph_calls += drive.calls
+        n = len(targets)
+        print(f"{label:<8}{wins / n:>8.0%}{statistics.mean(times):>9.2f}{steps / n:>11.1f}"
+              f"{llm_calls / n:>11.1f}{graph_calls / n:>13.1f}")
+
+
+if __name__ == "__main__":
+    main()
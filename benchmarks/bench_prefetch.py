@@ -0,0 +1,61 @@
+"""
+Per-level navigation latency with and without speculative subfolder prefetch.
+
+    python -m benchmarks.bench_prefetch --queries 10
+"""
+import argparse
+import logging
+import random
+import statistics
+import time
+
+from benchmarks.synthetic import FakeDrive, ScriptedRuntime, deepest_files, make_tree, noisy_oracle
+from src.agent import navigator
+from src.agent.navigator import AgentState, build_agent_graph
+from src.agent.prefetch import ListingPrefetcher
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--queries", type=int, default=10)
+    parser.add_argument("--depth", type=int, default=3)
+    parser.add_argument("--branching", type=int, default=4)
+    parser.add_argument("--graph-latency", type=float, default=0.2)
+    parser.add_argument("--llm-latency", type=float, default=0.3)
+    parser.add_argument("--seed", type=int, default=3)
+    args = parser.parse_args()
+    logging.disable(logging.INFO)
+
+    tree = make_tree(depth=args.depth, branching=args.branching, seed=args.seed)
+    targets = random.Random(args.seed).sample(deepest_files(tree), args.queries)
+    graph = build_agent_graph()
+
+    print(f"depth={args.depth} branching={args.branching}; graph={args.graph_latency}s llm={args.llm_latency}s")
+    print(f"{'variant':<22}{'s/level':>9}{'hit rate':>10}{'listings':>10}")
+    for label, width in (("no prefetch", 0), ("prefetch width=2", 2), (f"prefetch width={args.branching}", args.branching)):
+        navigator.PREFETCH_WIDTH = width
+        per_level, hits, lookups, listings = [], 0, 0, 0
+        for target in targets:
+            drive = FakeDrive(tree, latency=args.graph_latency)
+            runtime = ScriptedRuntime(noisy_oracle(tree, target, error_rate=0.0), args.llm_latency)
+            prefetcher = ListingPrefetcher(drive) if width else None
+            state = AgentState(user_query=f"find {target['name'].rsplit('.', 1)[0]}", max_attempts=args.depth + 3)
+            configurable = {"graph_client": drive, "runtime": runtime, "prefetcher": prefetcher}
+
+            start = time.perf_counter()
+            final = graph.invoke(state, config={"configurable": configurable})
+            elapsed = time.perf_counter() - start
+            if prefetcher is not None:
+                prefetcher.close()
+                hits += prefetcher.hits
+                lookups += prefetcher.hits + prefetcher.misses
+            levels = len(final["decision_trace"])
+            # Exclude the verification step (download + one LLM call) from per-level time.
+            per_level.append((elapsed - args.graph_latency - args.llm_latency) / levels)
+            listings += drive.calls
+        hit_rate = f"{hits / lookups:.0%}" if lookups else "-"
+        print(f"{label:<22}{statistics.mean(per_level):>9.3f}{hit_rate:>10}{listings / len(targets):>10.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,76 @@
+"""
+Cost of the profiling hooks: per-request overhead of SlowRequestMiddleware
+while capture is off and on, and how much a running sampler slows a
+CPU-bound workload at a few sampling intervals.
+
+    python -m benchmarks.bench_profiling --requests 50000
+"""
+import argparse
+import asyncio
+import time
+
+from src.utils.profiling import SlowRequestCapture, SlowRequestMiddleware, StackSampler
+
+SCOPE = {"type": "http", "method": "GET", "path": "/drive/root"}
+
+
+async def endpoint(scope, receive, send):
+    await send({"type": "http.response.start", "status": 200, "headers": []})
+    await send({"type": "http.response.body", "body": b"{}"})
+
+
+async def receive():
+    return {"type": "http.request", "body": b""}
+
+
+async def send(message):
+    pass
+
+
+def per_request_us(app, requests: int) -> float:
+    async def loop():
+        start = time.perf_counter()
+        for _ in range(requests):
+            await app(SCOPE, receive, send)
+        return time.perf_counter() - start
+    return asyncio.run(loop()) / requests * 1e6
+
+
+def workload_ms(rounds: int = 300) -> float:
+    start = time.perf_counter()
+    for _ in range(rounds):
+        sorted(str(i) for i in range(2000))
+    return (time.perf_counter() - start) * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--requests", type=int, default=50000)
+    args = parser.parse_args()
+
+    bare = per_request_us(endpoint, args.requests)
+    print(f"{'middleware':>28}{'us/request':>12}{'overhead':>10}")
+    print(f"{'none':>28}{bare:>12.2f}{'':>10}")
+    for label, threshold in (("capture off", 0), ("capture on (never slow)", 10_000), ("capture on (always slow)", 0.0001)):
+        capture = SlowRequestCapture(threshold)
+        try:
+            us = per_request_us(SlowRequestMiddleware(endpoint, capture), args.requests)
+        finally:
+            capture.configure(0)
+        print(f"{label:>28}{us:>12.2f}{us - bare:>+10.2f}")
+
+    base = min(workload_ms() for _ in range(5))
+    print(f"\n{'sampler interval':>28}{'workload ms':>12}{'slowdown':>10}")
+    print(f"{'off':>28}{base:>12.1f}{'':>10}")
+    for interval in (0.01, 0.005, 0.001):
+        sampler = StackSampler(interval)
+        sampler.start()
+        try:
+            ms = min(workload_ms() for _ in range(5))
+        finally:
+            sampler.stop()
+        print(f"{f'{interval * 1000:g} ms':>28}{ms:>12.1f}{ms / base - 1:>+10.1%}")
+
+
+if __name__ == "__main__":
+    main()
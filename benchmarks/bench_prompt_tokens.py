@@ -0,0 +1,73 @@
+"""
+Decision prompt size for folders of increasing size: the previous listing
+(Python repr of every child incl. the full driveItem JSON) vs. the compact,
+token-budgeted TSV encoding.
+
+    python -m benchmarks.bench_prompt_tokens
+"""
+import json
+import time
+from pathlib import Path
+
+from src.agent.candidates import encode_candidates, estimate_tokens
+from src.agent.navigator import AgentState, PROMPT_TOKEN_BUDGET, build_decision_prompt, to_candidate
+
+FIXTURE = Path(__file__).resolve().parent.parent / "testgraph.json"
+PAYLOADS = {}
+
+
+def token_counter():
+    """tiktoken when its encoding is available locally, else the built-in estimate."""
+    try:
+        import tiktoken
+        enc = tiktoken.get_encoding("cl100k_base")
+        return "tiktoken/cl100k_base", lambda s: len(enc.encode(s))
+    except Exception:
+        return "estimate (chars/4)", estimate_tokens
+
+
+def synthetic_folder(n: int):
+    templates = json.loads(FIXTURE.read_text())["value"]
+    items = []
+    for i in range(n):
+        raw = dict(templates[i % len(templates)])
+        raw["id"] = f"9509D56FD07A9FEF!s{i:032x}"
+        stem, _, ext = raw["name"].rpartition(".")
+        raw["name"] = f"{stem or raw['name']}_{i}.{ext}" if stem else f"{raw['name']}_{i}"
+        items.append(raw)
+    PAYLOADS.update((raw["id"], raw) for raw in items)
+    return [to_candidate(raw) for raw in items]
+
+
+def legacy_listing(candidates) -> str:
+    return "Each item includes both simplified fields and full OneDrive metadata:\n\n" + str([
+        {
+            "id": c.id,
+            "name": c.name,
+            "type": c.type,
+            "mime_type": c.mime_type,
+            "parent_path": c.parent_reference_path,
+            "complete_metadata": PAYLOADS.get(c.id),
+        }
+        for c in candidates
+    ])
+
+
+def main():
+    counter_name, count = token_counter()
+    print(f"token counter: {counter_name}; budget: {PROMPT_TOKEN_BUDGET}")
+    print(f"{'items':>6}{'legacy tokens':>15}{'compact tokens':>16}{'shown':>7}{'ratio':>8}{'encode ms':>11}")
+    for n in (10, 50, 200, 1000):
+        candidates = synthetic_folder(n)
+        state = AgentState(user_query="find the latest resume pdf", candidates=candidates)
+        legacy = build_decision_prompt(state, legacy_listing(candidates))
+        start = time.perf_counter()
+        listing, aliases = encode_candidates(candidates, PROMPT_TOKEN_BUDGET)
+        elapsed = (time.perf_counter() - start) * 1000
+        compact = build_decision_prompt(state, listing)
+        old, new = count(legacy), count(compact)
+        print(f"{n:>6}{old:>15}{new:>16}{len(aliases):>7}{old / new:>7.1f}x{elapsed:>11.2f}")
+
+
+if __name__ == "__main__":
+    main()
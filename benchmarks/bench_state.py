@@ -0,0 +1,115 @@
+"""
+Per-step cost of the navigation state as a run grows: the previous state
+(full driveItem JSON on every candidate, nodes returning `trace + [step]`)
+vs. the reducer-based state (nodes return only new entries, candidates carry
+no driveItem payload).
+
+    python -m benchmarks.bench_state --steps 1000
+"""
+import argparse
+import statistics
+import time
+from typing import List, Literal, Optional
+
+from langgraph.graph import END, START, StateGraph
+from pydantic import BaseModel
+
+from benchmarks.synthetic import make_tree
+from src.agent.checkpoint import SqliteCheckpointSaver, with_state_types
+from src.agent.navigator import AgentState, DecisionStep, RejectedPath, to_candidate
+
+
+class LegacyCandidate(BaseModel):
+    id: str
+    name: str
+    type: Literal["folder", "file"]
+    mime_type: Optional[str]
+    parent_reference_path: Optional[str]
+    raw: dict
+
+
+class LegacyState(BaseModel):
+    user_query: str
+    current_item_id: Optional[str] = None
+    depth: int = 0
+    visited_items: List[str] = []
+    rejected_paths: List[RejectedPath] = []
+    candidates: List[LegacyCandidate] = []
+    decision_trace: List[DecisionStep] = []
+
+
+def step(i: int, items) -> DecisionStep:
+    return DecisionStep(
+        attempt=1,
+        depth=i,
+        chosen_id=items[0]["id"],
+        chosen_name=items[0]["name"],
+        chosen_type="folder",
+        reason="benchmark",
+        alternatives=[i["name"] for i in items[1:6]],
+    )
+
+
+def build(legacy: bool, listings, steps: int, checkpointer=None):
+    def node(state):
+        items = listings[state.depth % len(listings)]
+        if legacy:
+            candidates = [
+                LegacyCandidate(**to_candidate(i).model_dump(include={"id", "name", "type", "mime_type", "parent_reference_path"}), raw=i)
+                for i in items
+            ]
+            return {
+                "candidates": candidates,
+                "current_item_id": items[0]["id"],
+                "depth": state.depth + 1,
+                "visited_items": state.visited_items + [items[0]["id"]],
+                "decision_trace": state.decision_trace + [step(state.depth, items)],
+            }
+        return {
+            "candidates": [to_candidate(i) for i in items],
+            "current_item_id": items[0]["id"],
+            "depth": state.depth + 1,
+            "visited_items": [items[0]["id"]],
+            "decision_trace": [step(state.depth, items)],
+        }
+
+    graph = StateGraph(LegacyState if legacy else AgentState)
+    graph.add_node("step", node)
+    graph.add_edge(START, "step")
+    graph.add_conditional_edges("step", lambda s: "step" if s.depth < steps else END)
+    state = LegacyState if legacy else AgentState
+    return graph.compile(checkpointer=checkpointer and with_state_types(checkpointer, state))
+
+
+def run(legacy: bool, listings, steps: int, checkpoint: bool):
+    graph = build(legacy, listings, steps, SqliteCheckpointSaver() if checkpoint else None)
+    config = {"recursion_limit": steps + 10, "configurable": {"thread_id": "bench"}}
+    stamps = []
+    last = time.perf_counter()
+    for _ in graph.stream({"user_query": "benchmark"}, config, stream_mode="updates"):
+        now = time.perf_counter()
+        stamps.append((now - last) * 1000)
+        last = now
+    return stamps
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--steps", type=int, default=1000)
+    parser.add_argument("--files-per-folder", type=int, default=40)
+    parser.add_argument("--checkpoint", action="store_true", help="checkpoint every step to an in-memory SQLite saver")
+    args = parser.parse_args()
+
+    tree = make_tree(depth=2, branching=6, files_per_folder=args.files_per_folder, seed=3)
+    listings = list(tree["items"].values())
+    window = max(args.steps // 10, 1)
+    print(f"{'state':>8}{'first ms/step':>15}{'last ms/step':>14}{'growth':>8}{'total s':>9}")
+    for label, legacy in (("legacy", True), ("reducer", False)):
+        stamps = run(legacy, listings, args.steps, args.checkpoint)
+        first = statistics.mean(stamps[1: window + 1])
+        last = statistics.mean(stamps[-window:])
+        print(f"{label:>8}{first:>15.3f}{last:>14.3f}{last / first:>7.1f}x{sum(stamps) / 1000:>9.2f}")
+
+
+if __name__ == "__main__":
+    main()
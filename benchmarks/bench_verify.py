@@ -0,0 +1,79 @@
+"""
+Navigation with a scripted LLM that picks a wrong sibling file for a share of
+queries, verifying 1 vs. N candidate files per download_and_verify step.
+
+    python -m benchmarks.bench_verify --queries 20 --wrong-pick-rate 0.5
+"""
+import argparse
+import logging
+import random
+import statistics
+import time
+
+from benchmarks.synthetic import FakeDrive, ScriptedRuntime, deepest_files, make_tree, noisy_oracle
+from src.agent import navigator
+from src.agent.navigator import AgentState, Decision, build_agent_graph
+
+
+def wrong_file_oracle(tree, target, wrong_pick: bool):
+    """noisy_oracle that, when `wrong_pick`, selects a sibling of the target instead."""
+    oracle = noisy_oracle(tree, target, error_rate=0.0)
+
+    def script(tool, prompt):
+        decision = oracle(tool, prompt)
+        if tool is Decision and wrong_pick and decision.action == "select_file":
+            rows = [line.split("\t") for line in prompt.splitlines() if line.startswith("c")]
+            sibling = next(r for r in rows if r[1] == "F" and r[2] != target["name"])
+            return Decision(action="select_file", id=sibling[0], name=sibling[2], reason="wrong pick")
+        return decision
+
+    return script
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--queries", type=int, default=20)
+    parser.add_argument("--depth", type=int, default=2)
+    parser.add_argument("--branching", type=int, default=4)
+    parser.add_argument("--wrong-pick-rate", type=float, default=0.5)
+    parser.add_argument("--graph-latency", type=float, default=0.1)
+    parser.add_argument("--llm-latency", type=float, default=0.3)
+    parser.add_argument("--seed", type=int, default=5)
+    args = parser.parse_args()
+    logging.disable(logging.INFO)
+
+    tree = make_tree(depth=args.depth, branching=args.branching, seed=args.seed)
+    rng = random.Random(args.seed)
+    targets = rng.sample(deepest_files(tree), args.queries)
+    wrong = [rng.random() < args.wrong_pick_rate for _ in targets]
+    graph = build_agent_graph()
+
+    print(f"depth={args.depth} branching={args.branching}; wrong first pick in {sum(wrong)}/{len(targets)} queries; "
+          f"graph={args.graph_latency}s llm={args.llm_latency}s")
+    print(f"{'verify top-N':<14}{'success':>9}{'mean s':>9}{'verify s':>10}{'LLM calls':>11}")
+    for top_n in (1, 3, 5):
+        navigator.VERIFY_TOP_N = top_n
+        wins, times, verify_times, llm_calls = 0, [], [], 0
+        for target, wrong_pick in zip(targets, wrong):
+            drive = FakeDrive(tree, latency=args.graph_latency)
+            runtime = ScriptedRuntime(wrong_file_oracle(tree, target, wrong_pick), args.llm_latency)
+            query = "find the " + target["name"].rsplit(".", 1)[0].replace("_", " ") + " document"
+            state = AgentState(user_query=query, max_attempts=args.depth + 3)
+
+            start = time.perf_counter()
+            final = graph.invoke(state, config={"configurable": {"graph_client": drive, "runtime": runtime}})
+            elapsed = time.perf_counter() - start
+            found = final.get("current_file")
+            wins += bool(final.get("verified") and found and found.id == target["id"])
+            times.append(elapsed)
+            # Every level before verification costs one listing and one LLM call.
+            levels = len(final["decision_trace"])
+            verify_times.append(elapsed - levels * (args.graph_latency + args.llm_latency))
+            llm_calls += runtime.calls
+        n = len(targets)
+        print(f"{top_n:<14}{wins / n:>8.0%}{statistics.mean(times):>9.2f}"
+              f"{statistics.mean(verify_times):>10.2f}{llm_calls / n:>11.1f}")
+
+
+if __name__ == "__main__":
+    main()
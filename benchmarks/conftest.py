@@ -0,0 +1,48 @@
+"""
+Fixtures for the pytest-benchmark suite (benchmarks/test_perf_*.py): a fake
+Graph server and the FastAPI app wired to it. Run and compare against the
+baselines tracked in benchmarks/baselines:
+
+    python -m pytest benchmarks --benchmark-only --benchmark-storage=benchmarks/baselines \
+        --benchmark-compare --benchmark-compare-fail=median:25%
+
+and record a new baseline with `--benchmark-save=baseline` instead of the
+compare options.
+"""
+import pytest
+
+import src.main as main
+from benchmarks.fake_graph import Faults, fake_graph_server, serve
+from benchmarks.synthetic import make_tree
+from src.clients.oneDriveHelper import GraphClient
+
+
+@pytest.fixture(scope="session")
+def fake_graph():
+    # ~2k items: 6 folders under the root, 36 below them, 8 files everywhere
+    with fake_graph_server(make_tree(depth=2, branching=6, files_per_folder=40, seed=3)) as fake:
+        yield fake
+
+
+@pytest.fixture(scope="session")
+def big_folder_graph():
+    """A drive whose root holds 5000 files, with 5 ms per request like a nearby Graph."""
+    with fake_graph_server(make_tree(depth=0, files_per_folder=5000, seed=4), Faults(latency=0.005)) as fake:
+        yield fake
+
+
+@pytest.fixture
+def graph_client(fake_graph):
+    return GraphClient("token", base_url=fake_graph.base_url)
+
+
+@pytest.fixture(scope="session")
+def api(fake_graph):
+    """Base URL of the FastAPI app, served by uvicorn, talking to `fake_graph`."""
+    patch = pytest.MonkeyPatch()
+    patch.setattr(main, "graph", lambda: GraphClient(
+        "token", search_cache=main.search_cache, download_cache=main.download_cache, base_url=fake_graph.base_url,
+    ))
+    with serve(main.app) as url:
+        yield url
+    patch.undo()
@@ -0,0 +1,525 @@
+"""
+Local Microsoft Graph stand-in for offline benchmarks and tests.
+
+Serves the endpoints the clients in src/clients use over a synthetic drive
+(`make_tree`) or a seeded fixture (testgraph.json): children with paging and
+$select, items, path lookup, search, content with Range, simple and session
+uploads, $batch, delta and beta search. Latency, 429 throttling and 5xx
+failures can be injected.
+
+    python -m benchmarks.fake_graph --depth 4 --branching 6 --port 8001 --latency 0.02 --throttle-rate 0.05
+
+Point the app at it with GRAPH_BASE_URL=http://127.0.0.1:8001, or pass
+`base_url=` to GraphClient.
+"""
+import argparse
+import asyncio
+import contextlib
+import hashlib
+import json
+import random
+import re
+import socket
+import threading
+import time
+import uuid
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+from urllib.parse import parse_qsl, unquote, urlsplit
+
+import uvicorn
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse, Response
+
+from benchmarks.synthetic import make_tree
+
+FIXTURE = Path(__file__).resolve().parent.parent / "testgraph.json"
+DEFAULT_PAGE_SIZE = 200
+MAX_PAGE_SIZE = 999
+BATCH_LIMIT = 20
+_BLOCK = 64 * 1024
+
+
+class Faults:
+    """What to inject into every request: latency (+ jitter), 429s and 5xx failures."""
+    __slots__ = ("latency", "jitter", "throttle_rate", "failure_rate", "retry_after", "rng", "_lock")
+
+    def __init__(
+        self,
+        latency: float = 0.0,
+        jitter: float = 0.0,
+        throttle_rate: float = 0.0,
+        failure_rate: float = 0.0,
+        retry_after: int = 1,
+        seed: int = 0,
+    ):
+        self.latency = latency
+        self.jitter = jitter
+        self.throttle_rate = throttle_rate
+        self.failure_rate = failure_rate
+        self.retry_after = retry_after
+        self.rng = random.Random(seed)
+        self._lock = threading.Lock()
+
+
+    def delay(self) -> float:
+        with self._lock:
+            return self.latency + (self.rng.uniform(0, self.jitter) if self.jitter else 0.0)
+
+
+    def status(self) -> Optional[int]:
+        """429, 503 or None (serve normally)."""
+        with self._lock:
+            roll = self.rng.random()
+        if roll < self.throttle_rate:
+            return 429
+        if roll < self.throttle_rate + self.failure_rate:
+            return 503
+        return None
+
+
+def graph_error(status: int, code: str, message: str, retry_after: Optional[int] = None):
+    headers = {"Retry-After": str(retry_after)} if retry_after is not None else {}
+    return status, headers, {"error": {"code": code, "message": message}}
+
+
+def tree_from_fixture(path: Path = FIXTURE) -> Dict[str, Any]:
+    """
+    A `make_tree`-shaped tree from a Graph listing/search dump: every item is
+    placed under the folders named in its parentReference.path, which are
+    created as needed.
+    """
+    items: Dict[str, List[Dict[str, Any]]] = {"root": []}
+    paths: Dict[str, str] = {"root": ""}
+    folder_by_path: Dict[str, str] = {"": "root"}
+
+    def folder_for(folder_path: str) -> str:
+        if folder_path in folder_by_path:
+            return folder_by_path[folder_path]
+        parent_path, name = folder_path.rsplit("/", 1)
+        parent = folder_for(parent_path)
+        fid = "FOLDER!" + hashlib.sha1(folder_path.encode()).hexdigest()[:16]
+        items[parent].append({
+            "id": fid,
+            "name": name,
+            "eTag": f'"{{{fid}}},1"',
+            "folder": {"childCount": 0},
+            "parentReference": {"path": f"/drive/root:{parent_path}"},
+            "lastModifiedDateTime": "2025-06-01T00:00:00Z",
+        })
+        items[fid] = []
+        paths[fid] = folder_path
+        folder_by_path[folder_path] = fid
+        return fid
+
+    for item in json.loads(Path(path).read_text())["value"]:
+        parent_path = unquote(item.get("parentReference", {}).get("path", "/drive/root:")).split("root:", 1)[1]
+        parent = folder_for(parent_path.rstrip("/"))
+        items[parent].append(item)
+        paths[item["id"]] = f"{parent_path.rstrip('/')}/{item['name']}"
+    for children in items.values():
+        for child in children:
+            if "folder" in child:
+                child["folder"]["childCount"] = len(items.get(child["id"], []))
+    return {"items": items, "paths": paths}
+
+
+def _content(item_id: str, start: int, end: int) -> bytes:
+    """Deterministic bytes [start, end] of an item: a per-item 64 KiB block repeated."""
+    seed = hashlib.sha256(item_id.encode()).digest()
+    block = (seed * (_BLOCK // len(seed) + 1))[:_BLOCK]
+    first = start // _BLOCK
+    last = end // _BLOCK
+    data = block * (last - first + 1)
+    return data[start - first * _BLOCK:end - first * _BLOCK + 1]
+
+
+def _select(item: Dict[str, Any], select: Optional[str]) -> Dict[str, Any]:
+    if not select:
+        return item
+    fields = select.split(",")
+    return {k: v for k, v in item.items() if k in fields}
+
+
+class FakeGraph:
+    """
+    In-memory drive answering Graph requests as (status, headers, body), where
+    body is a JSON-able dict, bytes or None. Thread-safe; `stats` counts
+    requests per route and injected faults.
+    """
+    def __init__(self, tree: Dict[str, Any], base_url: str = "http://fake-graph", faults: Optional[Faults] = None):
+        self.base_url = base_url
+        self.faults = faults or Faults()
+        self.children: Dict[str, List[str]] = {}
+        self.items: Dict[str, Dict[str, Any]] = {"root": {"id": "root", "name": "root", "folder": {}, "root": {}}}
+        self.paths: Dict[str, str] = dict(tree["paths"])
+        for folder_id, children in tree["items"].items():
+            self.children[folder_id] = [c["id"] for c in children]
+            for child in children:
+                item = dict(child)
+                item.setdefault("cTag", f'"c:{{{child["id"]}}},1"')
+                self.items[child["id"]] = item
+        self.by_path = {path.lower(): iid for iid, path in self.paths.items()}
+        self.seq = 0
+        self.changes: List[Tuple[int, str]] = []
+        self.uploads: Dict[str, Dict[str, Any]] = {}
+        self.stats: Dict[str, int] = {}
+        self._lock = threading.Lock()
+        self._routes = [
+            ("GET", re.compile(r"/v1\.0/me/drive"), self._drive),
+            ("GET", re.compile(r"/v1\.0/me/drive/root"), self._root),
+            ("GET", re.compile(r"/v1\.0/me/drive/root/children"), self._children),
+            ("GET", re.compile(r"/v1\.0/me/drive/items/(?P<item_id>[^/]+)/children"), self._children),
+            ("GET", re.compile(r"/v1\.0/me/drive/items/(?P<item_id>[^/]+)/content"), self._content_redirect),
+            ("GET", re.compile(r"/v1\.0/me/drive/items/(?P<item_id>[^/]+)"), self._item),
+            ("DELETE", re.compile(r"/v1\.0/me/drive/items/(?P<item_id>[^/]+)"), self._delete),
+            ("GET", re.compile(r"/v1\.0/me/drive/root/search\(q='(?P<q>.*)'\)"), self._search),
+            ("GET", re.compile(r"/v1\.0/me/drive/root/delta"), self._delta),
+            ("PUT", re.compile(r"/v1\.0/me/drive/root:(?P<path>/.*):/content"), self._put_content),
+            ("POST", re.compile(r"/v1\.0/me/drive/root:(?P<path>/.*):/createUploadSession"), self._create_session),
+            ("GET", re.compile(r"/v1\.0/me/drive/root:(?P<path>/[^:]*):?"), self._by_path),
+            ("POST", re.compile(r"/v1\.0/\$batch"), self._batch),
+            ("POST", re.compile(r"/beta/search/query"), self._beta_search),
+            ("GET", re.compile(r"/download/(?P<item_id>[^/]+)"), self._download),
+            ("PUT", re.compile(r"/upload/(?P<session_id>[^/]+)"), self._upload_range),
+            ("DELETE", re.compile(r"/upload/(?P<session_id>[^/]+)"), self._cancel_session),
+        ]
+
+
+    # -----------------------
+    # Dispatch
+    # -----------------------
+
+    def _count(self, key: str) -> None:
+        with self._lock:
+            self.stats[key] = self.stats.get(key, 0) + 1
+
+
+    def handle(
+        self,
+        method: str,
+        path: str,
+        query: Dict[str, str],
+        headers: Optional[Dict[str, str]] = None,
+        body: bytes = b"",
+    ):
+        headers = {k.lower(): v for k, v in (headers or {}).items()}
+        for route_method, pattern, handler in self._routes:
+            match = pattern.fullmatch(path)
+            if match and route_method == method:
+                self._count(handler.__name__.lstrip("_"))
+                return handler(query=query, headers=headers, body=body, **match.groupdict())
+        self._count("not_found")
+        return graph_error(404, "itemNotFound", f"{method} {path} is not served by the fake")
+
+
+    def fault(self) -> Optional[Tuple[int, Dict[str, str], Dict[str, Any]]]:
+        status = self.faults.status()
+        if status == 429:
+            self._count("throttled")
+            return graph_error(429, "TooManyRequests", "Please retry after", self.faults.retry_after)
+        if status == 503:
+            self._count("failed")
+            return graph_error(503, "serviceNotAvailable", "Injected failure", self.faults.retry_after)
+        return None
+
+
+    def touch(self, item_id: str, **changes) -> Dict[str, Any]:
+        """Record a change to an item (new eTag/cTag, optional field updates) for delta."""
+        with self._lock:
+            item = self.items[item_id]
+            self.seq += 1
+            item.update(changes)
+            item["eTag"] = f'"{{{item_id}}},{self.seq + 1}"'
+            item["cTag"] = f'"c:{{{item_id}}},{self.seq + 1}"'
+            self.changes.append((self.seq, item_id))
+            return item
+
+
+    # -----------------------
+    # Handlers
+    # -----------------------
+
+    def _drive(self, **kwargs):
+        return 200, {}, {"id": "fakedrive0001", "driveType": "business"}
+
+
+    def _root(self, query, **kwargs):
+        return 200, {}, _select(self.items["root"], query.get("$select"))
+
+
+    def _children(self, query, item_id: str = "root", **kwargs):
+        if item_id not in self.children:
+            if item_id in self.items:
+                return 200, {}, {"value": []}
+            return graph_error(404, "itemNotFound", f"Item {item_id} does not exist")
+        top = min(int(query.get("$top", DEFAULT_PAGE_SIZE)), MAX_PAGE_SIZE)
+        start = int(query.get("$skiptoken", 0))
+        ids = self.children[item_id][start:start + top]
+        page = {"value": [_select(self.items[i], query.get("$select")) for i in ids]}
+        if start + top < len(self.children[item_id]):
+            next_query = {k: v for k, v in query.items() if k != "$skiptoken"}
+            next_query["$top"] = str(top)
+            next_query["$skiptoken"] = str(start + top)
+            suffix = "root" if item_id == "root" else f"items/{item_id}"
+            page["@odata.nextLink"] = f"{self.base_url}/v1.0/me/drive/{suffix}/children?" + "&".join(
+                f"{k}={v}" for k, v in next_query.items()
+            )
+        return 200, {}, page
+
+
+    def _item(self, query, item_id: str, **kwargs):
+        item = self.items.get(item_id)
+        if item is None:
+            return graph_error(404, "itemNotFound", f"Item {item_id} does not exist")
+        if "file" in item:
+            item = dict(item, **{"@microsoft.graph.downloadUrl": f"{self.base_url}/download/{item_id}?sig={uuid.uuid4().hex[:8]}"})
+        return 200, {}, _select(item, query.get("$select"))
+
+
+    def _delete(self, item_id: str, **kwargs):
+        if item_id not in self.items:
+            return graph_error(404, "itemNotFound", f"Item {item_id} does not exist")
+        with self._lock:
+            for children in self.children.values():
+                if item_id in children:
+                    children.remove(item_id)
+        self.touch(item_id, deleted={"state": "deleted"})
+        return 204, {}, None
+
+
+    def _content_redirect(self, item_id: str, **kwargs):
+        if "file" not in self.items.get(item_id, {}):
+            return graph_error(404, "itemNotFound", f"File {item_id} does not exist")
+        return 302, {"Location": f"{self.base_url}/download/{item_id}"}, None
+
+
+    def _download(self, headers, item_id: str, **kwargs):
+        item = self.items.get(item_id)
+        if item is None or "file" not in item:
+            return 404, {}, b""
+        size = item.get("size", 0)
+        common = {"Accept-Ranges": "bytes", "ETag": item["eTag"], "Content-Type": item["file"].get("mimeType", "application/octet-stream")}
+        match = re.fullmatch(r"bytes=(\d*)-(\d*)", headers.get("range", ""))
+        if match and size:
+            start = int(match.group(1)) if match.group(1) else max(size - int(match.group(2)), 0)
+            end = min(int(match.group(2)), size - 1) if match.group(1) and match.group(2) else size - 1
+            if start >= size:
+                return 416, {"Content-Range": f"bytes */{size}"}, b""
+            return 206, dict(common, **{"Content-Range": f"bytes {start}-{end}/{size}"}), _content(item_id, start, end)
+        return 200, common, _content(item_id, 0, size - 1) if size else b""
+
+
+    def _by_path(self, query, path: str, **kwargs):
+        item_id = self.by_path.get(unquote(path).rstrip("/").lower())
+        if item_id is None:
+            return graph_error(404, "itemNotFound", f"Path {path} does not exist")
+        return self._item(query=query, item_id=item_id)
+
+
+    def _search(self, q: str, **kwargs):
+        terms = [t for t in re.split(r"\W+", unquote(q).lower()) if t]
+        hits = [
+            item for iid, item in self.items.items()
+            if iid != "root" and terms and all(t in item["name"].lower() for t in terms)
+        ]
+        return 200, {}, {"value": hits[:DEFAULT_PAGE_SIZE]}
+
+
+    def _delta(self, query, **kwargs):
+        token = query.get("token")
+        top = min(int(query.get("$top", DEFAULT_PAGE_SIZE)), MAX_PAGE_SIZE)
+        with self._lock:
+            seq = self.seq
+            if token == "latest":
+                ids: List[str] = []
+            elif token is None:
+                ids = [i for i in self.items if i != "root"]
+            else:
+                ids = list(dict.fromkeys(i for s, i in self.changes if s > int(token)))
+        start = int(query.get("$skiptoken", 0))
+        page: Dict[str, Any] = {"value": [self.items[i] for i in ids[start:start + top]]}
+        if start + top < len(ids):
+            page["@odata.nextLink"] = (
+                f"{self.base_url}/v1.0/me/drive/root/delta?token={token or ''}&$top={top}&$skiptoken={start + top}"
+            )
+        else:
+            page["@odata.deltaLink"] = f"{self.base_url}/v1.0/me/drive/root/delta?token={seq}"
+        return 200, {}, page
+
+
+    def _new_file(self, path: str, size: int) -> Dict[str, Any]:
+        path = "/" + unquote(path).strip("/")
+        parent_path, name = path.rsplit("/", 1)
+        parent = self.by_path.get(parent_path.lower(), "root") if parent_path else "root"
+        item_id = self.by_path.get(path.lower())
+        with self._lock:
+            if item_id is None:
+                item_id = f"FAKE!{uuid.uuid4().hex[:12]}"
+                self.items[item_id] = {
+                    "id": item_id,
+                    "name": name,
+                    "file": {"mimeType": "application/octet-stream"},
+                    "parentReference": {"path": f"/drive/root:{parent_path}"},
+                }
+                self.children.setdefault(parent, []).append(item_id)
+                self.paths[item_id] = path
+                self.by_path[path.lower()] = item_id
+        return self.touch(item_id, size=size, lastModifiedDateTime=time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()))
+
+
+    def _put_content(self, body, path: str, **kwargs):
+        return 201, {}, self._new_file(path, len(body))
+
+
+    def _create_session(self, path: str, **kwargs):
+        session_id = uuid.uuid4().hex
+        with self._lock:
+            self.uploads[session_id] = {"path": path, "received": 0}
+        return 200, {}, {
+            "uploadUrl": f"{self.base_url}/upload/{session_id}",
+            "expirationDateTime": "2099-01-01T00:00:00Z",
+        }
+
+
+    def _upload_range(self, headers, body, session_id: str, **kwargs):
+        session = self.uploads.get(session_id)
+        match = re.fullmatch(r"bytes (\d+)-(\d+)/(\d+)", headers.get("content-range", ""))
+        if session is None:
+            return graph_error(404, "itemNotFound", "Upload session not found")
+        if not match:
+            return graph_error(400, "invalidRequest", "Missing Content-Range")
+        start, end, total = map(int, match.groups())
+        if start != session["received"] or end - start + 1 != len(body):
+            return graph_error(416, "invalidRange", f"Expected range starting at {session['received']}")
+        session["received"] = end + 1
+        if session["received"] < total:
+            return 202, {}, {"nextExpectedRanges": [f"{session['received']}-"], "expirationDateTime": "2099-01-01T00:00:00Z"}
+        del self.uploads[session_id]
+        return 201, {}, self._new_file(session["path"], total)
+
+
+    def _cancel_session(self, session_id: str, **kwargs):
+        self.uploads.pop(session_id, None)
+        return 204, {}, None
+
+
+    def _batch(self, body, **kwargs):
+        requests = json.loads(body or b"{}").get("requests", [])
+        if len(requests) > BATCH_LIMIT:
+            return graph_error(400, "invalidRequest", f"A batch holds at most {BATCH_LIMIT} requests")
+        responses = []
+        for sub in requests:
+            fault = self.fault()
+            if fault is None:
+                parts = urlsplit("/v1.0" + sub["url"] if not sub["url"].startswith("/v1.0") else sub["url"])
+                sub_body = json.dumps(sub["body"]).encode() if "body" in sub else b""
+                fault = self.handle(sub.get("method", "GET"), unquote(parts.path), dict(parse_qsl(parts.query)),
+                                    sub.get("headers"), sub_body)
+            status, headers, payload = fault
+            responses.append({"id": sub["id"], "status": status, "headers": headers,
+                              "body": payload if not isinstance(payload, bytes) else None})
+        return 200, {}, {"responses": responses}
+
+
+    def _beta_search(self, body, **kwargs):
+        value = []
+        for req in json.loads(body or b"{}").get("requests", []):
+            terms = [t for t in re.split(r"\W+", req.get("query", {}).get("queryString", "").lower()) if t]
+            matched = [
+                item for iid, item in self.items.items()
+                if iid != "root" and terms and any(t in item["name"].lower() for t in terms)
+            ]
+            start, size = req.get("from", 0), req.get("size", 25)
+            hits = [
+                {"hitId": item["id"], "rank": start + n + 1, "summary": item["name"], "resource": item}
+                for n, item in enumerate(matched[start:start + size])
+            ]
+            value.append({
+                "searchTerms": terms,
+                "hitsContainers": [{
+                    "hits": hits,
+                    "total": len(matched),
+                    "moreResultsAvailable": start + size < len(matched),
+                }],
+            })
+        return 200, {}, {"value": value}
+
+
+# -----------------------
+# HTTP app and server
+# -----------------------
+
+def create_app(fake: FakeGraph) -> FastAPI:
+    """ASGI app serving `fake`, with its fault injection applied to every request."""
+    app = FastAPI()
+
+    @app.api_route("/{full_path:path}", methods=["GET", "POST", "PUT", "PATCH", "DELETE"])
+    async def dispatch(full_path: str, request: Request):
+        body = await request.body()
+        delay = fake.faults.delay()
+        if delay:
+            await asyncio.sleep(delay)
+        result = fake.fault() or fake.handle(
+            request.method, request.url.path, dict(request.query_params), dict(request.headers), body
+        )
+        status, headers, payload = result
+        if payload is None or isinstance(payload, bytes):
+            return Response(payload or b"", status_code=status, headers=headers)
+        return JSONResponse(payload, status_code=status, headers=headers)
+
+    return app
+
+
+@contextlib.contextmanager
+def serve(app, host: str = "127.0.0.1", port: int = 0) -> Iterator[str]:
+    """Run an ASGI app with uvicorn in a background thread; yields its base URL."""
+    sock = socket.socket()
+    # Accepted connections inherit this; without it small responses stall ~40 ms on delayed ACKs.
+    sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+    sock.bind((host, port))
+    server = uvicorn.Server(uvicorn.Config(app, log_level="warning"))
+    thread = threading.Thread(target=server.run, kwargs={"sockets": [sock]}, daemon=True)
+    thread.start()
+    while not server.started:
+        time.sleep(0.01)
+    try:
+        yield f"http://{host}:{sock.getsockname()[1]}"
+    finally:
+        server.should_exit = True
+        thread.join()
+
+
+@contextlib.contextmanager
+def fake_graph_server(tree: Optional[Dict[str, Any]] = None, faults: Optional[Faults] = None) -> Iterator[FakeGraph]:
+    """A FakeGraph served on a free local port; its `base_url` is set accordingly."""
+    fake = FakeGraph(tree or make_tree(), faults=faults)
+    with serve(create_app(fake)) as url:
+        fake.base_url = url
+        yield fake
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--port", type=int, default=8001)
+    parser.add_argument("--fixture", action="store_true", help=f"seed the drive from {FIXTURE.name}")
+    parser.add_argument("--depth", type=int, default=3)
+    parser.add_argument("--branching", type=int, default=6)
+    parser.add_argument("--files-per-folder", type=int, default=8)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--latency", type=float, default=0.0, help="seconds added to every request")
+    parser.add_argument("--jitter", type=float, default=0.0, help="extra uniform 0..jitter seconds")
+    parser.add_argument("--throttle-rate", type=float, default=0.0, help="share of requests answered 429")
+    parser.add_argument("--failure-rate", type=float, default=0.0, help="share of requests answered 503")
+    parser.add_argument("--retry-after", type=int, default=1)
+    args = parser.parse_args()
+
+    tree = tree_from_fixture() if args.fixture else make_tree(args.depth, args.branching, args.files_per_folder, args.seed)
+    faults = Faults(args.latency, args.jitter, args.throttle_rate, args.failure_rate, args.retry_after, args.seed)
+    fake = FakeGraph(tree, base_url=f"http://127.0.0.1:{args.port}", faults=faults)
+    print(f"fake Graph with {len(fake.items) - 1} items on {fake.base_url}")
+    uvicorn.run(create_app(fake), host="127.0.0.1", port=args.port, log_level="warning")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,173 @@
+"""
+Closed-loop load test of the FastAPI app against the fake Graph server.
+`--concurrency` virtual users each loop over a weighted scenario mix for
+`--duration` seconds; reports throughput, latency percentiles and errors per
+scenario, and checks them against a tracked baseline.
+
+    python -m benchmarks.load_api --concurrency 32 --duration 20 --latency 0.03 --throttle-rate 0.02
+    python -m benchmarks.load_api --save-baseline     # rewrite benchmarks/baselines/load_api.json
+    python -m benchmarks.load_api --compare           # exit 1 on a regression beyond --tolerance
+"""
+import argparse
+import asyncio
+import json
+import logging
+import random
+import sys
+import time
+from pathlib import Path
+from typing import Any, Dict, List
+
+import httpx
+
+import src.main as main
+from benchmarks.fake_graph import FakeGraph, Faults, fake_graph_server, serve
+from benchmarks.synthetic import make_tree
+from src.clients.oneDriveHelper import GraphClient
+
+BASELINE = Path(__file__).resolve().parent / "baselines" / "load_api.json"
+
+
+def scenarios(fake: FakeGraph, rng: random.Random) -> Dict[str, Any]:
+    """name -> (weight, request factory) for the read-heavy mix the app sees."""
+    folders = [i for i, item in fake.items.items() if "folder" in item and i != "root"]
+    files = [i for i, item in fake.items.items() if "file" in item]
+    words = sorted({item["name"].split("_")[0] for item in fake.items.values() if "file" in item})
+    payload = b"x" * 256 * 1024
+
+    return {
+        "list_root": (2, lambda: ("GET", "/drive/root", {})),
+        "list_folder": (4, lambda: ("GET", f"/drive/folder/{rng.choice(folders)}", {})),
+        "stream_folder": (2, lambda: ("GET", f"/drive/folder/{rng.choice(folders)}/stream",
+                                      {"params": {"select": "id,name,size"}})),
+        "search": (3, lambda: ("GET", "/drive/search", {"params": {"q": rng.choice(words)}})),
+        "content_range": (3, lambda: ("GET", f"/drive/items/{rng.choice(files)}/content",
+                                      {"headers": {"Range": "bytes=0-65535"}})),
+        "upload_256k": (1, lambda: ("PUT", "/drive/upload", {
+            "params": {"path": f"/load/{rng.randrange(10**9)}.bin"},
+            "content": payload,
+        })),
+    }
+
+
+def percentile(values: List[float], q: float) -> float:
+    if not values:
+        return 0.0
+    values = sorted(values)
+    return values[min(int(len(values) * q), len(values) - 1)]
+
+
+async def run_load(base_url: str, mix: Dict[str, Any], concurrency: int, duration: float, rng: random.Random):
+    names = list(mix)
+    weights = [mix[n][0] for n in names]
+    latencies: Dict[str, List[float]] = {n: [] for n in names}
+    errors: Dict[str, int] = {n: 0 for n in names}
+    deadline = time.perf_counter() + duration
+
+    async def user(client: httpx.AsyncClient):
+        while time.perf_counter() < deadline:
+            name = rng.choices(names, weights)[0]
+            method, url, kwargs = mix[name][1]()
+            start = time.perf_counter()
+            try:
+                response = await client.request(method, url, **kwargs)
+                await response.aread()
+                ok = response.status_code < 400
+            except httpx.HTTPError:
+                ok = False
+            latencies[name].append(time.perf_counter() - start)
+            if not ok:
+                errors[name] += 1
+
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+    async with httpx.AsyncClient(base_url=base_url, timeout=60, limits=limits) as client:
+        await asyncio.gather(*(user(client) for _ in range(concurrency)))
+
+    results = {}
+    for name in names:
+        lat = latencies[name]
+        results[name] = {
+            "requests": len(lat),
+            "rps": round(len(lat) / duration, 1),
+            "p50_ms": round(percentile(lat, 0.50) * 1000, 1),
+            "p95_ms": round(percentile(lat, 0.95) * 1000, 1),
+            "p99_ms": round(percentile(lat, 0.99) * 1000, 1),
+            "error_rate": round(errors[name] / len(lat), 4) if lat else 0.0,
+        }
+    return results
+
+
+def regressions(results: Dict[str, Any], baseline: Dict[str, Any], tolerance: float) -> List[str]:
+    """Scenarios whose p95 grew, or throughput/error rate worsened, beyond `tolerance`."""
+    found = []
+    for name, base in baseline["results"].items():
+        now = results.get(name)
+        if now is None:
+            continue
+        if now["p95_ms"] > base["p95_ms"] * (1 + tolerance):
+            found.append(f"{name}: p95 {base['p95_ms']} -> {now['p95_ms']} ms")
+        if now["rps"] < base["rps"] * (1 - tolerance):
+            found.append(f"{name}: rps {base['rps']} -> {now['rps']}")
+        if now["error_rate"] > base["error_rate"] + tolerance / 10:
+            found.append(f"{name}: error rate {base['error_rate']} -> {now['error_rate']}")
+    return found
+
+
+def main_cli():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--duration", type=float, default=10)
+    parser.add_argument("--depth", type=int, default=3)
+    parser.add_argument("--branching", type=int, default=6)
+    parser.add_argument("--files-per-folder", type=int, default=20)
+    parser.add_argument("--latency", type=float, default=0.02, help="fake Graph seconds per request")
+    parser.add_argument("--jitter", type=float, default=0.01)
+    parser.add_argument("--throttle-rate", type=float, default=0.0)
+    parser.add_argument("--failure-rate", type=float, default=0.0)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--save-baseline", action="store_true")
+    parser.add_argument("--compare", action="store_true")
+    parser.add_argument("--tolerance", type=float, default=0.25)
+    args = parser.parse_args()
+    # oneDriveHelper configures INFO logging; per-request httpx lines would drown the report.
+    logging.getLogger("httpx").setLevel(logging.WARNING)
+
+    rng = random.Random(args.seed)
+    tree = make_tree(args.depth, args.branching, args.files_per_folder, args.seed)
+    faults = Faults(args.latency, args.jitter, args.throttle_rate, args.failure_rate, seed=args.seed)
+    with fake_graph_server(tree, faults) as fake:
+        main.graph = lambda: GraphClient(
+            "token", search_cache=main.search_cache, download_cache=main.download_cache, base_url=fake.base_url,
+        )
+        with serve(main.app) as api:
+            results = asyncio.run(run_load(api, scenarios(fake, rng), args.concurrency, args.duration, rng))
+        graph_stats = dict(fake.stats)
+
+    config = {k: v for k, v in vars(args).items() if k not in ("save_baseline", "compare", "tolerance")}
+    print(f"{len(fake.items) - 1} items, {args.concurrency} users, {args.duration:.0f} s, "
+          f"Graph latency {args.latency * 1000:.0f}+{args.jitter * 1000:.0f} ms, throttle {args.throttle_rate:.0%}")
+    print(f"{'scenario':>15}{'reqs':>7}{'rps':>8}{'p50 ms':>9}{'p95 ms':>9}{'p99 ms':>9}{'errors':>8}")
+    for name, r in results.items():
+        print(f"{name:>15}{r['requests']:>7}{r['rps']:>8.1f}{r['p50_ms']:>9.1f}{r['p95_ms']:>9.1f}"
+              f"{r['p99_ms']:>9.1f}{r['error_rate']:>8.1%}")
+    print(f"Graph requests: {sum(v for k, v in graph_stats.items() if k not in ('throttled', 'failed'))}, "
+          f"throttled {graph_stats.get('throttled', 0)}, failed {graph_stats.get('failed', 0)}")
+
+    if args.save_baseline:
+        BASELINE.parent.mkdir(parents=True, exist_ok=True)
+        BASELINE.write_text(json.dumps({"config": config, "results": results}, indent=2) + "\n")
+        print(f"baseline written to {BASELINE}")
+    if args.compare:
+        baseline = json.loads(BASELINE.read_text())
+        if baseline["config"] != config:
+            print(f"warning: baseline was recorded with {baseline['config']}")
+        found = regressions(results, baseline, args.tolerance)
+        for line in found:
+            print(f"REGRESSION {line}")
+        if found:
+            sys.exit(1)
+        print(f"no regression beyond {args.tolerance:.0%}")
+
+
+if __name__ == "__main__":
+    main_cli()
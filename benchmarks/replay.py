@@ -0,0 +1,395 @@
+"""
+Deterministic record/replay of agent runs.
+
+`record` runs reference queries through an agent graph and saves, per query,
+a cassette (JSON) holding every Graph client call result and every LLM tool
+call output. `bench` replays the cassettes against the current code with
+simulated latencies and reports steps, LLM calls, prompt tokens, wall time
+and success per query, so runs can be compared between changes without
+touching OpenAI or Graph.
+
+    python -m benchmarks.replay record --graph walk                  # synthetic reference set
+    python -m benchmarks.replay record --graph walk --live --queries queries.json --out my-cassettes
+    python -m benchmarks.replay bench --graph walk --graph-latency 0.05 --llm-latency 0.8
+
+LLM outputs are matched on (tool, normalized prompt). When a code change
+alters a prompt, the next unused recorded output for the same tool is
+replayed instead and counted as a fallback; prompt tokens are always counted
+on the prompt the current code sends. `--graph dev` runs src/agent-dev/new.py.
+"""
+import argparse
+import base64
+import importlib.util
+import json
+import random
+import statistics
+import threading
+import time
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+from benchmarks.bench_prompt_tokens import token_counter
+from benchmarks.synthetic import FakeDrive, ScriptedRuntime, deepest_files, make_tree, noisy_oracle
+from src.agent.llm_cache import cache_key
+
+ROOT = Path(__file__).resolve().parent.parent
+CASSETTES = Path(__file__).resolve().parent / "cassettes"
+_COUNT_NAME, count_tokens = token_counter()
+
+# What a GraphClient method returns when its call fails (replay misses look the same).
+_FAILED = {"list_root": [], "list_folder": [], "search": []}
+
+
+# -----------------------
+# Cassettes
+# -----------------------
+
+def _encode(value: Any) -> Any:
+    if isinstance(value, bytes):
+        return {"__bytes__": base64.b64encode(value).decode("ascii")}
+    return value
+
+
+def _decode(value: Any) -> Any:
+    if isinstance(value, dict) and "__bytes__" in value:
+        return base64.b64decode(value["__bytes__"])
+    return value
+
+
+def graph_key(method: str, args: tuple, kwargs: Dict[str, Any]) -> str:
+    return json.dumps([method, list(args), sorted(kwargs.items())], default=str)
+
+
+class Cassette:
+    """Recorded Graph call results and LLM outputs of one agent run."""
+    def __init__(self, query: Dict[str, Any], graph: str, graph_calls=None, llm_calls=None):
+        self.query = query
+        self.graph = graph
+        self.graph_calls: Dict[str, Any] = graph_calls or {}
+        self.llm_calls: List[Dict[str, Any]] = llm_calls or []
+        self._lock = threading.Lock()
+
+
+    def save(self, path: Path) -> None:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        payload = {"query": self.query, "graph": self.graph, "graph_calls": self.graph_calls, "llm_calls": self.llm_calls}
+        path.write_text(json.dumps(payload, indent=1, default=str) + "\n")
+
+
+    @classmethod
+    def load(cls, path: Path) -> "Cassette":
+        data = json.loads(Path(path).read_text())
+        return cls(data["query"], data["graph"], data["graph_calls"], data["llm_calls"])
+
+
+# -----------------------
+# Recording
+# -----------------------
+
+class RecordingGraph:
+    """Proxy to a GraphClient (or stand-in) saving every call's result into a cassette."""
+    def __init__(self, client, cassette: Cassette):
+        self.client = client
+        self.cassette = cassette
+
+
+    def __getattr__(self, name: str):
+        attr = getattr(self.client, name)
+        if not callable(attr):
+            return attr
+
+        def call(*args, **kwargs):
+            result = attr(*args, **kwargs)
+            with self.cassette._lock:
+                self.cassette.graph_calls[graph_key(name, args, kwargs)] = _encode(result)
+            return result
+        return call
+
+
+def _usage(result: Dict[str, Any]) -> Dict[str, int]:
+    usage = {"input_tokens": 0, "output_tokens": 0}
+    for message in result.get("messages") or []:
+        for kind, n in (getattr(message, "usage_metadata", None) or {}).items():
+            if kind in usage:
+                usage[kind] += n
+    return usage
+
+
+class _RecordingExtractor:
+    def __init__(self, extractor, tool, cassette: Cassette):
+        self.extractor = extractor
+        self.tool = tool
+        self.cassette = cassette
+
+
+    def invoke(self, input: Any, config: Optional[Dict[str, Any]] = None, **kwargs) -> Dict[str, Any]:
+        result = self.extractor.invoke(input)
+        responses = result.get("responses") or []
+        response = responses[0].model_dump() if responses and responses[0] is not None else None
+        usage = _usage(result)
+        if not usage["output_tokens"] and response is not None:
+            # Scripted runtimes report no usage; estimate the tool-call JSON instead.
+            usage = {"input_tokens": count_tokens(str(input)), "output_tokens": count_tokens(json.dumps(response))}
+        with self.cassette._lock:
+            self.cassette.llm_calls.append({
+                "tool": self.tool.__name__,
+                "key": cache_key("replay", self.tool, str(input)),
+                "response": response,
+                "usage": usage,
+            })
+        return result
+
+
+class RecordingRuntime:
+    """AgentRuntime proxy recording every extractor output into a cassette."""
+    def __init__(self, runtime, cassette: Cassette):
+        self.runtime = runtime
+        self.cassette = cassette
+
+
+    def extractor(self, tool, model: Optional[str] = None):
+        return _RecordingExtractor(self.runtime.extractor(tool, model), tool, self.cassette)
+
+
+# -----------------------
+# Replay
+# -----------------------
+
+class ReplayGraph:
+    """GraphClient stand-in answering from a cassette after `latency` seconds per call."""
+    def __init__(self, cassette: Cassette, latency: float = 0.0):
+        self.cassette = cassette
+        self.latency = latency
+        self.calls = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+
+
+    def __getattr__(self, name: str):
+        if name.startswith("_"):
+            raise AttributeError(name)
+
+        def call(*args, **kwargs):
+            key = graph_key(name, args, kwargs)
+            with self._lock:
+                self.calls += 1
+                found = key in self.cassette.graph_calls
+                if not found:
+                    self.misses += 1
+            if self.latency:
+                time.sleep(self.latency)
+            return _decode(self.cassette.graph_calls[key]) if found else _FAILED.get(name)
+        return call
+
+
+class _ReplayExtractor:
+    def __init__(self, runtime: "ReplayRuntime", tool):
+        self.runtime = runtime
+        self.tool = tool
+
+
+    def invoke(self, input: Any, config: Optional[Dict[str, Any]] = None, **kwargs) -> Dict[str, Any]:
+        entry = self.runtime._next(self.tool, str(input))
+        if self.runtime.latency:
+            time.sleep(self.runtime.latency)
+        if entry is None or entry["response"] is None:
+            return {"responses": [], "messages": []}
+        return {"responses": [self.tool.model_validate(entry["response"])], "messages": []}
+
+
+class ReplayRuntime:
+    """
+    AgentRuntime stand-in replaying recorded tool outputs: exact prompt matches
+    first, then the next unused output of the same tool (a fallback).
+    """
+    def __init__(self, cassette: Cassette, latency: float = 0.0):
+        self.cassette = cassette
+        self.latency = latency
+        self.calls = 0
+        self.fallbacks = 0
+        self.misses = 0
+        self.prompt_tokens = 0
+        self.output_tokens = 0
+        self._used = [False] * len(cassette.llm_calls)
+        self._lock = threading.Lock()
+
+
+    def extractor(self, tool, model: Optional[str] = None):
+        return _ReplayExtractor(self, tool)
+
+
+    def _next(self, tool, prompt: str) -> Optional[Dict[str, Any]]:
+        key = cache_key("replay", tool, prompt)
+        with self._lock:
+            self.calls += 1
+            self.prompt_tokens += count_tokens(prompt)
+            calls = self.cassette.llm_calls
+            index = next((i for i, c in enumerate(calls) if c["key"] == key and not self._used[i]), None)
+            if index is None:
+                index = next((i for i, c in enumerate(calls) if c["key"] == key), None)
+            if index is None:
+                index = next((i for i, c in enumerate(calls) if c["tool"] == tool.__name__ and not self._used[i]), None)
+                if index is not None:
+                    self.fallbacks += 1
+            if index is None:
+                self.misses += 1
+                return None
+            self._used[index] = True
+            self.output_tokens += calls[index]["usage"]["output_tokens"]
+            return calls[index]
+
+
+# -----------------------
+# Graphs and runs
+# -----------------------
+
+def load_graph(kind: str):
+    """(compiled graph, state class) for "walk", "beam" or "dev" (src/agent-dev/new.py)."""
+    if kind == "walk":
+        from src.agent.navigator import AgentState, build_agent_graph
+        return build_agent_graph(), AgentState
+    if kind == "beam":
+        from src.agent.beam import BeamState, build_beam_graph
+        return build_beam_graph(), BeamState
+    if kind == "dev":
+        spec = importlib.util.spec_from_file_location("agent_dev_new", ROOT / "src" / "agent-dev" / "new.py")
+        module = importlib.util.module_from_spec(spec)
+        spec.loader.exec_module(module)
+        return module.build_agent_graph(), module.AgentState
+    raise ValueError(f"unknown graph {kind!r}")
+
+
+def run_query(graph, state_cls, query: Dict[str, Any], graph_client, runtime) -> Tuple[Dict[str, Any], float]:
+    state = state_cls(
+        user_query=query["user_query"],
+        drive_description=query.get("drive_description"),
+        current_path=query.get("path", ""),
+        max_attempts=query.get("max_attempts", 5),
+    )
+    start = time.perf_counter()
+    final = graph.invoke(state, {"configurable": {"graph_client": graph_client, "runtime": runtime}})
+    return final, time.perf_counter() - start
+
+
+def succeeded(final: Dict[str, Any], query: Dict[str, Any]) -> bool:
+    file = final.get("current_file")
+    if not final.get("verified") or file is None:
+        return False
+    return query.get("expected_id") in (None, file.id)
+
+
+def synthetic_queries(count: int, seed: int) -> List[Tuple[Dict[str, Any], Any, Any]]:
+    """(query, FakeDrive, ScriptedRuntime) triples over one synthetic drive, with a noisy oracle LLM."""
+    tree = make_tree(depth=4, branching=5, files_per_folder=6, seed=seed)
+    targets = random.Random(seed).sample(deepest_files(tree), count)
+    out = []
+    for n, target in enumerate(targets):
+        query = {
+            "id": f"synthetic-{n:02d}",
+            "user_query": "find the " + target["name"].rsplit(".", 1)[0].replace("_", " "),
+            "drive_description": "Synthetic drive: folders named after business topics",
+            "max_attempts": 6,
+            "expected_id": target["id"],
+        }
+        out.append((query, FakeDrive(tree), ScriptedRuntime(noisy_oracle(tree, target, error_rate=0.3, seed=n))))
+    return out
+
+
+def live_queries(path: Path) -> List[Tuple[Dict[str, Any], Any, Any]]:
+    from src.agent.runtime import default_runtime
+    from src.clients.oneDriveHelper import GraphClient
+    from src.utils.token_manager import TokenManager
+
+    client = GraphClient(TokenManager().get_access_token())
+    queries = json.loads(Path(path).read_text())
+    return [(dict(q, id=q.get("id", f"query-{n:02d}")), client, default_runtime()) for n, q in enumerate(queries)]
+
+
+def record(args) -> None:
+    graph, state_cls = load_graph(args.graph)
+    sources = live_queries(args.queries) if args.live else synthetic_queries(args.count, args.seed)
+    out = Path(args.out) / args.graph
+    for query, client, runtime in sources:
+        cassette = Cassette(query, args.graph)
+        final, elapsed = run_query(graph, state_cls, query, RecordingGraph(client, cassette), RecordingRuntime(runtime, cassette))
+        cassette.save(out / f"{query['id']}.json")
+        print(f"{query['id']}: {'ok' if succeeded(final, query) else 'FAILED':>6}  "
+              f"{len(cassette.graph_calls)} graph calls, {len(cassette.llm_calls)} LLM calls, {elapsed * 1000:.0f} ms")
+
+
+def bench(args) -> List[Dict[str, Any]]:
+    graph, state_cls = load_graph(args.graph)
+    paths = sorted((Path(args.cassettes) / (args.recorded or args.graph)).glob("*.json"))
+    if not paths:
+        raise SystemExit(f"no cassettes in {Path(args.cassettes) / (args.recorded or args.graph)}")
+    rows = []
+    for path in paths:
+        cassette = Cassette.load(path)
+        for _ in range(args.repeat):
+            client = ReplayGraph(cassette, args.graph_latency)
+            runtime = ReplayRuntime(cassette, args.llm_latency)
+            final, elapsed = run_query(graph, state_cls, cassette.query, client, runtime)
+            rows.append({
+                "query": cassette.query["id"],
+                "success": succeeded(final, cassette.query),
+                # Beam runs count ranking rounds; walks count decisions.
+                "steps": final.get("round") or len(final.get("decision_trace") or []),
+                "llm_calls": runtime.calls,
+                "prompt_tokens": runtime.prompt_tokens,
+                "output_tokens": runtime.output_tokens,
+                "graph_calls": client.calls,
+                "wall_ms": round(elapsed * 1000, 1),
+                "fallbacks": runtime.fallbacks,
+                "misses": runtime.misses + client.misses,
+            })
+    return rows
+
+
+def print_report(rows: List[Dict[str, Any]], args) -> None:
+    print(f"graph {args.graph}, Graph latency {args.graph_latency * 1000:.0f} ms, LLM latency {args.llm_latency * 1000:.0f} ms, "
+          f"tokens by {_COUNT_NAME}")
+    print(f"{'query':>14}{'ok':>4}{'steps':>7}{'llm':>5}{'prompt tok':>12}{'out tok':>9}{'graph':>7}{'wall ms':>9}{'fallback':>10}{'miss':>6}")
+    for r in rows:
+        print(f"{r['query']:>14}{'y' if r['success'] else 'n':>4}{r['steps']:>7}{r['llm_calls']:>5}{r['prompt_tokens']:>12}"
+              f"{r['output_tokens']:>9}{r['graph_calls']:>7}{r['wall_ms']:>9.0f}{r['fallbacks']:>10}{r['misses']:>6}")
+    print(f"success {sum(r['success'] for r in rows)}/{len(rows)}  "
+          f"mean steps {statistics.mean(r['steps'] for r in rows):.1f}  "
+          f"mean prompt tokens {statistics.mean(r['prompt_tokens'] for r in rows):.0f}  "
+          f"median wall {statistics.median(r['wall_ms'] for r in rows):.0f} ms")
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    rec = sub.add_parser("record", help="run reference queries and save cassettes")
+    rec.add_argument("--graph", choices=("walk", "beam", "dev"), default="walk")
+    rec.add_argument("--out", default=str(CASSETTES))
+    rec.add_argument("--live", action="store_true", help="use live Graph (Key Vault token) and OpenAI")
+    rec.add_argument("--queries", help="JSON list of {id, user_query, path, drive_description, expected_id} for --live")
+    rec.add_argument("--count", type=int, default=6, help="synthetic queries to record")
+    rec.add_argument("--seed", type=int, default=7)
+
+    run = sub.add_parser("bench", help="replay cassettes and report per-query metrics")
+    run.add_argument("--graph", choices=("walk", "beam", "dev"), default="walk")
+    run.add_argument("--recorded", help="cassette set to replay (defaults to --graph)")
+    run.add_argument("--cassettes", default=str(CASSETTES))
+    run.add_argument("--graph-latency", type=float, default=0.02, help="simulated seconds per Graph call")
+    run.add_argument("--llm-latency", type=float, default=0.2, help="simulated seconds per LLM call")
+    run.add_argument("--repeat", type=int, default=1)
+    run.add_argument("--json", help="also write the rows to this file")
+
+    args = parser.parse_args()
+    if args.command == "record":
+        if args.live and not args.queries:
+            parser.error("--live needs --queries")
+        record(args)
+    else:
+        rows = bench(args)
+        print_report(rows, args)
+        if args.json:
+            Path(args.json).write_text(json.dumps(rows, indent=2) + "\n")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,108 @@
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Callable, Dict, Optional
+
+
+def _value_for(schema: Dict[str, Any]) -> Any:
+    """Smallest valid value for a JSON schema property."""
+    if "enum" in schema:
+        return schema["enum"][0]
+    if "anyOf" in schema:
+        return _value_for(next(s for s in schema["anyOf"] if s.get("type") != "null"))
+    kind = schema.get("type")
+    if kind == "string":
+        return "stub"
+    if kind in ("number", "integer"):
+        return 1
+    if kind == "boolean":
+        return True
+    if kind == "array":
+        return []
+    if kind == "object":
+        return {k: _value_for(v) for k, v in schema.get("properties", {}).items()}
+    return None
+
+
+def schema_responder(tool: Dict[str, Any], body: Dict[str, Any]) -> Dict[str, Any]:
+    """Default responder: fill the forced tool's parameters from its schema."""
+    return _value_for(tool["function"]["parameters"])
+
+
+class StubOpenAIServer:
+    """
+    Minimal OpenAI chat-completions server for offline benchmarks.
+
+    Every request is answered with a tool call to the first tool in the request;
+    arguments come from `responder(tool, request_body)`. `latency` seconds are
+    slept per request to stand in for model time.
+    """
+    def __init__(
+        self,
+        responder: Callable[[Dict[str, Any], Dict[str, Any]], Dict[str, Any]] = schema_responder,
+        latency: float = 0.0,
+        port: int = 0,
+    ):
+        self.responder = responder
+        self.latency = latency
+        self.requests = 0
+        self.prompt_chars = 0
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def log_message(self, *args):
+                pass
+
+            def do_POST(self):
+                body = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+                stub.requests += 1
+                stub.prompt_chars += sum(len(str(m.get("content") or "")) for m in body.get("messages", []))
+                if stub.latency:
+                    time.sleep(stub.latency)
+                tool = body["tools"][0]
+                args = stub.responder(tool, body)
+                payload = json.dumps({
+                    "id": f"chatcmpl-{stub.requests}",
+                    "object": "chat.completion",
+                    "created": int(time.time()),
+                    "model": body.get("model", "stub"),
+                    "choices": [{
+                        "index": 0,
+                        "finish_reason": "tool_calls",
+                        "message": {
+                            "role": "assistant",
+                            "content": None,
+                            "tool_calls": [{
+                                "id": f"call_{stub.requests}",
+                                "type": "function",
+                                "function": {"name": tool["function"]["name"], "arguments": json.dumps(args)},
+                            }],
+                        },
+                    }],
+                    "usage": {"prompt_tokens": 0, "completion_tokens": 0, "total_tokens": 0},
+                }).encode()
+                self.send_response(200)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(payload)))
+                self.end_headers()
+                self.wfile.write(payload)
+
+        self._server = ThreadingHTTPServer(("127.0.0.1", port), Handler)
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def base_url(self) -> str:
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}/v1"
+
+    def __enter__(self):
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self._server.shutdown()
+        self._server.server_close()
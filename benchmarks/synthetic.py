@@ -0,0 +1,209 @@
+"""
+Synthetic drive trees and scripted stand-ins for the Graph client and the LLM,
+for offline agent benchmarks.
+"""
+import hashlib
+import random
+import re
+import threading
+import time
+from typing import Any, Callable, Dict, List, Optional
+
+WORDS = [
+    "budget", "contracts", "design", "finance", "hiring", "invoices", "legal", "marketing",
+    "minutes", "onboarding", "payroll", "planning", "policies", "projects", "proposals", "receipts",
+    "reports", "research", "roadmap", "sales", "security", "strategy", "taxes", "training",
+]
+EXTENSIONS = [".pdf", ".docx", ".xlsx", ".pptx", ".txt"]
+
+
+def make_tree(depth: int = 3, branching: int = 6, files_per_folder: int = 8, seed: int = 0) -> Dict[str, Any]:
+    """
+    Build {"items": {folder_id: [driveItem, ...]}, "paths": {item_id: path}} with
+    globally unique names. Folder "root" is the drive root.
+    """
+    rng = random.Random(seed)
+    items: Dict[str, List[Dict[str, Any]]] = {}
+    paths: Dict[str, str] = {"root": ""}
+    counter = [0]
+
+    def next_id():
+        counter[0] += 1
+        return f"SYNTH!{counter[0]:08d}"
+
+    def fill(folder_id: str, path: str, level: int):
+        children = []
+        if level < depth:
+            for _ in range(branching):
+                fid = next_id()
+                name = f"{rng.choice(WORDS)}-{rng.choice(WORDS)}-{fid[-4:]}"
+                paths[fid] = f"{path}/{name}"
+                children.append({
+                    "id": fid,
+                    "name": name,
+                    "eTag": f'"{{{fid}}},1"',
+                    "folder": {"childCount": branching + files_per_folder},
+                    "parentReference": {"path": f"/drive/root:{path}"},
+                    "lastModifiedDateTime": "2025-06-01T00:00:00Z",
+                })
+                fill(fid, paths[fid], level + 1)
+        for _ in range(files_per_folder):
+            iid = next_id()
+            name = f"{rng.choice(WORDS)}_{rng.choice(WORDS)}_{iid[-4:]}{rng.choice(EXTENSIONS)}"
+            paths[iid] = f"{path}/{name}"
+            children.append({
+                "id": iid,
+                "name": name,
+                "eTag": f'"{{{iid}}},1"',
+                "size": rng.randint(1_000, 5_000_000),
+                "file": {"mimeType": "application/octet-stream"},
+                "parentReference": {"path": f"/drive/root:{path}"},
+                "lastModifiedDateTime": "2025-06-01T00:00:00Z",
+            })
+        items[folder_id] = children
+
+    fill("root", "", 0)
+    return {"items": items, "paths": paths}
+
+
+def deepest_files(tree: Dict[str, Any]) -> List[Dict[str, Any]]:
+    max_depth = max(p.count("/") for p in tree["paths"].values())
+    return [
+        i for children in tree["items"].values() for i in children
+        if "file" in i and tree["paths"][i["id"]].count("/") == max_depth
+    ]
+
+
+class FakeDrive:
+    """GraphClient stand-in over a synthetic tree with a fixed per-call latency."""
+    def __init__(self, tree: Dict[str, Any], latency: float = 0.0):
+        self.tree = tree
+        self.latency = latency
+        self.calls = 0
+        self._lock = threading.Lock()
+
+    def _tick(self):
+        with self._lock:
+            self.calls += 1
+        if self.latency:
+            time.sleep(self.latency)
+
+    def list_root(self):
+        self._tick()
+        return self.tree["items"]["root"]
+
+    def list_folder(self, folder_id: str):
+        self._tick()
+        return self.tree["items"].get(folder_id, [])
+
+    def iter_children(self, folder_id: str = "root", select=None, page_size: Optional[int] = None):
+        """Pages of `page_size` (Graph's default 200), one call each."""
+        items = self.tree["items"].get(folder_id, [])
+        size = page_size or 200
+        for start in range(0, max(len(items), 1), size):
+            self._tick()
+            yield items[start:start + size]
+
+    def get_item(self, item_id: str) -> Optional[Dict[str, Any]]:
+        self._tick()
+        return next((i for children in self.tree["items"].values() for i in children if i["id"] == item_id), None)
+
+    def get_folder_id_by_path(self, path: str) -> Optional[str]:
+        return next((i for i, p in self.tree["paths"].items() if p == path), None)
+
+    def download_file(self, file_id: str) -> bytes:
+        self._tick()
+        return f"contents of {self.tree['paths'].get(file_id, file_id)}".encode()
+
+    def download_prefix(self, file_id: str, max_bytes: int) -> bytes:
+        return self.download_file(file_id)[:max_bytes]
+
+
+_ROW = re.compile(r"^(c\d+)\t([DF])\t([^\t]*)", re.MULTILINE)
+
+
+class _ScriptedExtractor:
+    def __init__(self, runtime: "ScriptedRuntime", tool):
+        self.runtime = runtime
+        self.tool = tool
+
+    def invoke(self, input: str):
+        return self.runtime._call(self.tool, input)
+
+
+class ScriptedRuntime:
+    """
+    AgentRuntime stand-in whose extractors are answered by `script(tool, prompt)`
+    after `latency` seconds. Counts calls and prompt characters.
+    """
+    def __init__(self, script: Callable[[type, str], Any], latency: float = 0.0):
+        self.script = script
+        self.latency = latency
+        self.calls = 0
+        self.prompt_chars = 0
+        self._lock = threading.Lock()
+
+    def extractor(self, tool, model: Optional[str] = None):
+        return _ScriptedExtractor(self, tool)
+
+    def _call(self, tool, prompt: str):
+        with self._lock:
+            self.calls += 1
+            self.prompt_chars += len(prompt)
+        if self.latency:
+            time.sleep(self.latency)
+        return {"responses": [self.script(tool, prompt)]}
+
+
+def noisy_oracle(tree: Dict[str, Any], target: Dict[str, Any], error_rate: float = 0.3, seed: int = 0):
+    """
+    Scripted LLM that knows where `target` lives but, for a deterministic
+    `error_rate` share of folders, ranks a wrong subfolder first (the right one
+    second). Works for Decision, RankedDecision and FileRelevance tools.
+    """
+    target_path = tree["paths"][target["id"]]
+    on_path = set(target_path.strip("/").split("/"))
+
+    def wrong_first(rows) -> bool:
+        key = f"{seed}:{','.join(name for _, _, name in rows)}"
+        h = int.from_bytes(hashlib.blake2b(key.encode(), digest_size=8).digest(), "little")
+        return (h % 10_000) / 10_000 < error_rate
+
+    def order(rows):
+        good = [r for r in rows if r[2] in on_path]
+        rest = [r for r in rows if r[2] not in on_path]
+        folders = [r for r in rest if r[1] == "D"]
+        if good and good[0][1] == "D" and folders and wrong_first(rows):
+            return [folders[0], good[0]] + [r for r in rest if r is not folders[0]]
+        return good + rest
+
+    def script(tool, prompt: str):
+        name = tool.__name__
+        if name == "FileRelevance":
+            match = target["name"] in prompt.split("File content")[0]
+            return tool(score=1.0 if match else 0.0, reason="oracle", is_match=match)
+
+        ranked = order(_ROW.findall(prompt))
+        if not ranked:
+            return None
+        if name == "Decision":
+            ref, kind, item_name = ranked[0]
+            action = "select_file" if kind == "F" else "enter_folder"
+            return tool(action=action, id=ref, name=item_name, reason="oracle")
+        if name == "RankedDecision":
+            scores = [0.9, 0.7, 0.4, 0.3, 0.2]
+            options = []
+            for i, (ref, kind, item_name) in enumerate(ranked[:5]):
+                score = scores[i] if item_name in on_path or i < 2 else 0.1
+                if kind == "F" and item_name != target["name"]:
+                    score = min(score, 0.3)
+                options.append({
+                    "ref": ref,
+                    "action": "select_file" if kind == "F" else "enter_folder",
+                    "score": score,
+                    "reason": "oracle",
+                })
+            return tool(options=options)
+        raise ValueError(f"No script for tool {name}")
+
+    return script
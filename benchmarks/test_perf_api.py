@@ -0,0 +1,31 @@
+"""FastAPI endpoints end to end over HTTP, backed by the fake Graph server (pytest-benchmark)."""
+import httpx
+import pytest
+
+pytest.importorskip("pytest_benchmark")
+
+
+@pytest.fixture(scope="module")
+def http(api):
+    with httpx.Client(base_url=api, timeout=30) as client:
+        yield client
+
+
+def test_drive_root(benchmark, http):
+    assert benchmark(http.get, "/drive/root").status_code == 200
+
+
+def test_folder_stream_ndjson(benchmark, fake_graph, http):
+    folder_id = fake_graph.children["root"][0]
+    response = benchmark(http.get, f"/drive/folder/{folder_id}/stream", params={"select": "id,name", "top": 100})
+    assert response.status_code == 200 and response.text.count("\n") == len(fake_graph.children[folder_id])
+
+
+def test_content_range_proxy(benchmark, fake_graph, http):
+    item_id = next(i for i, item in fake_graph.items.items() if "file" in item)
+    response = benchmark(http.get, f"/drive/items/{item_id}/content", headers={"Range": "bytes=0-65535"})
+    assert response.status_code == 206 and len(response.content) == 65536
+
+
+def test_search_cached(benchmark, http):
+    assert benchmark(http.get, "/drive/search", params={"q": "budget"}).status_code == 200
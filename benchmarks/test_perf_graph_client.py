@@ -0,0 +1,58 @@
+"""GraphClient against the fake Graph server (pytest-benchmark; see conftest.py)."""
+import os
+
+import pytest
+
+pytest.importorskip("pytest_benchmark")
+
+from src.clients.oneDriveHelper import UPLOAD_CHUNK_ALIGN, GraphClient, UploadSession
+
+
+def first_file(fake):
+    return next(i for i in fake.items.values() if "file" in i)
+
+
+def test_list_root(benchmark, graph_client):
+    items = benchmark(graph_client.list_root)
+    assert len(items) == 46
+
+
+def test_list_5000_item_folder(benchmark, big_folder_graph):
+    client = GraphClient("token", base_url=big_folder_graph.base_url)
+    items = benchmark.pedantic(client.list_folder, args=("root",), rounds=5)
+    assert len(items) == 5000
+
+
+def test_iter_children_select_top_999(benchmark, big_folder_graph):
+    client = GraphClient("token", base_url=big_folder_graph.base_url)
+
+    def listing():
+        return sum(len(page) for page in client.iter_children("root", select=["id", "name", "size"], page_size=999))
+
+    assert benchmark.pedantic(listing, rounds=5) == 5000
+
+
+def test_search(benchmark, graph_client):
+    assert benchmark(graph_client.search, "budget")
+
+
+def test_get_download_info(benchmark, fake_graph, graph_client):
+    info = benchmark(graph_client.get_download_info, first_file(fake_graph)["id"])
+    assert info["@microsoft.graph.downloadUrl"]
+
+
+def test_download_prefix_64k(benchmark, fake_graph, graph_client):
+    data = benchmark(graph_client.download_prefix, first_file(fake_graph)["id"], 65536)
+    assert len(data) == 65536
+
+
+def test_upload_session_4mib(benchmark, graph_client):
+    data = os.urandom(4 * 2**20)
+
+    def upload():
+        url = graph_client.create_upload_session("/bench/upload.bin")
+        session = UploadSession(graph_client, url, len(data), 10 * UPLOAD_CHUNK_ALIGN)
+        session.feed(data)
+        return session.flush(final=True)
+
+    assert benchmark.pedantic(upload, rounds=5)["size"] == len(data)
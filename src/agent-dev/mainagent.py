@@ -7,6 +7,24 @@ from langgraph.graph import StateGraph, START, END
 from langgraph.checkpoint.memory import MemorySaver
 from langgraph.store.memory import InMemoryStore
 
+from src.agent.checkpoint import make_checkpointer
+from src.core.config import settings
+from src.index.hybrid import HybridRetriever
+
+# Only the best fused results are shown to the LLM reranker.
+RERANK_TOP_K = settings.RERANK_TOP_K
+
+_default_retriever: Optional[HybridRetriever] = None
+
+
+def default_retriever() -> HybridRetriever:
+    """Retriever for runs configured without one: the local full-text index only (Graph search needs a token)."""
+    global _default_retriever
+    if _default_retriever is None:
+        from src.index.lexical import LocalIndex
+        _default_retriever = HybridRetriever(local_index=LocalIndex(settings.LOCAL_INDEX_PATH))
+    return _default_retriever
+
 # ---------------------------------------------------------
 # 1. PYDANTIC MODELS (STATE & HISTORY)
 # ---------------------------------------------------------
@@ -16,6 +34,9 @@ class RerankItem(BaseModel):
     score: float = Field(description="Score between 0.0 and 1.0")
     explanation: str
 
+class RerankResult(BaseModel):
+    items: List[RerankItem]
+
 class SearchParams(BaseModel):
     query_string: str
     query_template: str
@@ -65,22 +86,76 @@ def generate_query_node(state: AgentState, config):
     }
 
 def execute_search_node(state: AgentState, config):
-    """Executes the search using the GraphAPI helper."""
-    sp_helper = config["configurable"].get("sp_helper_client")
-    # results = sp_helper.search(state.search_params)
-    mock_results = [{"id": "123", "name": "HWA_Renewals_2025"}]
-    
+    """
+    Runs Graph search, the local lexical index and the vector index concurrently
+    (HybridRetriever from config, else `default_retriever()`) and keeps the
+    RRF-fused, id-deduplicated results.
+    """
+    retriever: HybridRetriever = config["configurable"].get("retriever") or default_retriever()
+    params = state.search_params
+    results = retriever.retrieve(
+        params.query_string,
+        query_template=params.query_template,
+        semantic_query=params.semantic_query,
+        top_k=RERANK_TOP_K * 2,
+    )
+
     return {
-        "search_results": mock_results,
-        "history": state.history + [AgentHistory(iteration=state.iteration, stage="search", result_count=len(mock_results))]
+        "search_results": results,
+        "history": state.history + [AgentHistory(iteration=state.iteration, stage="search", result_count=len(results))]
     }
 
-def rerank_node(state: AgentState):
-    """Reranks results using an LLM to find the best match."""
-    ranked = [RerankItem(item_id="123", name="HWA_Renewals_2025", score=0.95, explanation="Exact match")]
+def build_rerank_prompt(state: AgentState, candidates: List[Dict[str, Any]]) -> str:
+    lines = "\n".join(
+        f"{c['id']}\t{c.get('name') or ''}\t{c.get('path') or ''}\t{(c.get('snippet') or '')[:200]!r}"
+        for c in candidates
+    )
+    return f"""
+{state.system_prompt}
+
+Rank the search results below by how well they answer the user's request.
+
+User request:
+\"{state.user_query}\"
+
+Results (id, name, path, snippet), tab separated:
+{lines}
+
+Return every result with a score between 0.0 and 1.0 and a short explanation.
+"""
+
+def rerank_node(state: AgentState, config):
+    """
+    Reranks the top fused results in ONE batched LLM call.
+    Falls back to the fusion order when no AgentRuntime is configured or the LLM returns nothing.
+    """
+    candidates = state.search_results[:RERANK_TOP_K]
+    runtime = config["configurable"].get("runtime")
+    ranked: List[RerankItem] = []
+
+    if candidates and runtime is not None:
+        extractor = runtime.extractor(RerankResult)
+        result = extractor.invoke(input=build_rerank_prompt(state, candidates)).get("responses", [None])[0]
+        if result is not None:
+            known = {c["id"] for c in candidates}
+            ranked = sorted((i for i in result.items if i.item_id in known), key=lambda i: i.score, reverse=True)
+
+    if not ranked and candidates:
+        top = candidates[0]["rrf_score"]
+        ranked = [
+            RerankItem(item_id=c["id"], name=c.get("name") or "", score=c["rrf_score"] / top,
+                       explanation=f"Fusion rank from {sorted(c['sources'])}")
+            for c in candidates
+        ]
+
     return {
         "ranked_items": ranked,
-        "history": state.history + [AgentHistory(iteration=state.iteration, stage="rerank", explanation="Found high confidence match")]
+        "history": state.history + [AgentHistory(
+            iteration=state.iteration,
+            stage="rerank",
+            result_count=len(ranked),
+            explanation=ranked[0].explanation if ranked else "No results",
+        )]
     }
 
 def select_final_node(state: AgentState):
@@ -152,7 +227,7 @@ def visualize_graph(graph):
 # EXECUTION
 # ---------------------------------------------------------
 if __name__ == "__main__":
-    checkpointer = MemorySaver()
+    checkpointer = make_checkpointer(settings.AGENT_CHECKPOINT_URL) or MemorySaver()
     app = build_graph(checkpointer=checkpointer)
     
     # Visualize
@@ -1,17 +1,9 @@
 import pprint
 from langgraph.graph import StateGraph, START, END
 from pydantic import BaseModel, Field
-from typing import List, Optional, Literal
-from langchain_openai import ChatOpenAI
-from trustcall import create_extractor
+from typing import Annotated, List, Optional, Literal
 from src.clients.oneDriveHelper import GraphClient
-
-import os
-from dotenv import load_dotenv
-
-load_dotenv()
-OPENAI_API_KEY = os.getenv("OPENAI_API_KEY")
-OPENAI_MODEL = os.getenv("OPENAI_MODEL")
+from src.agent.runtime import AgentRuntime, get_runtime
 
 # -----------------------
 # MODELS
@@ -76,9 +68,9 @@ class AgentState(BaseModel):
     done: bool = False
     verified: bool = False
 
-    visited_items: List[str] = Field(default_factory=list)
-    decision_trace: List[DecisionStep] = Field(default_factory=list)
-    rejected_paths: List[RejectedPath] = Field(default_factory=list)
+    visited_items: Annotated[List[str], append_list] = Field(default_factory=list)
+    decision_trace: Annotated[List[DecisionStep], append_list] = Field(default_factory=list)
+    rejected_paths: Annotated[List[RejectedPath], append_list] = Field(default_factory=list)
 
     # REPLACED each step (not union)
     candidates: List[Candidate] = Field(default_factory=list)
@@ -86,12 +78,6 @@ class AgentState(BaseModel):
 
     class Config:
         arbitrary_types_allowed = True
-        # 👇 union-based reducers
-        reducers = {
-            "visited_items": append_list,
-            "decision_trace": append_list,
-            "rejected_paths": append_list,
-        }
 
 
 # -----------------------
@@ -169,13 +155,11 @@ Return STRICT JSON:
 """
 
 
-def decide_next(state: AgentState):
+def decide_next(state: AgentState, config):
     if not state.candidates:
         return {"done": True}
 
-    llm = ChatOpenAI(model=OPENAI_MODEL, openai_api_key=OPENAI_API_KEY, temperature=0)
-
-    extractor = create_extractor(llm, tools=[Decision], tool_choice="Decision")
+    extractor = get_runtime(config).extractor(Decision)
 
     decision: Decision = extractor.invoke(
         input=build_decision_prompt(state)
@@ -246,9 +230,7 @@ def download_and_verify(state: AgentState, config):
     file_bytes = graph_client.download_file(state.current_file.id)
     md_text = file_bytes.decode("utf-8", errors="ignore")
 
-    llm = ChatOpenAI(model=OPENAI_MODEL, openai_api_key=OPENAI_API_KEY, temperature=0)
-
-    extractor = create_extractor(llm, tools=[FileRelevance], tool_choice="FileRelevance")
+    extractor = get_runtime(config).extractor(FileRelevance)
 
     relevance: FileRelevance = extractor.invoke(
         input=build_relevance_prompt(state, md_text)
@@ -307,26 +289,28 @@ def build_agent_graph():
 # -----------------------
 # RUN EXAMPLE
 # -----------------------
-from src.utils.token_manager import TokenManager
-access_token = TokenManager().get_access_token()
-client = GraphClient(access_token)
-
-state = AgentState(
-    user_query="find my test.txt, which is within the test folder not in root",
-    drive_description="Files organized by Work, Personal, Education"
-)
-
-agent_graph = build_agent_graph()
-final = agent_graph.invoke(state, config={"configurable": {"graph_client": client}})
-# pprint.pprint(final)
-import json
-def pydantic_encoder(obj):
-    if hasattr(obj, "model_dump"):
-        return obj.model_dump()
-    elif hasattr(obj, "dict"):
-        return obj.dict()
-    else:
-        return str(obj)
 
-with open("src/agent/final_state.json", "w") as f:
-    json.dump(final, f, indent=4, default=pydantic_encoder)
\ No newline at end of file
+if __name__ == "__main__":
+    from src.utils.token_manager import TokenManager
+    access_token = TokenManager().get_access_token()
+    client = GraphClient(access_token)
+
+    state = AgentState(
+        user_query="find my test.txt, which is within the test folder not in root",
+        drive_description="Files organized by Work, Personal, Education"
+    )
+
+    agent_graph = build_agent_graph()
+    final = agent_graph.invoke(state, config={"configurable": {"graph_client": client, "runtime": AgentRuntime()}})
+    # pprint.pprint(final)
+    import json
+    def pydantic_encoder(obj):
+        if hasattr(obj, "model_dump"):
+            return obj.model_dump()
+        elif hasattr(obj, "dict"):
+            return obj.dict()
+        else:
+            return str(obj)
+
+    with open("src/agent-dev/final_state.json", "w") as f:
+        json.dump(final, f, indent=4, default=pydantic_encoder)
\ No newline at end of file
@@ -0,0 +1,254 @@
+import os
+from typing import Annotated, Dict, List, Literal, Optional, Tuple
+
+from langgraph.graph import StateGraph, START, END
+from langgraph.types import Send
+from pydantic import BaseModel
+
+from src.agent.checkpoint import with_state_types
+from src.agent.candidates import encode_candidates, resolve_alias
+from src.agent.navigator import (
+    AgentState,
+    Candidate,
+    DecisionStep,
+    FoundFile,
+    PROMPT_TOKEN_BUDGET,
+    PRERANK_TOP_K,
+    VERIFY_TOP_N,
+    to_candidate,
+    verify_files,
+)
+from src.agent.prerank import exact_match, rank_candidates
+from src.agent.runtime import get_runtime
+from src.clients.oneDriveHelper import GraphClient
+from src.utils.telemetry import instrument_node
+
+# A file option scored at least this high ends the search early.
+FILE_ACCEPT_SCORE = float(os.getenv("NAV_BEAM_FILE_ACCEPT_SCORE", "0.8"))
+
+
+# -----------------------
+# Models
+# -----------------------
+
+class RankedOption(BaseModel):
+    ref: str
+    action: Literal["enter_folder", "select_file"]
+    score: float
+    reason: str
+
+class RankedDecision(BaseModel):
+    options: List[RankedOption]
+
+class FrontierNode(BaseModel):
+    id: str
+    path: str
+    depth: int
+    score: float = 1.0
+
+class FolderListing(BaseModel):
+    node: FrontierNode
+    candidates: List[Candidate]
+
+class ScoredFile(BaseModel):
+    id: str
+    name: str
+    path: str
+    folder_path: str
+    score: float
+    reason: str
+
+
+def collect_listings(old: Optional[List[FolderListing]], new: Optional[List[FolderListing]]):
+    """Append fan-out results; a `None` update clears them for the next round."""
+    if new is None:
+        return []
+    return (old or []) + new
+
+
+class BeamState(AgentState):
+    beam_width: int = 3
+    max_depth: int = 5
+    round: int = 0
+    frontier: List[FrontierNode] = []
+    listings: Annotated[List[FolderListing], collect_listings] = []
+    file_options: List[ScoredFile] = []
+
+
+# -----------------------
+# Node implementations
+# -----------------------
+
+def beam_start(state: BeamState, config):
+    graph_client: GraphClient = config["configurable"]["graph_client"]
+    start_id = state.start_item_id
+    if not start_id and state.current_path:
+        start_id = graph_client.get_folder_id_by_path(state.current_path)
+    node = FrontierNode(id=start_id or "root", path=state.current_path, depth=0)
+    return {"frontier": [node], "listings": None}
+
+
+def fan_out(state: BeamState):
+    """List every frontier folder concurrently."""
+    return [Send("list_folder", node) for node in state.frontier]
+
+
+def list_folder(node: FrontierNode, config):
+    graph_client: GraphClient = config["configurable"]["graph_client"]
+    items = graph_client.list_root() if node.id == "root" else graph_client.list_folder(node.id)
+    return {"listings": [FolderListing(node=node, candidates=[to_candidate(i) for i in items])]}
+
+
+def build_beam_prompt(state: BeamState, sections: List[str], beam_width: int) -> str:
+    listing = "\n\n".join(sections)
+    return f"""
+You are a file navigation agent exploring several OneDrive folders at once to find the file that best matches the user's search query.
+
+User search query:
+\"{state.user_query}\"
+
+Drive description:
+\"{state.drive_description}\"
+
+Folder listings (tab separated; type D = folder, F = file):
+{listing}
+
+Rank the most promising items across ALL folders above. Return up to {beam_width + 2} options, best first, each with:
+- ref: the item's ref (e.g. c3)
+- action: enter_folder for folders, select_file for files
+- score: 0.0-1.0 likelihood that this item is or leads to the wanted file
+- reason: short justification
+"""
+
+
+def rank_frontier(state: BeamState, config):
+    """
+    Score the children of every listed frontier folder with one ranked LLM call
+    and prune to the `beam_width` best subfolders for the next round.
+    """
+    listings = sorted(state.listings, key=lambda l: -l.node.score)
+    by_id: Dict[str, Tuple[Candidate, FrontierNode]] = {}
+    for listing in listings:
+        for c in listing.candidates:
+            by_id[c.id] = (c, listing.node)
+
+    options: List[Tuple[float, Candidate, FrontierNode, str]] = []
+    files = [c for l in listings for c in l.candidates if c.type == "file"]
+    named = exact_match(state.user_query, files)
+    if named is not None:
+        c, node = by_id[named.id]
+        options.append((1.0, c, node, "Exact name match with the query (no LLM call)"))
+    elif by_id:
+        sections, aliases, start = [], {}, 1
+        budget = max(300, PROMPT_TOKEN_BUDGET // max(1, len(listings)))
+        for listing in listings:
+            shortlist = [c for _, c in rank_candidates(state.user_query, listing.candidates)[:PRERANK_TOP_K]]
+            table, part = encode_candidates(shortlist, budget, start=start)
+            sections.append(f"### Folder: {listing.node.path or '/'}\n{table}")
+            aliases.update(part)
+            start += len(shortlist)
+
+        extractor = get_runtime(config).extractor(RankedDecision)
+        ranked: Optional[RankedDecision] = extractor.invoke(
+            input=build_beam_prompt(state, sections, state.beam_width)
+        ).get("responses", [None])[0]
+
+        for opt in (ranked.options if ranked else []):
+            chosen = by_id.get(resolve_alias(opt.ref, aliases) or "")
+            if chosen is not None:
+                options.append((max(0.0, min(1.0, opt.score)), chosen[0], chosen[1], opt.reason))
+        if not options:
+            # No usable LLM output: fall back to the lexical ranking.
+            scored = rank_candidates(state.user_query, [c for c, _ in by_id.values()])
+            top = scored[0][0] or 1.0
+            options = [(s / top, c, by_id[c.id][1], "Lexical pre-ranking") for s, c in scored[: state.beam_width + 2]]
+
+    visited = set(state.visited_items) | {l.node.id for l in listings}
+    newly_visited = [l.node.id for l in listings if l.node.id not in state.visited_items]
+    file_options = {f.id: f for f in state.file_options}
+    next_frontier: List[FrontierNode] = []
+    trace = []
+    for score, c, node, reason in sorted(options, key=lambda o: -o[0]):
+        path = f"{node.path}/{c.name}"
+        if c.type == "file":
+            if c.id not in file_options or file_options[c.id].score < score:
+                file_options[c.id] = ScoredFile(
+                    id=c.id, name=c.name, path=path, folder_path=node.path, score=score, reason=reason
+                )
+        elif c.id not in visited and node.depth + 1 < state.max_depth:
+            next_frontier.append(FrontierNode(id=c.id, path=path, depth=node.depth + 1, score=score))
+        trace.append(DecisionStep(
+            attempt=state.round + 1,
+            depth=node.depth,
+            chosen_id=c.id,
+            chosen_name=c.name,
+            chosen_type=c.type,
+            reason=f"[{score:.2f}] {reason}",
+            alternatives=[],
+        ))
+
+    next_frontier = next_frontier[: state.beam_width]
+    best_file = max(file_options.values(), key=lambda f: f.score, default=None)
+    done = (
+        not next_frontier
+        or state.round + 1 >= state.max_depth
+        or (best_file is not None and best_file.score >= FILE_ACCEPT_SCORE)
+    )
+
+    updates = {
+        "round": state.round + 1,
+        "frontier": next_frontier,
+        "listings": None,
+        "file_options": sorted(file_options.values(), key=lambda f: -f.score),
+        "visited_items": newly_visited,
+        "decision_trace": trace,
+        "done": done,
+    }
+    if done and best_file is not None:
+        updates["current_file"] = FoundFile(id=best_file.id, name=best_file.name, path=best_file.path)
+        updates["current_path"] = best_file.folder_path
+    return updates
+
+
+def verify_options(state: BeamState, config):
+    """Verify the best-scored files found across all explored folders concurrently."""
+    if not state.current_file:
+        return {}
+    files = [FoundFile(id=f.id, name=f.name, path=f.path) for f in state.file_options[:VERIFY_TOP_N]]
+    if not any(f.id == state.current_file.id for f in files):
+        files = [state.current_file] + files[: VERIFY_TOP_N - 1]
+    return verify_files(state, files, config)
+
+
+def route_after_rank(state: BeamState):
+    if state.done:
+        return "download_and_verify" if state.current_file else END
+    return fan_out(state)
+
+
+# -----------------------
+# Build StateGraph
+# -----------------------
+
+def build_beam_graph(checkpointer=None, store=None):
+    """
+    Beam-search variant of the navigation graph: each round lists up to
+    `beam_width` folders in parallel (Send fan-out), ranks all their children
+    in one LLM call and keeps the best subfolders as the next frontier.
+    """
+    graph = StateGraph(BeamState)
+
+    graph.add_node("resolve_start", instrument_node("resolve_start", beam_start))
+    graph.add_node("list_folder", instrument_node("list_folder", list_folder), input_schema=FrontierNode)
+    graph.add_node("rank_frontier", instrument_node("rank_frontier", rank_frontier))
+    graph.add_node("download_and_verify", instrument_node("download_and_verify", verify_options))
+
+    graph.add_edge(START, "resolve_start")
+    graph.add_conditional_edges("resolve_start", fan_out, ["list_folder"])
+    graph.add_edge("list_folder", "rank_frontier")
+    graph.add_conditional_edges(
+        "rank_frontier", route_after_rank, ["list_folder", "download_and_verify", END]
+    )
+    graph.add_edge("download_and_verify", END)
+
+    return graph.compile(checkpointer=with_state_types(checkpointer, BeamState), store=store)
@@ -0,0 +1,87 @@
+import math
+from collections import Counter
+from pathlib import PurePosixPath
+from typing import Dict, Iterable, List, Optional, Tuple
+
+# Columns sent to the LLM for every folder item, in order.
+COLUMNS = ("ref", "type", "name", "size", "modified")
+
+
+def estimate_tokens(text: str) -> int:
+    """Cheap, deterministic token estimate (~4 chars per token for English/JSON)."""
+    return math.ceil(len(text) / 4)
+
+
+def _human_size(size: Optional[int]) -> str:
+    if size is None:
+        return ""
+    for unit in ("B", "K", "M", "G"):
+        if size < 1024:
+            return f"{size:.0f}{unit}"
+        size /= 1024
+    return f"{size:.0f}T"
+
+
+def _cell(value: str) -> str:
+    return value.replace("\t", " ").replace("\n", " ")
+
+
+def candidate_row(alias: str, c) -> str:
+    return "\t".join((
+        alias,
+        "D" if c.type == "folder" else "F",
+        _cell(c.name),
+        "" if c.type == "folder" else _human_size(c.size),
+        (c.modified or "")[:10],
+    ))
+
+
+def _summary(rest: Iterable) -> str:
+    rest = list(rest)
+    folders = sum(1 for c in rest if c.type == "folder")
+    exts = Counter((PurePosixPath(c.name).suffix.lower() or "none") for c in rest if c.type != "folder")
+    parts = [f"{folders} folders"] if folders else []
+    parts += [f"{n} {ext}" for ext, n in sorted(exts.items(), key=lambda kv: (-kv[1], kv[0]))[:5]]
+    return f"... {len(rest)} more items not shown ({', '.join(parts)})"
+
+
+def encode_candidates(candidates: List, max_tokens: int = 2000, start: int = 1) -> Tuple[str, Dict[str, str]]:
+    """
+    Encode folder items as a compact TSV table within a token budget.
+
+    Each item gets a short local alias (`c1`, `c2`, ...) in place of its long
+    driveItem id; the returned mapping turns the alias chosen by the LLM back
+    into the id. Items are kept in the given order (callers pass them ranked);
+    once the budget is reached the remainder is summarized in one line.
+    `start` offsets alias numbering so several tables can share one prompt.
+    """
+    header = "\t".join(COLUMNS)
+    lines = [header]
+    aliases: Dict[str, str] = {}
+    used = estimate_tokens(header)
+    # Reserve room for the summary line so the total never exceeds the budget.
+    reserve = 30
+
+    for i, c in enumerate(candidates):
+        alias = f"c{start + i}"
+        row = candidate_row(alias, c)
+        cost = estimate_tokens(row) + 1
+        # The last row needs no room for a summary after it, only for itself.
+        limit = max_tokens if i == len(candidates) - 1 else max_tokens - reserve
+        if used + cost > limit:
+            lines.append(_summary(candidates[i:]))
+            break
+        lines.append(row)
+        aliases[alias] = c.id
+        used += cost
+    return "\n".join(lines), aliases
+
+
+def resolve_alias(ref: str, aliases: Dict[str, str]) -> Optional[str]:
+    """Map an alias (tolerating case/whitespace) or an already-real id back to a driveItem id."""
+    ref = (ref or "").strip()
+    if ref in aliases:
+        return aliases[ref]
+    if ref.lower() in aliases:
+        return aliases[ref.lower()]
+    return ref if ref in aliases.values() else None
@@ -0,0 +1,472 @@
+import logging
+import os
+import random
+import sqlite3
+import threading
+import time
+from typing import Any, AsyncIterator, Dict, Iterator, List, Optional, Sequence, Set, Tuple, get_args
+
+from langchain_core.runnables import RunnableConfig
+from langgraph.checkpoint.base import (
+    WRITES_IDX_MAP,
+    BaseCheckpointSaver,
+    ChannelVersions,
+    Checkpoint,
+    CheckpointMetadata,
+    CheckpointTuple,
+    SerializerProtocol,
+    get_checkpoint_id,
+    get_checkpoint_metadata,
+)
+from langgraph.checkpoint.serde.jsonplus import JsonPlusSerializer
+from pydantic import BaseModel
+
+from src.agent.store import sqlite_path
+
+logger = logging.getLogger(__name__)
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS checkpoints (
+    thread_id TEXT NOT NULL,
+    checkpoint_ns TEXT NOT NULL DEFAULT '',
+    checkpoint_id TEXT NOT NULL,
+    parent_checkpoint_id TEXT,
+    type TEXT,
+    checkpoint BLOB,
+    metadata_type TEXT,
+    metadata BLOB,
+    PRIMARY KEY (thread_id, checkpoint_ns, checkpoint_id)
+);
+CREATE TABLE IF NOT EXISTS blobs (
+    thread_id TEXT NOT NULL,
+    checkpoint_ns TEXT NOT NULL DEFAULT '',
+    channel TEXT NOT NULL,
+    version TEXT NOT NULL,
+    type TEXT NOT NULL,
+    blob BLOB,
+    PRIMARY KEY (thread_id, checkpoint_ns, channel, version)
+);
+CREATE TABLE IF NOT EXISTS writes (
+    thread_id TEXT NOT NULL,
+    checkpoint_ns TEXT NOT NULL DEFAULT '',
+    checkpoint_id TEXT NOT NULL,
+    task_id TEXT NOT NULL,
+    idx INTEGER NOT NULL,
+    channel TEXT NOT NULL,
+    type TEXT,
+    value BLOB,
+    task_path TEXT NOT NULL DEFAULT '',
+    PRIMARY KEY (thread_id, checkpoint_ns, checkpoint_id, task_id, idx)
+);
+CREATE TABLE IF NOT EXISTS threads (
+    thread_id TEXT PRIMARY KEY,
+    updated REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS threads_updated ON threads (updated);
+"""
+
+
+class SqliteCheckpointSaver(BaseCheckpointSaver[str]):
+    """
+    Durable LangGraph checkpointer on a single SQLite file.
+
+    Channel values are stored once per (channel, version) in `blobs`; a
+    checkpoint row only holds the channel version map. Each step therefore
+    writes just the state fields it changed, not a full state snapshot.
+    Resume a run with `graph.invoke(None, {"configurable": {"thread_id": ...}})`.
+
+    Deserialization is limited to LangGraph's safe types plus the state schema
+    types the compiled graph registers, since checkpoints outlive the process.
+    Nothing is deleted on its own; call `prune` to bound the file.
+    """
+    def __init__(self, db_path: str = ":memory:", *, serde: Optional[SerializerProtocol] = None, clock=time.time):
+        super().__init__(serde=serde or JsonPlusSerializer(allowed_msgpack_modules=None))
+        self.clock = clock
+        if db_path != ":memory:":
+            os.makedirs(os.path.dirname(os.path.abspath(db_path)), exist_ok=True)
+        self.db_path = db_path
+        self._conn = sqlite3.connect(db_path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(_SCHEMA)
+        self._lock = threading.Lock()
+
+
+    # -----------------------
+    # Reads
+    # -----------------------
+
+    def _load_blobs(self, thread_id: str, checkpoint_ns: str, versions: ChannelVersions) -> Dict[str, Any]:
+        if not versions:
+            return {}
+        keys = [(k, str(v)) for k, v in versions.items()]
+        clause = " OR ".join("(channel = ? AND version = ?)" for _ in keys)
+        rows = self._conn.execute(
+            f"SELECT channel, type, blob FROM blobs WHERE thread_id = ? AND checkpoint_ns = ? AND ({clause})",
+            [thread_id, checkpoint_ns] + [x for kv in keys for x in kv],
+        ).fetchall()
+        return {
+            channel: self.serde.loads_typed((type_, blob))
+            for channel, type_, blob in rows if type_ != "empty"
+        }
+
+
+    def _load_writes(self, thread_id: str, checkpoint_ns: str, checkpoint_id: str) -> List[Tuple[str, str, Any]]:
+        rows = self._conn.execute(
+            "SELECT task_id, channel, type, value FROM writes "
+            "WHERE thread_id = ? AND checkpoint_ns = ? AND checkpoint_id = ? "
+            "ORDER BY task_path, task_id, idx",
+            (thread_id, checkpoint_ns, checkpoint_id),
+        ).fetchall()
+        return [(task_id, channel, self.serde.loads_typed((type_, value))) for task_id, channel, type_, value in rows]
+
+
+    def _to_tuple(self, thread_id: str, checkpoint_ns: str, row) -> CheckpointTuple:
+        checkpoint_id, parent_id, type_, checkpoint_b, metadata_type, metadata_b = row
+        checkpoint: Checkpoint = self.serde.loads_typed((type_, checkpoint_b))
+        return CheckpointTuple(
+            config={"configurable": {
+                "thread_id": thread_id,
+                "checkpoint_ns": checkpoint_ns,
+                "checkpoint_id": checkpoint_id,
+            }},
+            checkpoint={
+                **checkpoint,
+                "channel_values": self._load_blobs(thread_id, checkpoint_ns, checkpoint["channel_versions"]),
+            },
+            metadata=self.serde.loads_typed((metadata_type, metadata_b)),
+            parent_config=(
+                {"configurable": {
+                    "thread_id": thread_id,
+                    "checkpoint_ns": checkpoint_ns,
+                    "checkpoint_id": parent_id,
+                }}
+                if parent_id else None
+            ),
+            pending_writes=self._load_writes(thread_id, checkpoint_ns, checkpoint_id),
+        )
+
+
+    def get_tuple(self, config: RunnableConfig) -> Optional[CheckpointTuple]:
+        """The checkpoint named in `config`, or the thread's latest one."""
+        thread_id = config["configurable"]["thread_id"]
+        checkpoint_ns = config["configurable"].get("checkpoint_ns", "")
+        columns = "checkpoint_id, parent_checkpoint_id, type, checkpoint, metadata_type, metadata"
+        with self._lock:
+            if checkpoint_id := get_checkpoint_id(config):
+                row = self._conn.execute(
+                    f"SELECT {columns} FROM checkpoints "
+                    "WHERE thread_id = ? AND checkpoint_ns = ? AND checkpoint_id = ?",
+                    (thread_id, checkpoint_ns, checkpoint_id),
+                ).fetchone()
+            else:
+                row = self._conn.execute(
+                    f"SELECT {columns} FROM checkpoints WHERE thread_id = ? AND checkpoint_ns = ? "
+                    "ORDER BY checkpoint_id DESC LIMIT 1",
+                    (thread_id, checkpoint_ns),
+                ).fetchone()
+            return self._to_tuple(thread_id, checkpoint_ns, row) if row else None
+
+
+    def list(
+        self,
+        config: Optional[RunnableConfig],
+        *,
+        filter: Optional[Dict[str, Any]] = None,
+        before: Optional[RunnableConfig] = None,
+        limit: Optional[int] = None,
+    ) -> Iterator[CheckpointTuple]:
+        """Checkpoints newest first, optionally filtered by thread, metadata and `before`."""
+        where, params = [], []
+        if config:
+            where.append("thread_id = ?")
+            params.append(config["configurable"]["thread_id"])
+            if (checkpoint_ns := config["configurable"].get("checkpoint_ns")) is not None:
+                where.append("checkpoint_ns = ?")
+                params.append(checkpoint_ns)
+            if checkpoint_id := get_checkpoint_id(config):
+                where.append("checkpoint_id = ?")
+                params.append(checkpoint_id)
+        if before and (before_id := get_checkpoint_id(before)):
+            where.append("checkpoint_id < ?")
+            params.append(before_id)
+        query = (
+            "SELECT thread_id, checkpoint_ns, checkpoint_id, parent_checkpoint_id, type, checkpoint, "
+            "metadata_type, metadata FROM checkpoints"
+            + (f" WHERE {' AND '.join(where)}" if where else "")
+            + " ORDER BY checkpoint_id DESC"
+        )
+        with self._lock:
+            rows = self._conn.execute(query, params).fetchall()
+        for thread_id, checkpoint_ns, *row in rows:
+            if limit is not None and limit <= 0:
+                break
+            with self._lock:
+                tup = self._to_tuple(thread_id, checkpoint_ns, row)
+            if filter and not all(tup.metadata.get(k) == v for k, v in filter.items()):
+                continue
+            if limit is not None:
+                limit -= 1
+            yield tup
+
+
+    # -----------------------
+    # Writes
+    # -----------------------
+
+    def put(
+        self,
+        config: RunnableConfig,
+        checkpoint: Checkpoint,
+        metadata: CheckpointMetadata,
+        new_versions: ChannelVersions,
+    ) -> RunnableConfig:
+        """Store a checkpoint; only channels listed in `new_versions` get new blobs."""
+        thread_id = config["configurable"]["thread_id"]
+        checkpoint_ns = config["configurable"].get("checkpoint_ns", "")
+        c = checkpoint.copy()
+        values: Dict[str, Any] = c.pop("channel_values")  # type: ignore[misc]
+
+        blobs = []
+        for channel, version in new_versions.items():
+            type_, blob = self.serde.dumps_typed(values[channel]) if channel in values else ("empty", None)
+            blobs.append((thread_id, checkpoint_ns, channel, str(version), type_, blob))
+        type_, checkpoint_b = self.serde.dumps_typed(c)
+        metadata_type, metadata_b = self.serde.dumps_typed(get_checkpoint_metadata(config, metadata))
+
+        with self._lock, self._conn:
+            self._conn.executemany("INSERT OR IGNORE INTO blobs VALUES (?, ?, ?, ?, ?, ?)", blobs)
+            self._conn.execute(
+                "INSERT OR REPLACE INTO checkpoints VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                (
+                    thread_id, checkpoint_ns, checkpoint["id"], config["configurable"].get("checkpoint_id"),
+                    type_, checkpoint_b, metadata_type, metadata_b,
+                ),
+            )
+            self._conn.execute(
+                "INSERT OR REPLACE INTO threads (thread_id, updated) VALUES (?, ?)", (thread_id, self.clock())
+            )
+        return {"configurable": {
+            "thread_id": thread_id,
+            "checkpoint_ns": checkpoint_ns,
+            "checkpoint_id": checkpoint["id"],
+        }}
+
+
+    def put_writes(
+        self,
+        config: RunnableConfig,
+        writes: Sequence[Tuple[str, Any]],
+        task_id: str,
+        task_path: str = "",
+    ) -> None:
+        """Store a task's pending writes against the current checkpoint."""
+        thread_id = config["configurable"]["thread_id"]
+        checkpoint_ns = config["configurable"].get("checkpoint_ns", "")
+        checkpoint_id = config["configurable"]["checkpoint_id"]
+        rows = []
+        for idx, (channel, value) in enumerate(writes):
+            type_, value_b = self.serde.dumps_typed(value)
+            rows.append((
+                thread_id, checkpoint_ns, checkpoint_id, task_id,
+                WRITES_IDX_MAP.get(channel, idx), channel, type_, value_b, task_path,
+            ))
+        # Special writes (errors, interrupts; negative idx) are replaced, regular ones written once.
+        with self._lock, self._conn:
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO writes VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)", [r for r in rows if r[4] < 0]
+            )
+            self._conn.executemany(
+                "INSERT OR IGNORE INTO writes VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)", [r for r in rows if r[4] >= 0]
+            )
+
+
+    def delete_thread(self, thread_id: str) -> None:
+        with self._lock, self._conn:
+            for table in ("checkpoints", "blobs", "writes", "threads"):
+                self._conn.execute(f"DELETE FROM {table} WHERE thread_id = ?", (thread_id,))
+
+
+    def prune(
+        self,
+        thread_id: Optional[str] = None,
+        keep_last: Optional[int] = None,
+        ttl: Optional[float] = None,
+    ) -> Dict[str, int]:
+        """
+        Bound the store: delete whole threads idle for more than `ttl` seconds,
+        then keep only the newest `keep_last` checkpoints (>= 1) of `thread_id`
+        (or of every thread), with their writes and the blobs they reference.
+        Returns how many threads, checkpoints and blobs were deleted.
+        """
+        stats = {"threads": 0, "checkpoints": 0, "blobs": 0}
+        if ttl:
+            with self._lock:
+                expired = [r[0] for r in self._conn.execute(
+                    "SELECT thread_id FROM threads WHERE updated < ?", (self.clock() - ttl,)
+                ).fetchall()]
+            for expired_id in expired:
+                self.delete_thread(expired_id)
+            stats["threads"] = len(expired)
+        if not keep_last:
+            return stats
+
+        keep_last = max(keep_last, 1)
+        with self._lock, self._conn:
+            scopes = self._conn.execute(
+                "SELECT DISTINCT thread_id, checkpoint_ns FROM checkpoints WHERE ? IS NULL OR thread_id = ?",
+                (thread_id, thread_id),
+            ).fetchall()
+            for tid, ns in scopes:
+                old_ids = [r[0] for r in self._conn.execute(
+                    "SELECT checkpoint_id FROM checkpoints WHERE thread_id = ? AND checkpoint_ns = ? "
+                    "ORDER BY checkpoint_id DESC LIMIT -1 OFFSET ?",
+                    (tid, ns, keep_last),
+                ).fetchall()]
+                if not old_ids:
+                    continue
+                for table in ("checkpoints", "writes"):
+                    self._conn.executemany(
+                        f"DELETE FROM {table} WHERE thread_id = ? AND checkpoint_ns = ? AND checkpoint_id = ?",
+                        [(tid, ns, cid) for cid in old_ids],
+                    )
+                stats["checkpoints"] += len(old_ids)
+                stats["blobs"] += self._drop_unreferenced_blobs(tid, ns)
+        return stats
+
+
+    def _drop_unreferenced_blobs(self, thread_id: str, checkpoint_ns: str) -> int:
+        """Delete blobs no remaining checkpoint of the thread refers to (caller holds `_lock`)."""
+        live: Set[Tuple[str, str]] = set()
+        for type_, checkpoint_b in self._conn.execute(
+            "SELECT type, checkpoint FROM checkpoints WHERE thread_id = ? AND checkpoint_ns = ?",
+            (thread_id, checkpoint_ns),
+        ):
+            versions = self.serde.loads_typed((type_, checkpoint_b))["channel_versions"]
+            live.update((channel, str(version)) for channel, version in versions.items())
+        rows = self._conn.execute(
+            "SELECT channel, version FROM blobs WHERE thread_id = ? AND checkpoint_ns = ?",
+            (thread_id, checkpoint_ns),
+        ).fetchall()
+        dead = [(thread_id, checkpoint_ns, c, v) for c, v in rows if (c, v) not in live]
+        self._conn.executemany(
+            "DELETE FROM blobs WHERE thread_id = ? AND checkpoint_ns = ? AND channel = ? AND version = ?", dead
+        )
+        return len(dead)
+
+
+    def get_next_version(self, current: Optional[str], channel: None = None) -> str:
+        if current is None:
+            current_v = 0
+        elif isinstance(current, int):
+            current_v = current
+        else:
+            current_v = int(current.split(".")[0])
+        return f"{current_v + 1:032}.{random.random():016}"
+
+
+    def close(self) -> None:
+        self._conn.close()
+
+
+    # -----------------------
+    # Async API (SQLite calls are short; run inline)
+    # -----------------------
+
+    async def aget_tuple(self, config: RunnableConfig) -> Optional[CheckpointTuple]:
+        return self.get_tuple(config)
+
+    async def alist(
+        self,
+        config: Optional[RunnableConfig],
+        *,
+        filter: Optional[Dict[str, Any]] = None,
+        before: Optional[RunnableConfig] = None,
+        limit: Optional[int] = None,
+    ) -> AsyncIterator[CheckpointTuple]:
+        for tup in self.list(config, filter=filter, before=before, limit=limit):
+            yield tup
+
+    async def aput(
+        self,
+        config: RunnableConfig,
+        checkpoint: Checkpoint,
+        metadata: CheckpointMetadata,
+        new_versions: ChannelVersions,
+    ) -> RunnableConfig:
+        return self.put(config, checkpoint, metadata, new_versions)
+
+    async def aput_writes(
+        self,
+        config: RunnableConfig,
+        writes: Sequence[Tuple[str, Any]],
+        task_id: str,
+        task_path: str = "",
+    ) -> None:
+        self.put_writes(config, writes, task_id, task_path)
+
+    async def adelete_thread(self, thread_id: str) -> None:
+        self.delete_thread(thread_id)
+
+
+def state_types(schema: type) -> Set[Tuple[str, str]]:
+    """(module, qualname) of `schema` and every pydantic model nested in its fields."""
+    found: Set[Tuple[str, str]] = set()
+
+    def walk(tp):
+        for arg in get_args(tp):
+            walk(arg)
+        if isinstance(tp, type) and issubclass(tp, BaseModel) and (tp.__module__, tp.__qualname__) not in found:
+            found.add((tp.__module__, tp.__qualname__))
+            for field in tp.model_fields.values():
+                walk(field.annotation)
+
+    walk(schema)
+    return found
+
+
+def with_state_types(checkpointer: Optional[BaseCheckpointSaver], schema: type) -> Optional[BaseCheckpointSaver]:
+    """Allow `checkpointer` to deserialize the models used by a graph's state."""
+    if checkpointer is None or not isinstance(checkpointer, BaseCheckpointSaver):
+        return checkpointer
+    return checkpointer.with_allowlist(state_types(schema))
+
+
+def prune_checkpoints(
+    checkpointer: Optional[BaseCheckpointSaver],
+    thread_id: Optional[str] = None,
+    keep_last: Optional[int] = None,
+    ttl: Optional[float] = None,
+) -> Dict[str, int]:
+    """
+    `SqliteCheckpointSaver.prune` for savers that support it. The in-memory
+    saver dies with the process; Postgres retention is left to the database.
+    """
+    if isinstance(checkpointer, SqliteCheckpointSaver):
+        return checkpointer.prune(thread_id, keep_last=keep_last, ttl=ttl)
+    return {}
+
+
+def make_checkpointer(url: Optional[str]) -> Optional[BaseCheckpointSaver]:
+    """
+    Checkpointer for a URL: `sqlite:///path/to.db`, `memory`, or
+    `postgresql://...` (needs langgraph-checkpoint-postgres). Empty means none.
+    """
+    if not url:
+        return None
+    if url == "memory":
+        from langgraph.checkpoint.memory import InMemorySaver
+        return InMemorySaver()
+    path = sqlite_path(url)
+    if path is not None:
+        return SqliteCheckpointSaver(path)
+    if url.startswith(("postgres://", "postgresql://")):
+        try:
+            from langgraph.checkpoint.postgres import PostgresSaver
+            from psycopg import Connection
+        except ImportError as e:
+            raise RuntimeError("Install langgraph-checkpoint-postgres to use a Postgres checkpointer") from e
+        saver = PostgresSaver(Connection.connect(url, autocommit=True, prepare_threshold=0))
+        saver.setup()
+        return saver
+    raise ValueError(f"Unsupported checkpointer URL: {url}")
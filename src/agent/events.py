@@ -0,0 +1,96 @@
+import json
+import logging
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+
+def format_sse(event: str, data: Dict[str, Any]) -> str:
+    """One server-sent event frame."""
+    return f"event: {event}\ndata: {json.dumps(data, default=str)}\n\n"
+
+
+def _file(f) -> Optional[Dict[str, Any]]:
+    if f is None:
+        return None
+    return f.model_dump()
+
+
+def summarize_result(final: Dict[str, Any]) -> Dict[str, Any]:
+    """Client-facing outcome of a finished run from its final state values."""
+    return {
+        "verified": final.get("verified", False),
+        "file": _file(final.get("current_file")),
+        "steps": len(final.get("decision_trace") or []),
+        "rejected": [r.file_name for r in final.get("rejected_paths") or []],
+    }
+
+
+def summarize_update(node: str, update: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+    """
+    Client-facing summary of one node's state update (linear or beam graph),
+    without candidate payloads. None for updates with nothing to report.
+    """
+    if not update:
+        return None
+    out: Dict[str, Any] = {"node": node}
+    if "current_item_id" in update:
+        out["folder_id"] = update["current_item_id"]
+    if "current_path" in update:
+        out["path"] = update["current_path"]
+    if update.get("recalled"):
+        out["recalled"] = update["recalled"]
+    if "candidates" in update:
+        out["candidates"] = len(update["candidates"])
+    if update.get("listings"):
+        out["folders"] = [l.node.path or "/" for l in update["listings"]]
+        out["candidates"] = sum(len(l.candidates) for l in update["listings"])
+    if "frontier" in update:
+        out["frontier"] = [n.path for n in update["frontier"]]
+    if update.get("decision_trace"):
+        out["decisions"] = [
+            {"action": "select_file" if d.chosen_type == "file" else "enter_folder",
+             "name": d.chosen_name, "reason": d.reason, "depth": d.depth}
+            for d in update["decision_trace"]
+        ]
+    if "verified" in update:
+        out["verified"] = update["verified"]
+        current = update.get("current_file")
+        out["score"] = current.relevance.score if current is not None and current.relevance else None
+        out["rejected"] = [r.file_name for r in update.get("rejected_paths") or []]
+    return out if len(out) > 1 else None
+
+
+async def stream_agent(
+    graph,
+    state,
+    config: Dict[str, Any],
+    is_disconnected: Optional[Callable[[], Awaitable[bool]]] = None,
+) -> AsyncIterator[str]:
+    """
+    Run a compiled navigation graph with `astream` and yield SSE frames:
+    one `step` per node update, then `result` (or `error`). Stops the run at
+    the next step boundary once `is_disconnected()` reports the client gone.
+    """
+    final: Dict[str, Any] = {}
+    stream = graph.astream(state, config, stream_mode=["updates", "values"])
+    try:
+        async for mode, chunk in stream:
+            if mode == "values":
+                final = chunk
+                continue
+            if is_disconnected is not None and await is_disconnected():
+                logger.info("Client disconnected; cancelling agent run")
+                return
+            for node, update in chunk.items():
+                summary = summarize_update(node, update)
+                if summary is not None:
+                    yield format_sse("step", summary)
+    except Exception as e:
+        logger.exception("Agent run failed")
+        yield format_sse("error", {"error": str(e)})
+        return
+    finally:
+        await stream.aclose()
+
+    yield format_sse("result", summarize_result(final))
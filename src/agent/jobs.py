@@ -0,0 +1,249 @@
+import heapq
+import itertools
+import logging
+import threading
+import time
+import uuid
+from collections import deque
+from typing import Any, Callable, Deque, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+
+class QueueFull(Exception):
+    """Raised by `JobQueue.submit` when no more jobs can be admitted."""
+    def __init__(self, retry_after: int):
+        super().__init__(f"Agent job queue is full; retry after {retry_after}s")
+        self.retry_after = retry_after
+
+
+class Job:
+    __slots__ = (
+        "id", "user", "priority", "payload", "status", "result", "error",
+        "submitted_at", "started_at", "finished_at",
+    )
+
+    def __init__(self, user: str, priority: int, payload: Any, now: float):
+        self.id = uuid.uuid4().hex
+        self.user = user
+        self.priority = priority
+        self.payload = payload
+        self.status = "queued"
+        self.result: Any = None
+        self.error: Optional[str] = None
+        self.submitted_at = now
+        self.started_at: Optional[float] = None
+        self.finished_at: Optional[float] = None
+
+
+    def to_dict(self, position: Optional[int] = None) -> Dict[str, Any]:
+        out = {
+            "job_id": self.id,
+            "user": self.user,
+            "priority": self.priority,
+            "status": self.status,
+            "submitted_at": self.submitted_at,
+            "started_at": self.started_at,
+            "finished_at": self.finished_at,
+            "error": self.error,
+        }
+        if position is not None:
+            out["position"] = position
+        return out
+
+
+class JobQueue:
+    """
+    Bounded priority queue of agent runs served by a fixed pool of worker threads.
+
+    - `submit` raises `QueueFull` (with a Retry-After estimate) once
+      `max_queued` jobs are waiting; higher `priority` runs first, FIFO within
+      a priority.
+    - A user never has more than `per_user` jobs running; their other jobs wait
+      while other users' jobs are picked.
+    - Finished jobs are kept for `retention` seconds for status/result lookups.
+    - `metrics()` reports depth, running jobs and recent wait/run times.
+    """
+    def __init__(
+        self,
+        run: Callable[[Job], Any],
+        workers: int = 4,
+        max_queued: int = 100,
+        per_user: int = 2,
+        retention: float = 3600,
+        clock: Callable[[], float] = time.time,
+        name: str = "agent",
+    ):
+        self.run = run
+        self.name = name
+        self.workers = workers
+        self.max_queued = max_queued
+        self.per_user = per_user
+        self.retention = retention
+        self.clock = clock
+        self._heap: List[Any] = []
+        self._seq = itertools.count()
+        self._jobs: Dict[str, Job] = {}
+        self._running: Dict[str, int] = {}
+        self._waits: Deque[float] = deque(maxlen=500)
+        self._runs: Deque[float] = deque(maxlen=500)
+        self._cond = threading.Condition()
+        self._threads: List[threading.Thread] = []
+        self._stopping = False
+        self.completed = 0
+        self.failed = 0
+        self.rejected = 0
+
+
+    def _start(self) -> None:
+        for n in range(self.workers):
+            t = threading.Thread(target=self._work, name=f"{self.name}-worker-{n}", daemon=True)
+            t.start()
+            self._threads.append(t)
+
+
+    def submit(self, user: str, payload: Any, priority: int = 0) -> Job:
+        with self._cond:
+            if self._stopping:
+                raise RuntimeError("Job queue is shut down")
+            if not self._threads:
+                self._start()
+            self._purge()
+            if self._depth() >= self.max_queued:
+                self.rejected += 1
+                raise QueueFull(self._retry_after())
+            job = Job(user, priority, payload, self.clock())
+            self._jobs[job.id] = job
+            heapq.heappush(self._heap, (-priority, next(self._seq), job))
+            # notify_all: `wait` callers share the condition with the workers.
+            self._cond.notify_all()
+        return job
+
+
+    def get(self, job_id: str) -> Optional[Job]:
+        with self._cond:
+            return self._jobs.get(job_id)
+
+
+    def position(self, job: Job) -> Optional[int]:
+        """0-based place of a queued job in pick order, ignoring per-user caps."""
+        with self._cond:
+            if job.status != "queued":
+                return None
+            ahead = sorted(e for e in self._heap if e[2].status == "queued")
+            return next((i for i, e in enumerate(ahead) if e[2] is job), None)
+
+
+    def wait(self, job: Job, timeout: Optional[float] = None) -> bool:
+        """Block until `job` has finished (or `timeout` passes); True if it finished."""
+        with self._cond:
+            return self._cond.wait_for(lambda: job.status not in ("queued", "running"), timeout)
+
+
+    def cancel(self, job_id: str) -> bool:
+        """Cancel a job that has not started; running jobs are left to finish."""
+        with self._cond:
+            job = self._jobs.get(job_id)
+            if job is None or job.status != "queued":
+                return False
+            job.status = "cancelled"
+            job.finished_at = self.clock()
+            self._heap = [e for e in self._heap if e[2] is not job]
+            heapq.heapify(self._heap)
+            self._cond.notify_all()
+            return True
+
+
+    def _depth(self) -> int:
+        return sum(1 for e in self._heap if e[2].status == "queued")
+
+
+    def _retry_after(self) -> int:
+        """Seconds until a queue slot likely frees up: mean run time per worker."""
+        mean_run = sum(self._runs) / len(self._runs) if self._runs else 30.0
+        return max(1, int(mean_run / max(self.workers, 1) + 0.999))
+
+
+    def _purge(self) -> None:
+        cutoff = self.clock() - self.retention
+        for job_id in [j.id for j in self._jobs.values() if j.finished_at is not None and j.finished_at < cutoff]:
+            del self._jobs[job_id]
+
+
+    def _pick(self) -> Optional[Job]:
+        """Pop the best queued job whose user is below the concurrency cap."""
+        skipped = []
+        job = None
+        while self._heap:
+            entry = heapq.heappop(self._heap)
+            if entry[2].status != "queued":
+                continue
+            if self._running.get(entry[2].user, 0) < self.per_user:
+                job = entry[2]
+                break
+            skipped.append(entry)
+        for entry in skipped:
+            heapq.heappush(self._heap, entry)
+        return job
+
+
+    def _work(self) -> None:
+        while True:
+            with self._cond:
+                job = self._pick()
+                while job is None and not self._stopping:
+                    self._cond.wait()
+                    job = self._pick()
+                if job is None:
+                    return
+                job.status = "running"
+                job.started_at = self.clock()
+                self._running[job.user] = self._running.get(job.user, 0) + 1
+                self._waits.append(job.started_at - job.submitted_at)
+
+            try:
+                result, error = self.run(job), None
+            except Exception as e:
+                logger.exception(f"Agent job {job.id} failed")
+                result, error = None, str(e)
+
+            with self._cond:
+                job.finished_at = self.clock()
+                job.result, job.error = result, error
+                job.status = "failed" if error else "done"
+                if error:
+                    self.failed += 1
+                else:
+                    self.completed += 1
+                self._runs.append(job.finished_at - job.started_at)
+                self._running[job.user] -= 1
+                # A slot for this user (and a worker) is free again.
+                self._cond.notify_all()
+
+
+    def metrics(self) -> Dict[str, Any]:
+        with self._cond:
+            waits = sorted(self._waits)
+            return {
+                "queued": self._depth(),
+                "running": sum(self._running.values()),
+                "workers": self.workers,
+                "max_queued": self.max_queued,
+                "per_user": self.per_user,
+                "completed": self.completed,
+                "failed": self.failed,
+                "rejected": self.rejected,
+                "wait_p50_s": waits[len(waits) // 2] if waits else None,
+                "wait_p95_s": waits[int(len(waits) * 0.95)] if waits else None,
+                "run_mean_s": sum(self._runs) / len(self._runs) if self._runs else None,
+            }
+
+
+    def shutdown(self, wait: bool = True) -> None:
+        """Stop accepting jobs; workers exit once no queued job is ready to run."""
+        with self._cond:
+            self._stopping = True
+            self._cond.notify_all()
+        if wait:
+            for t in self._threads:
+                t.join()
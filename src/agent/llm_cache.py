@@ -0,0 +1,163 @@
+import hashlib
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+from typing import Any, Callable, Dict, Optional, Type
+
+from pydantic import BaseModel, ValidationError
+
+logger = logging.getLogger(__name__)
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS llm_cache (
+    key TEXT PRIMARY KEY,
+    tool TEXT NOT NULL,
+    created REAL NOT NULL,
+    accessed REAL NOT NULL,
+    value TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS llm_cache_accessed ON llm_cache (accessed);
+"""
+
+
+def normalize_prompt(prompt: str) -> str:
+    """Collapse whitespace so formatting-only prompt changes share a cache entry."""
+    return " ".join(prompt.split())
+
+
+def tool_fingerprint(tool: Type[BaseModel]) -> str:
+    """Stable text form of a tool's JSON schema; a schema change invalidates its entries."""
+    return json.dumps(tool.model_json_schema(), sort_keys=True, separators=(",", ":"))
+
+
+def cache_key(model: str, tool: Type[BaseModel], prompt: str) -> str:
+    payload = "\x1f".join((model, tool_fingerprint(tool), normalize_prompt(prompt)))
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class LLMCache:
+    """
+    Persistent, content-addressed cache of structured LLM outputs.
+
+    Entries are keyed by `cache_key(model, tool, prompt)` and hold the tool's
+    validated output as JSON. Entries older than `ttl` seconds are ignored and
+    the least recently used ones are evicted beyond `max_entries`.
+    """
+    def __init__(
+        self,
+        db_path: str = ":memory:",
+        ttl: float = 7 * 24 * 3600,
+        max_entries: int = 50_000,
+        clock: Callable[[], float] = time.time,
+    ):
+        if db_path != ":memory:":
+            os.makedirs(os.path.dirname(os.path.abspath(db_path)), exist_ok=True)
+        self.db_path = db_path
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.clock = clock
+        self.hits = 0
+        self.misses = 0
+        self._conn = sqlite3.connect(db_path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(_SCHEMA)
+        self._lock = threading.Lock()
+        self._count = self._conn.execute("SELECT COUNT(*) FROM llm_cache").fetchone()[0]
+
+
+    def get(self, key: str, tool: Type[BaseModel]) -> Optional[BaseModel]:
+        """Cached output for `key` as a `tool` instance, or None on a miss."""
+        now = self.clock()
+        with self._lock, self._conn:
+            row = self._conn.execute(
+                "SELECT value, created FROM llm_cache WHERE key = ?", (key,)
+            ).fetchone()
+            if row is not None and now - row[1] > self.ttl:
+                self._conn.execute("DELETE FROM llm_cache WHERE key = ?", (key,))
+                self._count -= 1
+                row = None
+            if row is not None:
+                self._conn.execute("UPDATE llm_cache SET accessed = ? WHERE key = ?", (now, key))
+        if row is None:
+            self.misses += 1
+            return None
+        try:
+            value = tool.model_validate_json(row[0])
+        except ValidationError as e:
+            logger.warning(f"Dropping unreadable LLM cache entry {key[:12]}: {e}")
+            self.invalidate(key)
+            self.misses += 1
+            return None
+        self.hits += 1
+        return value
+
+
+    def put(self, key: str, value: BaseModel) -> None:
+        now = self.clock()
+        with self._lock, self._conn:
+            exists = self._conn.execute("SELECT 1 FROM llm_cache WHERE key = ?", (key,)).fetchone()
+            self._conn.execute(
+                "INSERT OR REPLACE INTO llm_cache (key, tool, created, accessed, value) VALUES (?, ?, ?, ?, ?)",
+                (key, type(value).__name__, now, now, value.model_dump_json()),
+            )
+            if exists is None:
+                self._count += 1
+            if self._count > self.max_entries:
+                # Evict in batches of ~10% so puts at the cap stay cheap.
+                excess = self._count - self.max_entries + self.max_entries // 10
+                cur = self._conn.execute(
+                    "DELETE FROM llm_cache WHERE key IN "
+                    "(SELECT key FROM llm_cache ORDER BY accessed LIMIT ?)",
+                    (excess,),
+                )
+                self._count -= cur.rowcount
+
+
+    def invalidate(self, key: str) -> None:
+        with self._lock, self._conn:
+            cur = self._conn.execute("DELETE FROM llm_cache WHERE key = ?", (key,))
+            self._count -= cur.rowcount
+
+
+    def purge_expired(self) -> int:
+        """Delete entries past their TTL; returns how many were removed."""
+        with self._lock, self._conn:
+            cur = self._conn.execute("DELETE FROM llm_cache WHERE created < ?", (self.clock() - self.ttl,))
+            self._count -= cur.rowcount
+        return cur.rowcount
+
+
+    def __len__(self) -> int:
+        return self._count
+
+
+class CachedExtractor:
+    """
+    Wraps a trustcall extractor for one tool: prompts seen before are answered
+    from the cache as `{"responses": [<tool instance>]}`, without an LLM call.
+    """
+    def __init__(self, extractor, tool: Type[BaseModel], model: str, cache: LLMCache):
+        self.extractor = extractor
+        self.tool = tool
+        self.model = model
+        self.cache = cache
+
+
+    def invoke(self, input: Any, config: Optional[Dict[str, Any]] = None, **kwargs) -> Dict[str, Any]:
+        if not isinstance(input, str):
+            return self.extractor.invoke(input, config, **kwargs)
+
+        key = cache_key(self.model, self.tool, input)
+        cached = self.cache.get(key, self.tool)
+        if cached is not None:
+            return {"messages": [], "responses": [cached], "response_metadata": [], "cached": True}
+
+        result = self.extractor.invoke(input, config, **kwargs)
+        responses = result.get("responses") or []
+        if responses and isinstance(responses[0], self.tool):
+            self.cache.put(key, responses[0])
+        return result
@@ -0,0 +1,148 @@
+import hashlib
+import logging
+import os
+import time
+from typing import Any, Dict, Optional
+
+from langgraph.store.base import BaseStore
+
+from src.agent.prerank import query_terms, tokens
+
+logger = logging.getLogger(__name__)
+
+# Store namespaces: verified query -> file outcomes, and folder -> query-word hints.
+OUTCOMES = ("navigation", "outcomes")
+FOLDER_HINTS = ("navigation", "folders")
+
+# A folder hint is used when at least this share of the query's words matched it before.
+HINT_MIN_SCORE = float(os.getenv("NAV_MEMORY_HINT_MIN_SCORE", "0.6"))
+# Words remembered per folder hint, and hints scored per lookup.
+HINT_MAX_TERMS = 50
+HINT_SCAN_LIMIT = 100
+# Each new outcome for a folder scales its older words by HINT_DECAY; words that
+# fall under HINT_MIN_WEIGHT (about eight outcomes without a repeat) are dropped.
+HINT_DECAY = 0.8
+HINT_MIN_WEIGHT = 0.2
+
+# Stopwords that flip a query's meaning, so they stay in the memory key.
+NEGATIONS = {"not", "no", "without", "except", "excluding"}
+
+
+def query_key(query: str) -> Optional[str]:
+    """Order- and stopword-insensitive key of a query; None if it has no content words."""
+    terms = sorted(set(query_terms(query)))
+    if not terms:
+        return None
+    terms += sorted(NEGATIONS.intersection(tokens(query)) - set(terms))
+    return hashlib.sha1(" ".join(terms).encode("utf-8")).hexdigest()
+
+
+def recall(store: BaseStore, query: str, graph_client) -> Optional[Dict[str, Any]]:
+    """
+    Look up a previous outcome for `query`.
+
+    Returns `{"kind": "file", ...}` for a verified file whose eTag is unchanged,
+    else `{"kind": "folder", ...}` for a folder that answered similar queries,
+    else None. Entries whose item changed or disappeared are deleted.
+    """
+    key = query_key(query)
+    if key is None:
+        return None
+
+    outcome = store.get(OUTCOMES, key)
+    if outcome is not None:
+        v = outcome.value
+        item = graph_client.get_item(v["item_id"])
+        if item and item.get("eTag") == v.get("etag"):
+            return {"kind": "file", **v}
+        logger.info(f"Navigation memory for '{query}' is stale ({v['path']} changed); dropping it")
+        store.delete(OUTCOMES, key)
+
+    # Stores with text or vector search pre-rank the hints; the overlap score decides.
+    wanted = set(query_terms(query))
+    hints = store.search(FOLDER_HINTS, query=" ".join(sorted(wanted)), limit=HINT_SCAN_LIMIT)
+    scored = sorted(
+        ((len(wanted & set(h.value["terms"])) / len(wanted), h.value["hits"], h) for h in hints),
+        key=lambda s: s[:2],
+        reverse=True,
+    )
+    for score, _, hint in scored[:3]:
+        if score < HINT_MIN_SCORE:
+            break
+        if graph_client.get_item(hint.value["folder_id"]):
+            return {"kind": "folder", **hint.value}
+        store.delete(FOLDER_HINTS, hint.key)
+    return None
+
+
+def remember(
+    store: BaseStore,
+    query: str,
+    item_id: str,
+    name: str,
+    path: str,
+    etag: Optional[str],
+    folder_id: str,
+) -> None:
+    """Record a verified outcome and strengthen the hint for its folder."""
+    key = query_key(query)
+    if key is None:
+        return
+    folder_path = path.rsplit("/", 1)[0]
+    store.put(OUTCOMES, key, {
+        "query": query,
+        "item_id": item_id,
+        "name": name,
+        "path": path,
+        "etag": etag,
+        "folder_id": folder_id,
+        "folder_path": folder_path,
+        "verified_at": time.time(),
+    })
+
+    hint = store.get(FOLDER_HINTS, folder_id)
+    weights = {t: w * HINT_DECAY for t, w in _weights(hint).items()}
+    for t in query_terms(query):
+        weights[t] = weights.get(t, 0.0) + 1.0
+    _put_hint(store, folder_id, folder_path, weights, (hint.value["hits"] if hint else 0) + 1)
+
+
+def forget(store: BaseStore, query: str) -> None:
+    key = query_key(query)
+    if key is not None:
+        store.delete(OUTCOMES, key)
+
+
+def demote(store: BaseStore, query: str, folder_id: str) -> None:
+    """Unlearn `query`'s words from a folder hint that led to a wrong answer."""
+    hint = store.get(FOLDER_HINTS, folder_id)
+    if hint is None:
+        return
+    wrong = set(query_terms(query))
+    weights = {t: w for t, w in _weights(hint).items() if t not in wrong}
+    hits = hint.value["hits"] - 1
+    if hits <= 0 or not weights:
+        store.delete(FOLDER_HINTS, folder_id)
+        return
+    _put_hint(store, folder_id, hint.value["folder_path"], weights, hits)
+
+
+def _weights(hint) -> Dict[str, float]:
+    if hint is None:
+        return {}
+    # Hints written before weights existed count every word once.
+    return hint.value.get("weights") or {t: 1.0 for t in hint.value["terms"]}
+
+
+def _put_hint(store: BaseStore, folder_id: str, folder_path: str, weights: Dict[str, float], hits: int) -> None:
+    kept = sorted(
+        ((w, t) for t, w in weights.items() if w >= HINT_MIN_WEIGHT),
+        reverse=True,
+    )[:HINT_MAX_TERMS]
+    store.put(FOLDER_HINTS, folder_id, {
+        "folder_id": folder_id,
+        "folder_path": folder_path,
+        "terms": sorted(t for _, t in kept),
+        "weights": {t: round(w, 4) for w, t in kept},
+        "hits": hits,
+    })
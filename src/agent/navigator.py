@@ -0,0 +1,496 @@
+import operator
+import os
+from concurrent.futures import ThreadPoolExecutor
+from langgraph.graph import StateGraph, START, END
+from langgraph.store.base import BaseStore
+from pydantic import BaseModel
+from typing import Annotated, List, Optional, Literal
+from src.clients.oneDriveHelper import GraphClient
+from src.agent.runtime import get_runtime
+from src.agent.checkpoint import with_state_types
+from src.agent.candidates import encode_candidates, resolve_alias
+from src.agent.prerank import exact_match, rank_candidates
+from src.agent.prefetch import ListingPrefetcher
+from src.agent import memory
+from src.utils.telemetry import instrument_node
+
+# Upper bound on the folder listing part of a decision prompt.
+PROMPT_TOKEN_BUDGET = int(os.getenv("NAV_PROMPT_TOKEN_BUDGET", "2000"))
+# Only the best lexically pre-ranked items of a folder are shown to the LLM.
+PRERANK_TOP_K = int(os.getenv("NAV_PRERANK_TOP_K", "40"))
+# Number of likely subfolders listed speculatively while the LLM decides.
+PREFETCH_WIDTH = int(os.getenv("NAV_PREFETCH_WIDTH", "3"))
+# Files verified concurrently per download_and_verify step (the pick plus its best siblings).
+VERIFY_TOP_N = int(os.getenv("NAV_VERIFY_TOP_N", "3"))
+# Only this many leading bytes of each file are downloaded for verification.
+VERIFY_PREFIX_BYTES = int(os.getenv("NAV_VERIFY_PREFIX_BYTES", "16384"))
+
+
+# -----------------------
+# Models
+# -----------------------
+
+class Candidate(BaseModel):
+    """A folder child: the driveItem fields the nodes use, not the full payload."""
+    id: str
+    name: str
+    type: Literal["folder", "file"]
+    mime_type: Optional[str]
+    parent_reference_path: Optional[str]
+    size: Optional[int] = None
+    modified: Optional[str] = None
+    etag: Optional[str] = None
+
+class Decision(BaseModel):
+    action: Literal["enter_folder", "select_file"]
+    id: str
+    name: str
+    reason: str
+
+class DecisionStep(BaseModel):
+    attempt: int
+    depth: int
+    chosen_id: str
+    chosen_name: str
+    chosen_type: str
+    reason: str
+    alternatives: List[str]
+
+class FileRelevance(BaseModel):
+    score: float
+    reason: str
+    is_match: bool
+
+class FoundFile(BaseModel):
+    id: str
+    name: str
+    path: str
+    relevance: Optional[FileRelevance] = None
+
+class RejectedPath(BaseModel):
+    path: str
+    file_name: str
+    rejection_reason: str
+
+def add_unique(old: List[str], new: List[str]) -> List[str]:
+    """Append ids not seen yet, keeping first-visit order."""
+    seen = set(old)
+    return old + [i for i in dict.fromkeys(new) if i not in seen]
+
+class AgentState(BaseModel):
+    user_query: str
+    drive_description: Optional[str] = None
+    max_attempts: int = 3
+    start_item_id: Optional[str] = None
+    current_item_id: Optional[str] = None
+    current_path: str = ""
+    depth: int = 0
+    attempt: int = 1
+    done: bool = False
+    verified: bool = False
+    # Append-only: nodes return just the new entries.
+    visited_items: Annotated[List[str], add_unique] = []
+    rejected_paths: Annotated[List[RejectedPath], operator.add] = []
+    candidates: List[Candidate] = []
+    decision_trace: Annotated[List[DecisionStep], operator.add] = []
+    current_file: Optional[FoundFile] = None
+    # Set when navigation memory supplied the start: "file", "folder", or "stale"
+    # after a remembered file or folder failed verification and the run restarted at root.
+    recalled: Optional[Literal["file", "folder", "stale"]] = None
+    # Folder whose hint supplied the start, demoted if that walk fails.
+    hint_folder_id: Optional[str] = None
+
+# -----------------------
+# Node implementations
+# -----------------------
+def resolve_start(state: AgentState, config, *, store: Optional[BaseStore] = None):
+    graph_client: GraphClient = config["configurable"]["graph_client"]
+    if state.start_item_id:
+        return {"current_item_id": state.start_item_id}
+    if state.current_path:
+        return {"current_item_id": graph_client.get_folder_id_by_path(state.current_path)}
+
+    # A known answer goes straight to verification; a known folder skips the walk down.
+    recalled = memory.recall(store, state.user_query, graph_client) if store is not None else None
+    if recalled is not None and recalled["kind"] == "file":
+        return {
+            "current_item_id": recalled["folder_id"],
+            "current_path": recalled["folder_path"],
+            "current_file": FoundFile(id=recalled["item_id"], name=recalled["name"], path=recalled["path"]),
+            "done": True,
+            "recalled": "file",
+        }
+    if recalled is not None:
+        return {
+            "current_item_id": recalled["folder_id"],
+            "current_path": recalled["folder_path"],
+            "recalled": "folder",
+            "hint_folder_id": recalled["folder_id"],
+        }
+    return {"current_item_id": "root"}
+
+
+def to_candidate(i: dict) -> Candidate:
+    return Candidate(
+        id=i["id"],
+        name=i["name"],
+        type="folder" if "folder" in i else "file",
+        mime_type=i.get("file", {}).get("mimeType"),
+        parent_reference_path=i.get("parentReference", {})
+            .get("path", "")
+            .replace("/drive/root:", ""),
+        size=i.get("size"),
+        modified=i.get("lastModifiedDateTime"),
+        etag=i.get("eTag"),
+    )
+
+
+def list_children(state: AgentState, config):
+    graph_client: GraphClient = config["configurable"]["graph_client"]
+    prefetcher: Optional[ListingPrefetcher] = config["configurable"].get("prefetcher")
+
+    if prefetcher is not None:
+        items = prefetcher.get(state.current_item_id)
+    else:
+        items = (
+            graph_client.list_root()
+            if state.current_item_id == "root"
+            else graph_client.list_folder(state.current_item_id)
+        )
+    candidates = [to_candidate(i) for i in items]
+
+    # Start listing the likeliest subfolders now so the next level overlaps the LLM call.
+    if prefetcher is not None and PREFETCH_WIDTH > 0:
+        folders = [c for _, c in rank_candidates(state.user_query, candidates) if c.type == "folder"]
+        prefetcher.prefetch(c.id for c in folders[:PREFETCH_WIDTH])
+
+    return {"candidates": candidates, "visited_items": [state.current_item_id]}
+
+
+def build_decision_prompt(state: AgentState, listing: str) -> str:
+    return f"""
+You are a file navigation agent exploring a OneDrive folder tree to find the file that best matches the user's search query. Use the folder’s listing and metadata to choose the next action.
+
+### CONTEXT
+User search query:
+\"{state.user_query}\"
+
+Drive description:
+\"{state.drive_description}\"
+
+Current folder path:
+\"{state.current_path or '/'}\"
+
+Contents of this folder (tab separated; type D = folder, F = file):
+{listing}
+
+### YOUR GOAL
+Choose the **single best next action** that will help you find the most relevant file for the user’s query.
+
+### ACTION SETTINGS
+You may return one of these actions only:
+- **enter_folder**: Dive into a subfolder to continue searching
+- **select_file**: Choose a file as the best match
+
+### OUTPUT FORMAT
+Return **STRICT JSON ONLY** with the following keys (no extra text outside the JSON object):
+
+{{
+  "action": "<enter_folder | select_file>",
+  "id": "<ref of the chosen item, e.g. c3>",
+  "name": "<Name of the chosen item>",
+  "reason": "<Justification for your choice>"
+}}
+
+### GUIDANCE
+- If the query matches a file's name, path, or content strongly, use **select_file**.
+- If there are subfolders that likely contain better matches, use **enter_folder**.
+- Provide a concise reason describing why you chose that action in terms of relevance to the query.
+
+Respond with JSON only.
+"""
+
+
+def decide_next(state: AgentState, config):
+    if not state.candidates:
+        return {"done": True}
+
+    # The query names one item outright: take it without asking the LLM.
+    chosen = exact_match(state.user_query, state.candidates)
+    if chosen is not None:
+        decision = Decision(
+            action="select_file" if chosen.type == "file" else "enter_folder",
+            id=chosen.id,
+            name=chosen.name,
+            reason="Exact name match with the query (lexical pre-ranking, no LLM call)",
+        )
+    else:
+        shortlist = [c for _, c in rank_candidates(state.user_query, state.candidates)[:PRERANK_TOP_K]]
+        extractor = get_runtime(config).extractor(Decision)
+
+        listing, aliases = encode_candidates(shortlist, PROMPT_TOKEN_BUDGET)
+        decision: Decision = extractor.invoke(
+            input=build_decision_prompt(state, listing)
+        ).get("responses", [None])[0]
+
+        if decision is None:
+            return {"done": True}
+
+        # Map the short ref back to the driveItem; the listing is authoritative for id/name.
+        chosen_id = resolve_alias(decision.id, aliases)
+        chosen = next((c for c in state.candidates if c.id == chosen_id), None)
+        if chosen is None:
+            chosen = next((c for c in state.candidates if c.name == decision.name), None)
+        if chosen is None:
+            return {"done": True}
+        decision = decision.model_copy(update={"id": chosen.id, "name": chosen.name})
+
+    prefetcher: Optional[ListingPrefetcher] = config["configurable"].get("prefetcher")
+    if prefetcher is not None:
+        prefetcher.cancel_except(decision.id if decision.action == "enter_folder" else None)
+
+    # Log the decision
+    trace = DecisionStep(
+        attempt=state.attempt,
+        depth=state.depth,
+        chosen_id=decision.id,
+        chosen_name=decision.name,
+        chosen_type="file" if decision.action == "select_file" else "folder",
+        reason=decision.reason,
+        alternatives=[c.name for c in state.candidates if c.id != decision.id],
+    )
+
+    updates = {"decision_trace": [trace]}
+
+    # Handle actions
+    if decision.action == "select_file":
+        updates["current_file"] = FoundFile(
+            id=decision.id,
+            name=decision.name,
+            path=f"{state.current_path}/{decision.name}"
+        )
+        updates["done"] = True
+
+    # elif decision.action == "enter_folder":
+    #     updates.update({
+    #         "current_item_id": decision.id,
+    #         "current_path": f"{state.current_path}/{decision.name}",
+    #         "depth": state.depth + 1
+    #     })
+    #     updates["done"] = False
+
+    else:
+        updates.update({
+            "current_item_id": decision.id,
+            "current_path": f"{state.current_path}/{decision.name}",
+            "depth": state.depth + 1
+        })
+        updates["done"] = False
+        updates["attempt"]= state.attempt + 1
+        updates["current_file"] = None
+
+    return updates
+
+
+def build_relevance_prompt(state: AgentState, file: FoundFile, content: str) -> str:
+    return f"""
+You are evaluating whether a file matches the user's search intent. Based on the user's query, file name, path, and content, you will assign a **relevance score**.
+
+User query:
+\"{state.user_query}\"
+
+File name:
+\"{file.name}\"
+
+File path:
+\"{file.path}\"
+
+File content (first 2000 characters):
+{content[:2000]}
+
+You must return **STRICT JSON ONLY** in this exact format:
+
+{{
+  "score": <0.0, 0.5, or 1.0>,
+  "reason": "<explanation of your score>",
+  "is_match": <true or false>
+}}
+
+### SCORING GUIDELINES (interpret these carefully):
+Assign one of these three scores based on how well the file matches the query:
+
+1. **1.0 — Highly Relevant**
+   • The file clearly contains strong evidence that it fulfills the user's search intent, such as:
+     - The query terms appear in the **file name** or **file path**  
+       AND the **content** meaningfully discusses or answers the query.  
+   • Typical indicators include direct textual matches to key query phrases or highly relevant context.
+
+2. **0.5 — Moderately Relevant**
+   • Some signals of relevance exist but are incomplete or only moderately aligned, such as:
+     - Query terms appear only in the content (not name/path),  
+     - The context relates to the topic but not strongly or fully.
+
+3. **0.0 — Not Relevant**
+   • No meaningful evidence of relevance in the file name, path, or content.
+   • The content does not answer, mention, or meaningfully relate to the query.
+
+### OUTPUT RULES:
+• **score** must be exactly 0.0, 0.5, or 1.0.  
+• **is_match** should be `true` if score is **1.0 or 0.5** (moderate or high relevance), otherwise `false`.  
+• **reason** should briefly explain which signals you used to determine the score.
+
+Return JSON only — no extra text outside the JSON object.
+"""
+
+
+
+def score_file(state: AgentState, file: FoundFile, config) -> FileRelevance:
+    """Download the first VERIFY_PREFIX_BYTES of `file` and let the LLM score it."""
+    graph_client: GraphClient = config["configurable"]["graph_client"]
+
+    file_bytes = graph_client.download_prefix(file.id, VERIFY_PREFIX_BYTES)
+    md_text = (file_bytes or b"").decode("utf-8", errors="ignore")
+
+    extractor = get_runtime(config).extractor(FileRelevance)
+    relevance: Optional[FileRelevance] = extractor.invoke(
+        input=build_relevance_prompt(state, file, md_text)
+    ).get("responses", [None])[0]
+
+    # Fail-safe: if LLM returns nothing
+    if relevance is None:
+        relevance = FileRelevance(
+            score=0.0,
+            reason="LLM returned no structured output",
+            is_match=False
+        )
+    return relevance
+
+
+def verify_files(state: AgentState, files: List[FoundFile], config):
+    """
+    Score the first of `files`; only if it does not match, score the others
+    concurrently and keep the best match (ties go to the earlier file). Every
+    file that was scored and did not match is recorded in `rejected_paths`.
+    """
+    results = [score_file(state, files[0], config)]
+    if not results[0].is_match and len(files) > 1:
+        with ThreadPoolExecutor(max_workers=len(files) - 1, thread_name_prefix="verify") as pool:
+            results += pool.map(lambda f: score_file(state, f, config), files[1:])
+    files = files[:len(results)]
+
+    rejected = [
+        RejectedPath(
+            path=f.path.rsplit("/", 1)[0],
+            file_name=f.name,
+            rejection_reason=f"Content mismatch: {r.reason}",
+        )
+        for f, r in zip(files, results) if not r.is_match
+    ]
+    matches = [(r.score, -i, f, r) for i, (f, r) in enumerate(zip(files, results)) if r.is_match]
+
+    # ✅ If a file is relevant
+    if matches:
+        _, _, best, relevance = max(matches, key=lambda m: m[:2])
+        return {
+            "verified": True,
+            "done": True,
+            "current_file": best.model_copy(update={"relevance": relevance}),
+            "current_path": best.path.rsplit("/", 1)[0],
+            "rejected_paths": rejected,
+        }
+
+    # ❌ If no file is relevant
+    return {
+        "done": False,
+        "verified": False,
+        "attempt": state.attempt + 1,
+        "current_file": None,
+        "rejected_paths": rejected,
+    }
+
+
+def verification_candidates(state: AgentState) -> List[FoundFile]:
+    """The selected file followed by the lexically best other files of its folder (the fallbacks)."""
+    rejected = {(r.path, r.file_name) for r in state.rejected_paths}
+    files = [state.current_file]
+    for _, c in rank_candidates(state.user_query, state.candidates):
+        if len(files) >= VERIFY_TOP_N:
+            break
+        if c.type == "file" and c.id != state.current_file.id and (state.current_path, c.name) not in rejected:
+            files.append(FoundFile(id=c.id, name=c.name, path=f"{state.current_path}/{c.name}"))
+    return files
+
+
+def download_and_verify(state: AgentState, config):
+    if not state.current_file:
+        return {}
+    return verify_files(state, verification_candidates(state), config)
+
+
+def remember_outcome(state: AgentState, config, *, store: Optional[BaseStore] = None):
+    """Save a verified answer to navigation memory; drop a remembered one that failed."""
+    if store is None or (state.verified and state.recalled == "file"):
+        return {}
+    if state.verified and state.current_file:
+        found = state.current_file
+        etag = next((c.etag for c in state.candidates if c.id == found.id), None)
+        if etag is None:
+            etag = (config["configurable"]["graph_client"].get_item(found.id) or {}).get("eTag")
+        memory.remember(store, state.user_query, found.id, found.name, found.path, etag, state.current_item_id)
+        return {}
+    if state.recalled in ("file", "folder"):
+        if state.recalled == "file":
+            memory.forget(store, state.user_query)
+        else:
+            memory.demote(store, state.user_query, state.hint_folder_id)
+        return {
+            "recalled": "stale",
+            "current_item_id": "root",
+            "current_path": "",
+            "depth": 0,
+            "attempt": 1,
+            "done": False,
+        }
+    return {}
+
+
+# -----------------------
+# Build StateGraph
+# -----------------------
+
+def build_agent_graph(checkpointer=None, store=None):
+    graph = StateGraph(AgentState)
+
+    graph.add_node("resolve_start", instrument_node("resolve_start", resolve_start))
+    graph.add_node("list_children", instrument_node("list_children", list_children))
+    graph.add_node("decide_next", instrument_node("decide_next", decide_next))
+    graph.add_node("download_and_verify", instrument_node("download_and_verify", download_and_verify))
+    graph.add_node("remember_outcome", instrument_node("remember_outcome", remember_outcome))
+
+    graph.add_edge(START, "resolve_start")
+    graph.add_conditional_edges(
+        "resolve_start",
+        lambda s: "download_and_verify" if s.current_file else "list_children",
+        ["download_and_verify", "list_children"],
+    )
+    graph.add_edge("list_children", "decide_next")
+    # graph.add_edge("decide_next", END)
+    graph.add_conditional_edges(
+        "decide_next",
+        lambda s: END if s.attempt==s.max_attempts else "download_and_verify" if s.done else "list_children",
+    )
+    # graph.add_conditional_edges(
+    #     "download_and_verify",
+    #     lambda s: END if s.verified and s.done else "resolve_start"
+    # )
+    graph.add_edge("download_and_verify", "remember_outcome")
+    # A remembered file or folder that failed verification falls back to a normal walk
+    # from root. The restart resets attempt to 1 and a failed verification always bumps
+    # it, so the fallback runs at most once.
+    graph.add_conditional_edges(
+        "remember_outcome",
+        lambda s: "list_children" if s.recalled == "stale" and s.attempt == 1 and not s.done else END,
+        ["list_children", END],
+    )
+
+    return graph.compile(checkpointer=with_state_types(checkpointer, AgentState), store=store)
@@ -0,0 +1,77 @@
+import logging
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Shared by all runs so speculative work can never exceed a fixed thread budget.
+_pool = ThreadPoolExecutor(max_workers=8, thread_name_prefix="listing-prefetch")
+
+
+class ListingPrefetcher:
+    """
+    Per-run cache of speculative folder listings.
+
+    While the LLM decides which subfolder to enter, `prefetch` fetches the first
+    page of the most likely candidates in the background (one request each); the
+    next `get` for one of them returns the prefetched listing, fetching any
+    further pages only then. Listings that turn out not to be needed are
+    dropped with `cancel_except`.
+    """
+    def __init__(self, graph_client, pool: Optional[ThreadPoolExecutor] = None, page_size: Optional[int] = None):
+        self.graph_client = graph_client
+        self.page_size = page_size
+        self._pool = pool or _pool
+        self._futures: Dict[str, Future] = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.cancelled = 0
+
+
+    def _list(self, folder_id: str) -> List[Dict[str, Any]]:
+        if folder_id == "root":
+            return self.graph_client.list_root()
+        return self.graph_client.list_folder(folder_id)
+
+
+    def _first_page(self, folder_id: str) -> Tuple[List[Dict[str, Any]], Iterator[List[Dict[str, Any]]]]:
+        pages = self.graph_client.iter_children(folder_id, page_size=self.page_size)
+        return next(pages, []), pages
+
+
+    def prefetch(self, folder_ids: Iterable[str]) -> None:
+        with self._lock:
+            for folder_id in folder_ids:
+                if folder_id not in self._futures:
+                    self._futures[folder_id] = self._pool.submit(self._first_page, folder_id)
+
+
+    def get(self, folder_id: str) -> List[Dict[str, Any]]:
+        """Listing of `folder_id`, from the prefetch cache when available."""
+        with self._lock:
+            future = self._futures.pop(folder_id, None)
+        if future is not None and not future.cancelled():
+            try:
+                first, rest = future.result()
+                items = first + [item for page in rest for item in page]
+                self.hits += 1
+                return items
+            except Exception as e:
+                logger.warning(f"Prefetch of '{folder_id}' failed, listing directly: {e}")
+        self.misses += 1
+        return self._list(folder_id)
+
+
+    def cancel_except(self, keep_id: Optional[str] = None) -> None:
+        """Cancel every pending prefetch except the one for `keep_id`."""
+        with self._lock:
+            for folder_id in list(self._futures):
+                if folder_id != keep_id:
+                    if self._futures.pop(folder_id).cancel():
+                        self.cancelled += 1
+
+
+    def close(self) -> None:
+        self.cancel_except(None)
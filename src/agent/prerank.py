@@ -0,0 +1,156 @@
+import re
+from datetime import datetime, timezone
+from difflib import SequenceMatcher
+from pathlib import PurePosixPath
+from typing import List, Optional, Set, Tuple
+
+_TOKEN_RE = re.compile(r"[a-z0-9]+")
+
+# Shorter names (without extension) are too generic to skip the LLM on.
+MIN_EXACT_STEM_CHARS = 3
+
+# Words that carry no signal about *which* item is wanted.
+STOPWORDS = {
+    "a", "an", "and", "any", "are", "at", "file", "files", "find", "folder", "folders", "for", "from",
+    "get", "give", "in", "inside", "is", "it", "its", "me", "my", "not", "of", "on", "open", "or",
+    "please", "root", "show", "that", "the", "this", "to", "under", "where", "which", "with", "within",
+}
+
+# Query words that hint at a file type.
+TYPE_HINTS = {
+    "pdf": ("pdf",),
+    "word": ("doc", "docx"),
+    "doc": ("doc", "docx"),
+    "docx": ("doc", "docx"),
+    "excel": ("xls", "xlsx", "csv"),
+    "spreadsheet": ("xls", "xlsx", "csv", "ods"),
+    "xlsx": ("xls", "xlsx"),
+    "csv": ("csv",),
+    "powerpoint": ("ppt", "pptx"),
+    "slides": ("ppt", "pptx"),
+    "deck": ("ppt", "pptx"),
+    "image": ("png", "jpg", "jpeg", "gif", "bmp", "webp"),
+    "photo": ("png", "jpg", "jpeg", "heic"),
+    "text": ("txt", "md"),
+    "txt": ("txt",),
+}
+
+
+def tokens(text: str) -> List[str]:
+    return _TOKEN_RE.findall((text or "").lower())
+
+
+def query_terms(query: str) -> List[str]:
+    return [t for t in tokens(query) if t not in STOPWORDS]
+
+
+def _extension(name: str) -> str:
+    return PurePosixPath(name).suffix.lower().lstrip(".")
+
+
+def _fuzzy(term: str, words: Set[str]) -> float:
+    """Best similarity of `term` to any word (prefix matches count as strong)."""
+    best = 0.0
+    for w in words:
+        if w == term:
+            return 1.0
+        if len(term) >= 3 and (w.startswith(term) or term.startswith(w) and len(w) >= 3):
+            best = max(best, 0.85)
+        elif abs(len(w) - len(term)) <= 3:
+            best = max(best, SequenceMatcher(None, term, w).ratio())
+    return best if best >= 0.75 else 0.0
+
+
+def score_candidate(query: str, candidate, now: Optional[datetime] = None) -> float:
+    """
+    Lexical relevance of a folder item to the query: term/fuzzy matches on the
+    name (strongest) and parent path, file-type hints against the extension or
+    mime type, plus a small bonus for recently modified items.
+    """
+    terms = query_terms(query)
+    if not terms:
+        return 0.0
+
+    name_words = set(tokens(candidate.name))
+    path_words = set(tokens(candidate.parent_reference_path or ""))
+    ext = _extension(candidate.name)
+    mime = (candidate.mime_type or "").lower()
+
+    score = 0.0
+    for t in terms:
+        score += 3.0 * _fuzzy(t, name_words)
+        score += 1.0 * (t in path_words)
+        if candidate.type == "file" and t in TYPE_HINTS:
+            if ext in TYPE_HINTS[t] or any(h in mime for h in TYPE_HINTS[t]):
+                score += 1.5
+    score /= len(terms)
+
+    if len(candidate.name) >= 4 and candidate.name.lower() in query.lower():
+        score += 5.0
+
+    modified = candidate.modified
+    if modified:
+        try:
+            age = ((now or datetime.now(timezone.utc)) - datetime.fromisoformat(modified.replace("Z", "+00:00"))).days
+            score += 0.2 if age <= 30 else 0.1 if age <= 365 else 0.0
+        except ValueError:
+            pass
+    return score
+
+
+def rank_candidates(query: str, candidates: List, now: Optional[datetime] = None) -> List[Tuple[float, object]]:
+    """Candidates by descending score; ties keep listing order."""
+    scored = [(score_candidate(query, c, now), i, c) for i, c in enumerate(candidates)]
+    scored.sort(key=lambda s: (-s[0], s[1]))
+    return [(s, c) for s, _, c in scored]
+
+
+def _specific(name_tokens: List[str]) -> bool:
+    """A name long and distinctive enough to be taken as an exact reference."""
+    return len("".join(name_tokens)) >= MIN_EXACT_STEM_CHARS and any(t not in STOPWORDS for t in name_tokens)
+
+
+def _phrase_at(q: List[str], phrase: List[str]) -> List[int]:
+    """Start positions where `phrase` occurs in `q` as whole tokens."""
+    n = len(phrase)
+    return [i for i in range(len(q) - n + 1) if q[i:i + n] == phrase]
+
+
+def exact_match(query: str, candidates: List) -> Optional[object]:
+    """
+    Item the query names unambiguously, so no LLM call is needed. Names are
+    compared as whole tokens, case- and punctuation-insensitively
+    ("Q3_Report.PDF" ~ "q3 report pdf"):
+    - a file whose full name (with extension) appears in the query, or
+    - a folder referred to as "<name> folder" / "folder <name>" when no file
+      matched, and not as the tail of a longer name ("meeting notes folder"
+      does not name "notes").
+    Names shorter than MIN_EXACT_STEM_CHARS or made of stopwords only never
+    match. Returns None unless exactly one item qualifies.
+    """
+    q = tokens(query)
+
+    files = []
+    for c in candidates:
+        if c.type != "file" or not _extension(c.name):
+            continue
+        name = tokens(c.name)
+        stem = tokens(PurePosixPath(c.name).stem)
+        if _specific(stem) and _phrase_at(q, name):
+            files.append(c)
+    if len(files) == 1:
+        return files[0]
+    if files:
+        return None
+
+    folders = []
+    for c in candidates:
+        name = tokens(c.name)
+        if c.type != "folder" or not _specific(name):
+            continue
+        n = len(name)
+        before = [i for i in _phrase_at(q, name + ["folder"]) if i == 0 or q[i - 1] in STOPWORDS]
+        after = [i for i in _phrase_at(q, ["folder"] + name) if i + n + 1 == len(q) or q[i + n + 1] in STOPWORDS]
+        if before or after:
+            folders.append(c)
+    return folders[0] if len(folders) == 1 else None
@@ -0,0 +1,162 @@
+import asyncio
+import os
+import threading
+from typing import Any, Dict, Optional, Tuple, Type
+
+import httpx
+from dotenv import load_dotenv
+from langchain_openai import ChatOpenAI
+from pydantic import BaseModel
+from trustcall import create_extractor
+
+from src.agent.llm_cache import CachedExtractor, LLMCache
+from src.core.config import settings
+from src.utils.telemetry import LLM_CALL_SECONDS, LLM_TOKENS, timed
+
+load_dotenv()
+
+
+class AgentRuntime:
+    """
+    Process-wide holder of LLM clients and trustcall extractors for agent nodes.
+
+    Clients are built once per (model, temperature) and extractors once per
+    (model, tool schema), all sharing one pooled httpx transport. With a `cache`,
+    extractors answer previously seen prompts from it. Nodes get the runtime
+    from the LangGraph config via `get_runtime(config)`.
+    """
+    def __init__(
+        self,
+        model: Optional[str] = None,
+        api_key: Optional[str] = None,
+        base_url: Optional[str] = None,
+        max_connections: int = 20,
+        timeout: float = 60,
+        cache: Optional[LLMCache] = None,
+    ):
+        self.model = model or os.getenv("OPENAI_MODEL")
+        self.api_key = api_key or os.getenv("OPENAI_API_KEY")
+        self.base_url = base_url or os.getenv("OPENAI_BASE_URL")
+        self.cache = cache
+        limits = httpx.Limits(max_connections=max_connections, max_keepalive_connections=max_connections)
+        self.http_client = httpx.Client(limits=limits, timeout=timeout)
+        self.http_async_client = httpx.AsyncClient(limits=limits, timeout=timeout)
+        self._llms: Dict[Tuple[str, float], ChatOpenAI] = {}
+        self._extractors: Dict[Tuple[str, str], Any] = {}
+        self._lock = threading.Lock()
+        self._closing: Optional[asyncio.Task] = None
+
+
+    def llm(self, model: Optional[str] = None, temperature: float = 0) -> ChatOpenAI:
+        """Shared chat model client for `model` (defaults to OPENAI_MODEL)."""
+        model = model or self.model
+        if not model:
+            raise RuntimeError("Please set OPENAI_MODEL in .env or env")
+        if not self.api_key:
+            raise RuntimeError("Please set OPENAI_API_KEY in .env or env")
+        key = (model, temperature)
+        llm = self._llms.get(key)
+        if llm is None:
+            with self._lock:
+                llm = self._llms.get(key)
+                if llm is None:
+                    llm = ChatOpenAI(
+                        model=model,
+                        openai_api_key=self.api_key,
+                        openai_api_base=self.base_url,
+                        temperature=temperature,
+                        http_client=self.http_client,
+                        http_async_client=self.http_async_client,
+                    )
+                    self._llms[key] = llm
+        return llm
+
+
+    def extractor(self, tool: Type[BaseModel], model: Optional[str] = None):
+        """Shared trustcall extractor forced to call `tool`."""
+        key = (model or self.model, f"{tool.__module__}.{tool.__qualname__}")
+        extractor = self._extractors.get(key)
+        if extractor is None:
+            llm = self.llm(model)
+            with self._lock:
+                extractor = self._extractors.get(key)
+                if extractor is None:
+                    extractor = create_extractor(llm, tools=[tool], tool_choice=tool.__name__)
+                    if self.cache is not None:
+                        extractor = CachedExtractor(extractor, tool, key[0], self.cache)
+                    extractor = InstrumentedExtractor(extractor, tool.__name__)
+                    self._extractors[key] = extractor
+        return extractor
+
+
+    def close(self) -> None:
+        """Close both HTTP clients; inside a running event loop prefer `await aclose()`."""
+        self.http_client.close()
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            asyncio.run(self.http_async_client.aclose())
+        else:
+            self._closing = loop.create_task(self.http_async_client.aclose())
+
+
+    async def aclose(self) -> None:
+        self.http_client.close()
+        await self.http_async_client.aclose()
+
+
+class InstrumentedExtractor:
+    """Times extractor calls and counts the tokens reported in the messages' usage metadata."""
+    def __init__(self, extractor, tool_name: str):
+        self.extractor = extractor
+        self.tool_name = tool_name
+
+
+    def invoke(self, input: Any, config: Optional[Dict[str, Any]] = None, **kwargs) -> Dict[str, Any]:
+        with timed(LLM_CALL_SECONDS, f"llm.{self.tool_name}", tool=self.tool_name) as timer:
+            result = self.extractor.invoke(input, config, **kwargs)
+            cached = bool(result.get("cached"))
+            timer.set(cached=str(cached).lower())
+        if not cached:
+            for message in result.get("messages") or []:
+                usage = getattr(message, "usage_metadata", None) or {}
+                for kind in ("input_tokens", "output_tokens"):
+                    if usage.get(kind):
+                        LLM_TOKENS.inc(usage[kind], tool=self.tool_name, kind=kind.split("_")[0])
+        return result
+
+
+_default_runtime: Optional[AgentRuntime] = None
+_default_lock = threading.Lock()
+
+
+def default_runtime() -> AgentRuntime:
+    """Lazily created runtime shared by every graph run in this process."""
+    global _default_runtime
+    if _default_runtime is None:
+        with _default_lock:
+            if _default_runtime is None:
+                cache = None
+                if settings.LLM_CACHE_PATH:
+                    cache = LLMCache(
+                        settings.LLM_CACHE_PATH,
+                        ttl=settings.LLM_CACHE_TTL,
+                        max_entries=settings.LLM_CACHE_MAX_ENTRIES,
+                    )
+                _default_runtime = AgentRuntime(cache=cache)
+    return _default_runtime
+
+
+async def close_default_runtime() -> None:
+    """Close the process-wide runtime (at app shutdown); the next use creates a new one."""
+    global _default_runtime
+    with _default_lock:
+        runtime, _default_runtime = _default_runtime, None
+    if isinstance(runtime, AgentRuntime):
+        await runtime.aclose()
+
+
+def get_runtime(config: Optional[Dict[str, Any]]) -> AgentRuntime:
+    """Runtime passed as `config["configurable"]["runtime"]`, else the process default."""
+    runtime = ((config or {}).get("configurable") or {}).get("runtime")
+    return runtime if runtime is not None else default_runtime()
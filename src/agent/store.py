@@ -0,0 +1,242 @@
+import json
+import logging
+import os
+import sqlite3
+import threading
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from langgraph.store.base import (
+    BaseStore,
+    GetOp,
+    Item,
+    ListNamespacesOp,
+    Op,
+    PutOp,
+    Result,
+    SearchItem,
+    SearchOp,
+)
+
+from src.agent.prerank import tokens
+
+logger = logging.getLogger(__name__)
+
+_SEP = "\x1f"
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS store (
+    namespace TEXT NOT NULL,
+    key TEXT NOT NULL,
+    value TEXT NOT NULL,
+    created_at TEXT NOT NULL,
+    updated_at TEXT NOT NULL,
+    expires_at TEXT,
+    ttl_minutes REAL,
+    PRIMARY KEY (namespace, key)
+);
+"""
+
+
+def _matches(value: Any, expected: Any) -> bool:
+    """Filter semantics of the LangGraph stores: equality, nested dicts and $eq/$ne/$gt/$gte/$lt/$lte."""
+    if isinstance(expected, dict):
+        if any(k.startswith("$") for k in expected):
+            ops = {
+                "$eq": lambda a, b: a == b,
+                "$ne": lambda a, b: a != b,
+                "$gt": lambda a, b: a is not None and float(a) > float(b),
+                "$gte": lambda a, b: a is not None and float(a) >= float(b),
+                "$lt": lambda a, b: a is not None and float(a) < float(b),
+                "$lte": lambda a, b: a is not None and float(a) <= float(b),
+            }
+            return all(ops[op](value, arg) for op, arg in expected.items())
+        return isinstance(value, dict) and all(_matches(value.get(k), v) for k, v in expected.items())
+    return value == expected
+
+
+def _text_score(query: str, value: Dict[str, Any]) -> float:
+    """Share of query words found in the item's string values."""
+    wanted = set(tokens(query))
+    if not wanted:
+        return 0.0
+    words = set(tokens(" ".join(str(v) for v in value.values() if isinstance(v, (str, list)))))
+    return len(wanted & words) / len(wanted)
+
+
+class SqliteStore(BaseStore):
+    """
+    Persistent LangGraph `BaseStore` on a single SQLite file.
+
+    Supports get/put/delete/search/list_namespaces with filters and per-item
+    TTLs (minutes, as in the LangGraph API). `search(query=...)` ranks items by
+    word overlap with their string values; there is no vector index.
+    """
+    supports_ttl = True
+
+    def __init__(self, db_path: str = ":memory:"):
+        if db_path != ":memory:":
+            os.makedirs(os.path.dirname(os.path.abspath(db_path)), exist_ok=True)
+        self.db_path = db_path
+        self._conn = sqlite3.connect(db_path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(_SCHEMA)
+        self._lock = threading.Lock()
+
+
+    def _item(self, row, cls=Item, **extra) -> Item:
+        namespace, key, value, created_at, updated_at = row[:5]
+        return cls(
+            namespace=tuple(namespace.split(_SEP)) if namespace else (),
+            key=key,
+            value=json.loads(value),
+            created_at=created_at,
+            updated_at=updated_at,
+            **extra,
+        )
+
+
+    def _refresh(self, rows, now: datetime) -> None:
+        """Push back the expiry of items read with refresh_ttl."""
+        for row in rows:
+            if row[6] is not None:
+                self._conn.execute(
+                    "UPDATE store SET expires_at = ? WHERE namespace = ? AND key = ?",
+                    ((now + timedelta(minutes=row[6])).isoformat(), row[0], row[1]),
+                )
+
+
+    def _get(self, op: GetOp, now: datetime) -> Optional[Item]:
+        row = self._conn.execute(
+            "SELECT namespace, key, value, created_at, updated_at, expires_at, ttl_minutes FROM store "
+            "WHERE namespace = ? AND key = ? AND (expires_at IS NULL OR expires_at > ?)",
+            (_SEP.join(op.namespace), op.key, now.isoformat()),
+        ).fetchone()
+        if row is None:
+            return None
+        if op.refresh_ttl:
+            self._refresh([row], now)
+        return self._item(row)
+
+
+    def _search(self, op: SearchOp, now: datetime) -> List[SearchItem]:
+        prefix = _SEP.join(op.namespace_prefix)
+        rows = self._conn.execute(
+            "SELECT namespace, key, value, created_at, updated_at, expires_at, ttl_minutes FROM store "
+            "WHERE (? = '' OR namespace = ? OR substr(namespace, 1, ?) = ?) "
+            "AND (expires_at IS NULL OR expires_at > ?) ORDER BY updated_at DESC",
+            (prefix, prefix, len(prefix) + 1, prefix + _SEP, now.isoformat()),
+        ).fetchall()
+        scored: List[Tuple[Optional[float], Any]] = []
+        for row in rows:
+            value = json.loads(row[2])
+            if op.filter and not all(_matches(value.get(k), v) for k, v in op.filter.items()):
+                continue
+            scored.append((_text_score(op.query, value) if op.query else None, row))
+        if op.query:
+            scored.sort(key=lambda s: -s[0])
+        page = scored[op.offset: op.offset + op.limit]
+        if op.refresh_ttl:
+            self._refresh([row for _, row in page], now)
+        return [self._item(row, SearchItem, score=score) for score, row in page]
+
+
+    def _put(self, op: PutOp, now: datetime) -> None:
+        namespace = _SEP.join(op.namespace)
+        if op.value is None:
+            self._conn.execute("DELETE FROM store WHERE namespace = ? AND key = ?", (namespace, op.key))
+            return
+        stamp = now.isoformat()
+        expires_at = (now + timedelta(minutes=op.ttl)).isoformat() if op.ttl is not None else None
+        self._conn.execute(
+            "INSERT INTO store (namespace, key, value, created_at, updated_at, expires_at, ttl_minutes) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?) "
+            "ON CONFLICT (namespace, key) DO UPDATE SET value = excluded.value, "
+            "updated_at = excluded.updated_at, expires_at = excluded.expires_at, ttl_minutes = excluded.ttl_minutes",
+            (namespace, op.key, json.dumps(op.value), stamp, stamp, expires_at, op.ttl),
+        )
+
+
+    def _list_namespaces(self, op: ListNamespacesOp, now: datetime) -> List[Tuple[str, ...]]:
+        rows = self._conn.execute(
+            "SELECT DISTINCT namespace FROM store WHERE expires_at IS NULL OR expires_at > ?", (now.isoformat(),)
+        ).fetchall()
+        namespaces = [tuple(r[0].split(_SEP)) for r in rows]
+
+        def matches(ns, condition) -> bool:
+            path = condition.path
+            if len(ns) < len(path):
+                return False
+            pairs = zip(ns, path) if condition.match_type == "prefix" else zip(reversed(ns), reversed(path))
+            return all(p == "*" or n == p for n, p in pairs)
+
+        if op.match_conditions:
+            namespaces = [ns for ns in namespaces if all(matches(ns, c) for c in op.match_conditions)]
+        if op.max_depth is not None:
+            namespaces = {ns[: op.max_depth] for ns in namespaces}
+        return sorted(namespaces)[op.offset: op.offset + op.limit]
+
+
+    def batch(self, ops: Iterable[Op]) -> List[Result]:
+        now = datetime.now(timezone.utc)
+        results: List[Result] = []
+        with self._lock, self._conn:
+            for op in ops:
+                if isinstance(op, GetOp):
+                    results.append(self._get(op, now))
+                elif isinstance(op, SearchOp):
+                    results.append(self._search(op, now))
+                elif isinstance(op, PutOp):
+                    results.append(self._put(op, now))
+                elif isinstance(op, ListNamespacesOp):
+                    results.append(self._list_namespaces(op, now))
+                else:
+                    raise ValueError(f"Unknown store operation: {type(op).__name__}")
+        return results
+
+
+    async def abatch(self, ops: Iterable[Op]) -> List[Result]:
+        return self.batch(ops)
+
+
+    def sweep_expired(self) -> int:
+        """Delete expired items; returns how many were removed."""
+        with self._lock, self._conn:
+            cur = self._conn.execute(
+                "DELETE FROM store WHERE expires_at IS NOT NULL AND expires_at <= ?",
+                (datetime.now(timezone.utc).isoformat(),),
+            )
+        return cur.rowcount
+
+
+    def close(self) -> None:
+        self._conn.close()
+
+
+def sqlite_path(url: str) -> Optional[str]:
+    """
+    Database path of a `sqlite:///relative.db` or `sqlite:////abs/path.db` URL
+    (`sqlite://` alone is in-memory); None for other schemes. A host part, as in
+    `sqlite://file.db`, is rejected rather than guessed at.
+    """
+    if not url.startswith("sqlite:"):
+        return None
+    if url == "sqlite://":
+        return ":memory:"
+    if not url.startswith("sqlite:///"):
+        raise ValueError(f"Invalid SQLite URL {url!r}; use sqlite:///relative.db or sqlite:////abs/path.db")
+    return url[len("sqlite:///"):] or ":memory:"
+
+
+def make_store(url: Optional[str]) -> Optional[BaseStore]:
+    """Store for a URL: `sqlite:///path/to.db` or `memory`. Empty means none."""
+    if not url:
+        return None
+    if url == "memory":
+        from langgraph.store.memory import InMemoryStore
+        return InMemoryStore()
+    path = sqlite_path(url)
+    if path is not None:
+        return SqliteStore(path)
+    raise ValueError(f"Unsupported store URL: {url}")
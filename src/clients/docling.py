@@ -2,10 +2,11 @@ import io
 import json
 import mimetypes
 import os
+import tempfile
 import zipfile
 import tarfile
 from pathlib import Path
-from typing import Tuple
+from typing import Optional, Tuple
 
 import magic
 import pandas as pd
@@ -15,6 +16,8 @@ from docling.datamodel.base_models import InputFormat
 from docling.datamodel.pipeline_options import VlmPipelineOptions, PdfPipelineOptions
 from docling.document_converter import DocumentConverter
 
+from src.utils.telemetry import CONVERSION_BYTES, CONVERSION_SECONDS, timed
+
 # Optional: PyxTxt for broader extraction (install extras if needed)
 try:
     from pyxtxt import extract
@@ -57,30 +60,50 @@ def guess_extension(filename: str, mime: str = None) -> str:
         ext = mimetypes.guess_extension(mime) or ""
     return ext.lower()
 
-def convert_bytes(file_bytes: bytes, filename: str, mime: str = None) -> Tuple[dict, str]:
+def handler_name(ext: str) -> str:
+    """Which handler `convert_bytes` uses for an extension (metrics label)."""
+    if ext in ARCHIVE_EXTS:
+        return "archive"
+    if ext in AUDIO_VIDEO_EXTS:
+        return "audio_video"
+    if ext in CODE_TEXT_EXTS:
+        return "text"
+    if ext in DOCLING_EXTS:
+        return "docling"
+    return "pyxtxt" if HAS_PYXTXT else "unsupported"
+
+def convert_bytes(file_bytes: bytes, filename: str, mime: str = None, pages: Optional[int] = None) -> Tuple[dict, str]:
     """
     Convert any bytes into (json_struct, markdown).
+    `pages` limits paged formats (PDF etc.) to their first pages.
     """
     ext = guess_extension(filename, mime)
-
+    handler = handler_name(ext)
+    # Unknown extensions share one label to keep metric cardinality bounded.
+    label = ext if handler not in ("pyxtxt", "unsupported") else "other"
+    CONVERSION_BYTES.inc(len(file_bytes), handler=handler, extension=label)
+    with timed(CONVERSION_SECONDS, "docling.convert_bytes", handler=handler, extension=label):
+        return _convert(handler, file_bytes, filename, pages)
+
+def _convert(handler: str, file_bytes: bytes, filename: str, pages: Optional[int]) -> Tuple[dict, str]:
     # -- Archive (unpack to process each file if needed)
-    if ext in ARCHIVE_EXTS:
+    if handler == "archive":
         return handle_archive(file_bytes, filename)
 
     # -- Audio/Video (requires extra libs if available)
-    if ext in AUDIO_VIDEO_EXTS:
+    if handler == "audio_video":
         return handle_audio_video(file_bytes, filename)
 
     # -- Code/Text
-    if ext in CODE_TEXT_EXTS:
+    if handler == "text":
         return handle_text_bytes(file_bytes)
 
     # -- Docling formats
-    if ext in DOCLING_EXTS:
-        return convert_with_docling(file_bytes, filename)
+    if handler == "docling":
+        return convert_with_docling(file_bytes, filename, pages)
 
     # -- Fallback: raw try via PyxTxt if installed
-    if HAS_PYXTXT:
+    if handler == "pyxtxt":
         try:
             return convert_with_pyxxt(file_bytes, filename)
         except Exception:
@@ -93,21 +116,24 @@ def convert_bytes(file_bytes: bytes, filename: str, mime: str = None) -> Tuple[d
 #  Handler Impl
 # --------------------------------------------------------------------------------
 
-def convert_with_docling(file_bytes: bytes, filename: str) -> Tuple[dict, str]:
+def convert_with_docling(file_bytes: bytes, filename: str, pages: Optional[int] = None) -> Tuple[dict, str]:
     """
     Use Docling to parse into JSON/Markdown.
     """
-    # Write temp file with correct extension
-    tmp = Path(f"/tmp/{filename}")
-    tmp.write_bytes(file_bytes)
+    # Write temp file with correct extension (own directory: concurrent conversions may share a name)
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        tmp = Path(tmp_dir) / Path(filename).name
+        tmp.write_bytes(file_bytes)
 
-    result = docling_converter.convert(source=str(tmp))
-    doc = result.document
+        if pages:
+            result = docling_converter.convert(source=str(tmp), page_range=(1, pages))
+        else:
+            result = docling_converter.convert(source=str(tmp))
+        doc = result.document
 
-    json_struct = doc.model_dump()
-    md_text = doc.export_to_markdown()
+        json_struct = doc.model_dump()
+        md_text = doc.export_to_markdown()
 
-    tmp.unlink(missing_ok=True)
     return json_struct, md_text
 
 def handle_text_bytes(file_bytes: bytes) -> Tuple[dict, str]:
@@ -1,5 +1,206 @@
 import requests
 import json
+from concurrent.futures import ThreadPoolExecutor
+from typing import Optional, List, Dict, Any, Iterator
+
+from requests.adapters import HTTPAdapter
+
+from src.core.config import settings
+from src.utils.telemetry import GRAPH_CALL_SECONDS, instrument_session, traced
+
+BETA_SEARCH_URL = f"{settings.GRAPH_BASE_URL}/beta/search/query"
+
+
+class GraphSearchError(Exception):
+    """Raised when the Graph beta Search API returns a non-200 response."""
+    def __init__(self, status_code: Optional[int], message: str):
+        super().__init__(f"Graph API Error {status_code}: {message}")
+        self.status_code = status_code
+        self.message = message
+
+
+def _pooled_session(pool_size: int = 10) -> requests.Session:
+    """Session with a keep-alive connection pool sized for concurrent searches."""
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    instrument_session(session)
+    return session
+
+
+# Shared across SearchClient instances so short-lived clients (one per API
+# request / token) still reuse warm TLS connections.
+_shared_session = _pooled_session()
+
+
+class SearchClient:
+    """
+    Microsoft Graph beta Search API client over a pooled HTTP session.
+    """
+    def __init__(
+        self,
+        access_token: str,
+        region: str = "APAC",
+        timeout: int = 10,
+        session: Optional[requests.Session] = None,
+        url: str = BETA_SEARCH_URL,
+        cache=None,
+    ):
+        self.url = url
+        self.cache = cache
+        self.region = region
+        self.timeout = timeout
+        self.session = session or _shared_session
+        self.headers = {
+            "Authorization": f"Bearer {access_token}",
+            "Content-Type": "application/json"
+        }
+
+
+    def build_request(
+        self,
+        query_string: str,
+        query_template: Optional[str] = None,
+        semantic_query: Optional[str] = None,
+        region: Optional[str] = None,
+        size: int = 25,
+        offset: int = 0,
+        fields: Optional[List[str]] = None,
+    ) -> Dict[str, Any]:
+        """Build one entry of the `requests` array of a search query body."""
+        query_obj = {"queryString": query_string}
+        if query_template:
+            query_obj["queryTemplate"] = query_template  # KQL template using {searchTerms}
+
+        request_obj = {
+            "entityTypes": ["driveItem"],
+            "query": query_obj,
+            "region": region or self.region,
+            "from": offset,
+            "size": size
+        }
+        if semantic_query:
+            request_obj["semanticQuery"] = {"query": semantic_query}
+        if fields:
+            request_obj["fields"] = fields
+        return request_obj
+
+
+    @traced(GRAPH_CALL_SECONDS, method="beta_query")
+    def query(self, search_requests: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """
+        POST several search requests in a single round-trip.
+        Returns one searchResponse per request, in order.
+        """
+        return self._post(search_requests).get("value", [])
+
+
+    def _post(self, search_requests: List[Dict[str, Any]]) -> Dict[str, Any]:
+        """The full JSON body of a search query response."""
+        try:
+            resp = self.session.post(
+                self.url,
+                headers=self.headers,
+                json={"requests": search_requests},
+                timeout=self.timeout
+            )
+        except requests.RequestException as e:
+            raise GraphSearchError(None, str(e)) from e
+
+        if resp.status_code != 200:
+            raise GraphSearchError(resp.status_code, resp.text)
+        return resp.json()
+
+
+    def _cache_key(self, query_string: str, **kwargs):
+        kwargs.setdefault("region", self.region)
+        kwargs.setdefault("size", 25)
+        kwargs.setdefault("offset", 0)
+        return self.cache.make_key(query_string, scope="beta/search", **kwargs)
+
+
+    @traced(GRAPH_CALL_SECONDS, method="beta_search")
+    def search(self, query_string: str, **kwargs) -> Dict[str, Any]:
+        """Run a single search request and return its searchResponse."""
+        def fetch():
+            responses = self.query([self.build_request(query_string, **kwargs)])
+            return responses[0] if responses else {}
+
+        if self.cache is None:
+            return fetch()
+        return self.cache.get_or_fetch(self._cache_key(query_string, **kwargs), fetch)
+
+
+    @traced(GRAPH_CALL_SECONDS, method="beta_search_many")
+    def search_many(self, requests_kwargs: List[Dict[str, Any]]) -> List[List[Dict[str, Any]]]:
+        """
+        Run several searches (e.g. one per expanded query template) in one HTTP call.
+        Returns the hits of each request, in order. With a cache, only the
+        requests that miss are sent.
+        """
+        responses: List[Optional[Dict[str, Any]]] = [None] * len(requests_kwargs)
+        keys = []
+        if self.cache is not None:
+            for i, kw in enumerate(requests_kwargs):
+                key = self._cache_key(**kw)
+                keys.append(key)
+                found, value = self.cache.get(key)
+                if found:
+                    responses[i] = value
+
+        missing = [i for i, r in enumerate(responses) if r is None]
+        if missing:
+            fetched = self.query([self.build_request(**requests_kwargs[i]) for i in missing])
+            for i, r in zip(missing, fetched):
+                responses[i] = r
+                if self.cache is not None:
+                    self.cache.put(keys[i], r)
+        return [extract_hits(r or {})[0] for r in responses]
+
+
+    def iter_hits(
+        self,
+        query_string: str,
+        page_size: int = 25,
+        max_results: Optional[int] = None,
+        **kwargs
+    ) -> Iterator[Dict[str, Any]]:
+        """
+        Iterate over every hit of a search, page by page.
+        The next page is fetched in the background while the caller consumes
+        the current one; iteration stops when `moreResultsAvailable` is false.
+        """
+        def fetch(offset: int):
+            return self.search(query_string, size=page_size, offset=offset, **kwargs)
+
+        yielded = 0
+        offset = 0
+        with ThreadPoolExecutor(max_workers=1) as pool:
+            future = pool.submit(fetch, offset)
+            while future is not None:
+                hits, more = extract_hits(future.result())
+                offset += len(hits)
+                future = None
+                if more and hits and (max_results is None or offset < max_results):
+                    future = pool.submit(fetch, offset)
+                for hit in hits:
+                    if max_results is not None and yielded >= max_results:
+                        if future is not None:
+                            future.cancel()
+                        return
+                    yielded += 1
+                    yield hit
+
+
+def extract_hits(search_response: Dict[str, Any]):
+    """Flatten a searchResponse into (hits, moreResultsAvailable)."""
+    hits: List[Dict[str, Any]] = []
+    more = False
+    for container in search_response.get("hitsContainers", []):
+        hits.extend(container.get("hits", []))
+        more = more or container.get("moreResultsAvailable", False)
+    return hits, more
 
 
 def search_drive_items(
@@ -23,52 +224,20 @@ def search_drive_items(
     :param size: Number of results to return
     :param offset: Pagination offset
     :param fields: Optional list of fields to return
+    :return: The Graph response body as returned by the API (use
+        `SearchClient.query` / `search_many` to batch several searches)
     """
-
-    headers = {
-        "Authorization": f"Bearer {access_token}",
-        "Content-Type": "application/json"
-    }
-
-    # Build query object
-    query_obj = {"queryString": query_string}
-
-    if query_template:
-        query_obj["queryTemplate"] = query_template #KQL template using {searchTerms}
-
-    # Base request
-    request_obj = {
-        "entityTypes": ["driveItem"],
-        "query": query_obj,
-        "region": region,
-        "from": offset,
-        "size": size
-    }
-
-    # ✅ Add semanticQuery only if provided
-    if semantic_query:
-        request_obj["semanticQuery"] = {
-            "query": semantic_query
-        }
-
-    # ✅ Add fields if provided
-    if fields:
-        request_obj["fields"] = fields
-
-    body = {"requests": [request_obj]}
-
-    response = requests.post(
-        "https://graph.microsoft.com/beta/search/query",
-        headers=headers,
-        json=body
+    client = SearchClient(access_token, region=region)
+    return client._post([
+        client.build_request(
+            query_string,
+            query_template=query_template,
+            semantic_query=semantic_query,
+            size=size,
+            offset=offset,
+            fields=fields,
         )
-
-    if response.status_code != 200:
-        raise Exception(
-            f"Graph API Error {response.status_code}: {response.text}"
-        )
-
-    return response.json()
+    ])
 
 
 # ✅ Example usage
@@ -89,4 +258,4 @@ if __name__ == "__main__":
         offset=0,
         fields=["name", "webUrl", "lastModifiedDateTime", "createdBy"]
     )
-    print(json.dumps(results, indent=4))
\ No newline at end of file
+    print(json.dumps(results, indent=4))
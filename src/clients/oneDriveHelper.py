@@ -1,36 +1,164 @@
 import requests
 import logging
-from typing import Optional, List, Dict, Any
+import time
+from typing import Optional, List, Dict, Any, Iterator, Sequence, Tuple
+
+from src.core.config import settings
+from src.utils.telemetry import GRAPH_CALL_SECONDS, instrument_session, traced
 
 logger = logging.getLogger(__name__)
 logging.basicConfig(level=logging.INFO)
 
+# Upload session chunks must be multiples of 320 KiB (and at most 60 MiB).
+UPLOAD_CHUNK_ALIGN = 320 * 1024
+
+# Throttling / transient statuses worth retrying; Retry-After is honoured up to the cap.
+RETRY_STATUSES = (429, 502, 503, 504)
+MAX_RETRY_AFTER = 30.0
+
+
+class GraphListingError(Exception):
+    """Raised by `iter_children` when a page still fails after its retries."""
+    def __init__(self, folder_id: str, pages_read: int, message: str):
+        super().__init__(f"Listing of '{folder_id}' failed after {pages_read} page(s): {message}")
+        self.folder_id = folder_id
+        self.pages_read = pages_read
+        self.message = message
+        self.status_code: Optional[int] = None
+
+
+class GraphRequestError(Exception):
+    """
+    Raised when Graph rejects a request with a 4xx status the caller can act on
+    (name conflict, invalid path, ...). 401 and 429 are this service's token or
+    quota problems, not the caller's, and are logged as upstream failures instead.
+    """
+    def __init__(self, status_code: int, message: str):
+        super().__init__(f"{status_code}: {message}")
+        self.status_code = status_code
+        self.message = message
+
+
+def raise_for_rejection(e: requests.RequestException) -> None:
+    """Re-raise an HTTPError with a caller-facing 4xx status as `GraphRequestError`."""
+    resp = e.response if isinstance(e, requests.HTTPError) else None
+    if resp is None or not 400 <= resp.status_code < 500 or resp.status_code in (401, 429):
+        return
+    try:
+        message = resp.json()["error"]["message"]
+    except (ValueError, KeyError, TypeError):
+        message = str(e)
+    raise GraphRequestError(resp.status_code, message) from e
+
+
+def retry_delay(resp: Optional[requests.Response], attempt: int) -> float:
+    """Seconds to wait before retry `attempt`: Retry-After when given, else exponential backoff."""
+    header = resp.headers.get("Retry-After") if resp is not None else None
+    try:
+        return min(float(header), MAX_RETRY_AFTER)
+    except (TypeError, ValueError):
+        return 0.5 * 2 ** attempt
+
 
 class GraphClient:
     """
     Production-ready Microsoft Graph API client for OneDrive operations.
     """
-    def __init__(self, access_token: str, timeout: int = 10):
-        self.base_url = "https://graph.microsoft.com/v1.0"
+    def __init__(
+        self,
+        access_token: str,
+        timeout: int = 10,
+        search_cache=None,
+        download_cache=None,
+        base_url: Optional[str] = None,
+        max_retries: int = 3,
+    ):
+        self.base_url = f"{base_url or settings.GRAPH_BASE_URL}/v1.0"
         self.session = requests.Session()
         self.session.headers.update({
             "Authorization": f"Bearer {access_token}",
             "Content-Type": "application/json"
         })
+        # Pre-authenticated download and upload URLs must be called without the bearer token.
+        self.transfer_session = requests.Session()
+        instrument_session(self.session)
+        instrument_session(self.transfer_session)
         self.timeout = timeout
+        self.search_cache = search_cache
+        self.download_cache = download_cache
+        self.max_retries = max_retries
 
 
+    @traced(GRAPH_CALL_SECONDS, method="list_root")
     def list_root(self) -> List[Dict[str, Any]]:
-        """List files and folders at the root of the user's OneDrive."""
+        """List files and folders at the root of the user's OneDrive (all pages, or [] if any page fails)."""
+        return self._list_all("root")
+
+
+    def _list_all(self, folder_id: str) -> List[Dict[str, Any]]:
         try:
-            resp = self.session.get(f"{self.base_url}/me/drive/root/children", timeout=self.timeout)
-            resp.raise_for_status()
-            return resp.json().get("value", [])
-        except requests.RequestException as e:
-            logger.error(f"Failed to list root: {e}")
+            return [item for page in self.iter_children(folder_id) for item in page]
+        except GraphListingError as e:
+            logger.error(str(e))
             return []
 
 
+    def _get_page(self, url: str, params: Optional[Dict[str, Any]]) -> Dict[str, Any]:
+        """GET one listing page, retrying throttling and transient errors."""
+        for attempt in range(self.max_retries + 1):
+            resp = None
+            try:
+                resp = self.session.get(url, params=params, timeout=self.timeout)
+                if resp.status_code not in RETRY_STATUSES or attempt == self.max_retries:
+                    resp.raise_for_status()
+                    return resp.json()
+            except requests.HTTPError:
+                raise
+            except requests.RequestException:
+                if attempt == self.max_retries:
+                    raise
+            delay = retry_delay(resp, attempt)
+            logger.warning(f"Graph page request throttled or failed, retrying in {delay:.1f}s")
+            time.sleep(delay)
+
+
+    def iter_children(
+        self,
+        folder_id: str = "root",
+        select: Optional[Sequence[str]] = None,
+        page_size: Optional[int] = None,
+    ) -> Iterator[List[Dict[str, Any]]]:
+        """
+        Yield the children of a folder one Graph page at a time, following
+        `@odata.nextLink`. `select` is forwarded as `$select`, `page_size` as `$top`.
+        Each page is retried on 429/5xx; a page that still fails raises
+        `GraphListingError`, so a listing is never silently cut short.
+        """
+        if folder_id == "root":
+            url = f"{self.base_url}/me/drive/root/children"
+        else:
+            url = f"{self.base_url}/me/drive/items/{folder_id}/children"
+        params: Optional[Dict[str, Any]] = {}
+        if select:
+            params["$select"] = ",".join(select)
+        if page_size:
+            params["$top"] = page_size
+        pages_read = 0
+        while url:
+            try:
+                data = self._get_page(url, params or None)
+            except (requests.RequestException, ValueError) as e:
+                error = GraphListingError(folder_id, pages_read, str(e))
+                if isinstance(e, requests.HTTPError) and e.response is not None:
+                    error.status_code = e.response.status_code
+                raise error from e
+            pages_read += 1
+            yield data.get("value", [])
+            # nextLink already carries the query options.
+            url, params = data.get("@odata.nextLink"), None
+
+
+    @traced(GRAPH_CALL_SECONDS, method="get_drive_id")
     def get_drive_id(self) -> Optional[str]:
         """Get the user's OneDrive drive ID."""
         try:
@@ -42,6 +170,7 @@ class GraphClient:
             return None
 
 
+    @traced(GRAPH_CALL_SECONDS, method="get_folder_id_by_path")
     def get_folder_id_by_path(self, path: str) -> Optional[str]:
         """Get the folder ID for a given path."""
         try:
@@ -53,28 +182,54 @@ class GraphClient:
             return None
     
 
+    @traced(GRAPH_CALL_SECONDS, method="list_folder")
     def list_folder(self, folder_id: str) -> List[Dict[str, Any]]:
-        """List contents of a folder by folder ID."""
-        try:
-            resp = self.session.get(f"{self.base_url}/me/drive/items/{folder_id}/children", timeout=self.timeout)
-            resp.raise_for_status()
-            return resp.json().get("value", [])
-        except requests.RequestException as e:
-            logger.error(f"Failed to list folder '{folder_id}': {e}")
-            return []
+        """List contents of a folder by folder ID (all pages, or [] if any page fails)."""
+        return self._list_all(folder_id)
 
 
+    @traced(GRAPH_CALL_SECONDS, method="search")
     def search(self, query: str) -> List[Dict[str, Any]]:
         """Search OneDrive for files/folders matching the query."""
-        try:
+        def fetch():
             resp = self.session.get(f"{self.base_url}/me/drive/root/search(q='{query}')", timeout=self.timeout)
             resp.raise_for_status()
             return resp.json().get("value", [])
+
+        try:
+            if self.search_cache is None:
+                return fetch()
+            key = self.search_cache.make_key(query, scope="v1.0/root/search")
+            return self.search_cache.get_or_fetch(key, fetch)
         except requests.RequestException as e:
             logger.error(f"Search failed for query '{query}': {e}")
             return []
+
+
+    @traced(GRAPH_CALL_SECONDS, method="delta")
+    def delta(self, delta_link: Optional[str] = None, latest: bool = False) -> Tuple[List[Dict[str, Any]], Optional[str]]:
+        """
+        Get drive changes since `delta_link`, following all pages.
+        With `latest=True` and no link, only fetch a fresh link for the current state.
+        Returns (changed items, new delta link); the link is None on failure.
+        """
+        url = delta_link or f"{self.base_url}/me/drive/root/delta" + ("?token=latest" if latest else "")
+        items: List[Dict[str, Any]] = []
+        try:
+            while url:
+                resp = self.session.get(url, timeout=self.timeout)
+                resp.raise_for_status()
+                data = resp.json()
+                items.extend(data.get("value", []))
+                if "@odata.deltaLink" in data:
+                    return items, data["@odata.deltaLink"]
+                url = data.get("@odata.nextLink")
+        except requests.RequestException as e:
+            logger.error(f"Failed to get drive delta: {e}")
+        return items, None
     
 
+    @traced(GRAPH_CALL_SECONDS, method="download_file")
     def download_file(self, file_id: str) -> Optional[bytes]:
         """Download a file by its ID."""
         try:
@@ -90,11 +245,75 @@ class GraphClient:
             return None
 
 
-    def upload_file(self, path: str, content: bytes) -> Optional[Dict[str, Any]]:
-        """Upload a file to a given path."""
+    @traced(GRAPH_CALL_SECONDS, method="download_prefix")
+    def download_prefix(self, file_id: str, max_bytes: int) -> Optional[bytes]:
+        """Download at most the first `max_bytes` of a file (Range request, streamed)."""
+        try:
+            with self.session.get(
+                f"{self.base_url}/me/drive/items/{file_id}/content",
+                headers={"Range": f"bytes=0-{max_bytes - 1}"},
+                timeout=self.timeout,
+                allow_redirects=True,
+                stream=True,
+            ) as resp:
+                resp.raise_for_status()
+                # Servers may ignore Range and send the whole file; stop reading early then.
+                data = bytearray()
+                for chunk in resp.iter_content(chunk_size=min(max_bytes, 65536)):
+                    data.extend(chunk)
+                    if len(data) >= max_bytes:
+                        break
+                return bytes(data[:max_bytes])
+        except requests.RequestException as e:
+            logger.error(f"Failed to download prefix of file '{file_id}': {e}")
+            return None
+
+
+    @traced(GRAPH_CALL_SECONDS, method="get_download_info")
+    def get_download_info(self, item_id: str) -> Optional[Dict[str, Any]]:
+        """
+        Metadata of a file with its short-lived, pre-authenticated
+        `@microsoft.graph.downloadUrl`. Cached in `download_cache` when set.
+        """
+        def fetch():
+            resp = self.session.get(
+                f"{self.base_url}/me/drive/items/{item_id}",
+                params={"$select": "id,name,size,eTag,cTag,file,lastModifiedDateTime,@microsoft.graph.downloadUrl"},
+                timeout=self.timeout,
+            )
+            resp.raise_for_status()
+            item = resp.json()
+            return item if item.get("@microsoft.graph.downloadUrl") else None
+
+        try:
+            if self.download_cache is None:
+                return fetch()
+            return self.download_cache.get_or_fetch(("downloadUrl", item_id), fetch)
+        except requests.RequestException as e:
+            logger.error(f"Failed to get download URL for item '{item_id}': {e}")
+            return None
+
+
+    @traced(GRAPH_CALL_SECONDS, method="open_download")
+    def open_download(self, url: str, headers: Optional[Dict[str, str]] = None) -> Optional[requests.Response]:
+        """
+        Open a streamed GET on a download URL, passing e.g. Range/If-Range through.
+        The caller reads `iter_content` and must close the response.
+        """
+        try:
+            return self.transfer_session.get(url, headers=headers, timeout=self.timeout, stream=True)
+        except requests.RequestException as e:
+            logger.error(f"Failed to open download: {e}")
+            return None
+
+
+    @traced(GRAPH_CALL_SECONDS, method="upload_file")
+    def upload_file(self, path: str, content: bytes, conflict_behavior: Optional[str] = None) -> Optional[Dict[str, Any]]:
+        """Upload a file to a given path; raises `GraphRequestError` when Graph rejects it."""
         try:
             resp = self.session.put(
                 f"{self.base_url}/me/drive/root:/{path}:/content",
+                params={"@microsoft.graph.conflictBehavior": conflict_behavior} if conflict_behavior else None,
                 headers={"Authorization": self.session.headers["Authorization"]},
                 data=content,
                 timeout=self.timeout
@@ -102,10 +321,70 @@ class GraphClient:
             resp.raise_for_status()
             return resp.json()
         except requests.RequestException as e:
+            raise_for_rejection(e)
             logger.error(f"Failed to upload file to '{path}': {e}")
             return None
 
 
+    @traced(GRAPH_CALL_SECONDS, method="create_upload_session")
+    def create_upload_session(self, path: str, conflict_behavior: str = "replace") -> Optional[str]:
+        """
+        Start a resumable upload to `path`; returns the pre-authenticated upload
+        URL, None on upstream failure. Raises `GraphRequestError` when Graph
+        rejects the request (409 for a name collision with conflict_behavior=fail).
+        """
+        try:
+            resp = self.session.post(
+                f"{self.base_url}/me/drive/root:/{path.strip('/')}:/createUploadSession",
+                json={"item": {"@microsoft.graph.conflictBehavior": conflict_behavior}},
+                timeout=self.timeout,
+            )
+            resp.raise_for_status()
+            return resp.json().get("uploadUrl")
+        except requests.RequestException as e:
+            raise_for_rejection(e)
+            logger.error(f"Failed to create upload session for '{path}': {e}")
+            return None
+
+
+    @traced(GRAPH_CALL_SECONDS, method="upload_chunk")
+    def upload_chunk(self, upload_url: str, chunk: bytes, start: int, total: int, retries: int = 2) -> Optional[Dict[str, Any]]:
+        """
+        PUT one byte range of an upload session, retrying 5xx, 429 and network
+        errors (honouring Retry-After). Other 4xx (expired session, range
+        mismatch, too large) fail at once. Returns the session status (or the
+        driveItem after the last range), None on failure.
+        """
+        byte_range = f"bytes {start}-{start + len(chunk) - 1}/{total}"
+        headers = {"Content-Length": str(len(chunk)), "Content-Range": byte_range}
+        for attempt in range(retries + 1):
+            resp = None
+            try:
+                resp = self.transfer_session.put(upload_url, data=chunk, headers=headers, timeout=self.timeout)
+                transient = resp.status_code >= 500 or resp.status_code == 429
+                if not transient or attempt == retries:
+                    resp.raise_for_status()
+                    return resp.json()
+            except requests.HTTPError as e:
+                logger.error(f"Failed to upload {byte_range}: {e}")
+                return None
+            except requests.RequestException as e:
+                if attempt == retries:
+                    logger.error(f"Failed to upload {byte_range}: {e}")
+                    return None
+            time.sleep(retry_delay(resp, attempt))
+        return None
+
+
+    @traced(GRAPH_CALL_SECONDS, method="cancel_upload_session")
+    def cancel_upload_session(self, upload_url: str) -> None:
+        try:
+            self.transfer_session.delete(upload_url, timeout=self.timeout)
+        except requests.RequestException as e:
+            logger.warning(f"Failed to cancel upload session: {e}")
+
+
+    @traced(GRAPH_CALL_SECONDS, method="delete_item")
     def delete_item(self, item_id: str) -> bool:
         """Delete an item (file/folder) by its ID."""
         try:
@@ -120,6 +399,7 @@ class GraphClient:
             return False
 
 
+    @traced(GRAPH_CALL_SECONDS, method="get_item")
     def get_item(self, item_id: str): #-> List[Dict[str, Any]]:
         """Get metadata for a OneDrive item by its ID."""
         try:
@@ -133,3 +413,64 @@ class GraphClient:
         except requests.RequestException as e:
             logger.error(f"Failed to get metadata for item '{item_id}': {e}")
             return []
+
+
+class UploadSession:
+    """
+    Feeds a byte stream of known length into a Graph upload session.
+
+    `feed` buffers incoming data and reports when a full chunk is ready; `flush`
+    sends every full chunk (and, with `final=True`, the remainder), so at most
+    about one chunk is held in memory. Chunk sizes are rounded to 320 KiB.
+    """
+    def __init__(
+        self,
+        graph_client: GraphClient,
+        upload_url: str,
+        total_size: int,
+        chunk_size: int = 10 * UPLOAD_CHUNK_ALIGN,
+        on_progress=None,
+    ):
+        self.graph_client = graph_client
+        self.upload_url = upload_url
+        self.total_size = total_size
+        self.chunk_size = max(UPLOAD_CHUNK_ALIGN, chunk_size // UPLOAD_CHUNK_ALIGN * UPLOAD_CHUNK_ALIGN)
+        self.on_progress = on_progress
+        self.uploaded = 0
+        self.item: Optional[Dict[str, Any]] = None
+        self.failed = False
+        self._buffer = bytearray()
+
+
+    def feed(self, data: bytes) -> bool:
+        """Buffer `data`; True once a full chunk is waiting to be flushed."""
+        if self.uploaded + len(self._buffer) + len(data) > self.total_size:
+            raise ValueError("Upload body is longer than its declared size")
+        self._buffer.extend(data)
+        return len(self._buffer) >= self.chunk_size
+
+
+    def _send(self, size: int) -> None:
+        chunk = bytes(self._buffer[:size])
+        del self._buffer[:size]
+        result = self.graph_client.upload_chunk(self.upload_url, chunk, self.uploaded, self.total_size)
+        if result is None:
+            self.failed = True
+            return
+        self.uploaded += size
+        if "id" in result:
+            self.item = result
+        if self.on_progress is not None:
+            self.on_progress(self.uploaded, self.total_size)
+
+
+    def flush(self, final: bool = False) -> Optional[Dict[str, Any]]:
+        """Send buffered full chunks (all data if `final`); returns the driveItem when done."""
+        while not self.failed and len(self._buffer) >= self.chunk_size:
+            self._send(self.chunk_size)
+        if final and not self.failed:
+            if self.uploaded + len(self._buffer) != self.total_size:
+                raise ValueError("Upload body is shorter than its declared size")
+            if self._buffer:
+                self._send(len(self._buffer))
+        return self.item
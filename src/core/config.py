@@ -34,6 +34,73 @@ class _Config:
         self.GRAPH_APP_AUTHORITY_URL = os.getenv("GRAPH_APP_AUTHORITY_URL", "https://login.microsoftonline.com")
         self.GRAPH_APP_SCOPES = os.getenv("GRAPH_APP_SCOPES", "Files.ReadWrite offline_access")
         self.GRAPH_APP_REDIRECT_URI = os.getenv("GRAPH_APP_REDIRECT_URI", "http://localhost:8000/callback")
+        # Graph host; point at a local stand-in (benchmarks/fake_graph.py) for offline runs
+        self.GRAPH_BASE_URL = os.getenv("GRAPH_BASE_URL", "https://graph.microsoft.com").rstrip("/")
+
+        # Search result cache (seconds)
+        self.SEARCH_CACHE_TTL = float(os.getenv("SEARCH_CACHE_TTL", "300"))
+        self.SEARCH_CACHE_NEGATIVE_TTL = float(os.getenv("SEARCH_CACHE_NEGATIVE_TTL", "30"))
+        self.SEARCH_CACHE_MAX_ENTRIES = int(os.getenv("SEARCH_CACHE_MAX_ENTRIES", "1024"))
+        self.SEARCH_CACHE_DELTA_INTERVAL = float(os.getenv("SEARCH_CACHE_DELTA_INTERVAL", "30"))
+
+        # Cached pre-authenticated download URLs (seconds; Graph issues them for about an hour)
+        self.DOWNLOAD_URL_TTL = float(os.getenv("DOWNLOAD_URL_TTL", "300"))
+        self.DOWNLOAD_URL_MAX_ENTRIES = int(os.getenv("DOWNLOAD_URL_MAX_ENTRIES", "10000"))
+        self.DOWNLOAD_CHUNK_SIZE = int(os.getenv("DOWNLOAD_CHUNK_SIZE", "65536"))
+
+        # Upload sessions: chunk size (rounded down to a multiple of 320 KiB) and default conflict behavior
+        self.UPLOAD_CHUNK_SIZE = int(os.getenv("UPLOAD_CHUNK_SIZE", str(10 * 320 * 1024)))
+        self.UPLOAD_CONFLICT_BEHAVIOR = os.getenv("UPLOAD_CONFLICT_BEHAVIOR", "replace")
+
+        # Document conversion: result cache, worker pool, seconds a request waits before answering 202
+        self.CONVERSION_CACHE_PATH = os.getenv("CONVERSION_CACHE_PATH", "data/conversions.db")
+        self.CONVERSION_CACHE_MAX_ENTRIES = int(os.getenv("CONVERSION_CACHE_MAX_ENTRIES", "2000"))
+        self.CONVERSION_WORKERS = int(os.getenv("CONVERSION_WORKERS", "2"))
+        self.CONVERSION_QUEUE_MAX = int(os.getenv("CONVERSION_QUEUE_MAX", "50"))
+        self.CONVERSION_SYNC_WAIT = float(os.getenv("CONVERSION_SYNC_WAIT", "5"))
+        # Conservative text per page used to size max_chars previews (only the first pages are converted)
+        self.CONVERSION_PREVIEW_CHARS_PER_PAGE = int(os.getenv("CONVERSION_PREVIEW_CHARS_PER_PAGE", "1500"))
+
+        # Instrumentation: Prometheus metrics at /metrics, OpenTelemetry spans (needs an SDK configured)
+        self.METRICS_ENABLED = os.getenv("METRICS_ENABLED", "true").lower() == "true"
+        self.TRACING_ENABLED = os.getenv("TRACING_ENABLED", "false").lower() == "true"
+
+        # Admin profiling endpoints (disabled without a token); slow-request capture threshold (0 = off)
+        self.ADMIN_TOKEN = os.getenv("ADMIN_TOKEN")
+        self.PROFILE_MAX_SECONDS = float(os.getenv("PROFILE_MAX_SECONDS", "60"))
+        self.SLOW_REQUEST_MS = float(os.getenv("SLOW_REQUEST_MS", "0"))
+        self.SLOW_REQUEST_KEEP = int(os.getenv("SLOW_REQUEST_KEEP", "20"))
+
+        # Local full-text index
+        self.LOCAL_INDEX_PATH = os.getenv("LOCAL_INDEX_PATH", "data/local_index.db")
+
+        # Semantic (vector) index
+        self.SEMANTIC_INDEX_DIR = os.getenv("SEMANTIC_INDEX_DIR", "data/semantic_index")
+        self.OPENAI_EMBEDDING_MODEL = os.getenv("OPENAI_EMBEDDING_MODEL", "text-embedding-3-small")
+        # Fused search results shown to the LLM reranker
+        self.RERANK_TOP_K = int(os.getenv("RERANK_TOP_K", "10"))
+
+        # Agent LLM response cache (empty path disables it; TTL in seconds)
+        self.LLM_CACHE_PATH = os.getenv("LLM_CACHE_PATH", "data/llm_cache.db")
+        self.LLM_CACHE_TTL = float(os.getenv("LLM_CACHE_TTL", "604800"))
+        self.LLM_CACHE_MAX_ENTRIES = int(os.getenv("LLM_CACHE_MAX_ENTRIES", "50000"))
+
+        # Agent checkpointer: sqlite:///path, memory, postgresql://... (empty disables it)
+        self.AGENT_CHECKPOINT_URL = os.getenv("AGENT_CHECKPOINT_URL", "sqlite:///data/checkpoints.db")
+        # Checkpoint retention after each run: newest checkpoints kept per thread, idle threads dropped after TTL seconds (0 = keep)
+        self.AGENT_CHECKPOINT_KEEP = int(os.getenv("AGENT_CHECKPOINT_KEEP", "10"))
+        self.AGENT_CHECKPOINT_TTL = float(os.getenv("AGENT_CHECKPOINT_TTL", "604800"))
+        # Long-term navigation memory store: sqlite:///path or memory (empty disables it)
+        self.AGENT_STORE_URL = os.getenv("AGENT_STORE_URL", "sqlite:///data/agent_store.db")
+
+        # Concurrent streamed runs (/agent/find) before new ones get 429
+        self.AGENT_MAX_STREAMS = int(os.getenv("AGENT_MAX_STREAMS", "8"))
+        # Agent job queue: worker threads, queued-job bound, running jobs per user
+        # (keyed by the advisory X-User-Id header, else client address), result retention (seconds)
+        self.AGENT_WORKERS = int(os.getenv("AGENT_WORKERS", "4"))
+        self.AGENT_QUEUE_MAX = int(os.getenv("AGENT_QUEUE_MAX", "100"))
+        self.AGENT_MAX_JOBS_PER_USER = int(os.getenv("AGENT_MAX_JOBS_PER_USER", "2"))
+        self.AGENT_JOB_RETENTION = float(os.getenv("AGENT_JOB_RETENTION", "3600"))
 
     # Derived OAuth URLs
     @property
@@ -0,0 +1,139 @@
+import logging
+import time
+from concurrent.futures import ThreadPoolExecutor, wait
+from typing import Any, Callable, Dict, List, Optional
+
+from src.clients.graphAPIBetaSearch import extract_hits
+from src.index.lexical import item_path
+
+logger = logging.getLogger(__name__)
+
+
+def normalize_hit(hit: Dict[str, Any]) -> Dict[str, Any]:
+    """Map a Graph search hit / driveItem / index hit onto one flat shape keyed by driveItem id."""
+    resource = hit.get("resource", hit)
+    path = resource.get("path") or (item_path(resource) if "parentReference" in resource else None)
+    out = {
+        "id": resource.get("id") or hit.get("hitId"),
+        "name": resource.get("name"),
+        "path": path,
+        "mime_type": resource.get("mime_type") or resource.get("file", {}).get("mimeType"),
+        "webUrl": resource.get("webUrl"),
+        "lastModifiedDateTime": resource.get("lastModifiedDateTime"),
+    }
+    snippet = hit.get("summary") or hit.get("snippet") or (hit.get("chunks") or [None])[0]
+    if snippet:
+        out["snippet"] = snippet
+    return out
+
+
+def reciprocal_rank_fusion(
+    ranked_lists: Dict[str, List[Dict[str, Any]]],
+    k: int = 60,
+    weights: Optional[Dict[str, float]] = None,
+) -> List[Dict[str, Any]]:
+    """
+    Fuse several ranked lists with RRF (score = sum w / (k + rank)), deduplicating
+    by driveItem id. Fields from earlier sources win; `sources` records every
+    retriever that returned the item and its rank there.
+    """
+    fused: Dict[str, Dict[str, Any]] = {}
+    for source, hits in ranked_lists.items():
+        weight = (weights or {}).get(source, 1.0)
+        for rank, hit in enumerate(hits, start=1):
+            item = normalize_hit(hit)
+            item_id = item["id"]
+            if not item_id:
+                continue
+            entry = fused.get(item_id)
+            if entry is None:
+                entry = fused[item_id] = {**item, "rrf_score": 0.0, "sources": {}}
+            else:
+                for key, value in item.items():
+                    if entry.get(key) is None and value is not None:
+                        entry[key] = value
+            if source not in entry["sources"]:
+                entry["sources"][source] = rank
+                entry["rrf_score"] += weight / (k + rank)
+    return sorted(fused.values(), key=lambda e: e["rrf_score"], reverse=True)
+
+
+class HybridRetriever:
+    """
+    Runs Graph search, the local lexical index and the vector index concurrently
+    and fuses their rankings. Any retriever may be omitted; one that fails or
+    exceeds `timeout` contributes nothing instead of failing the whole call.
+    """
+    def __init__(
+        self,
+        search_client=None,
+        local_index=None,
+        vector_index=None,
+        per_source_k: int = 25,
+        timeout: Optional[float] = 15,
+        weights: Optional[Dict[str, float]] = None,
+        max_workers: int = 6,
+    ):
+        self.search_client = search_client
+        self.local_index = local_index
+        self.vector_index = vector_index
+        self.per_source_k = per_source_k
+        self.timeout = timeout
+        self.weights = weights
+        self._pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="hybrid-retriever")
+        self.last_timings: Dict[str, float] = {}
+
+
+    def _sources(
+        self,
+        query_string: str,
+        query_template: Optional[str],
+        semantic_query: Optional[str],
+    ) -> Dict[str, Callable[[], List[Dict[str, Any]]]]:
+        k = self.per_source_k
+        sources: Dict[str, Callable[[], List[Dict[str, Any]]]] = {}
+        if self.search_client is not None:
+            def graph():
+                resp = self.search_client.search(
+                    query_string, query_template=query_template, semantic_query=semantic_query, size=k
+                )
+                return extract_hits(resp)[0]
+            sources["graph"] = graph
+        if self.local_index is not None:
+            sources["lexical"] = lambda: self.local_index.search_local(query_string, top_k=k)
+        if self.vector_index is not None:
+            sources["vector"] = lambda: self.vector_index.semantic_search(semantic_query or query_string, k=k)
+        return sources
+
+
+    def retrieve(
+        self,
+        query_string: str,
+        query_template: Optional[str] = None,
+        semantic_query: Optional[str] = None,
+        top_k: int = 20,
+    ) -> List[Dict[str, Any]]:
+        """Fused, deduplicated top-k results; wall time is bounded by the slowest retriever."""
+        sources = self._sources(query_string, query_template, semantic_query)
+
+        def timed(name, fn):
+            start = time.perf_counter()
+            try:
+                return fn()
+            finally:
+                self.last_timings[name] = time.perf_counter() - start
+
+        futures = {name: self._pool.submit(timed, name, fn) for name, fn in sources.items()}
+        wait(futures.values(), timeout=self.timeout)
+
+        ranked: Dict[str, List[Dict[str, Any]]] = {}
+        for name, future in futures.items():
+            if not future.done():
+                future.cancel()
+                logger.warning(f"Hybrid retrieval: '{name}' timed out after {self.timeout}s")
+                continue
+            try:
+                ranked[name] = future.result()
+            except Exception as e:
+                logger.error(f"Hybrid retrieval: '{name}' failed: {e}")
+        return reciprocal_rank_fusion(ranked, weights=self.weights)[:top_k]
@@ -0,0 +1,377 @@
+import logging
+import os
+import re
+import sqlite3
+import threading
+import time
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
+from urllib.parse import unquote
+
+logger = logging.getLogger(__name__)
+
+_TOKEN_RE = re.compile(r"\w+", re.UNICODE)
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS docs (
+    rowid INTEGER PRIMARY KEY,
+    item_id TEXT UNIQUE NOT NULL,
+    name TEXT NOT NULL,
+    path TEXT NOT NULL,
+    mime_type TEXT,
+    ctag TEXT,
+    modified TEXT,
+    size INTEGER,
+    indexed_at REAL
+);
+CREATE VIRTUAL TABLE IF NOT EXISTS docs_fts USING fts5(
+    name, path, content, tokenize='porter unicode61'
+);
+CREATE TABLE IF NOT EXISTS folders (
+    item_id TEXT PRIMARY KEY,
+    path TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS meta (
+    key TEXT PRIMARY KEY,
+    value TEXT
+);
+"""
+
+
+def item_path(item: Dict[str, Any]) -> str:
+    """
+    Human readable drive path of a driveItem, e.g. `/Documents/test/test.txt`,
+    from `parentReference.path` (which delta responses leave out).
+    """
+    parent = unquote(item.get("parentReference", {}).get("path", "") or "")
+    if ":" in parent:
+        parent = parent.split(":", 1)[1]
+    return f"{parent.rstrip('/')}/{item.get('name', '')}"
+
+
+def item_version(item: Dict[str, Any]) -> Optional[str]:
+    """cTag changes when content changes; eTag is the fallback."""
+    return item.get("cTag") or item.get("eTag")
+
+
+def to_fts_query(query: str) -> str:
+    """Turn free text into an FTS5 OR-query of quoted terms (no FTS syntax leaks through)."""
+    tokens = _TOKEN_RE.findall(query.lower())
+    return " OR ".join(f'"{t}"' for t in dict.fromkeys(tokens))
+
+
+def _folders_first(items: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """Live folders of a delta batch, each after its parent, then everything else in order."""
+    folders = {
+        i["id"]: i for i in items if ("folder" in i or "root" in i) and "deleted" not in i
+    }
+    ordered: List[Dict[str, Any]] = []
+    seen = set()
+
+    def visit(folder_id):
+        if folder_id in seen or folder_id not in folders:
+            return
+        seen.add(folder_id)
+        visit((folders[folder_id].get("parentReference") or {}).get("id"))
+        ordered.append(folders[folder_id])
+
+    for folder_id in folders:
+        visit(folder_id)
+    return ordered + [i for i in items if i["id"] not in folders]
+
+
+class LocalIndex:
+    """
+    SQLite FTS5 index over converted (markdown) OneDrive documents.
+    """
+    def __init__(self, db_path: str = ":memory:", max_content_chars: int = 200_000):
+        if db_path != ":memory:":
+            os.makedirs(os.path.dirname(os.path.abspath(db_path)), exist_ok=True)
+        self.db_path = db_path
+        self.max_content_chars = max_content_chars
+        self._conn = sqlite3.connect(db_path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(_SCHEMA)
+        self._lock = threading.Lock()
+
+
+    def needs_update(self, item: Dict[str, Any]) -> bool:
+        """True if the item is not indexed or its content version changed."""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT ctag FROM docs WHERE item_id = ?", (item["id"],)
+            ).fetchone()
+        return row is None or row[0] != item_version(item)
+
+
+    def path_of(self, item: Dict[str, Any]) -> str:
+        """
+        Drive path of an item: under its parent's path when the parent folder is
+        known to the index (delta items carry only `parentReference.id`), else
+        from `parentReference.path`.
+        """
+        parent_id = (item.get("parentReference") or {}).get("id")
+        with self._lock:
+            row = self._conn.execute("SELECT path FROM folders WHERE item_id = ?", (parent_id,)).fetchone()
+        if row is None:
+            return item_path(item)
+        return f"{row[0]}/{item.get('name', '')}"
+
+
+    def record_folder(self, item: Dict[str, Any]) -> int:
+        """
+        Remember a folder's path for its children. If the folder was renamed or
+        moved, the paths of everything below it are rewritten; returns how many
+        indexed documents that touched.
+        """
+        path = "" if "root" in item else self.path_of(item)
+        with self._lock, self._conn:
+            row = self._conn.execute("SELECT path FROM folders WHERE item_id = ?", (item["id"],)).fetchone()
+            self._conn.execute(
+                "INSERT OR REPLACE INTO folders (item_id, path) VALUES (?, ?)", (item["id"], path)
+            )
+            if row is None or row[0] == path:
+                return 0
+            old = row[0] + "/"
+            self._conn.execute(
+                "UPDATE folders SET path = ? || substr(path, ?) WHERE substr(path, 1, ?) = ?",
+                (path + "/", len(old) + 1, len(old), old),
+            )
+            moved = self._conn.execute(
+                "SELECT rowid, ? || substr(path, ?) FROM docs WHERE substr(path, 1, ?) = ?",
+                (path + "/", len(old) + 1, len(old), old),
+            ).fetchall()
+            for rowid, new_path in moved:
+                self._conn.execute("UPDATE docs SET path = ? WHERE rowid = ?", (new_path, rowid))
+                self._conn.execute("UPDATE docs_fts SET path = ? WHERE rowid = ?", (new_path, rowid))
+        return len(moved)
+
+
+    def forget_folder(self, item_id: str) -> None:
+        with self._lock, self._conn:
+            self._conn.execute("DELETE FROM folders WHERE item_id = ?", (item_id,))
+
+
+    def update_metadata(self, item: Dict[str, Any]) -> bool:
+        """
+        Refresh name and path of an indexed item in place, without touching its
+        content; a rename or move does not change the cTag. True if anything changed.
+        """
+        name, path = item.get("name", ""), self.path_of(item)
+        with self._lock, self._conn:
+            row = self._conn.execute(
+                "SELECT rowid, name, path FROM docs WHERE item_id = ?", (item["id"],)
+            ).fetchone()
+            if row is None or (row[1], row[2]) == (name, path):
+                return False
+            self._conn.execute(
+                "UPDATE docs SET name = ?, path = ?, modified = ? WHERE rowid = ?",
+                (name, path, item.get("lastModifiedDateTime"), row[0]),
+            )
+            self._conn.execute(
+                "UPDATE docs_fts SET name = ?, path = ? WHERE rowid = ?", (name, path, row[0])
+            )
+        return True
+
+
+    def upsert(self, item: Dict[str, Any], markdown: str, stale: bool = False) -> None:
+        """
+        Insert or replace the index entry for a driveItem.
+        `stale=True` records the entry without a version so the next sync retries it.
+        """
+        name = item.get("name", "")
+        path = self.path_of(item)
+        content = (markdown or "")[: self.max_content_chars]
+        with self._lock, self._conn:
+            row = self._conn.execute(
+                "SELECT rowid FROM docs WHERE item_id = ?", (item["id"],)
+            ).fetchone()
+            if row is not None:
+                self._conn.execute("DELETE FROM docs_fts WHERE rowid = ?", (row[0],))
+                self._conn.execute("DELETE FROM docs WHERE rowid = ?", (row[0],))
+            cur = self._conn.execute(
+                "INSERT INTO docs (item_id, name, path, mime_type, ctag, modified, size, indexed_at)"
+                " VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                (
+                    item["id"],
+                    name,
+                    path,
+                    item.get("file", {}).get("mimeType"),
+                    None if stale else item_version(item),
+                    item.get("lastModifiedDateTime"),
+                    item.get("size"),
+                    time.time(),
+                ),
+            )
+            self._conn.execute(
+                "INSERT INTO docs_fts (rowid, name, path, content) VALUES (?, ?, ?, ?)",
+                (cur.lastrowid, name, path, content),
+            )
+
+
+    def remove(self, item_id: str) -> None:
+        with self._lock, self._conn:
+            row = self._conn.execute(
+                "SELECT rowid FROM docs WHERE item_id = ?", (item_id,)
+            ).fetchone()
+            if row is not None:
+                self._conn.execute("DELETE FROM docs_fts WHERE rowid = ?", (row[0],))
+                self._conn.execute("DELETE FROM docs WHERE rowid = ?", (row[0],))
+
+
+    def get_content(self, item_id: str, version: Optional[str] = None) -> Optional[str]:
+        """Indexed markdown of an item, or None if missing or stale for `version`."""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT d.ctag, f.content FROM docs d JOIN docs_fts f ON f.rowid = d.rowid"
+                " WHERE d.item_id = ?",
+                (item_id,),
+            ).fetchone()
+        if row is None or (version is not None and row[0] != version):
+            return None
+        return row[1]
+
+
+    def search_local(
+        self,
+        query: str,
+        top_k: int = 10,
+        path_prefix: Optional[str] = None,
+        mime_type: Optional[str] = None,
+    ) -> List[Dict[str, Any]]:
+        """
+        BM25-ranked search (name > path > content) with optional path and mime filters.
+        `mime_type` matches exactly, or as a prefix when it ends with `/`.
+        """
+        fts_query = to_fts_query(query)
+        if not fts_query:
+            return []
+
+        sql = (
+            "SELECT d.item_id, d.name, d.path, d.mime_type, d.modified, d.size,"
+            " bm25(docs_fts, 10.0, 5.0, 1.0) AS rank,"
+            " snippet(docs_fts, 2, '**', '**', '…', 12)"
+            " FROM docs_fts JOIN docs d ON d.rowid = docs_fts.rowid"
+            " WHERE docs_fts MATCH ?"
+        )
+        params: List[Any] = [fts_query]
+        if path_prefix:
+            sql += " AND d.path LIKE ? ESCAPE '\\'"
+            escaped = path_prefix.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+            params.append(f"{escaped.rstrip('/')}/%")
+        if mime_type:
+            if mime_type.endswith("/"):
+                sql += " AND d.mime_type LIKE ?"
+                params.append(f"{mime_type}%")
+            else:
+                sql += " AND d.mime_type = ?"
+                params.append(mime_type)
+        sql += " ORDER BY rank LIMIT ?"
+        params.append(top_k)
+
+        with self._lock:
+            rows = self._conn.execute(sql, params).fetchall()
+        return [
+            {
+                "id": r[0],
+                "name": r[1],
+                "path": r[2],
+                "mime_type": r[3],
+                "lastModifiedDateTime": r[4],
+                "size": r[5],
+                "score": -r[6],
+                "snippet": r[7],
+            }
+            for r in rows
+        ]
+
+
+    def iter_documents(self) -> Iterator[Dict[str, Any]]:
+        """Yield every indexed document with its markdown content."""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT d.item_id, d.name, d.path, d.mime_type, d.ctag, f.content"
+                " FROM docs d JOIN docs_fts f ON f.rowid = d.rowid"
+            ).fetchall()
+        for r in rows:
+            yield {
+                "id": r[0], "name": r[1], "path": r[2], "mime_type": r[3], "version": r[4], "content": r[5]
+            }
+
+
+    def count(self) -> int:
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM docs").fetchone()[0]
+
+
+    def _get_meta(self, key: str) -> Optional[str]:
+        with self._lock:
+            row = self._conn.execute("SELECT value FROM meta WHERE key = ?", (key,)).fetchone()
+        return row[0] if row else None
+
+
+    def _set_meta(self, key: str, value: str) -> None:
+        with self._lock, self._conn:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO meta (key, value) VALUES (?, ?)", (key, value)
+            )
+
+
+    def sync(
+        self,
+        graph_client,
+        convert: Optional[Callable[[bytes, str, Optional[str]], Tuple[dict, str]]] = None,
+        max_bytes: int = 50 * 1024 * 1024,
+    ) -> Dict[str, int]:
+        """
+        Incrementally update the index from the drive delta feed.
+        The first run walks the whole drive; later runs only see changes since
+        the stored delta link. Files whose cTag is unchanged are not re-downloaded;
+        if they were renamed or moved only their name and path are updated.
+        Folders are recorded first (parents before children) so paths can be
+        built from parent ids; a renamed or moved folder re-paths its subtree.
+        """
+        if convert is None:
+            from src.clients.docling import convert_bytes as convert
+
+        delta_link = self._get_meta("delta_link")
+        items, new_link = graph_client.delta(delta_link)
+        stats = {"indexed": 0, "renamed": 0, "removed": 0, "skipped": 0}
+
+        for item in _folders_first(items):
+            if "deleted" in item:
+                self.remove(item["id"])
+                self.forget_folder(item["id"])
+                stats["removed"] += 1
+                continue
+            if "folder" in item or "root" in item:
+                stats["renamed"] += self.record_folder(item)
+                continue
+            if "file" not in item:
+                stats["skipped"] += 1
+                continue
+            if not self.needs_update(item):
+                stats["renamed" if self.update_metadata(item) else "skipped"] += 1
+                continue
+
+            markdown = ""
+            stale = False
+            if (item.get("size") or 0) <= max_bytes:
+                content = graph_client.download_file(item["id"])
+                stale = content is None
+                if content is not None:
+                    try:
+                        json_struct, markdown = convert(
+                            content, item.get("name", ""), item["file"].get("mimeType")
+                        )
+                        if isinstance(json_struct, dict) and "error" in json_struct:
+                            markdown = ""
+                    except Exception as e:
+                        logger.error(f"Failed to convert '{item.get('name')}' for indexing: {e}")
+            # Metadata is indexed even when content is unavailable so names still match.
+            self.upsert(item, markdown, stale=stale)
+            stats["indexed"] += 1
+
+        if new_link:
+            self._set_meta("delta_link", new_link)
+        return stats
@@ -0,0 +1,481 @@
+import hashlib
+import logging
+import os
+import re
+import sqlite3
+import threading
+from typing import Any, Dict, Iterable, List, Optional, Protocol
+
+import numpy as np
+
+from src.index.lexical import item_path, item_version
+
+logger = logging.getLogger(__name__)
+
+_TOKEN_RE = re.compile(r"\w+", re.UNICODE)
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS chunks (
+    row INTEGER PRIMARY KEY,
+    item_id TEXT NOT NULL,
+    chunk_no INTEGER NOT NULL,
+    text TEXT NOT NULL,
+    deleted INTEGER NOT NULL DEFAULT 0
+);
+CREATE INDEX IF NOT EXISTS chunks_item ON chunks (item_id);
+CREATE TABLE IF NOT EXISTS items (
+    item_id TEXT PRIMARY KEY,
+    name TEXT,
+    path TEXT,
+    mime_type TEXT,
+    version TEXT
+);
+CREATE TABLE IF NOT EXISTS meta (
+    key TEXT PRIMARY KEY,
+    value TEXT NOT NULL
+);
+"""
+
+
+# --------------------------------------------------------------------------------
+#  Chunking
+# --------------------------------------------------------------------------------
+
+def chunk_markdown(text: str, max_chars: int = 1200, overlap: int = 150) -> List[str]:
+    """
+    Split markdown into chunks of at most `max_chars`, preferring heading and
+    paragraph boundaries. Oversized paragraphs are cut with `overlap` chars of context.
+    """
+    if not text or not text.strip():
+        return []
+
+    blocks = [b.strip() for b in re.split(r"\n(?=#{1,6} )|\n\s*\n", text) if b.strip()]
+    chunks: List[str] = []
+    current = ""
+    for block in blocks:
+        if len(block) > max_chars:
+            if current:
+                chunks.append(current)
+                current = ""
+            step = max_chars - overlap
+            chunks.extend(block[i:i + max_chars] for i in range(0, len(block), step))
+            continue
+        if current and len(current) + len(block) + 2 > max_chars:
+            chunks.append(current)
+            current = block
+        else:
+            current = f"{current}\n\n{block}" if current else block
+    if current:
+        chunks.append(current)
+    return chunks
+
+
+# --------------------------------------------------------------------------------
+#  Embedders
+# --------------------------------------------------------------------------------
+
+class Embedder(Protocol):
+    """Same surface as langchain `Embeddings`, so e.g. `OpenAIEmbeddings` plugs in directly."""
+    def embed_documents(self, texts: List[str]) -> List[List[float]]: ...
+    def embed_query(self, text: str) -> List[float]: ...
+
+
+class HashingEmbedder:
+    """
+    Deterministic, dependency-free embedder (feature hashing of word unigrams
+    and bigrams). Meant for tests and offline benchmarks, not for quality.
+    """
+    def __init__(self, dim: int = 256):
+        self.dim = dim
+
+    def _embed(self, text: str) -> np.ndarray:
+        vec = np.zeros(self.dim, dtype=np.float32)
+        tokens = _TOKEN_RE.findall(text.lower())
+        for feature in tokens + [f"{a} {b}" for a, b in zip(tokens, tokens[1:])]:
+            h = int.from_bytes(hashlib.blake2b(feature.encode(), digest_size=8).digest(), "little")
+            vec[h % self.dim] += 1.0 if (h >> 63) else -1.0
+        norm = np.linalg.norm(vec)
+        return vec / norm if norm else vec
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        return [self._embed(t).tolist() for t in texts]
+
+    def embed_query(self, text: str) -> List[float]:
+        return self._embed(text).tolist()
+
+
+def default_embedder() -> Embedder:
+    """OpenAI embeddings when an API key is configured, otherwise the hashing fake."""
+    from src.core.config import settings
+    if os.getenv("OPENAI_API_KEY"):
+        from langchain_openai import OpenAIEmbeddings
+        return OpenAIEmbeddings(model=settings.OPENAI_EMBEDDING_MODEL)
+    logger.warning("OPENAI_API_KEY not set; using HashingEmbedder for the semantic index")
+    return HashingEmbedder()
+
+
+def embed_in_batches(embedder: Embedder, texts: List[str], batch_size: int = 64) -> np.ndarray:
+    """Embed texts in batches and return an L2-normalized float32 matrix."""
+    rows: List[List[float]] = []
+    for i in range(0, len(texts), batch_size):
+        rows.extend(embedder.embed_documents(texts[i:i + batch_size]))
+    matrix = np.asarray(rows, dtype=np.float32)
+    if matrix.size:
+        norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+        matrix /= np.where(norms == 0, 1, norms)
+    return matrix
+
+
+# --------------------------------------------------------------------------------
+#  Vector storage + IVF approximate nearest neighbour search
+# --------------------------------------------------------------------------------
+
+def _kmeans(data: np.ndarray, k: int, iterations: int = 10, seed: int = 0) -> np.ndarray:
+    """Spherical k-means on unit vectors; returns unit-norm centroids."""
+    rng = np.random.default_rng(seed)
+    centroids = data[rng.choice(len(data), size=k, replace=False)].copy()
+    for _ in range(iterations):
+        assign = np.argmax(data @ centroids.T, axis=1)
+        for c in range(k):
+            members = data[assign == c]
+            if len(members):
+                centroids[c] = members.sum(axis=0)
+        norms = np.linalg.norm(centroids, axis=1, keepdims=True)
+        centroids /= np.where(norms == 0, 1, norms)
+    return centroids
+
+
+def embedder_id(embedder: Embedder, dim: int) -> str:
+    """Identity of an embedding space: vectors from different ones cannot be compared."""
+    return f"{type(embedder).__name__}:{getattr(embedder, 'model', '')}:{dim}"
+
+
+class VectorIndex:
+    """
+    Chunk vectors in a memory-mapped float32 matrix (`vectors.npy`) with chunk
+    metadata in SQLite. Search is exact below `ivf_threshold` rows and an IVF
+    (inverted file over k-means centroids) probe of `nprobe` lists above it.
+
+    The embedder (class, model, dimension) is recorded with the index; opening
+    it with a different one starts an empty index for `update_from` to refill.
+    Rows of removed documents are reclaimed by `compact`, run automatically by
+    `update_from` once they exceed `compact_ratio` of the matrix.
+    """
+    def __init__(
+        self,
+        directory: str,
+        embedder: Embedder,
+        dim: Optional[int] = None,
+        ivf_threshold: int = 4096,
+        nprobe: int = 8,
+        batch_size: int = 64,
+        compact_ratio: float = 0.3,
+    ):
+        os.makedirs(directory, exist_ok=True)
+        self.directory = directory
+        self.embedder = embedder
+        self.dim = dim or getattr(embedder, "dim", None) or len(embedder.embed_query("dimension probe"))
+        self.ivf_threshold = ivf_threshold
+        self.nprobe = nprobe
+        self.batch_size = batch_size
+        self.compact_ratio = compact_ratio
+        self._lock = threading.RLock()
+        self._conn = sqlite3.connect(os.path.join(directory, "chunks.db"), check_same_thread=False)
+        self._conn.executescript(_SCHEMA)
+
+        self._vectors_path = os.path.join(directory, "vectors.npy")
+        self._check_embedder(embedder_id(embedder, self.dim))
+        self._size = self._conn.execute("SELECT COALESCE(MAX(row) + 1, 0) FROM chunks").fetchone()[0]
+        self._vectors = self._open_vectors(max(1024, self._size))
+        self._live = np.zeros(self._vectors.shape[0], dtype=bool)
+        for (row,) in self._conn.execute("SELECT row FROM chunks WHERE deleted = 0"):
+            self._live[row] = True
+
+        self._centroids: Optional[np.ndarray] = None
+        self._lists: List[np.ndarray] = []
+        self._trained_size = 0
+
+
+    def _check_embedder(self, identity: str) -> None:
+        """Drop an index built by another embedder (or of unknown origin) so it is rebuilt."""
+        row = self._conn.execute("SELECT value FROM meta WHERE key = 'embedder'").fetchone()
+        if row is not None and row[0] == identity:
+            return
+        # Indexes written before the embedder was recorded are kept if the dimension matches.
+        legacy_match = row is None and self._stored_dim() in (None, self.dim)
+        if not legacy_match:
+            logger.warning(
+                f"Semantic index at {self.directory} was built with {row[0] if row else 'another embedder'}, "
+                f"not {identity}; starting it over"
+            )
+            with self._conn:
+                self._conn.execute("DELETE FROM chunks")
+                self._conn.execute("DELETE FROM items")
+            if os.path.exists(self._vectors_path):
+                os.remove(self._vectors_path)
+        with self._conn:
+            self._conn.execute("INSERT OR REPLACE INTO meta (key, value) VALUES ('embedder', ?)", (identity,))
+
+
+    def _stored_dim(self) -> Optional[int]:
+        if not os.path.exists(self._vectors_path):
+            return None
+        return np.load(self._vectors_path, mmap_mode="r").shape[1]
+
+
+    def _open_vectors(self, capacity: int) -> np.memmap:
+        if os.path.exists(self._vectors_path):
+            existing = np.load(self._vectors_path, mmap_mode="r+")
+            if existing.shape[0] >= capacity and existing.shape[1] == self.dim:
+                return existing
+            grown = np.lib.format.open_memmap(
+                self._vectors_path + ".tmp", mode="w+", dtype=np.float32, shape=(capacity, self.dim)
+            )
+            grown[: existing.shape[0]] = existing
+            grown.flush()
+            del existing
+            os.replace(self._vectors_path + ".tmp", self._vectors_path)
+            return grown
+        return np.lib.format.open_memmap(
+            self._vectors_path, mode="w+", dtype=np.float32, shape=(capacity, self.dim)
+        )
+
+
+    def _ensure_capacity(self, needed: int) -> None:
+        capacity = self._vectors.shape[0]
+        if needed <= capacity:
+            return
+        while capacity < needed:
+            capacity *= 2
+        self._vectors.flush()
+        self._vectors = self._open_vectors(capacity)
+        live = np.zeros(capacity, dtype=bool)
+        live[: len(self._live)] = self._live
+        self._live = live
+
+
+    def needs_update(self, item_id: str, version: Optional[str]) -> bool:
+        with self._lock:
+            row = self._conn.execute("SELECT version FROM items WHERE item_id = ?", (item_id,)).fetchone()
+        return row is None or row[0] != version
+
+
+    def add_document(
+        self,
+        item_id: str,
+        markdown: str,
+        name: str = "",
+        path: str = "",
+        mime_type: Optional[str] = None,
+        version: Optional[str] = None,
+    ) -> int:
+        """Chunk, embed (batched) and store a document, replacing any previous version."""
+        chunks = chunk_markdown(markdown) or ([name] if name else [])
+        vectors = embed_in_batches(self.embedder, chunks, self.batch_size) if chunks else None
+
+        with self._lock, self._conn:
+            self._remove_locked(item_id)
+            self._conn.execute(
+                "INSERT OR REPLACE INTO items (item_id, name, path, mime_type, version) VALUES (?, ?, ?, ?, ?)",
+                (item_id, name, path, mime_type, version),
+            )
+            if vectors is None:
+                return 0
+            start = self._size
+            self._ensure_capacity(start + len(chunks))
+            self._vectors[start:start + len(chunks)] = vectors
+            self._live[start:start + len(chunks)] = True
+            self._conn.executemany(
+                "INSERT INTO chunks (row, item_id, chunk_no, text) VALUES (?, ?, ?, ?)",
+                [(start + i, item_id, i, c) for i, c in enumerate(chunks)],
+            )
+            self._size = start + len(chunks)
+            if self._centroids is not None:
+                self._assign(np.arange(start, self._size))
+        return len(chunks)
+
+
+    def add_item(self, item: Dict[str, Any], markdown: str) -> int:
+        """`add_document` for a Graph driveItem."""
+        return self.add_document(
+            item["id"],
+            markdown,
+            name=item.get("name", ""),
+            path=item_path(item),
+            mime_type=item.get("file", {}).get("mimeType"),
+            version=item_version(item),
+        )
+
+
+    def remove(self, item_id: str) -> None:
+        with self._lock, self._conn:
+            self._remove_locked(item_id)
+            self._conn.execute("DELETE FROM items WHERE item_id = ?", (item_id,))
+
+
+    def _remove_locked(self, item_id: str) -> None:
+        rows = [r for (r,) in self._conn.execute(
+            "SELECT row FROM chunks WHERE item_id = ? AND deleted = 0", (item_id,)
+        )]
+        if rows:
+            self._live[rows] = False
+            self._conn.execute("UPDATE chunks SET deleted = 1 WHERE item_id = ?", (item_id,))
+
+
+    def flush(self) -> None:
+        with self._lock:
+            self._vectors.flush()
+
+
+    def dead_ratio(self) -> float:
+        """Share of used rows that belong to removed or replaced documents."""
+        with self._lock:
+            if not self._size:
+                return 0.0
+            return 1.0 - int(self._live[: self._size].sum()) / self._size
+
+
+    def compact(self) -> int:
+        """Rewrite the matrix with live rows only; returns the number of rows reclaimed."""
+        with self._lock:
+            live_rows = np.flatnonzero(self._live[: self._size])
+            reclaimed = self._size - len(live_rows)
+            if not reclaimed:
+                return 0
+            capacity = max(1024, len(live_rows))
+            tmp_path = self._vectors_path + ".compact"
+            packed = np.lib.format.open_memmap(tmp_path, mode="w+", dtype=np.float32, shape=(capacity, self.dim))
+            for i in range(0, len(live_rows), 65536):
+                batch = live_rows[i:i + 65536]
+                packed[i:i + len(batch)] = self._vectors[batch]
+            packed.flush()
+
+            with self._conn:
+                self._conn.execute("DELETE FROM chunks WHERE deleted = 1")
+                # Ascending order: a row only ever moves down onto a slot already freed.
+                self._conn.executemany(
+                    "UPDATE chunks SET row = ? WHERE row = ?",
+                    ((new, int(old)) for new, old in enumerate(live_rows) if new != old),
+                )
+            del self._vectors
+            os.replace(tmp_path, self._vectors_path)
+            self._vectors = packed
+            self._live = np.zeros(capacity, dtype=bool)
+            self._live[: len(live_rows)] = True
+            self._size = len(live_rows)
+            self._centroids = None
+            self._lists = []
+            self._trained_size = 0
+        logger.info(f"Semantic index: compacted {reclaimed} dead rows, {len(live_rows)} left")
+        return reclaimed
+
+
+    # ---------- ANN ----------
+
+    def _assign(self, rows: np.ndarray) -> None:
+        assign = np.argmax(self._vectors[rows] @ self._centroids.T, axis=1)
+        for c in range(len(self._centroids)):
+            new = rows[assign == c]
+            if len(new):
+                self._lists[c] = np.concatenate([self._lists[c], new])
+
+
+    def _train(self) -> None:
+        live_rows = np.flatnonzero(self._live[: self._size])
+        k = max(8, int(np.sqrt(len(live_rows))))
+        self._centroids = _kmeans(np.asarray(self._vectors[live_rows]), k)
+        self._lists = [np.empty(0, dtype=np.int64) for _ in range(k)]
+        self._assign(live_rows)
+        self._trained_size = len(live_rows)
+        logger.info(f"Semantic index: trained IVF with {k} lists over {len(live_rows)} vectors")
+
+
+    def _candidate_rows(self, query: np.ndarray) -> np.ndarray:
+        live_count = int(self._live[: self._size].sum())
+        if live_count < self.ivf_threshold:
+            return np.flatnonzero(self._live[: self._size])
+        if self._centroids is None or live_count > 2 * self._trained_size:
+            self._train()
+        nearest = np.argsort(-(self._centroids @ query))[: self.nprobe]
+        rows = np.concatenate([self._lists[c] for c in nearest])
+        return rows[self._live[rows]]
+
+
+    def semantic_search(self, query: str, k: int = 10, chunks_per_item: int = 1) -> List[Dict[str, Any]]:
+        """
+        Top-k files for `query` by cosine similarity of their best chunk.
+        Each hit carries the driveItem id, name, path, score and matching chunk text.
+        """
+        q = np.asarray(self.embedder.embed_query(query), dtype=np.float32)
+        norm = np.linalg.norm(q)
+        if norm:
+            q /= norm
+
+        with self._lock:
+            rows = self._candidate_rows(q)
+            if not len(rows):
+                return []
+            scores = self._vectors[rows] @ q
+            # Over-fetch chunks so that k distinct files survive per-item dedup.
+            take = min(len(rows), k * 4 * max(1, chunks_per_item))
+            top = np.argpartition(-scores, take - 1)[:take]
+            top = top[np.argsort(-scores[top])]
+            best_rows = [int(rows[i]) for i in top]
+            best_scores = {int(rows[i]): float(scores[i]) for i in top}
+
+            placeholders = ",".join("?" * len(best_rows))
+            meta = {
+                r[0]: r[1:]
+                for r in self._conn.execute(
+                    "SELECT c.row, c.item_id, c.text, i.name, i.path, i.mime_type"
+                    f" FROM chunks c JOIN items i ON i.item_id = c.item_id WHERE c.row IN ({placeholders})",
+                    best_rows,
+                )
+            }
+
+        results: Dict[str, Dict[str, Any]] = {}
+        for row in best_rows:
+            if row not in meta:
+                continue
+            item_id, text, name, path, mime_type = meta[row]
+            hit = results.get(item_id)
+            if hit is None:
+                if len(results) >= k:
+                    continue
+                results[item_id] = {
+                    "id": item_id,
+                    "name": name,
+                    "path": path,
+                    "mime_type": mime_type,
+                    "score": best_scores[row],
+                    "chunks": [text],
+                }
+            elif len(hit["chunks"]) < chunks_per_item:
+                hit["chunks"].append(text)
+        return list(results.values())
+
+
+    def update_from(self, local_index) -> Dict[str, int]:
+        """
+        Bring the vector index in line with a `LocalIndex`, re-embedding only
+        documents whose version changed and dropping ones that disappeared.
+        """
+        stats = {"embedded": 0, "removed": 0}
+        seen = set()
+        for doc in local_index.iter_documents():
+            seen.add(doc["id"])
+            if self.needs_update(doc["id"], doc["version"]):
+                self.add_document(
+                    doc["id"], doc["content"], doc["name"], doc["path"], doc["mime_type"], doc["version"]
+                )
+                stats["embedded"] += 1
+        with self._lock:
+            known = [r[0] for r in self._conn.execute("SELECT item_id FROM items")]
+        for item_id in known:
+            if item_id not in seen:
+                self.remove(item_id)
+                stats["removed"] += 1
+        if self.dead_ratio() > self.compact_ratio:
+            self.compact()
+        self.flush()
+        return stats
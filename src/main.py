@@ -1,12 +1,58 @@
+import hmac
+import json
+import tracemalloc
+import uuid
+from collections import OrderedDict
+from contextlib import asynccontextmanager
 import requests
-from fastapi import FastAPI, Request
-from fastapi.responses import RedirectResponse
+from typing import Literal, Optional
+from fastapi import Depends, FastAPI, Header, HTTPException, Query, Request
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import JSONResponse, PlainTextResponse, RedirectResponse, StreamingResponse
+from starlette.requests import ClientDisconnect
+from pydantic import BaseModel
 from src.core.config import settings
 from src.utils.keyvault import KeyVaultClient
 from src.utils.token_manager import TokenManager
-from src.clients.oneDriveHelper import GraphClient
+from src.clients.oneDriveHelper import GraphClient, GraphListingError, GraphRequestError, UploadSession
+from src.utils.search_cache import SearchCache
+from src.utils.conversion_cache import ConversionCache
+from src.index.lexical import LocalIndex, item_version
+from src.agent.beam import BeamState, build_beam_graph
+from src.agent.checkpoint import make_checkpointer, prune_checkpoints
+from src.agent.events import format_sse, stream_agent, summarize_result
+from src.agent.jobs import JobQueue, QueueFull
+from src.agent.navigator import AgentState, build_agent_graph
+from src.agent.prefetch import ListingPrefetcher
+from src.agent.runtime import close_default_runtime
+from src.agent.store import make_store
+from src.utils.telemetry import MetricsMiddleware, gauge_lines, render_metrics
+from src.utils.profiling import SlowRequestCapture, SlowRequestMiddleware, StackSampler, tracemalloc_top
 
-app = FastAPI()
+slow_requests = SlowRequestCapture(settings.SLOW_REQUEST_MS, keep=settings.SLOW_REQUEST_KEEP)
+profiler = StackSampler()
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    yield
+    await close_default_runtime()
+
+app = FastAPI(lifespan=lifespan)
+app.add_middleware(MetricsMiddleware)
+app.add_middleware(SlowRequestMiddleware, capture=slow_requests)
+
+search_cache = SearchCache(
+    ttl=settings.SEARCH_CACHE_TTL,
+    negative_ttl=settings.SEARCH_CACHE_NEGATIVE_TTL,
+    max_entries=settings.SEARCH_CACHE_MAX_ENTRIES,
+    delta_interval=settings.SEARCH_CACHE_DELTA_INTERVAL,
+)
+# Download URLs are item-scoped; a short TTL keeps them well inside their ~1 h validity.
+download_cache = SearchCache(
+    ttl=settings.DOWNLOAD_URL_TTL,
+    negative_ttl=0,
+    max_entries=settings.DOWNLOAD_URL_MAX_ENTRIES,
+)
 
 # ---------- ONE TIME LOGIN ----------
 @app.get("/login")
@@ -46,7 +92,7 @@ def callback(request: Request):
 # ---------- NORMAL API ----------
 def graph():
     token = TokenManager().get_access_token()
-    return GraphClient(token)
+    return GraphClient(token, search_cache=search_cache, download_cache=download_cache)
 
 @app.get("/drive/root")
 def root():
@@ -56,6 +102,613 @@ def root():
 def folder(folder_id: str):
     return graph().list_folder(folder_id)
 
+def ndjson_children(folder_id: str, select: Optional[str], top: Optional[int]) -> StreamingResponse:
+    """
+    Children as NDJSON, written page by page as Graph returns them. The first
+    page is fetched before responding so a bad folder is a 404/502; a page
+    failing later ends the stream with an `{"error": ...}` line.
+    """
+    fields = [f.strip() for f in select.split(",") if f.strip()] if select else None
+    pages = graph().iter_children(folder_id, select=fields, page_size=top)
+    try:
+        first = next(pages, [])
+    except GraphListingError as e:
+        raise HTTPException(status_code=404 if e.status_code == 404 else 502, detail=str(e))
+
+    def lines():
+        yield "".join(json.dumps(item) + "\n" for item in first)
+        try:
+            for page in pages:
+                yield "".join(json.dumps(item) + "\n" for item in page)
+        except GraphListingError as e:
+            yield json.dumps({"error": str(e)}) + "\n"
+
+    return StreamingResponse(lines(), media_type="application/x-ndjson")
+
+@app.get("/drive/root/stream")
+def root_stream(select: Optional[str] = None, top: Optional[int] = Query(None, ge=1, le=999)):
+    return ndjson_children("root", select, top)
+
+@app.get("/drive/folder/{folder_id}/stream")
+def folder_stream(folder_id: str, select: Optional[str] = None, top: Optional[int] = Query(None, ge=1, le=999)):
+    return ndjson_children(folder_id, select, top)
+
+# Passed through in both directions so partial and resumed reads work end to end.
+PROXY_REQUEST_HEADERS = ("Range", "If-Range")
+PROXY_RESPONSE_HEADERS = (
+    "Content-Length", "Content-Range", "Content-Type", "Accept-Ranges", "ETag", "Last-Modified",
+)
+
+@app.get("/drive/items/{item_id}/content")
+def item_content(item_id: str, request: Request, redirect: bool = False):
+    """
+    Stream a file's bytes from its pre-authenticated download URL, chunk by
+    chunk, honouring Range/If-Range. `redirect=true` sends the client to the
+    download URL instead so the bytes bypass this service.
+    """
+    client = graph()
+    headers = {h: request.headers[h] for h in PROXY_REQUEST_HEADERS if h in request.headers}
+    for attempt in range(2):
+        info = client.get_download_info(item_id)
+        if info is None:
+            raise HTTPException(status_code=404, detail="file not found or not downloadable")
+        url = info["@microsoft.graph.downloadUrl"]
+        if redirect:
+            return RedirectResponse(url, status_code=302)
+        upstream = client.open_download(url, headers)
+        if upstream is None:
+            raise HTTPException(status_code=502, detail="download failed")
+        if upstream.status_code in (401, 403, 404, 410) and attempt == 0:
+            # Expired or revoked URL: fetch a fresh one once.
+            upstream.close()
+            download_cache.invalidate(("downloadUrl", item_id))
+            continue
+        break
+
+    out_headers = {h: upstream.headers[h] for h in PROXY_RESPONSE_HEADERS if h in upstream.headers}
+    out_headers.setdefault("Accept-Ranges", "bytes")
+    out_headers.setdefault("Content-Type", (info.get("file") or {}).get("mimeType", "application/octet-stream"))
+    out_headers["Content-Disposition"] = f"attachment; filename*=UTF-8''{requests.utils.quote(info['name'])}"
+
+    def body():
+        try:
+            yield from upstream.iter_content(chunk_size=settings.DOWNLOAD_CHUNK_SIZE)
+        finally:
+            upstream.close()
+
+    return StreamingResponse(body(), status_code=upstream.status_code, headers=out_headers)
+
+# Progress of recent uploads by upload id, for polling while a PUT is in flight.
+uploads: "OrderedDict[str, dict]" = OrderedDict()
+MAX_TRACKED_UPLOADS = 1000
+
+def track_upload(upload_id: str, path: str, total: int) -> dict:
+    progress = {"upload_id": upload_id, "path": path, "total": total, "uploaded": 0, "status": "uploading"}
+    uploads[upload_id] = progress
+    while len(uploads) > MAX_TRACKED_UPLOADS:
+        uploads.popitem(last=False)
+    return progress
+
+@app.put("/drive/upload")
+async def upload(
+    request: Request,
+    path: str,
+    conflict: Optional[Literal["replace", "rename", "fail"]] = None,
+    upload_id: Optional[str] = None,
+):
+    """
+    Stream the request body into a Graph upload session in aligned chunks;
+    memory stays at about one chunk whatever the file size. Poll
+    `/drive/uploads/{upload_id}` for progress.
+    """
+    if "content-length" not in request.headers:
+        raise HTTPException(status_code=411, detail="Content-Length is required")
+    total = int(request.headers["content-length"])
+    conflict = conflict or settings.UPLOAD_CONFLICT_BEHAVIOR
+    client = await run_in_threadpool(graph)
+    if total == 0:
+        # Upload sessions need at least one byte; empty files go through a simple PUT.
+        progress = track_upload(upload_id or uuid.uuid4().hex, path, total)
+        try:
+            item = await run_in_threadpool(client.upload_file, path.strip("/"), b"", conflict)
+        except GraphRequestError as e:
+            progress["status"] = "failed"
+            raise HTTPException(status_code=e.status_code, detail=e.message)
+        if item is None:
+            progress["status"] = "failed"
+            raise HTTPException(status_code=502, detail="upload failed")
+        progress["status"] = "done"
+        return {**item, "upload_id": progress["upload_id"]}
+
+    try:
+        upload_url = await run_in_threadpool(client.create_upload_session, path, conflict)
+    except GraphRequestError as e:
+        # A name collision (conflict=fail) is 409, a bad path 400: the caller's to fix.
+        raise HTTPException(status_code=e.status_code, detail=e.message)
+    if not upload_url:
+        raise HTTPException(status_code=502, detail="could not create upload session")
+    progress = track_upload(upload_id or uuid.uuid4().hex, path, total)
+    session = UploadSession(
+        client,
+        upload_url,
+        total,
+        chunk_size=settings.UPLOAD_CHUNK_SIZE,
+        on_progress=lambda done, _: progress.update(uploaded=done),
+    )
+
+    try:
+        async for data in request.stream():
+            if session.feed(data):
+                await run_in_threadpool(session.flush)
+                if session.failed:
+                    break
+        item = None if session.failed else await run_in_threadpool(session.flush, True)
+    except (ValueError, ClientDisconnect) as e:
+        progress["status"] = "aborted"
+        await run_in_threadpool(client.cancel_upload_session, upload_url)
+        if isinstance(e, ClientDisconnect):
+            raise
+        raise HTTPException(status_code=400, detail=str(e))
+
+    if item is None:
+        progress["status"] = "failed"
+        await run_in_threadpool(client.cancel_upload_session, upload_url)
+        raise HTTPException(status_code=502, detail=f"upload failed after {session.uploaded} of {total} bytes")
+    progress["status"] = "done"
+    return {**item, "upload_id": progress["upload_id"]}
+
+@app.get("/drive/uploads/{upload_id}")
+def upload_progress(upload_id: str):
+    if upload_id not in uploads:
+        raise HTTPException(status_code=404, detail="upload not found")
+    return uploads[upload_id]
+
+# ---------- CONVERSION ----------
+conversion_cache = ConversionCache(settings.CONVERSION_CACHE_PATH, max_entries=settings.CONVERSION_CACHE_MAX_ENTRIES)
+
+def convert_document(data: bytes, name: str, mime: Optional[str], pages: Optional[int]):
+    # Docling and its models are heavy; load them on the first conversion only.
+    from src.clients.docling import convert_bytes
+    return convert_bytes(data, name, mime, pages=pages)
+
+def conversion_key(item, pages: Optional[int]):
+    return (item["id"], item_version(item), pages or 0)
+
+def forget_conversion(job):
+    """Drop a finished job from `conversions_inflight`, unless a newer job took its key."""
+    _, item, pages = job.payload
+    key = conversion_key(item, pages)
+    if conversions_inflight.get(key) is job:
+        conversions_inflight.pop(key, None)
+
+def run_conversion_job(job):
+    client, item, pages = job.payload
+    try:
+        data = client.download_file(item["id"])
+        if data is None:
+            raise RuntimeError(f"download of '{item['name']}' failed")
+        json_struct, markdown = convert_document(data, item["name"], (item.get("file") or {}).get("mimeType"), pages)
+        if item_version(item):
+            conversion_cache.put(item["id"], item_version(item), pages, json_struct, markdown)
+        return json_struct, markdown
+    finally:
+        # Jobs that answered 202 may never be polled; don't let them pin item, client and result.
+        forget_conversion(job)
+
+conversion_jobs = JobQueue(
+    run_conversion_job,
+    workers=settings.CONVERSION_WORKERS,
+    max_queued=settings.CONVERSION_QUEUE_MAX,
+    per_user=settings.CONVERSION_WORKERS,
+    name="conversion",
+)
+# (item id, version, pages) -> running conversion job, so concurrent requests share one.
+conversions_inflight = {}
+
+def clip(value, max_chars: int):
+    """Cut every string in a JSON structure to `max_chars`."""
+    if isinstance(value, str):
+        return value[:max_chars]
+    if isinstance(value, list):
+        return [clip(v, max_chars) for v in value]
+    if isinstance(value, dict):
+        return {k: clip(v, max_chars) for k, v in value.items()}
+    return value
+
+def preview_pages(max_chars: int) -> int:
+    """Leading pages to convert for a `max_chars` preview, with one page of slack."""
+    return -(-max_chars // settings.CONVERSION_PREVIEW_CHARS_PER_PAGE) + 1
+
+def render_conversion(item_id: str, fmt: str, result, max_chars: Optional[int], pages: Optional[int] = None):
+    json_struct, markdown = result
+    # X-Page-Limit: the content covers at most that many leading pages of the document.
+    page_header = {"X-Page-Limit": str(pages)} if pages else {}
+    if fmt == "markdown":
+        text = markdown[:max_chars] if max_chars else markdown
+        return PlainTextResponse(
+            text,
+            media_type="text/markdown; charset=utf-8",
+            headers={"X-Truncated": str(len(text) < len(markdown)).lower(), **page_header},
+        )
+    return JSONResponse(
+        {"item_id": item_id, "json": clip(json_struct, max_chars) if max_chars else json_struct},
+        headers=page_header,
+    )
+
+def converted(item_id: str, fmt: str, max_chars: Optional[int], pages: Optional[int], wait: Optional[float]):
+    """
+    Converted content of a file: from the cache when its cTag (or eTag) is unchanged,
+    else from a conversion job. Jobs that outlast `wait` seconds answer 202
+    with a job id to poll at /conversions/{job_id}.
+
+    A `max_chars` preview without `pages` converts only the first
+    `preview_pages(max_chars)` pages of paged formats (unless the full
+    conversion is already cached), so a short preview does not pay for the whole
+    document; it may come up shorter than `max_chars` when those pages hold
+    little text. Pass `pages` to choose the range explicitly.
+    """
+    client = graph()
+    item = client.get_item(item_id)
+    if not item or "file" not in item:
+        raise HTTPException(status_code=404, detail="file not found")
+    version = item_version(item)
+    if max_chars and pages is None:
+        full = conversion_cache.get(item_id, version, None) if version else None
+        if full is not None:
+            return render_conversion(item_id, fmt, full, max_chars)
+        pages = preview_pages(max_chars)
+    cached = conversion_cache.get(item_id, version, pages) if version else None
+    if cached is not None:
+        return render_conversion(item_id, fmt, cached, max_chars, pages)
+
+    key = conversion_key(item, pages)
+    job = conversions_inflight.get(key)
+    if job is None or job.status in ("failed", "cancelled"):
+        try:
+            job = conversion_jobs.submit("conversion", (client, item, pages))
+        except QueueFull as e:
+            raise HTTPException(status_code=429, detail=str(e), headers={"Retry-After": str(e.retry_after)})
+        conversions_inflight[key] = job
+    conversion_jobs.wait(job, settings.CONVERSION_SYNC_WAIT if wait is None else wait)
+    return conversion_response(job, fmt, max_chars)
+
+def conversion_response(job, fmt: str, max_chars: Optional[int]):
+    _, item, pages = job.payload
+    if job.status in ("queued", "running"):
+        return JSONResponse(
+            {**job.to_dict(conversion_jobs.position(job)), "item_id": item["id"], "poll": f"/conversions/{job.id}?format={fmt}"},
+            status_code=202,
+        )
+    forget_conversion(job)
+    if job.status != "done":
+        raise HTTPException(status_code=502, detail=job.error or f"conversion {job.status}")
+    return render_conversion(item["id"], fmt, job.result, max_chars, pages)
+
+@app.get("/drive/items/{item_id}/markdown")
+def item_markdown(
+    item_id: str,
+    max_chars: Optional[int] = Query(None, ge=1),
+    pages: Optional[int] = Query(None, ge=1),
+    wait: Optional[float] = Query(None, ge=0, le=60),
+):
+    return converted(item_id, "markdown", max_chars, pages, wait)
+
+@app.get("/drive/items/{item_id}/json")
+def item_json(
+    item_id: str,
+    max_chars: Optional[int] = Query(None, ge=1),
+    pages: Optional[int] = Query(None, ge=1),
+    wait: Optional[float] = Query(None, ge=0, le=60),
+):
+    return converted(item_id, "json", max_chars, pages, wait)
+
+@app.get("/conversions/{job_id}")
+def conversion_status(
+    job_id: str,
+    format: Literal["markdown", "json"] = "markdown",
+    max_chars: Optional[int] = Query(None, ge=1),
+):
+    job = conversion_jobs.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="conversion not found")
+    return conversion_response(job, format, max_chars)
+
+_local_index: Optional[LocalIndex] = None
+
+def local_index() -> LocalIndex:
+    """The SQLite index, opened on first use so importing the app creates no files."""
+    global _local_index
+    if _local_index is None:
+        _local_index = LocalIndex(settings.LOCAL_INDEX_PATH)
+    return _local_index
+
 @app.get("/drive/search")
-def search(q: str):
-    return graph().search(q)
+def search(
+    q: str,
+    mode: Literal["graph", "local"] = "graph",
+    top_k: int = 25,
+    path: Optional[str] = None,
+    mime: Optional[str] = None,
+):
+    if mode == "local":
+        return local_index().search_local(q, top_k=top_k, path_prefix=path, mime_type=mime)
+    client = graph()
+    search_cache.sync_delta(client)
+    return client.search(q)
+
+def run_index_sync_job(job):
+    return local_index().sync(job.payload)
+
+# One sync at a time: it walks the delta feed, downloads and converts changed files.
+index_jobs = JobQueue(run_index_sync_job, workers=1, max_queued=1, per_user=1, name="index_sync")
+_index_sync_job = None
+
+@app.post("/drive/index/sync", status_code=202)
+def index_sync():
+    """Start a background index sync (or return the one already queued or running); poll its status URL."""
+    global _index_sync_job
+    job = _index_sync_job
+    if job is None or job.status not in ("queued", "running"):
+        try:
+            job = index_jobs.submit("index", graph())
+        except QueueFull as e:
+            raise HTTPException(status_code=429, detail=str(e), headers={"Retry-After": str(e.retry_after)})
+        _index_sync_job = job
+    return {**job.to_dict(index_jobs.position(job)), "poll": f"/drive/index/sync/{job.id}"}
+
+@app.get("/drive/index/sync/{job_id}")
+def index_sync_status(job_id: str):
+    job = index_jobs.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="sync job not found")
+    return {**job.to_dict(index_jobs.position(job)), "result": job.result}
+
+
+# ---------- AGENT ----------
+_agent_graphs = {}
+
+def agent_graph(strategy: str):
+    """Compiled navigation graph per strategy, built on first use."""
+    if strategy not in _agent_graphs:
+        checkpointer = make_checkpointer(settings.AGENT_CHECKPOINT_URL)
+        store = make_store(settings.AGENT_STORE_URL)
+        build = build_beam_graph if strategy == "beam" else build_agent_graph
+        _agent_graphs[strategy] = build(checkpointer=checkpointer, store=store)
+    return _agent_graphs[strategy]
+
+def prune_agent_checkpoints(strategy: str, thread_id: str) -> None:
+    """Apply checkpoint retention after a run so the checkpoint store stays bounded."""
+    prune_checkpoints(
+        agent_graph(strategy).checkpointer,
+        thread_id,
+        keep_last=settings.AGENT_CHECKPOINT_KEEP,
+        ttl=settings.AGENT_CHECKPOINT_TTL,
+    )
+
+class FindRequest(BaseModel):
+    query: str
+    path: str = ""
+    drive_description: Optional[str] = None
+    strategy: Literal["walk", "beam"] = "walk"
+    max_attempts: int = 3
+    thread_id: Optional[str] = None
+    # Continue `thread_id` from its last checkpoint instead of starting over.
+    resume: bool = False
+
+def initial_state(body: FindRequest):
+    state_cls = BeamState if body.strategy == "beam" else AgentState
+    return state_cls(
+        user_query=body.query,
+        current_path=body.path,
+        drive_description=body.drive_description,
+        max_attempts=body.max_attempts,
+    )
+
+def check_resumable(body: FindRequest) -> None:
+    """404 unless `body` names a thread that has a checkpoint to resume from."""
+    checkpointer = agent_graph(body.strategy).checkpointer
+    config = {"configurable": {"thread_id": body.thread_id}}
+    if not body.thread_id or checkpointer is None or checkpointer.get_tuple(config) is None:
+        raise HTTPException(status_code=404, detail="no checkpoint to resume for this thread_id")
+
+def agent_input(body: FindRequest):
+    """Graph input: the initial state, or None to continue the thread's checkpoint."""
+    return None if body.resume else initial_state(body)
+
+# Streamed runs in flight; counted on the event loop, so no lock is needed.
+_active_streams = 0
+
+@app.post("/agent/find")
+async def agent_find(body: FindRequest, request: Request):
+    """Run the navigation agent, streaming its progress as server-sent events."""
+    if _active_streams >= settings.AGENT_MAX_STREAMS:
+        raise HTTPException(status_code=429, detail="too many agent runs in progress", headers={"Retry-After": "5"})
+    if body.resume:
+        await run_in_threadpool(check_resumable, body)
+    thread_id = body.thread_id or str(uuid.uuid4())
+    state = agent_input(body)
+
+    async def events():
+        global _active_streams
+        _active_streams += 1
+        try:
+            # Sent before any Graph or LLM work so the client sees the run start at once.
+            yield format_sse("start", {"thread_id": thread_id, "strategy": body.strategy})
+            client = await run_in_threadpool(graph)
+            prefetcher = ListingPrefetcher(client)
+            config = {"configurable": {"thread_id": thread_id, "graph_client": client, "prefetcher": prefetcher}}
+            try:
+                async for frame in stream_agent(agent_graph(body.strategy), state, config, request.is_disconnected):
+                    yield frame
+            finally:
+                prefetcher.close()
+                await run_in_threadpool(prune_agent_checkpoints, body.strategy, thread_id)
+        finally:
+            _active_streams -= 1
+
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+# ---------- AGENT JOBS ----------
+def run_agent_job(job):
+    body: FindRequest = job.payload
+    client = graph()
+    prefetcher = ListingPrefetcher(client)
+    thread_id = body.thread_id or job.id
+    config = {"configurable": {"thread_id": thread_id, "graph_client": client, "prefetcher": prefetcher}}
+    try:
+        final = agent_graph(body.strategy).invoke(agent_input(body), config=config)
+    finally:
+        prefetcher.close()
+        prune_agent_checkpoints(body.strategy, thread_id)
+    return summarize_result(final)
+
+agent_jobs = JobQueue(
+    run_agent_job,
+    workers=settings.AGENT_WORKERS,
+    max_queued=settings.AGENT_QUEUE_MAX,
+    per_user=settings.AGENT_MAX_JOBS_PER_USER,
+    retention=settings.AGENT_JOB_RETENTION,
+)
+
+class JobRequest(FindRequest):
+    priority: int = 0
+
+def job_or_404(job_id: str):
+    job = agent_jobs.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="job not found")
+    return job
+
+def job_owner(request: Request, x_user_id: Optional[str]) -> str:
+    """
+    Key for the per-user running-job cap. The service has no per-user login
+    (one OneDrive token serves every caller), so this is a fairness hint, not a
+    security boundary: callers without X-User-Id are keyed by client address
+    instead of sharing one slot. AGENT_WORKERS and AGENT_QUEUE_MAX bound the
+    total load whatever the header says.
+    """
+    if x_user_id:
+        return x_user_id
+    return f"ip:{request.client.host}" if request.client else "anonymous"
+
+@app.post("/agent/jobs", status_code=202)
+def submit_job(body: JobRequest, request: Request, x_user_id: Optional[str] = Header(None)):
+    if body.resume:
+        check_resumable(body)
+    try:
+        job = agent_jobs.submit(job_owner(request, x_user_id), body, priority=body.priority)
+    except QueueFull as e:
+        raise HTTPException(status_code=429, detail=str(e), headers={"Retry-After": str(e.retry_after)})
+    return job.to_dict(agent_jobs.position(job))
+
+@app.get("/agent/jobs/{job_id}")
+def job_status(job_id: str):
+    job = job_or_404(job_id)
+    return job.to_dict(agent_jobs.position(job))
+
+@app.get("/agent/jobs/{job_id}/result")
+def job_result(job_id: str):
+    job = job_or_404(job_id)
+    if job.status in ("queued", "running"):
+        return JSONResponse(job.to_dict(agent_jobs.position(job)), status_code=202)
+    return {**job.to_dict(), "result": job.result}
+
+@app.delete("/agent/jobs/{job_id}")
+def cancel_job(job_id: str):
+    job = job_or_404(job_id)
+    if not agent_jobs.cancel(job_id):
+        raise HTTPException(status_code=409, detail=f"job is {job.status}")
+    return job.to_dict()
+
+@app.get("/agent/queue")
+def queue_metrics():
+    return agent_jobs.metrics()
+
+
+# ---------- METRICS ----------
+@app.get("/metrics")
+def metrics():
+    if not settings.METRICS_ENABLED:
+        raise HTTPException(status_code=404, detail="metrics are disabled")
+    lines = [render_metrics()]
+    for queue in (agent_jobs, conversion_jobs, index_jobs):
+        lines.extend(gauge_lines(f"{queue.name}_queue", f"{queue.name} job queue state", queue.metrics(), "field"))
+    for name, cache in (("search", search_cache), ("download_url", download_cache), ("conversion", conversion_cache)):
+        lines.extend(gauge_lines(f"{name}_cache", f"{name} cache lookups", {"hits": cache.hits, "misses": cache.misses}, "result"))
+    return PlainTextResponse("\n".join(lines) + "\n", media_type="text/plain; version=0.0.4")
+
+
+# ---------- ADMIN: PROFILING ----------
+def require_admin(x_admin_token: Optional[str] = Header(None)):
+    if not settings.ADMIN_TOKEN:
+        raise HTTPException(status_code=404, detail="admin endpoints are disabled")
+    if not x_admin_token or not hmac.compare_digest(x_admin_token, settings.ADMIN_TOKEN):
+        raise HTTPException(status_code=403, detail="invalid admin token")
+
+def profile_seconds(seconds: float = Query(10, gt=0)) -> float:
+    return min(seconds, settings.PROFILE_MAX_SECONDS)
+
+def start_profiler(seconds: float, interval_ms: float) -> None:
+    try:
+        profiler.start(duration=seconds, interval=interval_ms / 1000)
+    except RuntimeError:
+        raise HTTPException(status_code=409, detail="profiler is already running")
+
+@app.post("/admin/profiler/start", dependencies=[Depends(require_admin)])
+def profiler_start(seconds: float = Depends(profile_seconds), interval_ms: float = Query(10, ge=1, le=1000)):
+    """Start sampling all threads; it stops by itself after `seconds`."""
+    start_profiler(seconds, interval_ms)
+    return profiler.status()
+
+@app.get("/admin/profiler", dependencies=[Depends(require_admin)])
+def profiler_status():
+    return profiler.status()
+
+@app.post("/admin/profiler/stop", dependencies=[Depends(require_admin)])
+def profiler_stop():
+    """Stop sampling and return the collapsed stacks (flamegraph.pl / speedscope input)."""
+    profiler.stop()
+    return PlainTextResponse(profiler.collapsed())
+
+@app.get("/admin/profile", dependencies=[Depends(require_admin)])
+async def profile(seconds: float = Depends(profile_seconds), interval_ms: float = Query(10, ge=1, le=1000)):
+    """Sample for `seconds` and return the collapsed stacks."""
+    start_profiler(seconds, interval_ms)
+    await run_in_threadpool(profiler.wait)
+    return PlainTextResponse(profiler.collapsed())
+
+@app.post("/admin/tracemalloc/start", dependencies=[Depends(require_admin)])
+def tracemalloc_start(frames: int = Query(10, ge=1, le=100)):
+    if not tracemalloc.is_tracing():
+        tracemalloc.start(frames)
+    return {"tracing": True, "frames": tracemalloc.get_traceback_limit()}
+
+@app.get("/admin/tracemalloc", dependencies=[Depends(require_admin)])
+def tracemalloc_snapshot(top: int = Query(25, ge=1, le=500), group: Literal["lineno", "traceback", "filename"] = "lineno"):
+    return tracemalloc_top(top, group)
+
+@app.post("/admin/tracemalloc/stop", dependencies=[Depends(require_admin)])
+def tracemalloc_stop():
+    tracemalloc.stop()
+    return {"tracing": False}
+
+@app.get("/admin/slow-requests", dependencies=[Depends(require_admin)])
+def slow_request_list():
+    return {"threshold_ms": slow_requests.threshold_ms, "captures": slow_requests.summary()}
+
+@app.post("/admin/slow-requests", dependencies=[Depends(require_admin)])
+def slow_request_configure(threshold_ms: float = Query(..., ge=0)):
+    """Capture stacks of requests slower than `threshold_ms`; 0 turns capture (and its sampler) off."""
+    slow_requests.configure(threshold_ms)
+    return {"threshold_ms": slow_requests.threshold_ms}
+
+@app.get("/admin/slow-requests/{capture_id}", dependencies=[Depends(require_admin)])
+def slow_request_stacks(capture_id: int):
+    capture = slow_requests.get(capture_id)
+    if capture is None:
+        raise HTTPException(status_code=404, detail="unknown capture")
+    return PlainTextResponse(capture["stacks"])
@@ -0,0 +1,105 @@
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+import zlib
+from typing import Any, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS conversions (
+    item_id TEXT NOT NULL,
+    pages INTEGER NOT NULL,
+    ctag TEXT NOT NULL,
+    json_struct BLOB NOT NULL,
+    markdown BLOB NOT NULL,
+    used REAL NOT NULL,
+    PRIMARY KEY (item_id, pages)
+);
+CREATE INDEX IF NOT EXISTS conversions_used ON conversions (used);
+"""
+
+
+class ConversionCache:
+    """
+    Persistent cache of converted documents (JSON structure + markdown).
+
+    Entries are keyed by item id and page limit (0 = whole document) and are
+    only served while the item's cTag (content tag) is unchanged. Values are
+    zlib-compressed; the least recently used entries are evicted beyond
+    `max_entries`. The database is opened on first use.
+    """
+    def __init__(self, db_path: str = ":memory:", max_entries: int = 2000, clock=time.time):
+        self.db_path = db_path
+        self.max_entries = max_entries
+        self.clock = clock
+        self.hits = 0
+        self.misses = 0
+        self._conn: Optional[sqlite3.Connection] = None
+        self._lock = threading.Lock()
+
+
+    def _db(self) -> sqlite3.Connection:
+        """The connection, created with its file and schema on first call (under `_lock`)."""
+        if self._conn is None:
+            if self.db_path != ":memory:":
+                os.makedirs(os.path.dirname(os.path.abspath(self.db_path)), exist_ok=True)
+            conn = sqlite3.connect(self.db_path, check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.executescript(_SCHEMA)
+            self._conn = conn
+        return self._conn
+
+
+    def get(self, item_id: str, ctag: str, pages: Optional[int] = None) -> Optional[Tuple[Any, str]]:
+        """(json_struct, markdown) converted from content `ctag`, or None."""
+        with self._lock, self._db() as conn:
+            row = conn.execute(
+                "SELECT json_struct, markdown FROM conversions WHERE item_id = ? AND pages = ? AND ctag = ?",
+                (item_id, pages or 0, ctag),
+            ).fetchone()
+            if row is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+            conn.execute(
+                "UPDATE conversions SET used = ? WHERE item_id = ? AND pages = ?",
+                (self.clock(), item_id, pages or 0),
+            )
+        return json.loads(zlib.decompress(row[0])), zlib.decompress(row[1]).decode("utf-8")
+
+
+    def put(self, item_id: str, ctag: str, pages: Optional[int], json_struct: Any, markdown: str) -> None:
+        with self._lock, self._db() as conn:
+            # Conversions of older content are useless once the cTag moved on.
+            conn.execute("DELETE FROM conversions WHERE item_id = ? AND ctag != ?", (item_id, ctag))
+            conn.execute(
+                "INSERT OR REPLACE INTO conversions (item_id, pages, ctag, json_struct, markdown, used) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                (
+                    item_id,
+                    pages or 0,
+                    ctag,
+                    zlib.compress(json.dumps(json_struct, default=str).encode("utf-8")),
+                    zlib.compress(markdown.encode("utf-8")),
+                    self.clock(),
+                ),
+            )
+            count = conn.execute("SELECT COUNT(*) FROM conversions").fetchone()[0]
+            if count > self.max_entries:
+                conn.execute(
+                    "DELETE FROM conversions WHERE rowid IN "
+                    "(SELECT rowid FROM conversions ORDER BY used LIMIT ?)",
+                    (count - self.max_entries,),
+                )
+
+
+    def close(self) -> None:
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
@@ -1,6 +1,7 @@
 from azure.identity import ClientSecretCredential
 from azure.keyvault.secrets import SecretClient
 from src.core.config import settings
+from src.utils.telemetry import AUTH_SECONDS, traced
 
 class KeyVaultClient:
     def __init__(self):
@@ -11,8 +12,10 @@ class KeyVaultClient:
         )
         self.client = SecretClient(vault_url=settings.KEY_VAULT_URL, credential=self.credential)
 
+    @traced(AUTH_SECONDS, operation="keyvault_get_secret")
     def get_secret(self, name: str):
         return self.client.get_secret(name).value
 
+    @traced(AUTH_SECONDS, operation="keyvault_set_secret")
     def set_secret(self, name: str, value: str):
         self.client.set_secret(name, value)
@@ -0,0 +1,259 @@
+import collections
+import os
+import sys
+import threading
+import time
+import tracemalloc
+from typing import Any, Deque, Dict, List, Optional, Tuple
+
+# Leaf frames of threads parked waiting for work; dropped so idle pools don't dominate profiles.
+_IDLE_LEAVES = {
+    ("threading.py", "wait"),
+    ("threading.py", "_wait_for_tstate_lock"),
+    ("selectors.py", "select"),
+    ("queue.py", "get"),
+    ("thread.py", "_worker"),
+}
+
+
+class StackSampler:
+    """
+    Samples the Python stack of every thread from a daemon thread every
+    `interval` seconds (via `sys._current_frames()`), as folded stacks
+    ("thread;file:func;file:func"). Samples are aggregated into counts and,
+    with `window` set, also kept with their timestamps for the last `window`
+    seconds. Nothing runs until `start()`.
+    """
+    def __init__(self, interval: float = 0.01, window: Optional[float] = None):
+        self.interval = interval
+        self.window = window
+        self.counts: collections.Counter = collections.Counter()
+        self.samples = 0
+        self.started_at: Optional[float] = None
+        self.timeline: Deque[Tuple[float, int, str]] = collections.deque()
+        self._labels: Dict[Any, str] = {}
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._lock = threading.Lock()
+        self._start_lock = threading.Lock()
+
+
+    @property
+    def running(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+
+
+    def start(self, duration: Optional[float] = None, interval: Optional[float] = None) -> None:
+        """
+        Start sampling (from scratch), stopping by itself after `duration` seconds
+        if given. Raises RuntimeError if already running (checked atomically).
+        """
+        with self._start_lock:
+            if self.running:
+                raise RuntimeError("sampler is already running")
+            if interval is not None:
+                self.interval = interval
+            with self._lock:
+                self.counts.clear()
+                self.timeline.clear()
+                self.samples = 0
+            self.started_at = time.time()
+            self._stop.clear()
+            deadline = time.monotonic() + duration if duration else None
+            self._thread = threading.Thread(target=self._run, args=(deadline,), name="stack-sampler", daemon=True)
+            self._thread.start()
+
+
+    def stop(self) -> None:
+        self._stop.set()
+        if self._thread is not None and self._thread is not threading.current_thread():
+            self._thread.join()
+
+
+    def wait(self) -> None:
+        """Block until a timed run ends by itself."""
+        if self._thread is not None:
+            self._thread.join()
+
+
+    def _label(self, code) -> str:
+        label = self._labels.get(code)
+        if label is None:
+            label = self._labels[code] = f"{os.path.basename(code.co_filename)}:{code.co_name}"
+        return label
+
+
+    def _run(self, deadline: Optional[float]) -> None:
+        me = threading.get_ident()
+        while not self._stop.wait(self.interval):
+            now = time.monotonic()
+            if deadline is not None and now >= deadline:
+                break
+            names = {t.ident: t.name for t in threading.enumerate()}
+            stacks = []
+            for ident, frame in sys._current_frames().items():
+                if ident == me:
+                    continue
+                leaf = (os.path.basename(frame.f_code.co_filename), frame.f_code.co_name)
+                if leaf in _IDLE_LEAVES:
+                    continue
+                frames = []
+                while frame is not None:
+                    frames.append(self._label(frame.f_code))
+                    frame = frame.f_back
+                frames.append(names.get(ident, str(ident)))
+                stacks.append((ident, ";".join(reversed(frames))))
+            with self._lock:
+                self.samples += 1
+                for ident, stack in stacks:
+                    self.counts[stack] += 1
+                    if self.window is not None:
+                        self.timeline.append((now, ident, stack))
+                if self.window is not None:
+                    while self.timeline and self.timeline[0][0] < now - self.window:
+                        self.timeline.popleft()
+
+
+    def collapsed(self) -> str:
+        """Aggregated samples in the folded format flamegraph.pl / speedscope read."""
+        with self._lock:
+            return "".join(f"{stack} {n}\n" for stack, n in self.counts.most_common())
+
+
+    def between(self, start: float, end: float) -> str:
+        """Folded stacks sampled between two `time.monotonic()` readings (needs `window`)."""
+        counts: collections.Counter = collections.Counter()
+        with self._lock:
+            for ts, _, stack in self.timeline:
+                if start <= ts <= end:
+                    counts[stack] += 1
+        return "".join(f"{stack} {n}\n" for stack, n in counts.most_common())
+
+
+    def status(self) -> Dict[str, Any]:
+        return {
+            "running": self.running,
+            "started_at": self.started_at,
+            "interval_ms": self.interval * 1000,
+            "samples": self.samples,
+            "stacks": len(self.counts),
+        }
+
+
+# -----------------------
+# tracemalloc
+# -----------------------
+
+def tracemalloc_top(limit: int = 25, group_by: str = "lineno") -> Dict[str, Any]:
+    """Largest live allocations since tracing started, grouped by line or traceback."""
+    if not tracemalloc.is_tracing():
+        return {"tracing": False, "top": []}
+    snapshot = tracemalloc.take_snapshot().filter_traces((
+        tracemalloc.Filter(False, tracemalloc.__file__),
+        tracemalloc.Filter(False, "<frozen importlib._bootstrap>"),
+    ))
+    current, peak = tracemalloc.get_traced_memory()
+    top = []
+    for stat in snapshot.statistics(group_by)[:limit]:
+        top.append({
+            "size_kib": round(stat.size / 1024, 1),
+            "count": stat.count,
+            "where": [f"{f.filename}:{f.lineno}" for f in stat.traceback],
+        })
+    return {
+        "tracing": True,
+        "frames": tracemalloc.get_traceback_limit(),
+        "current_mib": round(current / 2**20, 2),
+        "peak_mib": round(peak / 2**20, 2),
+        "top": top,
+    }
+
+
+# -----------------------
+# Slow request capture
+# -----------------------
+
+class SlowRequestCapture:
+    """
+    Opt-in capture of where slow requests spent their time. While enabled, a
+    StackSampler keeps a short timeline of all threads' stacks; requests
+    slower than `threshold_ms` keep the folded stacks sampled during them.
+    Disabled (threshold 0), no sampler runs and the middleware passes through.
+    """
+    def __init__(self, threshold_ms: float = 0, interval: float = 0.005, keep: int = 20, window: float = 120):
+        self.threshold_ms = 0.0
+        self.interval = interval
+        self.window = window
+        self.captures: Deque[Dict[str, Any]] = collections.deque(maxlen=keep)
+        self.sampler: Optional[StackSampler] = None
+        self._seq = 0
+        self._lock = threading.Lock()
+        self.configure(threshold_ms)
+
+
+    @property
+    def enabled(self) -> bool:
+        return self.threshold_ms > 0
+
+
+    def configure(self, threshold_ms: float) -> None:
+        """Enable (threshold > 0), retune or disable (0) the capture."""
+        with self._lock:
+            self.threshold_ms = threshold_ms
+            if threshold_ms > 0 and self.sampler is None:
+                self.sampler = StackSampler(self.interval, window=self.window)
+                self.sampler.start()
+            elif threshold_ms <= 0 and self.sampler is not None:
+                self.sampler.stop()
+                self.sampler = None
+
+
+    def finish(self, method: str, path: str, status: int, start: float, end: float) -> None:
+        sampler = self.sampler
+        elapsed_ms = (end - start) * 1000
+        if sampler is None or elapsed_ms < self.threshold_ms:
+            return
+        with self._lock:
+            self._seq += 1
+            self.captures.append({
+                "id": self._seq,
+                "method": method,
+                "path": path,
+                "status": status,
+                "duration_ms": round(elapsed_ms, 1),
+                "at": time.time(),
+                "stacks": sampler.between(start, end),
+            })
+
+
+    def get(self, capture_id: int) -> Optional[Dict[str, Any]]:
+        return next((c for c in self.captures if c["id"] == capture_id), None)
+
+
+    def summary(self) -> List[Dict[str, Any]]:
+        return [{k: v for k, v in c.items() if k != "stacks"} for c in self.captures]
+
+
+class SlowRequestMiddleware:
+    """ASGI middleware feeding `capture`; a single attribute check while it is disabled."""
+    def __init__(self, app, capture: SlowRequestCapture):
+        self.app = app
+        self.capture = capture
+
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or self.capture.sampler is None:
+            await self.app(scope, receive, send)
+            return
+        status = [500]
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start":
+                status[0] = message["status"]
+            await send(message)
+
+        start = time.monotonic()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            self.capture.finish(scope["method"], scope["path"], status[0], start, time.monotonic())
@@ -0,0 +1,220 @@
+import logging
+import threading
+import time
+import unicodedata
+from collections import OrderedDict
+from concurrent.futures import Future
+from typing import Any, Callable, Dict, Hashable, Iterable, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+
+def normalize_query(query: Optional[str]) -> str:
+    """Case-fold, NFKC-normalize and collapse whitespace so near-identical queries share a key."""
+    if not query:
+        return ""
+    return " ".join(unicodedata.normalize("NFKC", query).casefold().split())
+
+
+def _result_ids(result: Any) -> Tuple[str, ...]:
+    """Collect driveItem ids from a list of items, search hits or searchResponses."""
+    ids = []
+    stack = [result]
+    while stack:
+        obj = stack.pop()
+        if isinstance(obj, list):
+            stack.extend(obj)
+        elif isinstance(obj, dict):
+            resource = obj.get("resource")
+            if isinstance(resource, dict) and "id" in resource:
+                ids.append(resource["id"])
+            elif "id" in obj:
+                ids.append(obj["id"])
+            for k in ("hitsContainers", "hits", "value"):
+                if k in obj:
+                    stack.append(obj[k])
+    return tuple(ids)
+
+
+class _Entry:
+    __slots__ = ("value", "expires_at", "item_ids")
+
+    def __init__(self, value: Any, expires_at: float, item_ids: Tuple[str, ...]):
+        self.value = value
+        self.expires_at = expires_at
+        self.item_ids = item_ids
+
+
+class SearchCache:
+    """
+    Thread-safe search result cache.
+
+    - Keys are built from the normalized query, KQL template, region, fields and paging.
+    - Entries expire after `ttl` seconds; empty results use the shorter `negative_ttl`.
+    - Concurrent misses for the same key are coalesced into one upstream call.
+    - `apply_delta` drops entries affected by changes reported by a Graph delta query.
+    """
+    def __init__(
+        self,
+        ttl: float = 300,
+        negative_ttl: float = 30,
+        max_entries: int = 1024,
+        delta_interval: float = 30,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self.ttl = ttl
+        self.negative_ttl = negative_ttl
+        self.max_entries = max_entries
+        self.delta_interval = delta_interval
+        self._clock = clock
+        self._entries: "OrderedDict[Hashable, _Entry]" = OrderedDict()
+        self._inflight: Dict[Hashable, Future] = {}
+        self._lock = threading.Lock()
+        self._delta_link: Optional[str] = None
+        self._last_delta = float("-inf")
+        self.hits = 0
+        self.misses = 0
+        self.coalesced = 0
+
+
+    @staticmethod
+    def make_key(
+        query_string: str,
+        query_template: Optional[str] = None,
+        region: Optional[str] = None,
+        fields: Optional[Iterable[str]] = None,
+        size: Optional[int] = None,
+        offset: Optional[int] = None,
+        semantic_query: Optional[str] = None,
+        scope: str = "me",
+    ) -> Tuple:
+        return (
+            scope,
+            normalize_query(query_string),
+            " ".join((query_template or "").split()),
+            (region or "").upper(),
+            tuple(sorted(fields)) if fields else (),
+            size,
+            offset,
+            normalize_query(semantic_query),
+        )
+
+
+    def get(self, key: Hashable) -> Tuple[bool, Any]:
+        """Return (found, value) for a live entry."""
+        with self._lock:
+            return self._get_locked(key)
+
+
+    def _get_locked(self, key: Hashable) -> Tuple[bool, Any]:
+        entry = self._entries.get(key)
+        if entry is None:
+            return False, None
+        if entry.expires_at <= self._clock():
+            del self._entries[key]
+            return False, None
+        self._entries.move_to_end(key)
+        return True, entry.value
+
+
+    def put(self, key: Hashable, value: Any) -> None:
+        ids = _result_ids(value)
+        ttl = self.ttl if ids else self.negative_ttl
+        with self._lock:
+            self._entries[key] = _Entry(value, self._clock() + ttl, ids)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+
+    def get_or_fetch(self, key: Hashable, fetch: Callable[[], Any]) -> Any:
+        """
+        Return the cached value for `key`, or call `fetch` once and cache its result.
+        Callers that miss while a fetch for the same key is running wait for it
+        instead of issuing their own request. Exceptions are propagated, not cached.
+        """
+        with self._lock:
+            found, value = self._get_locked(key)
+            if found:
+                self.hits += 1
+                return value
+            pending = self._inflight.get(key)
+            if pending is None:
+                self.misses += 1
+                pending = Future()
+                self._inflight[key] = pending
+                leader = True
+            else:
+                self.coalesced += 1
+                leader = False
+
+        if not leader:
+            return pending.result()
+
+        try:
+            value = fetch()
+        except BaseException as e:
+            pending.set_exception(e)
+            raise
+        else:
+            self.put(key, value)
+            pending.set_result(value)
+            return value
+        finally:
+            with self._lock:
+                self._inflight.pop(key, None)
+
+
+    def invalidate(self, key: Optional[Hashable] = None) -> None:
+        """Drop one entry, or everything when no key is given."""
+        with self._lock:
+            if key is None:
+                self._entries.clear()
+            else:
+                self._entries.pop(key, None)
+
+
+    def apply_delta(self, changed_items: Iterable[Dict[str, Any]]) -> int:
+        """
+        Invalidate entries affected by driveItem changes from a delta query.
+        Entries listing a changed item are dropped; cached empty results are
+        dropped on any change since a new item may now match them.
+        Returns the number of entries removed.
+        """
+        changed = {i.get("id") for i in changed_items if i.get("id")}
+        if not changed:
+            return 0
+        with self._lock:
+            stale = [
+                k for k, e in self._entries.items()
+                if not e.item_ids or changed.intersection(e.item_ids)
+            ]
+            for k in stale:
+                del self._entries[k]
+        return len(stale)
+
+
+    def sync_delta(self, graph_client) -> int:
+        """
+        Pull changes since the last sync from `graph_client.delta` and apply them.
+        Throttled to once per `delta_interval` seconds.
+        """
+        now = self._clock()
+        with self._lock:
+            if now - self._last_delta < self.delta_interval:
+                return 0
+            self._last_delta = now
+            delta_link = self._delta_link
+
+        items, new_link = graph_client.delta(delta_link, latest=delta_link is None)
+        if new_link is None:
+            return 0
+        with self._lock:
+            self._delta_link = new_link
+        if delta_link is None:
+            # First sync only establishes the baseline link.
+            return 0
+        removed = self.apply_delta(items)
+        if removed:
+            logger.info(f"Search cache: invalidated {removed} entries from {len(items)} changes")
+        return removed
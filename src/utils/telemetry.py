@@ -0,0 +1,333 @@
+import functools
+import re
+import threading
+import time
+from bisect import bisect_left
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+
+from src.core.config import settings
+
+# Optional: OpenTelemetry API for spans (an SDK/exporter is configured by the deployment)
+try:
+    from opentelemetry import trace as otel_trace
+    HAS_OTEL = True
+except ImportError:
+    HAS_OTEL = False
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60)
+
+metrics_enabled = settings.METRICS_ENABLED
+tracing_enabled = settings.TRACING_ENABLED and HAS_OTEL
+
+
+def configure(metrics: Optional[bool] = None, tracing: Optional[bool] = None) -> None:
+    """Switch metrics and/or spans on or off at runtime (e.g. in tests and benchmarks)."""
+    global metrics_enabled, tracing_enabled
+    if metrics is not None:
+        metrics_enabled = metrics
+    if tracing is not None:
+        tracing_enabled = tracing and HAS_OTEL
+
+
+# -----------------------
+# Prometheus metrics
+# -----------------------
+
+def _escape(value: Any) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+class _Metric:
+    kind = ""
+
+    def __init__(self, name: str, help: str, labels: Iterable[str] = ()):
+        self.name = name
+        self.help = help
+        self.labels = tuple(labels)
+        self._lock = threading.Lock()
+        REGISTRY.append(self)
+
+
+    def _key(self, labels: Dict[str, Any]) -> Tuple[str, ...]:
+        return tuple(str(labels.get(l, "")) for l in self.labels)
+
+
+    def _labelstr(self, key: Tuple[str, ...], extra: str = "") -> str:
+        parts = [f'{l}="{_escape(v)}"' for l, v in zip(self.labels, key)]
+        if extra:
+            parts.append(extra)
+        return "{" + ",".join(parts) + "}" if parts else ""
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def __init__(self, name: str, help: str, labels: Iterable[str] = ()):
+        super().__init__(name, help, labels)
+        self._values: Dict[Tuple[str, ...], float] = {}
+
+
+    def inc(self, amount: float = 1, **labels) -> None:
+        if not metrics_enabled:
+            return
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+
+    def value(self, **labels) -> float:
+        return self._values.get(self._key(labels), 0)
+
+
+    def render(self) -> List[str]:
+        with self._lock:
+            return [f"{self.name}{self._labelstr(k)} {v}" for k, v in sorted(self._values.items())]
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(self, name: str, help: str, labels: Iterable[str] = (), buckets: Iterable[float] = DEFAULT_BUCKETS):
+        super().__init__(name, help, labels)
+        self.buckets = tuple(sorted(buckets))
+        # key -> [bucket counts..., +Inf count, sum]
+        self._values: Dict[Tuple[str, ...], List[float]] = {}
+
+
+    def observe(self, value: float, **labels) -> None:
+        if not metrics_enabled:
+            return
+        key = self._key(labels)
+        i = bisect_left(self.buckets, value)
+        with self._lock:
+            row = self._values.get(key)
+            if row is None:
+                row = self._values[key] = [0] * (len(self.buckets) + 2)
+            row[i] += 1
+            row[-1] += value
+
+
+    def count(self, **labels) -> int:
+        row = self._values.get(self._key(labels))
+        return int(sum(row[:-1])) if row else 0
+
+
+    def render(self) -> List[str]:
+        lines = []
+        with self._lock:
+            for key, row in sorted(self._values.items()):
+                cumulative = 0
+                for bound, n in zip(self.buckets + (float("inf"),), row[:-1]):
+                    cumulative += n
+                    le = "+Inf" if bound == float("inf") else repr(bound)
+                    labels = self._labelstr(key, 'le="%s"' % le)
+                    lines.append(f"{self.name}_bucket{labels} {cumulative}")
+                lines.append(f"{self.name}_sum{self._labelstr(key)} {row[-1]}")
+                lines.append(f"{self.name}_count{self._labelstr(key)} {cumulative}")
+        return lines
+
+
+REGISTRY: List[_Metric] = []
+
+
+def render_metrics() -> str:
+    """All metrics in the Prometheus text exposition format (0.0.4)."""
+    out = []
+    for metric in REGISTRY:
+        out.append(f"# HELP {metric.name} {metric.help}")
+        out.append(f"# TYPE {metric.name} {metric.kind}")
+        out.extend(metric.render())
+    return "\n".join(out) + "\n"
+
+
+# -----------------------
+# Spans and timers
+# -----------------------
+
+class _Noop:
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def set(self, **labels):
+        pass
+
+    def rename(self, span_name):
+        pass
+
+
+_NOOP = _Noop()
+
+
+class _Timer:
+    """Times a block into a histogram and, with tracing on, wraps it in a span."""
+    __slots__ = ("histogram", "span_name", "labels", "start", "_span_cm", "span")
+
+    def __init__(self, histogram: Optional[Histogram], span_name: Optional[str], labels: Dict[str, Any]):
+        self.histogram = histogram
+        self.span_name = span_name
+        self.labels = labels
+        self._span_cm = None
+        self.span = None
+
+
+    def set(self, **labels) -> None:
+        """Add labels known only inside the block (e.g. a status code)."""
+        self.labels.update(labels)
+
+
+    def rename(self, span_name: str) -> None:
+        """Rename the span once a better name is known (e.g. the matched route)."""
+        self.span_name = span_name
+        if self.span is not None:
+            self.span.update_name(span_name)
+
+
+    def __enter__(self):
+        if tracing_enabled and self.span_name:
+            self._span_cm = otel_trace.get_tracer("ms365-onedrive-agent").start_as_current_span(self.span_name)
+            self.span = self._span_cm.__enter__()
+        self.start = time.perf_counter()
+        return self
+
+
+    def __exit__(self, exc_type, exc, tb):
+        elapsed = time.perf_counter() - self.start
+        if self.histogram is not None:
+            self.histogram.observe(elapsed, **self.labels)
+        if self._span_cm is not None:
+            for k, v in self.labels.items():
+                self.span.set_attribute(k, v)
+            self._span_cm.__exit__(exc_type, exc, tb)
+        return False
+
+
+def timed(histogram: Optional[Histogram], span_name: Optional[str] = None, **labels):
+    """
+    Context manager timing a block into `histogram` (with `labels`) and, when
+    tracing is on, recording it as the span `span_name`. A shared no-op when
+    both metrics and tracing are off.
+    """
+    if not metrics_enabled and not tracing_enabled:
+        return _NOOP
+    return _Timer(histogram, span_name, labels)
+
+
+def traced(histogram: Optional[Histogram], span_name: Optional[str] = None, **labels) -> Callable:
+    """Decorator form of `timed`."""
+    def decorator(fn):
+        name = span_name or fn.__qualname__
+
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            if not metrics_enabled and not tracing_enabled:
+                return fn(*args, **kwargs)
+            with _Timer(histogram, name, dict(labels)):
+                return fn(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+# -----------------------
+# Shared metrics
+# -----------------------
+
+GRAPH_CALL_SECONDS = Histogram("graph_call_seconds", "GraphClient method latency", ["method"])
+GRAPH_REQUESTS = Counter("graph_requests_total", "Graph HTTP responses", ["route", "status"])
+GRAPH_REQUEST_SECONDS = Histogram("graph_request_seconds", "Graph HTTP time to response headers", ["route"])
+GRAPH_THROTTLED = Counter("graph_throttled_total", "Graph responses with 429/503", ["route"])
+GRAPH_BYTES = Counter("graph_response_bytes_total", "Graph response body bytes (by Content-Length)", ["route"])
+AUTH_SECONDS = Histogram("auth_call_seconds", "Key Vault and token endpoint latency", ["operation"])
+CONVERSION_SECONDS = Histogram(
+    "conversion_seconds", "Document conversion time", ["handler", "extension"],
+    buckets=(0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120, 300),
+)
+CONVERSION_BYTES = Counter("conversion_input_bytes_total", "Bytes converted", ["handler", "extension"])
+AGENT_NODE_SECONDS = Histogram("agent_node_seconds", "Agent graph node latency", ["node"])
+LLM_CALL_SECONDS = Histogram("llm_call_seconds", "Structured LLM call latency", ["tool", "cached"])
+LLM_TOKENS = Counter("llm_tokens_total", "LLM tokens used", ["tool", "kind"])
+HTTP_REQUEST_SECONDS = Histogram("http_request_seconds", "API request latency", ["method", "route", "status"])
+
+_ID_SEGMENT = re.compile(r"/(items|drives|sites|users)/[^/:?]+")
+_PATH_SEGMENT = re.compile(r"/root:[^:?]*:?")
+
+
+def graph_route(url: str) -> str:
+    """URL path with item ids and drive paths replaced, to keep label cardinality low."""
+    path = url.split("://", 1)[-1].split("?", 1)[0]
+    path = path.split("/", 1)[1] if "/" in path else ""
+    if not path.startswith(("v1.0", "beta")):
+        return "download_or_upload_url"
+    path = _ID_SEGMENT.sub(r"/\1/{id}", "/" + path)
+    return _PATH_SEGMENT.sub("/root:{path}:", path)
+
+
+def record_graph_response(resp, *args, **kwargs):
+    """`requests` response hook feeding the Graph HTTP metrics."""
+    if not metrics_enabled:
+        return
+    route = graph_route(resp.url)
+    GRAPH_REQUESTS.inc(route=route, status=resp.status_code)
+    GRAPH_REQUEST_SECONDS.observe(resp.elapsed.total_seconds(), route=route)
+    if resp.status_code in (429, 503):
+        GRAPH_THROTTLED.inc(route=route)
+    length = resp.headers.get("Content-Length")
+    if length and length.isdigit():
+        GRAPH_BYTES.inc(int(length), route=route)
+
+
+def instrument_session(session) -> None:
+    """Attach the Graph response hook to a `requests.Session` (once)."""
+    hooks = session.hooks.setdefault("response", [])
+    if record_graph_response not in hooks:
+        hooks.append(record_graph_response)
+
+
+def instrument_node(name: str, fn: Callable) -> Callable:
+    """Wrap an agent graph node so its runs are timed (signature kept for LangGraph)."""
+    return traced(AGENT_NODE_SECONDS, f"agent.{name}", node=name)(fn)
+
+
+def gauge_lines(name: str, help: str, samples: Dict[str, Any], label: str) -> List[str]:
+    """Point-in-time values (e.g. queue depths) rendered as one Prometheus gauge."""
+    lines = [f"# HELP {name} {help}", f"# TYPE {name} gauge"]
+    for key, value in samples.items():
+        if isinstance(value, (int, float)) and not isinstance(value, bool):
+            lines.append(f'{name}{{{label}="{_escape(key)}"}} {value}')
+    return lines
+
+
+class MetricsMiddleware:
+    """
+    ASGI middleware timing every HTTP request until its last body chunk is
+    sent (so streamed responses are measured in full), labelled with the
+    route template rather than the raw path.
+    """
+    def __init__(self, app):
+        self.app = app
+
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not (metrics_enabled or tracing_enabled):
+            await self.app(scope, receive, send)
+            return
+        status = [500]
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start":
+                status[0] = message["status"]
+            await send(message)
+
+        # The route is only known after routing; the span is renamed to it then.
+        timer = timed(HTTP_REQUEST_SECONDS, f"{scope['method']} unmatched", method=scope["method"])
+        with timer:
+            try:
+                await self.app(scope, receive, send_wrapper)
+            finally:
+                route = getattr(scope.get("route"), "path", "unmatched")
+                timer.rename(f"{scope['method']} {route}")
+                timer.set(route=route, status=status[0])
@@ -1,17 +1,20 @@
 import requests
 from src.utils.keyvault import KeyVaultClient
 from src.core.config import settings
+from src.utils.telemetry import AUTH_SECONDS, traced
 
 class TokenManager:
     def __init__(self):
         self.kv = KeyVaultClient()
 
+    @traced(AUTH_SECONDS, operation="get_access_token")
     def get_access_token(self) -> str:
         try:
             return self.kv.get_secret("onedrive-access-token")
         except Exception:
             return self.refresh_access_token()
 
+    @traced(AUTH_SECONDS, operation="refresh_access_token")
     def refresh_access_token(self) -> str:
         refresh_token = self.kv.get_secret("onedrive-refresh-token")
 
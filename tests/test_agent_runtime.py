@@ -0,0 +1,41 @@
+import asyncio
+
+from src.agent import runtime as agent_runtime
+from src.agent.navigator import Decision, FileRelevance
+from src.agent.runtime import AgentRuntime, close_default_runtime, get_runtime
+
+
+def test_extractors_are_built_once_per_model_and_schema():
+    runtime = AgentRuntime(model="gpt-test", api_key="sk-test")
+    assert runtime.extractor(Decision) is runtime.extractor(Decision)
+    assert runtime.extractor(Decision) is not runtime.extractor(FileRelevance)
+    assert runtime.extractor(Decision) is not runtime.extractor(Decision, model="other")
+    assert runtime.llm().http_client is runtime.llm("other").http_client
+
+
+def test_get_runtime_prefers_config():
+    runtime = AgentRuntime(model="gpt-test", api_key="sk-test")
+    assert get_runtime({"configurable": {"runtime": runtime}}) is runtime
+
+
+def test_close_releases_sync_and_async_clients():
+    runtime = AgentRuntime(model="gpt-test", api_key="sk-test")
+    runtime.close()
+    assert runtime.http_client.is_closed and runtime.http_async_client.is_closed
+
+    async def close_in_loop():
+        inner = AgentRuntime(model="gpt-test", api_key="sk-test")
+        inner.close()
+        await inner._closing
+        return inner
+
+    inner = asyncio.run(close_in_loop())
+    assert inner.http_client.is_closed and inner.http_async_client.is_closed
+
+
+def test_close_default_runtime_resets_it(monkeypatch):
+    runtime = AgentRuntime(model="gpt-test", api_key="sk-test")
+    monkeypatch.setattr(agent_runtime, "_default_runtime", runtime)
+    asyncio.run(close_default_runtime())
+    assert runtime.http_async_client.is_closed
+    assert agent_runtime._default_runtime is None
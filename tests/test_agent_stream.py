@@ -0,0 +1,92 @@
+import asyncio
+import json
+
+from fastapi.testclient import TestClient
+
+import src.main as main
+from benchmarks.synthetic import FakeDrive, ScriptedRuntime, deepest_files, make_tree, noisy_oracle
+from src.agent import runtime as agent_runtime
+from src.agent.events import stream_agent
+from src.agent.navigator import AgentState, build_agent_graph
+
+
+def parse(frames):
+    events = []
+    for frame in frames:
+        head, data = frame.strip().split("\n")
+        events.append((head[len("event: "):], json.loads(data[len("data: "):])))
+    return events
+
+
+def setup():
+    tree = make_tree(depth=3, branching=4, files_per_folder=5, seed=4)
+    target = deepest_files(tree)[0]
+    runtime = ScriptedRuntime(noisy_oracle(tree, target, error_rate=0.0))
+    query = "find the " + target["name"].rsplit(".", 1)[0].replace("_", " ")
+    return tree, target, runtime, query
+
+
+async def collect(agen):
+    return [frame async for frame in agen]
+
+
+def test_stream_reports_each_step_and_the_result():
+    tree, target, runtime, query = setup()
+    config = {"configurable": {"graph_client": FakeDrive(tree), "runtime": runtime}}
+    events = parse(asyncio.run(collect(
+        stream_agent(build_agent_graph(), AgentState(user_query=query, max_attempts=5), config)
+    )))
+
+    nodes = [data["node"] for kind, data in events if kind == "step"]
+    assert nodes[:4] == ["resolve_start", "list_children", "decide_next", "list_children"]
+    listed = [data["candidates"] for kind, data in events if data.get("node") == "list_children"]
+    assert listed == [9, 9, 9, 5]
+    verify = next(data for kind, data in events if data.get("node") == "download_and_verify")
+    assert verify["verified"] and verify["score"] == 1.0
+    kind, result = events[-1]
+    assert kind == "result"
+    assert result["verified"] and result["file"]["id"] == target["id"] and result["steps"] == 4
+
+
+def test_disconnect_stops_the_run():
+    tree, target, runtime, query = setup()
+    drive = FakeDrive(tree)
+    config = {"configurable": {"graph_client": drive, "runtime": runtime}}
+    checks = []
+
+    async def is_disconnected():
+        checks.append(1)
+        return len(checks) > 2
+
+    events = parse(asyncio.run(collect(
+        stream_agent(build_agent_graph(), AgentState(user_query=query, max_attempts=5), config, is_disconnected)
+    )))
+
+    # Stopped after the first decision: no further listings or LLM calls.
+    assert [data["node"] for _, data in events] == ["resolve_start", "list_children"]
+    assert runtime.calls == 1
+    assert drive.calls == 1
+
+
+def test_find_endpoint_streams_sse(monkeypatch):
+    tree, target, runtime, query = setup()
+    monkeypatch.setattr(main, "graph", lambda: FakeDrive(tree))
+    monkeypatch.setattr(main, "_agent_graphs", {"walk": build_agent_graph()})
+    monkeypatch.setattr(agent_runtime, "_default_runtime", runtime)
+
+    with TestClient(main.app) as client:
+        response = client.post("/agent/find", json={"query": query, "max_attempts": 5})
+
+    assert response.headers["content-type"].startswith("text/event-stream")
+    events = parse(f"{block}\n\n" for block in response.text.strip().split("\n\n"))
+    assert events[0][0] == "start" and events[0][1]["thread_id"]
+    assert events[-1][0] == "result" and events[-1][1]["file"]["id"] == target["id"]
+    assert main._active_streams == 0
+
+
+def test_find_endpoint_caps_concurrent_streams(monkeypatch):
+    monkeypatch.setattr(main, "_active_streams", main.settings.AGENT_MAX_STREAMS)
+    with TestClient(main.app) as client:
+        response = client.post("/agent/find", json={"query": "budget"})
+    assert response.status_code == 429
+    assert response.headers["retry-after"]
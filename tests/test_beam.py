@@ -0,0 +1,23 @@
+from benchmarks.synthetic import FakeDrive, ScriptedRuntime, deepest_files, make_tree, noisy_oracle
+from src.agent.beam import BeamState, build_beam_graph
+from src.agent.navigator import AgentState, build_agent_graph
+
+
+def run(graph, state, tree, target):
+    runtime = ScriptedRuntime(noisy_oracle(tree, target, error_rate=1.0))
+    config = {"configurable": {"graph_client": FakeDrive(tree), "runtime": runtime}, "recursion_limit": 50}
+    return graph.invoke(state, config=config)
+
+
+def test_beam_recovers_where_single_path_takes_a_wrong_turn():
+    tree = make_tree(depth=2, branching=4, files_per_folder=3, seed=1)
+    target = deepest_files(tree)[0]
+    query = "find the report for " + target["name"].rsplit(".", 1)[0]
+
+    single = run(build_agent_graph(), AgentState(user_query=query, max_attempts=5), tree, target)
+    assert not single["verified"]
+
+    beam = run(build_beam_graph(), BeamState(user_query=query, beam_width=2, max_depth=3), tree, target)
+    assert beam["verified"]
+    assert beam["current_file"].id == target["id"]
+    assert beam["current_file"].path == tree["paths"][target["id"]]
@@ -0,0 +1,49 @@
+from src.agent.candidates import encode_candidates, estimate_tokens, resolve_alias
+from src.agent.navigator import Candidate
+
+
+def make(i, folder=False):
+    return Candidate(
+        id=f"9509D56FD07A9FEF!s{i:032x}",
+        name=f"folder{i}" if folder else f"report_{i}.pdf",
+        type="folder" if folder else "file",
+        mime_type=None if folder else "application/pdf",
+        parent_reference_path="/Work",
+        size=2048,
+        modified="2025-12-20T03:09:54Z",
+        etag="x" * 200,
+    )
+
+
+def test_compact_table_uses_aliases_and_minimal_fields():
+    table, aliases = encode_candidates([make(1, folder=True), make(2)])
+    assert table.splitlines() == [
+        "ref\ttype\tname\tsize\tmodified",
+        "c1\tD\tfolder1\t\t2025-12-20",
+        "c2\tF\treport_2.pdf\t2K\t2025-12-20",
+    ]
+    assert resolve_alias("c2", aliases) == make(2).id
+    assert resolve_alias(" C1 ", aliases) == make(1, folder=True).id
+    assert resolve_alias("c9", aliases) is None
+
+
+def test_budget_truncates_deterministically_with_summary():
+    candidates = [make(i) for i in range(500)]
+    table, aliases = encode_candidates(candidates, max_tokens=300)
+    assert estimate_tokens(table) <= 300
+    assert table.splitlines()[-1].startswith(f"... {500 - len(aliases)} more items not shown")
+    assert encode_candidates(candidates, max_tokens=300) == (table, aliases)
+
+
+def test_budget_ending_mid_row_never_overflows():
+    candidates = [make(i) for i in range(20)]
+    rows = encode_candidates(candidates, max_tokens=10_000)[0].splitlines()
+    full = sum(estimate_tokens(row) + 1 for row in rows) - 1
+
+    # The budget falls inside the last row: it is summarized, not squeezed in.
+    table, aliases = encode_candidates(candidates, max_tokens=full - 3)
+    assert estimate_tokens(table) <= full - 3
+    assert table.splitlines()[-1].startswith(f"... {20 - len(aliases)} more items not shown")
+    for budget in range(60, full + 1):
+        assert estimate_tokens(encode_candidates(candidates, max_tokens=budget)[0]) <= budget
+    assert len(encode_candidates(candidates, max_tokens=full + 30)[1]) == 20
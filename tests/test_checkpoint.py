@@ -0,0 +1,108 @@
+import pytest
+
+from benchmarks.synthetic import FakeDrive, ScriptedRuntime, deepest_files, make_tree, noisy_oracle
+from src.agent.checkpoint import SqliteCheckpointSaver, make_checkpointer
+from src.agent.navigator import AgentState, build_agent_graph
+
+
+def test_run_resumes_from_last_completed_node_after_restart(tmp_path):
+    db_path = str(tmp_path / "checkpoints.db")
+    tree = make_tree(depth=2, branching=3, files_per_folder=3, seed=4)
+    target = deepest_files(tree)[0]
+    oracle = noisy_oracle(tree, target, error_rate=0.0)
+    query = "find the " + target["name"].rsplit(".", 1)[0].replace("_", " ")
+    calls = []
+
+    def crashing(tool, prompt):
+        calls.append(tool.__name__)
+        if len(calls) == 2:
+            raise RuntimeError("pod restarted")
+        return oracle(tool, prompt)
+
+    drive = FakeDrive(tree)
+    config = {"configurable": {"thread_id": "run-1", "graph_client": drive, "runtime": ScriptedRuntime(crashing)}}
+    with pytest.raises(RuntimeError):
+        build_agent_graph(checkpointer=SqliteCheckpointSaver(db_path)).invoke(AgentState(user_query=query, max_attempts=5), config)
+
+    # A fresh process: new saver on the same file, same thread id, no input.
+    graph = build_agent_graph(checkpointer=SqliteCheckpointSaver(db_path))
+    final = graph.invoke(None, config)
+
+    assert final["verified"]
+    assert final["current_file"].id == target["id"]
+    # The first level's listing and decision were not paid for again
+    # (3 decisions for a depth-2 file, plus the call that crashed).
+    assert calls.count("Decision") == 4
+    baseline = FakeDrive(tree)
+    build_agent_graph().invoke(
+        AgentState(user_query=query, max_attempts=5),
+        {"configurable": {"graph_client": baseline, "runtime": ScriptedRuntime(oracle)}},
+    )
+    assert drive.calls == baseline.calls
+    assert len(list(graph.checkpointer.list({"configurable": {"thread_id": "run-1"}}))) > 5
+
+
+def test_unchanged_channels_are_not_rewritten():
+    saver = make_checkpointer("sqlite://")
+    tree = make_tree(depth=1, branching=2, files_per_folder=2, seed=1)
+    target = deepest_files(tree)[0]
+    config = {"configurable": {
+        "thread_id": "t",
+        "graph_client": FakeDrive(tree),
+        "runtime": ScriptedRuntime(noisy_oracle(tree, target, error_rate=0.0)),
+    }}
+    build_agent_graph(checkpointer=saver).invoke(AgentState(user_query="find " + target["name"]), config)
+
+    checkpoints = saver._conn.execute("SELECT COUNT(*) FROM checkpoints").fetchone()[0]
+    user_query_blobs = saver._conn.execute("SELECT COUNT(*) FROM blobs WHERE channel = 'user_query'").fetchone()[0]
+    assert checkpoints > 3
+    assert user_query_blobs == 1
+
+
+def run_once(saver, thread_id, seed=1):
+    tree = make_tree(depth=1, branching=2, files_per_folder=2, seed=seed)
+    target = deepest_files(tree)[0]
+    config = {"configurable": {
+        "thread_id": thread_id,
+        "graph_client": FakeDrive(tree),
+        "runtime": ScriptedRuntime(noisy_oracle(tree, target, error_rate=0.0)),
+    }}
+    graph = build_agent_graph(checkpointer=saver)
+    return graph, graph.invoke(AgentState(user_query="find " + target["name"]), config)
+
+
+def test_prune_keeps_the_newest_checkpoints_and_their_blobs():
+    saver = SqliteCheckpointSaver()
+    graph, final = run_once(saver, "t1")
+    run_once(saver, "t2")
+    count = lambda table, tid: saver._conn.execute(f"SELECT COUNT(*) FROM {table} WHERE thread_id = ?", (tid,)).fetchone()[0]
+    blobs_before = count("blobs", "t1")
+
+    stats = saver.prune("t1", keep_last=2)
+    assert count("checkpoints", "t1") == 2 and stats["checkpoints"] > 0
+    assert 0 < stats["blobs"] < blobs_before
+    assert count("checkpoints", "t2") > 2
+    # The latest state is still complete after its history went away.
+    state = graph.get_state({"configurable": {"thread_id": "t1"}})
+    assert state.values["current_file"].id == final["current_file"].id
+    assert state.values["user_query"] == final["user_query"]
+
+
+def test_prune_drops_threads_idle_past_the_ttl():
+    now = [1000.0]
+    saver = SqliteCheckpointSaver(clock=lambda: now[0])
+    run_once(saver, "old")
+    now[0] += 3600
+    run_once(saver, "new")
+
+    assert saver.prune(ttl=1800) == {"threads": 1, "checkpoints": 0, "blobs": 0}
+    threads = {r[0] for r in saver._conn.execute("SELECT DISTINCT thread_id FROM checkpoints")}
+    assert threads == {"new"}
+    assert saver._conn.execute("SELECT COUNT(*) FROM blobs WHERE thread_id = 'old'").fetchone()[0] == 0
+
+
+def test_sqlite_urls_must_use_three_slashes(tmp_path):
+    assert isinstance(make_checkpointer(f"sqlite:///{tmp_path}/c.db"), SqliteCheckpointSaver)
+    assert isinstance(make_checkpointer("sqlite://"), SqliteCheckpointSaver)
+    with pytest.raises(ValueError):
+        make_checkpointer("sqlite://file.db")
@@ -0,0 +1,115 @@
+import threading
+
+from fastapi.testclient import TestClient
+
+import src.main as main
+from src.agent.jobs import JobQueue
+from src.utils.conversion_cache import ConversionCache
+
+
+class FakeDriveItems:
+    def __init__(self):
+        self.ctag = "c1"
+        self.downloads = 0
+
+    def get_item(self, item_id):
+        if item_id != "F1":
+            return []
+        item = {"id": "F1", "name": "report.pdf", "eTag": "e1", "file": {"mimeType": "application/pdf"}}
+        if self.ctag is not None:
+            item["cTag"] = self.ctag
+        return item
+
+    def download_file(self, item_id):
+        self.downloads += 1
+        return b"%PDF fake"
+
+
+def setup(monkeypatch, gate=None):
+    drive = FakeDriveItems()
+    calls = []
+
+    def convert(data, name, mime, pages):
+        calls.append(pages)
+        if gate is not None:
+            gate.wait(5)
+        text = f"# {name}\n\n" + "lorem ipsum " * 100
+        return {"name": name, "body": text, "pages": pages}, text
+
+    monkeypatch.setattr(main, "graph", lambda: drive)
+    monkeypatch.setattr(main, "convert_document", convert)
+    monkeypatch.setattr(main, "conversion_cache", ConversionCache())
+    monkeypatch.setattr(main, "conversions_inflight", {})
+    monkeypatch.setattr(main, "conversion_jobs", JobQueue(main.run_conversion_job, workers=1, name="conversion"))
+    return drive, calls
+
+
+def test_markdown_is_converted_once_per_ctag(monkeypatch):
+    drive, calls = setup(monkeypatch)
+    with TestClient(main.app) as client:
+        first = client.get("/drive/items/F1/markdown")
+        preview = client.get("/drive/items/F1/markdown", params={"max_chars": 20})
+        as_json = client.get("/drive/items/F1/json", params={"max_chars": 5})
+        drive.ctag = "c2"
+        changed = client.get("/drive/items/F1/markdown")
+        missing = client.get("/drive/items/nope/markdown")
+
+    assert first.status_code == 200 and first.text.startswith("# report.pdf")
+    assert first.headers["x-truncated"] == "false"
+    assert preview.text == first.text[:20] and preview.headers["x-truncated"] == "true"
+    assert as_json.json()["json"]["body"] == "# rep"
+    assert changed.status_code == 200
+    assert calls == [None, None]
+    assert drive.downloads == 2
+    assert missing.status_code == 404
+    main.conversion_jobs.shutdown()
+
+
+def test_slow_conversion_answers_202_and_can_be_polled(monkeypatch):
+    gate = threading.Event()
+    drive, calls = setup(monkeypatch, gate)
+    with TestClient(main.app) as client:
+        pending = client.get("/drive/items/F1/markdown", params={"pages": 2, "wait": 0.05})
+        again = client.get("/drive/items/F1/json", params={"pages": 2, "wait": 0})
+        assert pending.status_code == 202 and again.status_code == 202
+        assert again.json()["job_id"] == pending.json()["job_id"]
+
+        gate.set()
+        main.conversion_jobs.wait(main.conversion_jobs.get(pending.json()["job_id"]), 5)
+        # Finished jobs leave the in-flight map even if nobody polls them.
+        assert main.conversions_inflight == {}
+        done = client.get(pending.json()["poll"])
+        cached = client.get("/drive/items/F1/json", params={"pages": 2})
+
+    assert done.status_code == 200 and done.text.startswith("# report.pdf")
+    assert cached.json()["json"]["pages"] == 2
+    assert calls == [2]
+    main.conversion_jobs.shutdown()
+
+
+def test_items_without_ctag_fall_back_to_etag(monkeypatch):
+    drive, calls = setup(monkeypatch)
+    drive.ctag = None
+    with TestClient(main.app) as client:
+        first = client.get("/drive/items/F1/markdown")
+        again = client.get("/drive/items/F1/markdown")
+
+    assert first.status_code == again.status_code == 200
+    assert calls == [None] and drive.downloads == 1
+    main.conversion_jobs.shutdown()
+
+
+def test_preview_converts_only_the_leading_pages(monkeypatch):
+    drive, calls = setup(monkeypatch)
+    with TestClient(main.app) as client:
+        preview = client.get("/drive/items/F1/markdown", params={"max_chars": 20})
+        full = client.get("/drive/items/F1/markdown")
+        again = client.get("/drive/items/F1/markdown", params={"max_chars": 5000})
+
+    assert calls == [main.preview_pages(20), None]
+    assert preview.text == full.text[:20]
+    assert preview.headers["x-page-limit"] == str(main.preview_pages(20))
+    assert "x-page-limit" not in full.headers
+    # Once the full conversion is cached, previews are cut from it.
+    assert again.text == full.text and "x-page-limit" not in again.headers
+    main.conversion_jobs.shutdown()
@@ -0,0 +1,96 @@
+from fastapi.testclient import TestClient
+
+import src.main as main
+from src.utils.search_cache import SearchCache
+
+CONTENT = bytes(range(256)) * 1024
+
+
+class FakeUpstream:
+    """Streamed download response honouring a single bytes=a-b Range."""
+    def __init__(self, headers):
+        self.closed = False
+        rng = (headers or {}).get("Range")
+        if rng:
+            start, end = (int(x) for x in rng.split("=")[1].split("-"))
+            self.body = CONTENT[start:end + 1]
+            self.status_code = 206
+            self.headers = {"Content-Range": f"bytes {start}-{end}/{len(CONTENT)}"}
+        else:
+            self.body = CONTENT
+            self.status_code = 200
+            self.headers = {}
+        self.headers.update({"Content-Length": str(len(self.body)), "ETag": '"v1"', "Content-Type": "application/pdf"})
+
+    def iter_content(self, chunk_size):
+        for i in range(0, len(self.body), chunk_size):
+            yield self.body[i:i + chunk_size]
+
+    def close(self):
+        self.closed = True
+
+
+class FakeClient:
+    """GraphClient stand-in; URLs in `expired` answer 403."""
+    def __init__(self, cache):
+        self.cache = cache
+        self.info_calls = 0
+        self.opened = []
+        self.expired = set()
+
+    def get_download_info(self, item_id):
+        def fetch():
+            self.info_calls += 1
+            return {"id": item_id, "name": "report 2024.pdf", "@microsoft.graph.downloadUrl": f"https://dl/{self.info_calls}"}
+        return self.cache.get_or_fetch(("downloadUrl", item_id), fetch)
+
+    def open_download(self, url, headers=None):
+        upstream = FakeUpstream(headers)
+        if url in self.expired:
+            upstream.status_code = 403
+        self.opened.append((url, headers, upstream))
+        return upstream
+
+
+def setup(monkeypatch):
+    cache = SearchCache(ttl=300, negative_ttl=0)
+    fake = FakeClient(cache)
+    monkeypatch.setattr(main, "download_cache", cache)
+    monkeypatch.setattr(main, "graph", lambda: fake)
+    return fake
+
+
+def test_streams_content_and_caches_the_download_url(monkeypatch):
+    fake = setup(monkeypatch)
+    with TestClient(main.app) as client:
+        full = client.get("/drive/items/F1/content")
+        part = client.get("/drive/items/F1/content", headers={"Range": "bytes=100-199", "If-Range": '"v1"'})
+
+    assert full.status_code == 200 and full.content == CONTENT
+    assert full.headers["content-type"] == "application/pdf"
+    assert "report%202024.pdf" in full.headers["content-disposition"]
+    assert part.status_code == 206 and part.content == CONTENT[100:200]
+    assert part.headers["content-range"] == f"bytes 100-199/{len(CONTENT)}"
+    assert fake.opened[1][1] == {"Range": "bytes=100-199", "If-Range": '"v1"'}
+    assert fake.info_calls == 1
+    assert all(upstream.closed for _, _, upstream in fake.opened)
+
+
+def test_expired_url_is_refreshed_once(monkeypatch):
+    fake = setup(monkeypatch)
+    fake.expired.add("https://dl/1")
+    with TestClient(main.app) as client:
+        response = client.get("/drive/items/F1/content")
+
+    assert response.status_code == 200 and response.content == CONTENT
+    assert [url for url, _, _ in fake.opened] == ["https://dl/1", "https://dl/2"]
+
+
+def test_redirect_mode(monkeypatch):
+    fake = setup(monkeypatch)
+    with TestClient(main.app) as client:
+        response = client.get("/drive/items/F1/content", params={"redirect": True}, follow_redirects=False)
+
+    assert response.status_code == 302
+    assert response.headers["location"] == "https://dl/1"
+    assert fake.opened == []
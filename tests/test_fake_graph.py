@@ -0,0 +1,80 @@
+import os
+
+import pytest
+import requests
+
+from benchmarks.fake_graph import Faults, FakeGraph, fake_graph_server, tree_from_fixture
+from benchmarks.synthetic import make_tree
+from src.clients.graphAPIBetaSearch import SearchClient
+from src.clients.oneDriveHelper import UPLOAD_CHUNK_ALIGN, GraphClient, UploadSession
+
+
+@pytest.fixture(scope="module")
+def fake():
+    with fake_graph_server(make_tree(depth=2, branching=3, files_per_folder=250, seed=2)) as fake:
+        yield fake
+
+
+def test_graph_client_pages_selects_and_downloads_against_the_fake(fake):
+    client = GraphClient("token", base_url=fake.base_url)
+    folder = next(i for i in client.list_root() if "folder" in i)
+    pages = list(client.iter_children(folder["id"], select=["id", "name"], page_size=100))
+
+    assert [len(p) for p in pages] == [100, 100, 53]
+    assert set(pages[0][0]) == {"id", "name"}
+    assert client.get_folder_id_by_path(fake.paths[folder["id"]]) == folder["id"]
+
+    file = next(i for p in pages for i in p if i["name"].rsplit(".", 1)[-1] in ("pdf", "docx", "txt"))
+    whole = client.download_file(file["id"])
+    assert len(whole) == fake.items[file["id"]]["size"]
+    assert client.download_prefix(file["id"], 1000) == whole[:1000]
+
+
+def test_uploads_and_delta_see_each_others_changes(fake):
+    client = GraphClient("token", base_url=fake.base_url)
+    _, link = client.delta(latest=True)
+    data = os.urandom(2 * UPLOAD_CHUNK_ALIGN + 7)
+    session = UploadSession(client, client.create_upload_session("/bench/out.bin"), len(data), UPLOAD_CHUNK_ALIGN)
+    session.feed(data)
+    item = session.flush(final=True)
+
+    changed, link = client.delta(link)
+    assert item["size"] == len(data)
+    assert [i["id"] for i in changed] == [item["id"]]
+    assert client.delete_item(item["id"])
+    changed, _ = client.delta(link)
+    assert changed[0]["deleted"] == {"state": "deleted"}
+
+
+def test_batch_and_beta_search(fake):
+    folder_id = fake.children["root"][0]
+    batch = requests.post(f"{fake.base_url}/v1.0/$batch", json={"requests": [
+        {"id": "1", "method": "GET", "url": f"/me/drive/items/{folder_id}"},
+        {"id": "2", "method": "GET", "url": "/me/drive/items/missing"},
+    ]}).json()
+    assert [(r["id"], r["status"]) for r in batch["responses"]] == [("1", 200), ("2", 404)]
+
+    word = fake.items[folder_id]["name"].split("-")[0]
+    search = SearchClient("token", url=f"{fake.base_url}/beta/search/query")
+    response = search.search(word, size=10)
+    container = response["hitsContainers"][0]
+    assert len(container["hits"]) == 10 and container["moreResultsAvailable"]
+
+
+def test_injected_throttling_and_failures():
+    tree = make_tree(depth=1, branching=2, files_per_folder=2)
+    with fake_graph_server(tree, Faults(throttle_rate=1.0, retry_after=7)) as fake:
+        resp = requests.get(f"{fake.base_url}/v1.0/me/drive/root/children")
+        assert resp.status_code == 429 and resp.headers["Retry-After"] == "7"
+        assert GraphClient("token", base_url=fake.base_url, max_retries=0).list_root() == []
+        fake.faults.throttle_rate, fake.faults.failure_rate = 0.0, 1.0
+        assert requests.get(f"{fake.base_url}/v1.0/me/drive").status_code == 503
+        assert fake.stats["throttled"] == 2 and fake.stats["failed"] == 1
+
+
+def test_fixture_seeding_rebuilds_the_folder_path():
+    fake = FakeGraph(tree_from_fixture())
+    status, _, folder = fake.handle("GET", "/v1.0/me/drive/root:/01 Resume/others", {})
+    assert status == 200 and "folder" in folder
+    status, _, page = fake.handle("GET", f"/v1.0/me/drive/items/{folder['id']}/children", {})
+    assert "AKASH_MUKHERJEE_act_resume.pdf" in [i["name"] for i in page["value"]]
@@ -0,0 +1,78 @@
+import pytest
+from src.clients import graphAPIBetaSearch
+from src.clients.graphAPIBetaSearch import SearchClient, GraphSearchError, search_drive_items
+
+
+class FakeResponse:
+    def __init__(self, status_code, payload):
+        self.status_code = status_code
+        self._payload = payload
+        self.text = str(payload)
+
+    def json(self):
+        return self._payload
+
+
+class FakeSession:
+    """Serves `total` fake hits in pages, honouring from/size."""
+    def __init__(self, total=0, status_code=200):
+        self.total = total
+        self.status_code = status_code
+        self.bodies = []
+
+    def post(self, url, headers=None, json=None, timeout=None):
+        self.bodies.append(json)
+        responses = []
+        for req in json["requests"]:
+            start, size = req["from"], req["size"]
+            hits = [{"hitId": str(i)} for i in range(start, min(start + size, self.total))]
+            responses.append({"hitsContainers": [{
+                "hits": hits,
+                "total": self.total,
+                "moreResultsAvailable": start + size < self.total,
+            }]})
+        return FakeResponse(self.status_code, {"value": responses})
+
+
+def test_iter_hits_walks_all_pages():
+    session = FakeSession(total=7)
+    client = SearchClient("token", session=session)
+    hits = list(client.iter_hits("report", page_size=3))
+    assert [h["hitId"] for h in hits] == [str(i) for i in range(7)]
+    assert [b["requests"][0]["from"] for b in session.bodies] == [0, 3, 6]
+
+
+def test_iter_hits_respects_max_results():
+    client = SearchClient("token", session=FakeSession(total=100))
+    assert len(list(client.iter_hits("report", page_size=10, max_results=15))) == 15
+
+
+def test_search_many_uses_one_round_trip():
+    session = FakeSession(total=2)
+    client = SearchClient("token", session=session)
+    results = client.search_many([
+        {"query_string": "a", "query_template": "filename:{searchTerms}"},
+        {"query_string": "a", "query_template": "content:{searchTerms}"},
+    ])
+    assert len(session.bodies) == 1
+    assert len(results) == 2 and len(results[0]) == 2
+
+
+def test_error_status_raises_graph_search_error():
+    client = SearchClient("token", session=FakeSession(status_code=429))
+    with pytest.raises(GraphSearchError) as exc:
+        client.search("report")
+    assert exc.value.status_code == 429
+
+
+def test_search_drive_items_returns_the_whole_response(monkeypatch):
+    class Annotated(FakeSession):
+        def post(self, *args, **kwargs):
+            resp = super().post(*args, **kwargs)
+            resp._payload["@odata.context"] = "https://graph.microsoft.com/beta/$metadata"
+            return resp
+
+    monkeypatch.setattr(graphAPIBetaSearch, "_shared_session", Annotated(total=2))
+    body = search_drive_items("token", "report")
+    assert body["@odata.context"].endswith("$metadata")
+    assert len(body["value"][0]["hitsContainers"][0]["hits"]) == 2
@@ -0,0 +1,44 @@
+import time
+from src.index.hybrid import HybridRetriever, reciprocal_rank_fusion
+
+
+def test_rrf_dedups_by_id_and_rewards_agreement():
+    fused = reciprocal_rank_fusion({
+        "graph": [{"hitId": "a", "resource": {"id": "a", "name": "a.pdf"}}, {"resource": {"id": "b"}}],
+        "lexical": [{"id": "b", "name": "b.txt", "path": "/x/b.txt"}, {"id": "c", "name": "c.txt"}],
+    })
+    assert [f["id"] for f in fused] == ["b", "a", "c"]
+    assert fused[0]["sources"] == {"graph": 2, "lexical": 1}
+    assert fused[0]["name"] == "b.txt"
+
+
+class SlowSource:
+    def __init__(self, hits, delay, fail=False):
+        self.hits, self.delay, self.fail = hits, delay, fail
+
+    def _run(self):
+        time.sleep(self.delay)
+        if self.fail:
+            raise RuntimeError("boom")
+        return self.hits
+
+    def search_local(self, query, top_k):
+        return self._run()
+
+    def semantic_search(self, query, k):
+        return self._run()
+
+    def search(self, query, **kwargs):
+        return {"hitsContainers": [{"hits": self._run()}]}
+
+
+def test_retrieve_runs_sources_concurrently_and_tolerates_failures():
+    retriever = HybridRetriever(
+        search_client=SlowSource([{"resource": {"id": "g"}}], 0.2),
+        local_index=SlowSource([{"id": "l"}], 0.2),
+        vector_index=SlowSource([], 0.2, fail=True),
+    )
+    start = time.perf_counter()
+    results = retriever.retrieve("query")
+    assert time.perf_counter() - start < 0.35
+    assert {r["id"] for r in results} == {"g", "l"}
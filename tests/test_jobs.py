@@ -0,0 +1,154 @@
+import threading
+import time
+
+import pytest
+from fastapi.testclient import TestClient
+
+import src.main as main
+from benchmarks.synthetic import FakeDrive, ScriptedRuntime, deepest_files, make_tree, noisy_oracle
+from src.agent import runtime as agent_runtime
+from src.agent.checkpoint import SqliteCheckpointSaver
+from src.agent.jobs import JobQueue, QueueFull
+from src.agent.navigator import build_agent_graph
+
+
+class GatedRunner:
+    """Fake agent run that blocks until released and records start order."""
+    def __init__(self):
+        self.gate = threading.Event()
+        self.started = []
+        self._lock = threading.Lock()
+
+    def __call__(self, job):
+        with self._lock:
+            self.started.append(job.payload)
+        self.gate.wait(5)
+        if job.payload == "boom":
+            raise RuntimeError("agent failed")
+        return {"payload": job.payload}
+
+
+def wait_for(predicate, timeout=5.0):
+    deadline = time.time() + timeout
+    while not predicate():
+        assert time.time() < deadline, "timed out"
+        time.sleep(0.005)
+
+
+def test_higher_priority_runs_first():
+    runner = GatedRunner()
+    queue = JobQueue(runner, workers=1, max_queued=10, per_user=5)
+    first = queue.submit("alice", "a1")
+    wait_for(lambda: runner.started == ["a1"])
+    queue.submit("alice", "a2", priority=5)
+    queue.submit("bob", "b1")
+    queue.submit("bob", "b2", priority=9)
+    assert queue.metrics()["queued"] == 3
+
+    runner.gate.set()
+    wait_for(lambda: queue.metrics()["completed"] == 4)
+    assert runner.started == ["a1", "b2", "a2", "b1"]
+    assert first.status == "done" and first.result == {"payload": "a1"}
+    assert queue.metrics()["wait_p95_s"] is not None
+    queue.shutdown()
+
+
+def test_per_user_cap_leaves_workers_for_other_users():
+    runner = GatedRunner()
+    queue = JobQueue(runner, workers=2, max_queued=10, per_user=1)
+    queue.submit("alice", "a1")
+    wait_for(lambda: runner.started == ["a1"])
+    queue.submit("alice", "a2", priority=5)
+    time.sleep(0.05)
+    assert runner.started == ["a1"]
+
+    queue.submit("bob", "b1")
+    wait_for(lambda: runner.started == ["a1", "b1"])
+    assert queue.metrics()["running"] == 2 and queue.metrics()["queued"] == 1
+    runner.gate.set()
+    wait_for(lambda: queue.metrics()["completed"] == 3)
+    queue.shutdown()
+
+
+def test_full_queue_rejects_with_retry_after():
+    runner = GatedRunner()
+    queue = JobQueue(runner, workers=1, max_queued=2, per_user=5)
+    queue.submit("u", "running")
+    wait_for(lambda: runner.started)
+    queued = [queue.submit("u", n) for n in ("q1", "q2")]
+    assert queue.position(queued[1]) == 1
+
+    with pytest.raises(QueueFull) as e:
+        queue.submit("u", "q3")
+    assert e.value.retry_after >= 1
+    assert queue.metrics()["rejected"] == 1
+
+    assert queue.cancel(queued[0].id)
+    assert queued[0].status == "cancelled"
+    queue.submit("u", "boom")
+    runner.gate.set()
+    wait_for(lambda: queue.metrics()["completed"] + queue.metrics()["failed"] == 3)
+    assert queue.metrics()["failed"] == 1
+    queue.shutdown()
+
+
+def test_job_endpoints_run_the_agent(monkeypatch):
+    tree = make_tree(depth=3, branching=4, files_per_folder=5, seed=4)
+    target = deepest_files(tree)[0]
+    query = "find the " + target["name"].rsplit(".", 1)[0].replace("_", " ")
+    monkeypatch.setattr(main, "graph", lambda: FakeDrive(tree))
+    monkeypatch.setattr(main, "_agent_graphs", {"walk": build_agent_graph()})
+    monkeypatch.setattr(agent_runtime, "_default_runtime", ScriptedRuntime(noisy_oracle(tree, target, 0.0)))
+    monkeypatch.setattr(main, "agent_jobs", JobQueue(main.run_agent_job, workers=1, max_queued=1, per_user=1))
+
+    with TestClient(main.app) as client:
+        submitted = client.post("/agent/jobs", json={"query": query, "max_attempts": 5}, headers={"X-User-Id": "alice"})
+        assert submitted.status_code == 202
+        job_id = submitted.json()["job_id"]
+        wait_for(lambda: client.get(f"/agent/jobs/{job_id}").json()["status"] == "done")
+
+        result = client.get(f"/agent/jobs/{job_id}/result").json()
+        assert result["user"] == "alice"
+        assert result["result"]["file"]["id"] == target["id"]
+        assert client.get("/agent/queue").json()["completed"] == 1
+        assert client.get("/agent/jobs/missing").status_code == 404
+
+        anonymous = client.post("/agent/jobs", json={"query": query, "max_attempts": 5})
+        assert anonymous.json()["user"] == "ip:testclient"
+    main.agent_jobs.shutdown()
+
+
+def test_interrupted_job_resumes_from_its_checkpoint(monkeypatch):
+    tree = make_tree(depth=3, branching=4, files_per_folder=5, seed=4)
+    target = deepest_files(tree)[0]
+    query = "find the " + target["name"].rsplit(".", 1)[0].replace("_", " ")
+    oracle = noisy_oracle(tree, target, 0.0)
+    calls = []
+
+    def crashing(tool, prompt):
+        calls.append(tool.__name__)
+        if len(calls) == 2:
+            raise RuntimeError("pod restarted")
+        return oracle(tool, prompt)
+
+    monkeypatch.setattr(main, "graph", lambda: FakeDrive(tree))
+    monkeypatch.setattr(main, "_agent_graphs", {"walk": build_agent_graph(checkpointer=SqliteCheckpointSaver())})
+    monkeypatch.setattr(agent_runtime, "_default_runtime", ScriptedRuntime(crashing))
+    monkeypatch.setattr(main, "agent_jobs", JobQueue(main.run_agent_job, workers=1, max_queued=2, per_user=2))
+
+    with TestClient(main.app) as client:
+        missing = client.post("/agent/jobs", json={"query": query, "thread_id": "nope", "resume": True})
+        assert missing.status_code == 404
+
+        body = {"query": query, "max_attempts": 5, "thread_id": "run-1"}
+        first = client.post("/agent/jobs", json=body).json()["job_id"]
+        wait_for(lambda: client.get(f"/agent/jobs/{first}").json()["status"] == "failed")
+
+        again = client.post("/agent/jobs", json={**body, "resume": True}).json()["job_id"]
+        wait_for(lambda: client.get(f"/agent/jobs/{again}").json()["status"] == "done")
+        result = client.get(f"/agent/jobs/{again}/result").json()
+        assert result["result"]["file"]["id"] == target["id"]
+    # The first level's decision came from the checkpoint, not a second LLM call
+    # (4 decisions for a depth-3 file, plus the call that crashed).
+    assert calls.count("Decision") == 5
+    main.agent_jobs.shutdown()
@@ -0,0 +1,104 @@
+import json
+
+import pytest
+import requests
+from fastapi.testclient import TestClient
+
+import src.main as main
+from src.clients.oneDriveHelper import GraphClient, GraphListingError
+
+
+class FakeResponse:
+    def __init__(self, status_code, payload, headers=None):
+        self.status_code = status_code
+        self._payload = payload
+        self.headers = headers or {}
+
+    def raise_for_status(self):
+        if self.status_code >= 400:
+            raise requests.HTTPError(f"{self.status_code}", response=self)
+
+    def json(self):
+        return self._payload
+
+
+class PagedSession:
+    """Serves `total` children in pages of `page_size`; page `fail_at` returns `fail_status` `failures` times."""
+    def __init__(self, total, page_size=3, fail_at=None, failures=10**6, fail_status=503):
+        self.total = total
+        self.page_size = page_size
+        self.fail_at = fail_at
+        self.failures = failures
+        self.fail_status = fail_status
+        self.calls = []
+
+    def get(self, url, params=None, timeout=None):
+        self.calls.append((url, params))
+        page = int(url.rsplit("page=", 1)[1]) if "page=" in url else 0
+        if page == self.fail_at and self.failures > 0:
+            self.failures -= 1
+            return FakeResponse(self.fail_status, {}, {"Retry-After": "0"})
+        start = page * self.page_size
+        payload = {"value": [{"id": str(i), "name": f"f{i}", "size": i} for i in range(start, min(start + self.page_size, self.total))]}
+        if start + self.page_size < self.total:
+            payload["@odata.nextLink"] = f"https://graph/next?$select=id&page={page + 1}"
+        return FakeResponse(200, payload)
+
+
+def client_with(session, **kwargs):
+    client = GraphClient("token", **kwargs)
+    client.session = session
+    return client
+
+
+def test_iter_children_follows_next_links_and_forwards_select():
+    session = PagedSession(total=7)
+    pages = list(client_with(session).iter_children("F1", select=["id", "name"], page_size=3))
+
+    assert [len(p) for p in pages] == [3, 3, 1]
+    assert session.calls[0] == ("https://graph.microsoft.com/v1.0/me/drive/items/F1/children", {"$select": "id,name", "$top": 3})
+    assert all(params is None for _, params in session.calls[1:])
+
+
+def test_list_folder_returns_every_page_or_nothing():
+    assert len(client_with(PagedSession(total=7)).list_folder("F1")) == 7
+    assert client_with(PagedSession(total=7, fail_at=1)).list_root() == []
+
+
+def test_throttled_pages_are_retried_and_hard_failures_raise():
+    session = PagedSession(total=7, fail_at=1, failures=2, fail_status=429)
+    assert len(client_with(session).list_folder("F1")) == 7
+    assert len(session.calls) == 5
+
+    session = PagedSession(total=7, fail_at=1, fail_status=404)
+    pages = client_with(session).iter_children("F1")
+    assert len(next(pages)) == 3
+    with pytest.raises(GraphListingError) as info:
+        next(pages)
+    assert info.value.pages_read == 1 and len(session.calls) == 2
+
+
+def test_stream_endpoint_writes_ndjson(monkeypatch):
+    session = PagedSession(total=8)
+    monkeypatch.setattr(main, "graph", lambda: client_with(session))
+
+    with TestClient(main.app) as client:
+        response = client.get("/drive/folder/F1/stream", params={"select": "id, name", "top": 3})
+
+    assert response.headers["content-type"] == "application/x-ndjson"
+    items = [json.loads(line) for line in response.text.splitlines()]
+    assert [i["id"] for i in items] == [str(i) for i in range(8)]
+    assert session.calls[0][1] == {"$select": "id,name", "$top": 3}
+
+
+def test_stream_endpoint_reports_failures(monkeypatch):
+    sessions = iter([PagedSession(total=8, fail_at=0, fail_status=404), PagedSession(total=8, fail_at=1)])
+    monkeypatch.setattr(main, "graph", lambda: client_with(next(sessions), max_retries=0))
+
+    with TestClient(main.app) as client:
+        assert client.get("/drive/folder/missing/stream").status_code == 404
+        response = client.get("/drive/folder/F1/stream", params={"top": 3})
+
+    lines = [json.loads(line) for line in response.text.splitlines()]
+    assert response.status_code == 200 and len(lines) == 4
+    assert "failed after 1 page" in lines[-1]["error"]
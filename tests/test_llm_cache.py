@@ -0,0 +1,45 @@
+from benchmarks.stub_openai import StubOpenAIServer
+from src.agent.llm_cache import LLMCache, cache_key
+from src.agent.navigator import Decision, FileRelevance
+from src.agent.runtime import AgentRuntime
+
+
+def test_key_ignores_whitespace_but_not_model_or_tool():
+    key = cache_key("gpt", FileRelevance, "query:\n  budget  2024\n")
+    assert key == cache_key("gpt", FileRelevance, "query: budget 2024")
+    assert key != cache_key("gpt-other", FileRelevance, "query: budget 2024")
+    assert key != cache_key("gpt", Decision, "query: budget 2024")
+
+
+def test_ttl_and_size_cap():
+    now = [1000.0]
+    cache = LLMCache(ttl=60, max_entries=10, clock=lambda: now[0])
+    value = FileRelevance(score=1.0, reason="ok", is_match=True)
+
+    cache.put("a", value)
+    assert cache.get("a", FileRelevance) == value
+    now[0] += 61
+    assert cache.get("a", FileRelevance) is None
+
+    for i in range(25):
+        now[0] += 1
+        cache.put(f"k{i}", value)
+    assert len(cache) <= 10
+    assert cache.get("k24", FileRelevance) == value
+    assert cache.get("k0", FileRelevance) is None
+
+
+def test_runtime_extractor_serves_repeats_from_cache(tmp_path):
+    cache = LLMCache(str(tmp_path / "llm.db"))
+    with StubOpenAIServer() as stub:
+        runtime = AgentRuntime(model="stub", api_key="stub", base_url=stub.base_url, cache=cache)
+        first = runtime.extractor(FileRelevance).invoke(input="Is budget.xlsx about the budget?")
+        second = runtime.extractor(FileRelevance).invoke(input="Is budget.xlsx   about the budget?")
+        runtime.close()
+
+    assert stub.requests == 1
+    assert isinstance(second["responses"][0], FileRelevance)
+    assert second["responses"][0] == first["responses"][0]
+    # Entries survive a restart.
+    reopened = LLMCache(str(tmp_path / "llm.db"))
+    assert len(reopened) == 1
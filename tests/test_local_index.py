@@ -0,0 +1,137 @@
+from src.index.lexical import LocalIndex, item_path
+
+
+def make_item(item_id, name, folder, mime="text/plain", ctag="c1"):
+    return {
+        "id": item_id,
+        "name": name,
+        "cTag": ctag,
+        "file": {"mimeType": mime},
+        "parentReference": {"path": f"/drive/root:{folder}"},
+    }
+
+
+def test_item_path_unquotes_parent():
+    item = make_item("1", "cv.pdf", "/01%20Resume/others")
+    assert item_path(item) == "/01 Resume/others/cv.pdf"
+
+
+def test_search_local_ranks_and_filters():
+    index = LocalIndex()
+    index.upsert(make_item("1", "resume.pdf", "/Work", "application/pdf"), "Smruti resume, data engineer")
+    index.upsert(make_item("2", "notes.txt", "/Personal"), "shopping list; mentions a resume once")
+    index.upsert(make_item("3", "budget.xlsx", "/Work", "application/vnd.ms-excel"), "numbers")
+
+    results = index.search_local("resume", top_k=5)
+    assert [r["id"] for r in results] == ["1", "2"]
+    assert [r["id"] for r in index.search_local("resume", path_prefix="/Personal")] == ["2"]
+    assert [r["id"] for r in index.search_local("resume", mime_type="application/")] == ["1"]
+    assert index.search_local('"; DROP TABLE docs; --') == []
+
+
+def test_upsert_replaces_and_tracks_versions():
+    index = LocalIndex()
+    item = make_item("1", "a.txt", "/", ctag="c1")
+    index.upsert(item, "old words")
+    assert not index.needs_update(item)
+    assert index.needs_update({**item, "cTag": "c2"})
+
+    index.upsert({**item, "cTag": "c2"}, "new words")
+    assert index.count() == 1
+    assert index.search_local("old") == []
+    assert index.get_content("1", "c2") == "new words"
+    assert index.get_content("1", "c1") is None
+
+
+class FakeGraph:
+    def __init__(self, pages):
+        self.pages = pages
+        self.downloads = []
+
+    def delta(self, delta_link=None, latest=False):
+        return self.pages.pop(0)
+
+    def download_file(self, item_id):
+        self.downloads.append(item_id)
+        return b"body of " + item_id.encode()
+
+
+def test_sync_is_incremental():
+    a, b = make_item("a", "a.txt", "/"), make_item("b", "b.txt", "/")
+    graph = FakeGraph([
+        ([a, b], "link-1"),
+        ([a, {"id": "b", "deleted": {}}], "link-2"),
+    ])
+    convert = lambda data, name, mime: ({}, data.decode())
+    index = LocalIndex()
+
+    assert index.sync(graph, convert=convert) == {"indexed": 2, "renamed": 0, "removed": 0, "skipped": 0}
+    assert index.sync(graph, convert=convert) == {"indexed": 0, "renamed": 0, "removed": 1, "skipped": 1}
+    assert graph.downloads == ["a", "b"]
+    assert [r["id"] for r in index.search_local("body")] == ["a"]
+
+
+def test_sync_applies_renames_and_moves_without_downloading():
+    a = make_item("a", "old.txt", "/Inbox")
+    graph = FakeGraph([
+        ([a], "link-1"),
+        ([{**a, "name": "budget.txt"}], "link-2"),
+        ([{**a, "name": "budget.txt", "parentReference": {"path": "/drive/root:/Finance"}}], "link-3"),
+    ])
+    convert = lambda data, name, mime: ({}, data.decode())
+    index = LocalIndex()
+    index.sync(graph, convert=convert)
+
+    assert index.sync(graph, convert=convert)["renamed"] == 1
+    assert [r["id"] for r in index.search_local("budget")] == ["a"]
+    assert index.search_local("old") == []
+    assert index.sync(graph, convert=convert)["renamed"] == 1
+    assert [r["path"] for r in index.search_local("budget", path_prefix="/Finance")] == ["/Finance/budget.txt"]
+    assert graph.downloads == ["a"]
+    assert index.get_content("a") == "body of a"
+
+
+def test_delta_paths_come_from_parent_ids_and_follow_folder_moves():
+    # Graph delta items carry parentReference.id but no parentReference.path.
+    root = {"id": "R", "root": {}, "folder": {}}
+    work = {"id": "W", "name": "Work", "folder": {}, "parentReference": {"id": "R"}}
+    plans = {"id": "P", "name": "Plans", "folder": {}, "parentReference": {"id": "W"}}
+    doc = {"id": "d", "name": "roadmap.txt", "cTag": "c1", "file": {}, "parentReference": {"id": "P"}}
+    graph = FakeGraph([
+        ([doc, plans, work, root], "link-1"),
+        ([{**work, "name": "Archive"}], "link-2"),
+    ])
+    convert = lambda data, name, mime: ({}, data.decode())
+    index = LocalIndex()
+
+    index.sync(graph, convert=convert)
+    assert [r["path"] for r in index.search_local("roadmap", path_prefix="/Work/Plans")] == ["/Work/Plans/roadmap.txt"]
+
+    assert index.sync(graph, convert=convert)["renamed"] == 1
+    assert index.search_local("roadmap", path_prefix="/Work") == []
+    assert [r["path"] for r in index.search_local("roadmap", path_prefix="/Archive")] == ["/Archive/Plans/roadmap.txt"]
+    assert index.path_of({"name": "new.txt", "parentReference": {"id": "P"}}) == "/Archive/Plans/new.txt"
+    assert graph.downloads == ["d"]
+
+
+def test_sync_endpoint_runs_in_the_background(monkeypatch):
+    from fastapi.testclient import TestClient
+
+    import src.main as main
+    from src.agent.jobs import JobQueue
+
+    graph = FakeGraph([([make_item("a", "a.txt", "/")], "link-1")])
+    index = LocalIndex()
+    monkeypatch.setattr(main, "graph", lambda: graph)
+    monkeypatch.setattr(main, "local_index", lambda: index)
+    monkeypatch.setattr(main, "index_jobs", JobQueue(lambda job: index.sync(job.payload, convert=lambda d, n, m: ({}, "")),
+                                                     workers=1, max_queued=1, per_user=1, name="index_sync"))
+    monkeypatch.setattr(main, "_index_sync_job", None)
+    with TestClient(main.app) as client:
+        started = client.post("/drive/index/sync")
+        assert started.status_code == 202
+        main.index_jobs.wait(main.index_jobs.get(started.json()["job_id"]), 5)
+        status = client.get(started.json()["poll"]).json()
+
+    assert status["status"] == "done" and status["result"]["indexed"] == 1
+    main.index_jobs.shutdown()
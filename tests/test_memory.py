@@ -0,0 +1,127 @@
+from benchmarks.synthetic import FakeDrive, ScriptedRuntime, deepest_files, make_tree, noisy_oracle
+from src.agent import memory
+from src.agent.navigator import AgentState, build_agent_graph
+from src.agent.store import SqliteStore
+
+
+def run(store, tree, target, query):
+    drive = FakeDrive(tree)
+    runtime = ScriptedRuntime(noisy_oracle(tree, target, error_rate=0.0))
+    final = build_agent_graph(store=store).invoke(
+        AgentState(user_query=query, max_attempts=5),
+        config={"configurable": {"graph_client": drive, "runtime": runtime}},
+    )
+    return final, drive, runtime
+
+
+def test_repeat_query_needs_no_navigation(tmp_path):
+    tree = make_tree(depth=2, branching=3, files_per_folder=3, seed=4)
+    target = deepest_files(tree)[0]
+    query = "find the " + target["name"].rsplit(".", 1)[0].replace("_", " ")
+
+    first, _, _ = run(SqliteStore(str(tmp_path / "store.db")), tree, target, query)
+    assert first["verified"] and first["decision_trace"]
+
+    # New process, same store file; word order and stopwords do not matter.
+    words = target["name"].rsplit(".", 1)[0].split("_")
+    again, drive, runtime = run(SqliteStore(str(tmp_path / "store.db")), tree, target, " ".join(reversed(words)))
+    assert again["verified"]
+    assert again["current_file"].id == target["id"]
+    assert again["recalled"] == "file"
+    assert again["decision_trace"] == []
+    assert runtime.calls == 1  # relevance check only
+    assert drive.calls == 2  # eTag check + content prefix
+
+
+def test_changed_etag_invalidates_the_outcome_but_keeps_the_folder_hint():
+    tree = make_tree(depth=2, branching=3, files_per_folder=3, seed=4)
+    target = deepest_files(tree)[0]
+    query = "find the " + target["name"].rsplit(".", 1)[0].replace("_", " ")
+    store = SqliteStore()
+    run(store, tree, target, query)
+
+    target["eTag"] = '"{changed},2"'
+    final, _, _ = run(store, tree, target, query)
+    assert final["verified"]
+    assert final["recalled"] == "folder"
+    assert len(final["decision_trace"]) == 1
+    assert store.get(memory.OUTCOMES, memory.query_key(query)).value["etag"] == '"{changed},2"'
+
+
+def test_folder_hint_for_similar_query():
+    tree = make_tree(depth=2, branching=3, files_per_folder=3, seed=4)
+    target = deepest_files(tree)[0]
+    folder_id = next(fid for fid, children in tree["items"].items() if target in children)
+    store = SqliteStore()
+    memory.remember(store, "quarterly budget receipts", target["id"], target["name"],
+                    tree["paths"][target["id"]], target["eTag"], folder_id)
+
+    hint = memory.recall(store, "budget receipts for march", FakeDrive(tree))
+    assert hint["kind"] == "folder"
+    assert hint["folder_id"] == folder_id
+    assert memory.recall(store, "holiday photos", FakeDrive(tree)) is None
+
+
+def test_sqlite_store_api():
+    store = SqliteStore()
+    store.put(("a", "b"), "k1", {"kind": "x", "n": 1})
+    store.put(("a", "c"), "k2", {"kind": "y", "n": 5})
+    store.put(("a", "b"), "gone", {"kind": "x"}, ttl=-1)
+
+    assert store.get(("a", "b"), "k1").value == {"kind": "x", "n": 1}
+    assert store.get(("a", "b"), "gone") is None
+    assert [i.key for i in store.search(("a",), filter={"n": {"$gte": 2}})] == ["k2"]
+    assert sorted(store.list_namespaces(prefix=("a",))) == [("a", "b"), ("a", "c")]
+    store.delete(("a", "b"), "k1")
+    assert store.get(("a", "b"), "k1") is None
+
+
+def test_remembered_file_that_fails_verification_falls_back_to_a_walk():
+    tree = make_tree(depth=2, branching=3, files_per_folder=3, seed=4)
+    target, wrong = deepest_files(tree)[:2]
+    query = "find the " + target["name"].rsplit(".", 1)[0].replace("_", " ")
+    store = SqliteStore()
+    memory.remember(store, query, wrong["id"], wrong["name"], tree["paths"][wrong["id"]], wrong["eTag"], "root")
+
+    final, _, _ = run(store, tree, target, query)
+    assert final["verified"]
+    assert final["current_file"].id == target["id"]
+    assert final["recalled"] == "stale"
+    assert final["rejected_paths"][0].file_name == wrong["name"]
+    assert store.get(memory.OUTCOMES, memory.query_key(query)).value["item_id"] == target["id"]
+
+
+def test_wrong_folder_hint_falls_back_to_a_walk_and_is_demoted():
+    tree = make_tree(depth=2, branching=3, files_per_folder=3, seed=4)
+    target = deepest_files(tree)[0]
+    wrong = next(f for f in deepest_files(tree) if tree["paths"][f["id"]].rsplit("/", 1)[0]
+                 != tree["paths"][target["id"]].rsplit("/", 1)[0])
+    wrong_folder = next(fid for fid, children in tree["items"].items() if wrong in children)
+    query = "find the " + target["name"].rsplit(".", 1)[0].replace("_", " ")
+    store = SqliteStore()
+    memory.remember(store, query + " draft", wrong["id"], wrong["name"],
+                    tree["paths"][wrong["id"]], wrong["eTag"], wrong_folder)
+
+    final, _, _ = run(store, tree, target, query)
+    assert final["verified"]
+    assert final["current_file"].id == target["id"]
+    assert final["recalled"] == "stale"
+    hint = store.get(memory.FOLDER_HINTS, wrong_folder)
+    assert hint is None or not set(memory.query_terms(query)) & set(hint.value["terms"])
+
+
+def test_folder_hint_words_decay():
+    store = SqliteStore()
+    memory.remember(store, "budget receipts", "f0", "r.pdf", "/Finance/r.pdf", None, "fin")
+    for i in range(12):
+        memory.remember(store, f"invoice batch{i}", f"f{i + 1}", "i.pdf", "/Finance/i.pdf", None, "fin")
+
+    hint = store.get(memory.FOLDER_HINTS, "fin").value
+    assert "budget" not in hint["terms"]
+    assert "invoice" in hint["terms"]
+    assert len(hint["terms"]) <= memory.HINT_MAX_TERMS
+
+
+def test_query_key_keeps_negations():
+    assert memory.query_key("reports not in archive") != memory.query_key("reports in archive")
+    assert memory.query_key("the reports in archive") == memory.query_key("archive reports")
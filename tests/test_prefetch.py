@@ -0,0 +1,49 @@
+from concurrent.futures import ThreadPoolExecutor
+
+from benchmarks.synthetic import FakeDrive, make_tree
+from src.agent.prefetch import ListingPrefetcher
+
+
+def test_prefetched_listing_is_reused():
+    tree = make_tree(depth=2, branching=3, files_per_folder=2, seed=1)
+    drive = FakeDrive(tree)
+    prefetcher = ListingPrefetcher(drive)
+    folder_ids = [i["id"] for i in tree["items"]["root"] if "folder" in i]
+
+    prefetcher.prefetch(folder_ids[:2])
+    assert prefetcher.get(folder_ids[0]) == tree["items"][folder_ids[0]]
+    assert prefetcher.get(folder_ids[2]) == tree["items"][folder_ids[2]]
+    assert (prefetcher.hits, prefetcher.misses) == (1, 1)
+
+
+def test_cancel_except_drops_unused_prefetches():
+    tree = make_tree(depth=2, branching=3, files_per_folder=2, seed=1)
+    drive = FakeDrive(tree, latency=0.05)
+    prefetcher = ListingPrefetcher(drive)
+    folder_ids = [i["id"] for i in tree["items"]["root"] if "folder" in i]
+
+    prefetcher.prefetch(folder_ids)
+    prefetcher.cancel_except(folder_ids[1])
+    assert prefetcher.get(folder_ids[1]) == tree["items"][folder_ids[1]]
+    assert prefetcher.hits == 1
+    # Dropped listings are fetched directly if needed after all.
+    assert prefetcher.get(folder_ids[0]) == tree["items"][folder_ids[0]]
+    assert prefetcher.misses == 1
+    prefetcher.close()
+
+
+def test_prefetch_costs_one_request_per_folder():
+    tree = make_tree(depth=2, branching=3, files_per_folder=4, seed=1)
+    drive = FakeDrive(tree)
+    pool = ThreadPoolExecutor(max_workers=2)
+    prefetcher = ListingPrefetcher(drive, pool=pool, page_size=2)
+    folder_ids = [i["id"] for i in tree["items"]["root"] if "folder" in i]
+
+    prefetcher.prefetch(folder_ids)
+    pool.shutdown(wait=True)
+    assert drive.calls == len(folder_ids)
+
+    # Only the folder actually entered pages through the rest of its listing.
+    assert prefetcher.get(folder_ids[0]) == tree["items"][folder_ids[0]]
+    assert drive.calls == len(folder_ids) + 3
+    assert prefetcher.hits == 1
@@ -0,0 +1,45 @@
+from src.agent.navigator import Candidate
+from src.agent.prerank import exact_match, rank_candidates
+
+
+def make(name, folder=False, path="/Documents"):
+    return Candidate(
+        id=name,
+        name=name,
+        type="folder" if folder else "file",
+        mime_type=None if folder else "application/pdf",
+        parent_reference_path=path,
+    )
+
+
+def test_exact_file_name_is_selected():
+    items = [make("test", folder=True), make("Q3_Report.PDF"), make("notes.txt")]
+    assert exact_match("open q3 report.pdf please", items).name == "Q3_Report.PDF"
+
+
+def test_named_folder_is_entered_when_no_file_matches():
+    items = [make("Work", folder=True), make("test", folder=True), make("todo.md")]
+    query = "find my test.txt, which is within the test folder not in root"
+    assert exact_match(query, items).name == "test"
+
+
+def test_ambiguous_or_absent_names_defer_to_llm():
+    items = [make("a.txt"), make("b.txt")]
+    assert exact_match("compare a.txt and b.txt", items) is None
+    assert exact_match("my tax return", items) is None
+
+
+def test_short_or_partial_names_are_not_exact_hits():
+    items = [make("a.txt"), make("it.pdf"), make("notes", folder=True), make("report.pdf")]
+    assert exact_match("find a txt file about budgets", items) is None
+    assert exact_match("is it pdf or docx", items) is None
+    assert exact_match("open the meeting notes folder", items) is None
+    assert exact_match("reports on pdf export", items) is None
+    assert exact_match("open the notes folder", items).name == "notes"
+    assert exact_match("folder notes, please", items).name == "notes"
+
+
+def test_rank_prefers_name_matches_with_fuzzy_terms():
+    items = [make("holiday.jpg"), make("Resumes", folder=True), make("smruti_resume.pdf"), make("budget.xlsx")]
+    ranked = [c.name for _, c in rank_candidates("smruti resume in pdf", items)]
+    assert ranked[:2] == ["smruti_resume.pdf", "Resumes"]
@@ -0,0 +1,110 @@
+import threading
+import time
+import tracemalloc
+
+import pytest
+from fastapi.testclient import TestClient
+
+import src.main as main
+from src.utils.profiling import SlowRequestCapture, StackSampler, tracemalloc_top
+
+
+def busy_loop(stop):
+    while not stop.is_set():
+        sum(range(1000))
+
+
+def test_sampler_folds_stacks_of_busy_threads():
+    stop = threading.Event()
+    worker = threading.Thread(target=busy_loop, args=(stop,), name="busy")
+    worker.start()
+    sampler = StackSampler(interval=0.002)
+    try:
+        sampler.start(duration=0.3)
+        sampler.wait()
+    finally:
+        stop.set()
+        worker.join()
+
+    stacks = dict(line.rsplit(" ", 1) for line in sampler.collapsed().splitlines())
+    busy = [s for s in stacks if s.startswith("busy;")]
+    assert busy and all("test_profiling.py:busy_loop" in s for s in busy)
+    assert not sampler.running and sampler.samples > 0
+
+
+def test_tracemalloc_top_reports_only_while_tracing():
+    assert tracemalloc_top() == {"tracing": False, "top": []}
+    tracemalloc.start(5)
+    try:
+        blob = [bytearray(1024) for _ in range(2000)]
+        report = tracemalloc_top(limit=5)
+    finally:
+        tracemalloc.stop()
+    assert report["tracing"] and report["frames"] == 5
+    assert any("test_profiling.py" in t["where"][0] for t in report["top"])
+    del blob
+
+
+def test_slow_request_capture_keeps_stacks_of_slow_requests():
+    capture = SlowRequestCapture(threshold_ms=50, interval=0.002, window=5)
+    try:
+        start = time.monotonic()
+        time.sleep(0.1)
+        capture.finish("GET", "/slow", 200, start, time.monotonic())
+        capture.finish("GET", "/fast", 200, time.monotonic(), time.monotonic())
+        [entry] = capture.summary()
+        assert entry["path"] == "/slow" and "stacks" not in entry
+        assert "test_profiling.py:test_slow_request_capture" in capture.get(entry["id"])["stacks"]
+    finally:
+        capture.configure(0)
+    assert capture.sampler is None and not capture.enabled
+
+
+@pytest.fixture
+def admin(monkeypatch):
+    monkeypatch.setattr(main.settings, "ADMIN_TOKEN", "secret")
+    yield TestClient(main.app), {"X-Admin-Token": "secret"}
+    main.slow_requests.configure(0)
+
+
+def test_admin_endpoints_are_hidden_without_a_token(monkeypatch):
+    monkeypatch.setattr(main.settings, "ADMIN_TOKEN", None)
+    client = TestClient(main.app)
+    assert client.get("/admin/profiler", headers={"X-Admin-Token": "x"}).status_code == 404
+    monkeypatch.setattr(main.settings, "ADMIN_TOKEN", "secret")
+    assert client.get("/admin/profiler", headers={"X-Admin-Token": "x"}).status_code == 403
+    assert client.get("/admin/profiler").status_code == 403
+
+
+def test_concurrent_profiler_starts_conflict(admin):
+    client, headers = admin
+    barrier = threading.Barrier(8)
+    codes = []
+
+    def start():
+        barrier.wait()
+        codes.append(client.post("/admin/profiler/start", params={"seconds": 0.3}, headers=headers).status_code)
+
+    threads = [threading.Thread(target=start) for _ in range(8)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    main.profiler.stop()
+    assert sorted(codes) == [200] + [409] * 7
+
+
+def test_admin_profile_and_slow_request_toggle(admin):
+    client, headers = admin
+    resp = client.get("/admin/profile", params={"seconds": 0.2, "interval_ms": 2}, headers=headers)
+    assert resp.status_code == 200 and resp.headers["content-type"].startswith("text/plain")
+
+    assert client.post("/admin/slow-requests", params={"threshold_ms": 1}, headers=headers).json() == {"threshold_ms": 1}
+    client.get("/admin/profile", params={"seconds": 0.05}, headers=headers)
+    captures = client.get("/admin/slow-requests", headers=headers).json()["captures"]
+    assert captures and captures[-1]["path"] == "/admin/profile"
+    assert client.get(f"/admin/slow-requests/{captures[-1]['id']}", headers=headers).status_code == 200
+    assert client.get("/admin/slow-requests/999999", headers=headers).status_code == 404
+
+    client.post("/admin/slow-requests", params={"threshold_ms": 0}, headers=headers)
+    assert main.slow_requests.sampler is None
@@ -0,0 +1,48 @@
+from benchmarks.replay import (
+    Cassette, RecordingGraph, RecordingRuntime, ReplayGraph, ReplayRuntime, load_graph, run_query,
+    succeeded, synthetic_queries,
+)
+from src.agent.navigator import Decision
+
+
+def record_one(tmp_path, graph_kind="walk"):
+    graph, state_cls = load_graph(graph_kind)
+    query, drive, runtime = synthetic_queries(2, seed=7)[1]
+    cassette = Cassette(query, graph_kind)
+    final, _ = run_query(graph, state_cls, query, RecordingGraph(drive, cassette), RecordingRuntime(runtime, cassette))
+    cassette.save(tmp_path / "q.json")
+    return graph, state_cls, final, Cassette.load(tmp_path / "q.json")
+
+
+def test_replay_reproduces_the_recorded_run_without_live_services(tmp_path):
+    graph, state_cls, recorded, cassette = record_one(tmp_path)
+    client, runtime = ReplayGraph(cassette), ReplayRuntime(cassette)
+
+    final, _ = run_query(graph, state_cls, cassette.query, client, runtime)
+
+    assert final["current_file"].id == recorded["current_file"].id
+    assert final["decision_trace"] == recorded["decision_trace"]
+    assert succeeded(final, cassette.query) == succeeded(recorded, cassette.query)
+    assert client.misses == runtime.misses == runtime.fallbacks == 0
+    assert runtime.calls == len(cassette.llm_calls) and runtime.prompt_tokens > 0
+
+
+def test_replay_keeps_going_when_a_prompt_changes(tmp_path):
+    _, _, _, cassette = record_one(tmp_path)
+    runtime = ReplayRuntime(cassette)
+    first = next(c for c in cassette.llm_calls if c["tool"] == "Decision")
+
+    result = runtime.extractor(Decision).invoke("a reworded prompt the recording never saw")
+
+    assert result["responses"][0].model_dump() == first["response"]
+    assert runtime.fallbacks == 1 and runtime.misses == 0
+
+
+def test_beam_cassettes_replay_bytes_and_parallel_listings(tmp_path):
+    graph, state_cls, recorded, cassette = record_one(tmp_path, "beam")
+    assert any("__bytes__" in str(v)[:20] for v in cassette.graph_calls.values())
+    client = ReplayGraph(cassette)
+
+    final, _ = run_query(graph, state_cls, cassette.query, client, ReplayRuntime(cassette))
+
+    assert final["current_file"].id == recorded["current_file"].id and client.misses == 0
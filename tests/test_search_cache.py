@@ -0,0 +1,58 @@
+import threading
+import time
+from src.utils.search_cache import SearchCache
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def test_near_identical_queries_share_a_key():
+    a = SearchCache.make_key("  Smruti   RESUME ", region="apac", fields=["webUrl", "name"])
+    b = SearchCache.make_key("smruti resume", region="APAC", fields=["name", "webUrl"])
+    assert a == b
+    assert a != SearchCache.make_key("smruti resume", region="APAC", offset=25)
+
+
+def test_ttl_and_negative_ttl():
+    clock = FakeClock()
+    cache = SearchCache(ttl=100, negative_ttl=10, clock=clock)
+    cache.put("hit", [{"id": "1"}])
+    cache.put("empty", [])
+    clock.now = 50
+    assert cache.get("hit") == (True, [{"id": "1"}])
+    assert cache.get("empty") == (False, None)
+    clock.now = 101
+    assert cache.get("hit") == (False, None)
+
+
+def test_concurrent_misses_are_coalesced():
+    cache = SearchCache()
+    calls = []
+
+    def fetch():
+        calls.append(1)
+        time.sleep(0.05)
+        return [{"id": "1"}]
+
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(cache.get_or_fetch("k", fetch))) for _ in range(8)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert len(calls) == 1
+    assert results == [[{"id": "1"}]] * 8
+
+
+def test_apply_delta_drops_affected_and_negative_entries():
+    cache = SearchCache()
+    cache.put("a", [{"id": "1"}])
+    cache.put("b", [{"resource": {"id": "2"}}])
+    cache.put("empty", [])
+    assert cache.apply_delta([{"id": "2"}]) == 2
+    assert cache.get("a")[0] and not cache.get("b")[0] and not cache.get("empty")[0]
@@ -0,0 +1,79 @@
+from src.index.lexical import LocalIndex
+from src.index.semantic import HashingEmbedder, VectorIndex, chunk_markdown
+
+
+def test_chunk_markdown_respects_limit_and_headings():
+    text = "# Title\nintro\n\n## Part\n" + "word " * 500
+    chunks = chunk_markdown(text, max_chars=300, overlap=50)
+    assert chunks[0].startswith("# Title")
+    assert all(len(c) <= 300 for c in chunks)
+    assert chunk_markdown("   ") == []
+
+
+def test_hashing_embedder_is_deterministic():
+    a, b = HashingEmbedder(64), HashingEmbedder(64)
+    assert a.embed_query("quarterly report") == b.embed_documents(["quarterly report"])[0]
+
+
+def test_semantic_search_dedups_by_item_and_persists(tmp_path):
+    index = VectorIndex(str(tmp_path), HashingEmbedder(128))
+    index.add_document("cv", "Smruti resume\n\ndata engineer experience", name="cv.pdf", path="/Work/cv.pdf")
+    index.add_document("tax", "income tax return 2024\n\ndeductions", name="tax.pdf", path="/Personal/tax.pdf")
+    hits = index.semantic_search("smruti resume", k=2)
+    assert hits[0]["id"] == "cv"
+    assert len({h["id"] for h in hits}) == len(hits)
+
+    index.remove("cv")
+    index.flush()
+    reopened = VectorIndex(str(tmp_path), HashingEmbedder(128))
+    assert [h["id"] for h in reopened.semantic_search("smruti resume", k=2)] == ["tax"]
+
+
+def test_ivf_search_finds_exact_document(tmp_path):
+    index = VectorIndex(str(tmp_path), HashingEmbedder(128), ivf_threshold=50, nprobe=4)
+    for i in range(200):
+        index.add_document(f"doc{i}", f"document number {i} topic{i % 17} keyword{i}")
+    hits = index.semantic_search("document number 123 topic4 keyword123", k=3)
+    assert hits[0]["id"] == "doc123"
+
+
+def test_update_from_local_index_only_embeds_changes(tmp_path):
+    local = LocalIndex()
+    item = {"id": "a", "name": "a.txt", "cTag": "v1", "file": {"mimeType": "text/plain"},
+            "parentReference": {"path": "/drive/root:/x"}}
+    local.upsert(item, "alpha beta")
+    index = VectorIndex(str(tmp_path), HashingEmbedder(64))
+    assert index.update_from(local) == {"embedded": 1, "removed": 0}
+    assert index.update_from(local) == {"embedded": 0, "removed": 0}
+    local.remove("a")
+    assert index.update_from(local) == {"embedded": 0, "removed": 1}
+
+
+def test_changed_embedder_starts_the_index_over(tmp_path):
+    local = LocalIndex()
+    local.upsert({"id": "a", "name": "a.txt", "cTag": "v1", "parentReference": {"path": "/drive/root:/x"}}, "alpha beta")
+    VectorIndex(str(tmp_path), HashingEmbedder(64)).update_from(local)
+
+    reopened = VectorIndex(str(tmp_path), HashingEmbedder(128))
+    assert reopened.semantic_search("alpha", k=1) == []
+    assert reopened.update_from(local) == {"embedded": 1, "removed": 0}
+    assert reopened.semantic_search("alpha", k=1)[0]["id"] == "a"
+    assert VectorIndex(str(tmp_path), HashingEmbedder(128)).needs_update("a", "v1") is False
+
+
+def test_compact_reclaims_removed_rows(tmp_path):
+    index = VectorIndex(str(tmp_path), HashingEmbedder(64), compact_ratio=1.0)
+    for i in range(30):
+        index.add_document(f"doc{i}", f"document {i} keyword{i}")
+    for i in range(0, 30, 2):
+        index.remove(f"doc{i}")
+    index.add_document("doc1", "document 1 keyword1 revised")
+    assert index.dead_ratio() > 0.5
+
+    assert index.compact() == 16
+    assert index.dead_ratio() == 0.0
+    assert index.semantic_search("document 7 keyword7", k=1)[0]["id"] == "doc7"
+    assert index.semantic_search("keyword1 revised", k=1)[0]["chunks"] == ["document 1 keyword1 revised"]
+    index.flush()
+    reopened = VectorIndex(str(tmp_path), HashingEmbedder(64))
+    assert reopened.semantic_search("document 25 keyword25", k=1)[0]["id"] == "doc25"
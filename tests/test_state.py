@@ -0,0 +1,25 @@
+from benchmarks.synthetic import FakeDrive, ScriptedRuntime, deepest_files, make_tree, noisy_oracle
+from src.agent.navigator import AgentState, add_unique, build_agent_graph
+
+
+def test_add_unique_keeps_first_visit_order():
+    assert add_unique(["root", "a"], ["b", "a", "b", "c"]) == ["root", "a", "b", "c"]
+
+
+def test_nodes_append_to_state_and_payloads_stay_out_of_it():
+    tree = make_tree(depth=3, branching=4, files_per_folder=5, seed=4)
+    target = deepest_files(tree)[0]
+    runtime = ScriptedRuntime(noisy_oracle(tree, target, error_rate=0.0))
+    query = "find the " + target["name"].rsplit(".", 1)[0].replace("_", " ")
+
+    final = build_agent_graph().invoke(
+        AgentState(user_query=query, max_attempts=5),
+        config={"configurable": {"graph_client": FakeDrive(tree), "runtime": runtime}},
+    )
+
+    assert final["current_file"].id == target["id"]
+    # One trace entry per decision, one visit per listed folder.
+    assert len(final["decision_trace"]) == 4
+    assert final["visited_items"][0] == "root"
+    assert len(final["visited_items"]) == len(set(final["visited_items"])) == 4
+    assert "raw" not in final["candidates"][0].model_dump()
@@ -0,0 +1,147 @@
+import asyncio
+from types import SimpleNamespace
+
+from fastapi.testclient import TestClient
+
+import src.main as main
+from benchmarks.synthetic import FakeDrive, ScriptedRuntime, deepest_files, make_tree, noisy_oracle
+from src.agent.navigator import AgentState, build_agent_graph
+from src.agent.runtime import InstrumentedExtractor
+from src.utils import telemetry
+from src.utils.telemetry import Counter, Histogram, graph_route, record_graph_response, timed
+
+
+def test_histogram_and_counter_render_prometheus_text():
+    hist = Histogram("test_render_seconds", "test", ["op"], buckets=(0.1, 1))
+    hist.observe(0.05, op="a")
+    hist.observe(0.5, op="a")
+    hist.observe(5, op="a")
+    count = Counter("test_render_total", "test", ["op"])
+    count.inc(op='say "hi"')
+
+    text = telemetry.render_metrics()
+    assert '# TYPE test_render_seconds histogram' in text
+    assert 'test_render_seconds_bucket{op="a",le="0.1"} 1' in text
+    assert 'test_render_seconds_bucket{op="a",le="1"} 2' in text
+    assert 'test_render_seconds_bucket{op="a",le="+Inf"} 3' in text
+    assert 'test_render_seconds_sum{op="a"} 5.55' in text
+    assert 'test_render_seconds_count{op="a"} 3' in text
+    assert 'test_render_total{op="say \\"hi\\""} 1' in text
+
+
+def test_disabled_instrumentation_is_a_shared_noop():
+    hist = Histogram("test_disabled_seconds", "test")
+    telemetry.configure(metrics=False, tracing=False)
+    try:
+        assert timed(hist, "span") is timed(hist, "other")
+        with timed(hist, "span"):
+            pass
+        hist.observe(1)
+    finally:
+        telemetry.configure(metrics=True)
+    assert hist.count() == 0
+
+
+def test_graph_routes_hide_ids_and_paths():
+    assert graph_route("https://graph.microsoft.com/v1.0/me/drive/items/ABC!12/children?$top=5") \
+        == "/v1.0/me/drive/items/{id}/children"
+    assert graph_route("https://graph.microsoft.com/v1.0/me/drive/root:/Reports/q1.pdf:/createUploadSession") \
+        == "/v1.0/me/drive/root:{path}:/createUploadSession"
+    assert graph_route("https://contoso.sharepoint.com/_layouts/15/download.aspx?UniqueId=x") == "download_or_upload_url"
+
+
+def test_response_hook_counts_status_throttles_and_bytes():
+    route = "/v1.0/me/drive/items/{id}"
+    throttled = telemetry.GRAPH_THROTTLED.value(route=route)
+    for status in (200, 429):
+        record_graph_response(SimpleNamespace(
+            url="https://graph.microsoft.com/v1.0/me/drive/items/X!1",
+            status_code=status,
+            elapsed=SimpleNamespace(total_seconds=lambda: 0.02),
+            headers={"Content-Length": "1500"},
+        ))
+    assert telemetry.GRAPH_REQUESTS.value(route=route, status=429) >= 1
+    assert telemetry.GRAPH_THROTTLED.value(route=route) == throttled + 1
+    assert telemetry.GRAPH_BYTES.value(route=route) >= 3000
+
+
+class _Extractor:
+    def __init__(self, cached=False):
+        self.cached = cached
+
+    def invoke(self, input, config=None, **kwargs):
+        usage = {"input_tokens": 120, "output_tokens": 30}
+        result = {"responses": [], "messages": [SimpleNamespace(usage_metadata=usage)]}
+        if self.cached:
+            result.update(messages=[], cached=True)
+        return result
+
+
+def test_llm_calls_record_latency_and_tokens_unless_cached():
+    before = telemetry.LLM_TOKENS.value(tool="TestTool", kind="input")
+    InstrumentedExtractor(_Extractor(), "TestTool").invoke("prompt")
+    InstrumentedExtractor(_Extractor(cached=True), "TestTool").invoke("prompt")
+
+    assert telemetry.LLM_TOKENS.value(tool="TestTool", kind="input") == before + 120
+    assert telemetry.LLM_CALL_SECONDS.count(tool="TestTool", cached="false") >= 1
+    assert telemetry.LLM_CALL_SECONDS.count(tool="TestTool", cached="true") >= 1
+
+
+def test_agent_nodes_are_timed_and_still_receive_config():
+    tree = make_tree(depth=3, branching=4, files_per_folder=5, seed=4)
+    target = deepest_files(tree)[0]
+    runtime = ScriptedRuntime(noisy_oracle(tree, target, error_rate=0.0))
+    config = {"configurable": {"graph_client": FakeDrive(tree), "runtime": runtime}}
+    before = telemetry.AGENT_NODE_SECONDS.count(node="list_children")
+    query = "find the " + target["name"].rsplit(".", 1)[0].replace("_", " ")
+
+    final = asyncio.run(build_agent_graph().ainvoke(AgentState(user_query=query, max_attempts=5), config))
+
+    assert final["verified"] and final["current_file"].id == target["id"]
+    assert telemetry.AGENT_NODE_SECONDS.count(node="list_children") == before + 4
+
+
+def test_metrics_endpoint_reports_requests_by_route_template():
+    client = TestClient(main.app)
+    client.get("/agent/jobs/no-such-job")
+    body = client.get("/metrics").text
+
+    assert 'http_request_seconds_count{method="GET",route="/agent/jobs/{job_id}",status="404"}' in body
+    assert "# TYPE agent_queue gauge" in body
+    assert 'conversion_cache{result="hits"}' in body
+
+
+def test_request_spans_are_named_by_route_template(monkeypatch):
+    names = []
+
+    class Span:
+        def __init__(self, name):
+            names.append(name)
+
+        def update_name(self, name):
+            names[-1] = name
+
+        def set_attribute(self, key, value):
+            pass
+
+    class SpanContext:
+        def __init__(self, name):
+            self.name = name
+
+        def __enter__(self):
+            return Span(self.name)
+
+        def __exit__(self, *exc):
+            return False
+
+    class Tracer:
+        def start_as_current_span(self, name):
+            return SpanContext(name)
+
+    monkeypatch.setattr(telemetry, "tracing_enabled", True)
+    monkeypatch.setattr(telemetry, "otel_trace", SimpleNamespace(get_tracer=lambda name: Tracer()), raising=False)
+    with TestClient(main.app) as client:
+        client.get("/agent/jobs/abc123")
+        client.get("/agent/jobs/def456")
+        client.get("/no/such/route")
+    assert names == ["GET /agent/jobs/{job_id}", "GET /agent/jobs/{job_id}", "GET unmatched"]
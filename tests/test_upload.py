@@ -0,0 +1,230 @@
+import os
+import re
+import socket
+import threading
+import time
+import zlib
+
+import httpx
+import pytest
+import requests
+import uvicorn
+from fastapi.testclient import TestClient
+
+import src.main as main
+from src.clients.oneDriveHelper import UPLOAD_CHUNK_ALIGN, GraphClient, UploadSession
+
+MIB = 2**20
+
+
+class FakeResponse:
+    def __init__(self, status_code, payload, headers=None):
+        self.status_code = status_code
+        self._payload = payload
+        self.headers = headers or {}
+
+    def raise_for_status(self):
+        if self.status_code >= 400:
+            raise requests.HTTPError(f"{self.status_code}", response=self)
+
+    def json(self):
+        return self._payload
+
+
+class StubGraph:
+    """
+    Graph upload-session stub: checks every Content-Range against what it has
+    received, keeps only a CRC of the bytes, and answers 201 with a driveItem
+    after the last range.
+    """
+    def __init__(self):
+        self.received = 0
+        self.crc = 0
+        self.chunk_sizes = []
+        self.sessions = []
+        self.cancelled = 0
+
+    def post(self, url, json=None, timeout=None):
+        self.sessions.append((url, json))
+        return FakeResponse(200, {"uploadUrl": "https://upload/session/1"})
+
+    def put(self, url, data=None, headers=None, timeout=None):
+        start, end, total = map(int, re.match(r"bytes (\d+)-(\d+)/(\d+)", headers["Content-Range"]).groups())
+        assert start == self.received and end - start + 1 == len(data) == int(headers["Content-Length"])
+        self.received += len(data)
+        self.crc = zlib.crc32(data, self.crc)
+        self.chunk_sizes.append(len(data))
+        if self.received == total:
+            return FakeResponse(201, {"id": "NEW!1", "name": "big.bin", "size": total})
+        return FakeResponse(202, {"nextExpectedRanges": [f"{self.received}-"]})
+
+    def delete(self, url, timeout=None):
+        self.cancelled += 1
+
+
+def stub_client(stub):
+    client = GraphClient("token")
+    client.session = stub
+    client.transfer_session = stub
+    return client
+
+
+def test_upload_session_sends_aligned_contiguous_chunks():
+    stub = StubGraph()
+    data = os.urandom(3 * UPLOAD_CHUNK_ALIGN + 12345)
+    progress = []
+    session = UploadSession(stub_client(stub), "https://upload/session/1", len(data), chunk_size=UPLOAD_CHUNK_ALIGN + 1,
+                            on_progress=lambda done, total: progress.append(done))
+    for i in range(0, len(data), 70_000):
+        if session.feed(data[i:i + 70_000]):
+            session.flush()
+    item = session.flush(final=True)
+
+    assert item["id"] == "NEW!1"
+    assert stub.chunk_sizes == [UPLOAD_CHUNK_ALIGN] * 3 + [12345]
+    assert stub.crc == zlib.crc32(data)
+    assert progress[-1] == len(data)
+
+
+def test_upload_session_rejects_a_body_of_the_wrong_length():
+    session = UploadSession(stub_client(StubGraph()), "https://upload/session/1", 10)
+    with pytest.raises(ValueError):
+        session.feed(b"x" * 11)
+    session.feed(b"x" * 5)
+    with pytest.raises(ValueError):
+        session.flush(final=True)
+
+
+class ScriptedPuts:
+    """Answers upload PUTs with the given statuses in turn."""
+    def __init__(self, *statuses):
+        self.statuses = list(statuses)
+        self.calls = 0
+
+    def put(self, url, data=None, headers=None, timeout=None):
+        self.calls += 1
+        status = self.statuses.pop(0)
+        return FakeResponse(status, {"id": "NEW!1"} if status < 300 else {}, {"Retry-After": "0"})
+
+
+def test_upload_chunk_retries_only_transient_failures():
+    client = GraphClient("token")
+    client.transfer_session = ScriptedPuts(503, 429, 201)
+    assert client.upload_chunk("https://upload/session/1", b"x", 0, 1)["id"] == "NEW!1"
+    assert client.transfer_session.calls == 3
+
+    for status in (404, 413, 416):
+        client.transfer_session = ScriptedPuts(status, 201)
+        assert client.upload_chunk("https://upload/session/1", b"x", 0, 1) is None
+        assert client.transfer_session.calls == 1
+
+
+class SimpleUploads:
+    def __init__(self, status=201):
+        self.status = status
+        self.puts = []
+        self.headers = {"Authorization": "Bearer token"}
+
+    def put(self, url, params=None, headers=None, data=None, timeout=None):
+        self.puts.append((url, params))
+        if self.status >= 400:
+            return FakeResponse(self.status, {"error": {"code": "nameAlreadyExists", "message": "name exists"}})
+        return FakeResponse(201, {"id": "EMPTY!1", "size": 0})
+
+
+def test_empty_upload_keeps_conflict_behaviour_and_tracking(monkeypatch):
+    stub = SimpleUploads()
+    monkeypatch.setattr(main, "graph", lambda: stub_client(stub))
+    with TestClient(main.app) as client:
+        done = client.put("/drive/upload", params={"path": "/a/empty.txt", "conflict": "fail", "upload_id": "e1"}, content=b"")
+        progress = client.get("/drive/uploads/e1").json()
+        stub.status = 409
+        conflict = client.put("/drive/upload", params={"path": "/a/empty.txt", "upload_id": "e2"}, content=b"")
+        conflict_progress = client.get("/drive/uploads/e2").json()
+        stub.status = 503
+        failed = client.put("/drive/upload", params={"path": "/a/empty.txt"}, content=b"")
+
+    assert done.status_code == 200 and done.json()["upload_id"] == "e1"
+    assert stub.puts[0][1] == {"@microsoft.graph.conflictBehavior": "fail"}
+    assert progress["status"] == "done"
+    assert conflict.status_code == 409 and conflict.json()["detail"] == "name exists"
+    assert conflict_progress["status"] == "failed"
+    assert failed.status_code == 502
+
+
+class SessionStatus(StubGraph):
+    def __init__(self, status):
+        super().__init__()
+        self.status = status
+
+    def post(self, url, json=None, timeout=None):
+        return FakeResponse(self.status, {"error": {"code": "invalidRequest", "message": f"graph said {self.status}"}})
+
+
+@pytest.mark.parametrize("graph_status, expected", [(409, 409), (400, 400), (401, 502), (429, 502), (500, 502)])
+def test_upload_session_rejections_pass_through(monkeypatch, graph_status, expected):
+    monkeypatch.setattr(main, "graph", lambda: stub_client(SessionStatus(graph_status)))
+    with TestClient(main.app) as client:
+        resp = client.put("/drive/upload", params={"path": "/a/big.bin", "conflict": "fail"}, content=b"x" * 10)
+    assert resp.status_code == expected
+
+
+def rss_bytes() -> int:
+    with open("/proc/self/status") as f:
+        return int(next(line for line in f if line.startswith("VmRSS")).split()[1]) * 1024
+
+
+@pytest.mark.skipif(not os.path.exists("/proc/self/status"), reason="RSS sampling needs /proc")
+def test_one_gib_upload_streams_with_bounded_memory(monkeypatch):
+    stub = StubGraph()
+    monkeypatch.setattr(main, "graph", lambda: stub_client(stub))
+
+    sock = socket.socket()
+    sock.bind(("127.0.0.1", 0))
+    port = sock.getsockname()[1]
+    server = uvicorn.Server(uvicorn.Config(main.app, log_level="warning"))
+    thread = threading.Thread(target=server.run, kwargs={"sockets": [sock]}, daemon=True)
+    thread.start()
+    while not server.started:
+        time.sleep(0.01)
+
+    total = 1024 * MIB
+    piece = os.urandom(MIB)
+    baseline = rss_bytes()
+    peak = [baseline]
+    done = threading.Event()
+
+    def sample():
+        while not done.is_set():
+            peak[0] = max(peak[0], rss_bytes())
+            time.sleep(0.02)
+
+    sampler = threading.Thread(target=sample, daemon=True)
+    sampler.start()
+    try:
+        response = httpx.put(
+            f"http://127.0.0.1:{port}/drive/upload",
+            params={"path": "/backups/big.bin", "conflict": "rename", "upload_id": "u1"},
+            content=(piece for _ in range(total // MIB)),
+            headers={"Content-Length": str(total)},
+            timeout=120,
+        )
+        progress = httpx.get(f"http://127.0.0.1:{port}/drive/uploads/u1").json()
+    finally:
+        done.set()
+        sampler.join()
+        server.should_exit = True
+        thread.join()
+
+    assert response.status_code == 200, response.text
+    assert response.json()["id"] == "NEW!1"
+    assert progress["status"] == "done" and progress["uploaded"] == total
+    assert stub.received == total
+    expected_crc = 0
+    for _ in range(total // MIB):
+        expected_crc = zlib.crc32(piece, expected_crc)
+    assert stub.crc == expected_crc
+    assert stub.sessions[0][1] == {"item": {"@microsoft.graph.conflictBehavior": "rename"}}
+    assert set(stub.chunk_sizes[:-1]) == {main.settings.UPLOAD_CHUNK_SIZE}
+    # Memory grows by a couple of chunks and socket buffers, never by the body size.
+    assert peak[0] - baseline < 64 * MIB, f"RSS grew by {(peak[0] - baseline) / MIB:.0f} MiB"
@@ -0,0 +1,50 @@
+from benchmarks.synthetic import FakeDrive, ScriptedRuntime, make_tree
+from src.agent.navigator import AgentState, Decision, FileRelevance, build_agent_graph
+
+
+def test_sibling_files_are_verified_when_the_pick_is_wrong():
+    tree = make_tree(depth=0, files_per_folder=6, seed=2)
+    files = tree["items"]["root"]
+    target, wrong = files[0], files[1]
+
+    def script(tool, prompt):
+        if tool is Decision:
+            ref = next(line.split("\t")[0] for line in prompt.splitlines() if f"\t{wrong['name']}\t" in line)
+            return Decision(action="select_file", id=ref, name=wrong["name"], reason="wrong guess")
+        match = target["name"] in prompt.split("File content")[0]
+        return FileRelevance(score=1.0 if match else 0.0, reason="scripted", is_match=match)
+
+    runtime = ScriptedRuntime(script)
+    query = "find the " + target["name"].rsplit(".", 1)[0].replace("_", " ")
+    final = build_agent_graph().invoke(
+        AgentState(user_query=query),
+        config={"configurable": {"graph_client": FakeDrive(tree), "runtime": runtime}},
+    )
+
+    assert final["verified"]
+    assert final["current_file"].id == target["id"]
+    assert [r.file_name for r in final["rejected_paths"]][0] == wrong["name"]
+    assert runtime.calls == 1 + 3
+
+
+def test_siblings_are_not_verified_when_the_pick_is_right():
+    tree = make_tree(depth=0, files_per_folder=6, seed=2)
+    target = tree["items"]["root"][0]
+
+    def script(tool, prompt):
+        if tool is Decision:
+            ref = next(line.split("\t")[0] for line in prompt.splitlines() if f"\t{target['name']}\t" in line)
+            return Decision(action="select_file", id=ref, name=target["name"], reason="right guess")
+        match = target["name"] in prompt.split("File content")[0]
+        return FileRelevance(score=1.0 if match else 0.0, reason="scripted", is_match=match)
+
+    runtime = ScriptedRuntime(script)
+    query = "find the " + target["name"].rsplit(".", 1)[0].replace("_", " ")
+    final = build_agent_graph().invoke(
+        AgentState(user_query=query),
+        config={"configurable": {"graph_client": FakeDrive(tree), "runtime": runtime}},
+    )
+
+    assert final["verified"] and final["current_file"].id == target["id"]
+    assert final["rejected_paths"] == []
+    assert runtime.calls == 1 + 1